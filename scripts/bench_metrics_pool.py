@@ -0,0 +1,90 @@
+"""
+Event loop lag while computing wallet metrics: inline vs MetricsPool.
+
+Usage:
+    python -m scripts.bench_metrics_pool [--wallets N] [--closed N] [--workers N]
+
+Runs the same batch of large synthetic wallets (see bench_wallet_metrics)
+through MetricsPool(workers=0) and MetricsPool(workers=N), a few at a time
+like the discovery workers, while an EventLoopLagMonitor samples the loop.
+Results of the two runs must be identical (exit status 1 otherwise).
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.bench_wallet_metrics import diff, prepare, synthetic_wallet
+from src.realtime.latency import EventLoopLagMonitor
+from src.realtime.metrics_pool import MetricsPool
+
+CONCURRENCY = 5  # WalletDiscoveryProcessor.NUM_WORKERS
+
+
+async def run(pool: MetricsPool, wallets: list[tuple]) -> tuple[list[dict], float, dict]:
+    """Compute every wallet; returns (results, seconds, loop lag summary)."""
+    monitor = EventLoopLagMonitor(interval=0.01)
+    lag_task = asyncio.create_task(monitor.run())
+    slots = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(wallet):
+        async with slots:
+            result = await pool.compute(*wallet)
+            await asyncio.sleep(0)  # discovery awaits I/O between wallets
+            return result
+
+    pool.start()
+    await asyncio.sleep(0.5)  # let the lag monitor settle
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(w) for w in wallets))
+    elapsed = time.perf_counter() - start
+    lag_task.cancel()
+    await asyncio.to_thread(pool.shutdown)
+    return results, elapsed, monitor.stats
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    options = {"--wallets": 12, "--closed": 20_000, "--workers": MetricsPool.WORKERS}
+    for name in options:
+        if name in args:
+            i = args.index(name)
+            options[name] = int(args[i + 1])
+            del args[i:i + 2]
+
+    wallets = []
+    for seed in range(options["--wallets"]):
+        data = synthetic_wallet(options["--closed"], seed=seed)
+        open_positions, closed = prepare(data["positions"], data["closed_positions"])
+        wallets.append((closed, open_positions, data["balance"]))
+
+    inline, inline_s, inline_lag = asyncio.run(run(MetricsPool(workers=0), wallets))
+    pool = MetricsPool(workers=options["--workers"])
+    pooled, pooled_s, pooled_lag = asyncio.run(run(pool, wallets))
+
+    print(f"{options['--wallets']} wallets x {options['--closed']:,} closed positions")
+    print(f"{'mode':>10} {'total':>9} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+    for name, seconds, lag in (
+        ("inline", inline_s, inline_lag),
+        (f"pool x{options['--workers']}", pooled_s, pooled_lag),
+    ):
+        print(
+            f"{name:>10} {seconds:>8.2f}s {lag['p50_ms']:>7.1f}ms "
+            f"{lag['p99_ms']:>7.1f}ms {lag['max_ms']:>7.1f}ms"
+        )
+    print(f"pool stats: {pool.stats}")
+
+    mismatches = [line for a, b in zip(inline, pooled) for line in diff(a, b)]
+    for line in mismatches[:10]:
+        print(f"    {line}")
+    print("parity ok" if not mismatches else "MISMATCH")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
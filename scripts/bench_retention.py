@@ -0,0 +1,183 @@
+"""
+Retention cleanup benchmark: row DELETE vs dropping expired partitions.
+
+Usage:
+    python -m scripts.bench_retention --dsn postgresql://... [--rows-per-day N] [--days D] [--keep-days K]
+
+Builds two copies of a live_trades-shaped table in a scratch schema
+(bench_retention, dropped afterwards), each holding --days days of
+synthetic trades:
+
+- plain: one heap table, cleaned the old way with
+  DELETE ... WHERE executed_at < cutoff RETURNING * (the REST client
+  returned every deleted row to count them)
+- partitioned: daily range partitions on executed_at, cleaned by
+  detaching and dropping partitions older than the cutoff
+
+For each it reports the cleanup duration (the time the old path blocked
+the event loop for), WAL generated and the bytes shipped back to the
+client. The DSN may also come from DATABASE_URL.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+
+SCHEMA = "bench_retention"
+
+COLUMNS = """
+    id BIGSERIAL,
+    trade_id TEXT NOT NULL,
+    trader_address TEXT NOT NULL,
+    condition_id TEXT NOT NULL,
+    side TEXT NOT NULL,
+    usd_value DECIMAL(18,2) NOT NULL,
+    executed_at TIMESTAMPTZ NOT NULL,
+    received_at TIMESTAMPTZ DEFAULT NOW(),
+    is_whale BOOLEAN DEFAULT FALSE,
+    is_insider_suspect BOOLEAN DEFAULT FALSE,
+    trader_red_flags TEXT[],
+    raw_data JSONB
+"""
+
+INDEXES = (
+    "CREATE UNIQUE INDEX ON {table}(trade_id, executed_at)",
+    "CREATE INDEX ON {table}(received_at DESC)",
+    "CREATE INDEX ON {table}(condition_id, received_at DESC)",
+    "CREATE INDEX ON {table}(trader_address, received_at DESC)",
+)
+
+FILL = """
+INSERT INTO {table} (trade_id, trader_address, condition_id, side, usd_value,
+                     executed_at, received_at, is_whale, trader_red_flags, raw_data)
+SELECT
+    'bench_' || g,
+    '0x' || lpad(to_hex(g % 50000), 40, '0'),
+    '0x' || lpad(to_hex(g % 3000), 64, '0'),
+    CASE WHEN g % 2 = 0 THEN 'BUY' ELSE 'SELL' END,
+    50 + g % 5000,
+    $1::timestamptz + (g % $2) * ($3::interval / $2),
+    $1::timestamptz + (g % $2) * ($3::interval / $2),
+    g % 100 = 0,
+    ARRAY['Large trade ($5K+) from new account'],
+    jsonb_build_object('asset', (10::numeric ^ 20 + g)::text, 'price', 0.5, 'pad', repeat('x', 300))
+FROM generate_series($4::bigint, $5::bigint) g
+"""
+
+
+async def wal_lsn(conn: asyncpg.Connection) -> str:
+    return await conn.fetchval("SELECT pg_current_wal_insert_lsn()::text")
+
+
+async def wal_bytes(conn: asyncpg.Connection, since: str) -> int:
+    return int(await conn.fetchval("SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), $1::pg_lsn)", since))
+
+
+async def fill(conn: asyncpg.Connection, table: str, start: datetime, days: int, rows_per_day: int) -> None:
+    total = days * rows_per_day
+    chunk = 200_000
+    for low in range(0, total, chunk):
+        high = min(total, low + chunk) - 1
+        # Spread rows evenly over [start, start + days)
+        await conn.execute(
+            FILL.format(table=table), start, total, timedelta(days=days), low, high
+        )
+    await conn.execute(f"ANALYZE {table}")
+
+
+async def bench_delete(conn: asyncpg.Connection, start: datetime, cutoff: datetime, args) -> dict:
+    table = f"{SCHEMA}.plain"
+    await conn.execute(f"CREATE TABLE {table} ({COLUMNS}, PRIMARY KEY (id, executed_at))")
+    for index in INDEXES:
+        await conn.execute(index.format(table=table))
+    await fill(conn, table, start, args.days, args.rows_per_day)
+
+    lsn = await wal_lsn(conn)
+    started = time.perf_counter()
+    rows = await conn.fetch(f"DELETE FROM {table} WHERE executed_at < $1 RETURNING *", cutoff)
+    elapsed = time.perf_counter() - started
+    returned = sum(len(str(tuple(r))) for r in rows)
+    return {
+        "mode": "delete_returning",
+        "rows_removed": len(rows),
+        "seconds": round(elapsed, 3),
+        "wal_mb": round(await wal_bytes(conn, lsn) / 1e6, 1),
+        "returned_mb": round(returned / 1e6, 1),
+    }
+
+
+async def bench_drop(conn: asyncpg.Connection, start: datetime, cutoff: datetime, args) -> dict:
+    table = f"{SCHEMA}.partitioned"
+    await conn.execute(
+        f"CREATE TABLE {table} ({COLUMNS}, PRIMARY KEY (id, executed_at)) PARTITION BY RANGE (executed_at)"
+    )
+    partitions = []
+    for day in range(args.days + 1):
+        low = start + timedelta(days=day)
+        name = f"{SCHEMA}.partitioned_p{low:%Y%m%d}"
+        await conn.execute(
+            f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{low.isoformat()}') "
+            f"TO ('{(low + timedelta(days=1)).isoformat()}')"
+        )
+        partitions.append((name, low + timedelta(days=1)))
+    for index in INDEXES:
+        await conn.execute(index.format(table=table))
+    await fill(conn, table, start, args.days, args.rows_per_day)
+
+    expired = [name for name, upper in partitions if upper <= cutoff]
+    rows = 0
+    for name in expired:
+        rows += await conn.fetchval(f"SELECT count(*) FROM {name}")
+
+    lsn = await wal_lsn(conn)
+    started = time.perf_counter()
+    for name in expired:
+        await conn.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+        await conn.execute(f"DROP TABLE {name}")
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": "drop_partitions",
+        "rows_removed": rows,
+        "partitions_dropped": len(expired),
+        "seconds": round(elapsed, 3),
+        "wal_mb": round(await wal_bytes(conn, lsn) / 1e6, 1),
+        "returned_mb": 0.0,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--rows-per-day", type=int, default=300_000)
+    parser.add_argument("--days", type=int, default=8)
+    parser.add_argument("--keep-days", type=int, default=7)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("--dsn (or DATABASE_URL) is required")
+
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=args.days - 1)
+    cutoff = today + timedelta(days=1) - timedelta(days=args.keep_days)
+
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+        results = [
+            await bench_delete(conn, start, cutoff, args),
+            await bench_drop(conn, start, cutoff, args),
+        ]
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,155 @@
+"""
+Microbenchmark: tolerant vs layout-compiled RTDS trade parsing.
+
+Usage:
+    python -m scripts.bench_rtds_parser [frames.jsonl] [--repeat N]
+
+frames.jsonl holds one raw RTDS frame per line, exactly as received from
+the websocket. Without a file, synthetic activity/trades frames with the
+production payload layout are generated.
+
+Each parser is timed end to end on the same frames: JSON decode (stdlib
+json for tolerant, orjson when available for compiled) plus trade parsing.
+"""
+
+import json
+import random
+import sys
+import time
+from dataclasses import fields
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.realtime.rtds_client import (
+    RTDSClient,
+    RTDSMessage,
+    PARSER_COMPILED,
+    PARSER_TOLERANT,
+    _json_loads,
+)
+
+
+def synthetic_frames(count: int = 20000) -> list[str]:
+    """Generate frames shaped like production activity/trades messages."""
+    rng = random.Random(42)
+    frames = []
+    base_ts = int(time.time())
+    for i in range(count):
+        payload = {
+            "asset": str(rng.getrandbits(250)),
+            "bio": "",
+            "conditionId": "0x" + "%064x" % rng.getrandbits(256),
+            "eventSlug": f"event-{rng.randint(1, 500)}",
+            "icon": "https://polymarket-upload.s3.us-east-2.amazonaws.com/icon.png",
+            "name": f"trader{rng.randint(1, 10000)}",
+            "outcome": rng.choice(["Yes", "No"]),
+            "outcomeIndex": rng.randint(0, 1),
+            "price": round(rng.uniform(0.01, 0.99), 3),
+            "profileImage": "",
+            "proxyWallet": "0x" + "%040x" % rng.getrandbits(160),
+            "pseudonym": "Some-Pseudonym",
+            "side": rng.choice(["BUY", "SELL"]),
+            "size": round(rng.uniform(1, 5000), 2),
+            "slug": f"market-{rng.randint(1, 2000)}",
+            "timestamp": base_ts + i // 50,
+            "title": "Will something happen?",
+            "transactionHash": "0x" + "%064x" % rng.getrandbits(256),
+        }
+        frames.append(json.dumps({
+            "connection_id": "bench",
+            "payload": payload,
+            "timestamp": (base_ts + i // 50) * 1000,
+            "topic": "activity",
+            "type": "trades",
+        }))
+    return frames
+
+
+def load_frames(path: Path) -> list[str]:
+    """Load recorded frames (one JSON frame per line)."""
+    with open(path) as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def trade_fields(trade: RTDSMessage) -> tuple:
+    """Field values used for parity comparison."""
+    return tuple(
+        getattr(trade, f.name) for f in fields(trade) if f.name != "executed_at"
+    )
+
+
+def run(client: RTDSClient, frames: list, loads) -> tuple[float, int]:
+    """Decode and parse all frames, returning (seconds, trades parsed)."""
+    parse = client._parse
+    parsed = 0
+    start = time.perf_counter()
+    for frame in frames:
+        data = loads(frame)
+        payload = data.get("payload", data)
+        if isinstance(payload, list):
+            for item in payload:
+                if parse(item):
+                    parsed += 1
+        elif parse(payload):
+            parsed += 1
+    return time.perf_counter() - start, parsed
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    repeat = 5
+    if "--repeat" in args:
+        idx = args.index("--repeat")
+        repeat = int(args[idx + 1])
+        del args[idx:idx + 2]
+
+    frames = load_frames(Path(args[0])) if args else synthetic_frames()
+    print(f"Frames: {len(frames):,} ({'recorded' if args else 'synthetic'}), repeat={repeat}")
+
+    tolerant = RTDSClient(on_trade=lambda t: None, parser_mode=PARSER_TOLERANT)
+    compiled = RTDSClient(on_trade=lambda t: None, parser_mode=PARSER_COMPILED)
+
+    # Parity check: both parsers must produce identical trades
+    mismatches = 0
+    for frame in frames:
+        data = json.loads(frame)
+        payload = data.get("payload", data)
+        items = payload if isinstance(payload, list) else [payload]
+        for item in items:
+            a = tolerant._parse_trade(item)
+            b = compiled._parse_trade_compiled(item)
+            if a is None or b is None:
+                mismatches += (a is None) != (b is None)
+                continue
+            # executed_at falls back to now() when missing, so compare the rest
+            if trade_fields(a) != trade_fields(b):
+                mismatches += 1
+    print(f"Parity mismatches: {mismatches}")
+
+    results = {}
+    for name, client, loads in (
+        ("tolerant (json + chained .get)", tolerant, json.loads),
+        ("compiled (fast decoder + key map)", compiled, _json_loads),
+    ):
+        best = float("inf")
+        parsed = 0
+        for _ in range(repeat):
+            elapsed, parsed = run(client, frames, loads)
+            best = min(best, elapsed)
+        results[name] = best
+        per_frame_us = best / len(frames) * 1e6
+        print(f"  {name:<36} {best * 1000:8.1f} ms  {per_frame_us:6.2f} us/frame  ({parsed:,} trades)")
+
+    tolerant_time, compiled_time = results.values()
+    print(f"Speedup: {tolerant_time / compiled_time:.2f}x")
+    print(
+        f"Compiled fast path: {compiled._parse_fast_count:,} hits, "
+        f"{compiled._parse_fallback_count:,} fallbacks"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+live_trades writer benchmark: blocking flushes vs background bulk writes.
+
+Usage:
+    python -m scripts.bench_trade_writer [--trades N] [--write-ms MS] [--in-flight K]
+    python -m scripts.bench_trade_writer --dsn postgresql://... [--trades N]
+    python -m scripts.bench_trade_writer --dsn postgresql://... --check
+
+Without --dsn the in-process MemoryTradeWriter stands in for Postgres with
+--write-ms simulated latency per batch. With --dsn the AsyncpgTradeWriter
+bulk-upserts synthetic rows (trade_id prefix "bench_") into live_trades.
+
+--check runs the AsyncpgTradeWriter SQL against a scratch copy of the
+migration 033 layout (schema bench_trade_writer, dropped afterwards; any
+throwaway Postgres will do, e.g. docker run -e POSTGRES_PASSWORD=x -p
+5432:5432 postgres:16) and verifies the upsert against the composite
+unique index, per-trade_id ordering with several batches in flight, tier
+moves and writes into the DEFAULT partition. Exit status 1 on failure.
+
+The baseline is the previous flush path: one synchronous upsert at a time
+on the event loop (emulated with time.sleep without --dsn, one batch in
+flight with --dsn). Reports throughput and event-loop lag (how late a
+10ms ticker wakes up), which is what RTDS receive and dispatch see while
+batches are written.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.realtime.retention import TIER_IMPORTANT, TIER_REGULAR
+from src.realtime.trade_writer import AsyncpgTradeWriter, MemoryTradeWriter, WriteBatch
+
+BATCH_SIZE = 50
+TICK_SECONDS = 0.01
+SCHEMA = "bench_trade_writer"
+
+
+def synthetic_records(count: int) -> list[dict]:
+    """Records in the TradeProcessor._enrich_trade layout."""
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "trade_id": f"bench_{i:08d}",
+            "tx_hash": f"0x{i:064x}",
+            "trader_address": f"0x{i % 5000:040x}",
+            "trader_username": None,
+            "is_known_trader": False,
+            "trader_classification": None,
+            "trader_insider_score": i % 100,
+            "trader_insider_level": None,
+            "trader_red_flags": ["Large trade ($5K+) from new account"] if i % 7 == 0 else [],
+            "is_insider_suspect": False,
+            "trader_portfolio_value": None,
+            "condition_id": f"0x{i % 300:064x}",
+            "asset_id": str(10**20 + i % 600),
+            "market_slug": f"bench-market-{i % 300}",
+            "market_title": None,
+            "event_slug": f"bench-event-{i % 50}",
+            "category": None,
+            "side": "BUY" if i % 2 else "SELL",
+            "outcome": "Yes",
+            "outcome_index": 0,
+            "size": 100.0 + i % 1000,
+            "price": 0.5,
+            "usd_value": 50.0 + i % 1000 / 2,
+            "executed_at": now,
+            "received_at": now,
+            "processing_latency_ms": 120,
+            "is_whale": False,
+            "retention_tier": "regular",
+        }
+        for i in range(count)
+    ]
+
+
+async def run(writer, records: list[dict], block_seconds: float = 0.0) -> dict:
+    """
+    Submit records in BATCH_SIZE batches while measuring loop lag.
+
+    block_seconds > 0 replaces the writer with a synchronous sleep per batch.
+    """
+    max_lag = 0.0
+    stop = asyncio.Event()
+
+    async def ticker() -> None:
+        nonlocal max_lag
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            max_lag = max(max_lag, time.perf_counter() - started - TICK_SECONDS)
+
+    tick_task = asyncio.create_task(ticker())
+    if not block_seconds:
+        await writer.start()
+
+    started = time.perf_counter()
+    for i in range(0, len(records), BATCH_SIZE):
+        if block_seconds:
+            time.sleep(block_seconds)
+            await asyncio.sleep(0)
+        else:
+            await writer.submit(WriteBatch(records[i:i + BATCH_SIZE]))
+    if not block_seconds:
+        await writer.close()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await tick_task
+    return {
+        "mode": "blocking" if block_seconds else f"in_flight={writer.max_in_flight}",
+        "trades_per_second": round(len(records) / elapsed),
+        "elapsed_seconds": round(elapsed, 2),
+        "max_loop_lag_ms": round(max_lag * 1000, 1),
+        "writer": writer.stats if not block_seconds else None,
+    }
+
+
+def scratch_ddl(now: datetime) -> list[str]:
+    """live_trades as laid out by migration 033, in SCHEMA, with one range partition per tier around now."""
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    ddl = [
+        f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+        f"CREATE SCHEMA {SCHEMA}",
+        f"""
+        CREATE TABLE {SCHEMA}.live_trades (
+            id BIGSERIAL,
+            trade_id TEXT NOT NULL,
+            tx_hash TEXT,
+            trader_address TEXT NOT NULL,
+            trader_username TEXT,
+            is_known_trader BOOLEAN DEFAULT FALSE,
+            trader_classification TEXT,
+            trader_portfolio_value DECIMAL(18,2),
+            condition_id TEXT NOT NULL,
+            asset_id TEXT,
+            market_slug TEXT,
+            market_title TEXT,
+            event_slug TEXT,
+            category TEXT,
+            side TEXT NOT NULL CHECK (side IN ('BUY', 'SELL')),
+            outcome TEXT,
+            outcome_index INT,
+            size DECIMAL(18,6) NOT NULL,
+            price DECIMAL(10,6) NOT NULL,
+            usd_value DECIMAL(18,2) NOT NULL,
+            executed_at TIMESTAMPTZ NOT NULL,
+            received_at TIMESTAMPTZ DEFAULT NOW(),
+            processing_latency_ms INT,
+            is_whale BOOLEAN DEFAULT FALSE,
+            is_watchlist BOOLEAN DEFAULT FALSE,
+            is_insider_suspect BOOLEAN DEFAULT FALSE,
+            trader_insider_score INTEGER,
+            trader_insider_level TEXT,
+            trader_red_flags TEXT[],
+            fill_count INTEGER NOT NULL DEFAULT 1,
+            retention_tier TEXT NOT NULL DEFAULT 'regular'
+                CHECK (retention_tier IN ('regular', 'important')),
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            PRIMARY KEY (id, retention_tier, executed_at)
+        ) PARTITION BY LIST (retention_tier)
+        """,
+        f"CREATE UNIQUE INDEX ON {SCHEMA}.live_trades(trade_id, retention_tier, executed_at)",
+    ]
+    for tier in (TIER_REGULAR, TIER_IMPORTANT):
+        ddl += [
+            f"CREATE TABLE {SCHEMA}.live_trades_{tier} PARTITION OF {SCHEMA}.live_trades "
+            f"FOR VALUES IN ('{tier}') PARTITION BY RANGE (executed_at)",
+            f"CREATE TABLE {SCHEMA}.live_trades_{tier}_default PARTITION OF {SCHEMA}.live_trades_{tier} DEFAULT",
+            f"CREATE TABLE {SCHEMA}.live_trades_{tier}_current PARTITION OF {SCHEMA}.live_trades_{tier} "
+            f"FOR VALUES FROM ('{(day - timedelta(days=1)).isoformat()}') TO ('{(day + timedelta(days=2)).isoformat()}')",
+        ]
+    return ddl
+
+
+class ScratchTradeWriter(AsyncpgTradeWriter):
+    TABLE = f"{SCHEMA}.live_trades"
+
+
+async def check(dsn: str) -> bool:
+    """Run the AsyncpgTradeWriter checks against the scratch schema; True if all pass."""
+    now = datetime.now(timezone.utc)
+    template = synthetic_records(1)[0]
+
+    def record(trade_id: str, usd_value: float, tier: str = TIER_REGULAR, executed_at: datetime = now) -> dict:
+        return {
+            **template,
+            "trade_id": trade_id,
+            "usd_value": usd_value,
+            "retention_tier": tier,
+            "executed_at": executed_at.isoformat(),
+        }
+
+    async def write(*batches: list[dict], max_in_flight: int = 4) -> dict:
+        writer = ScratchTradeWriter(dsn, max_in_flight=max_in_flight)
+        await writer.start()
+        for records in batches:
+            await writer.submit(WriteBatch(records))
+        await writer.close()
+        return writer.stats
+
+    import asyncpg  # only needed with --dsn
+
+    conn = await asyncpg.connect(dsn)
+    results: list[tuple[str, bool, str]] = []
+
+    async def rows(trade_ids: list[str]) -> list:
+        return await conn.fetch(
+            f"SELECT trade_id, retention_tier, usd_value::float8 AS usd_value, "
+            f"tableoid::regclass::text AS partition "
+            f"FROM {SCHEMA}.live_trades WHERE trade_id = ANY($1::text[]) ORDER BY trade_id",
+            trade_ids,
+        )
+
+    try:
+        for statement in scratch_ddl(now):
+            await conn.execute(statement)
+
+        # Upsert: the second write updates the rows in place
+        ids = [f"upsert_{i}" for i in range(200)]
+        stats = await write([record(t, 10) for t in ids], [record(t, 20) for t in ids])
+        found = await rows(ids)
+        ok = not stats["batches_failed"] and len(found) == 200 and all(r["usd_value"] == 20 for r in found)
+        results.append(("upsert", ok, f"{len(found)} rows, failed={stats['batches_failed']}"))
+
+        # Ordering: 20 overlapping batches with 4 in flight; the last version wins
+        hot = [f"hot_{i}" for i in range(10)]
+        batches = [
+            [record(t, version) for t in hot] + [record(f"cold_{version}_{i}", version) for i in range(40)]
+            for version in range(1, 21)
+        ]
+        stats = await write(*batches)
+        found = await rows(hot)
+        ok = not stats["batches_failed"] and len(found) == 10 and all(r["usd_value"] == 20 for r in found)
+        results.append((
+            "ordering", ok,
+            f"values={sorted({r['usd_value'] for r in found})}, ordering_waits={stats['ordering_waits']}, "
+            f"peak_in_flight={stats['peak_in_flight']}",
+        ))
+
+        # Tier moves: regular -> important replaces the row; a later regular
+        # re-delivery updates the important row instead of adding one
+        stats = await write([record("tier", 10)], [record("tier", 20, TIER_IMPORTANT)], [record("tier", 30)])
+        found = await rows(["tier"])
+        ok = (
+            not stats["batches_failed"]
+            and len(found) == 1
+            and found[0]["retention_tier"] == TIER_IMPORTANT
+            and found[0]["usd_value"] == 30
+            and found[0]["partition"] == f"{SCHEMA}.live_trades_{TIER_IMPORTANT}_current"
+        )
+        results.append(("tier_moves", ok, f"{[dict(r) for r in found]}"))
+
+        # Outside every range partition: lands in (and upserts within) DEFAULT
+        old = now - timedelta(days=10)
+        stats = await write([record("old", 10, executed_at=old)], [record("old", 20, executed_at=old)])
+        found = await rows(["old"])
+        ok = (
+            not stats["batches_failed"]
+            and len(found) == 1
+            and found[0]["usd_value"] == 20
+            and found[0]["partition"] == f"{SCHEMA}.live_trades_{TIER_REGULAR}_default"
+        )
+        results.append(("default_partition", ok, f"{[dict(r) for r in found]}"))
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+    for name, ok, detail in results:
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+    return all(ok for _, ok, _ in results)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=5000)
+    parser.add_argument("--write-ms", type=float, default=40, help="simulated write latency (no --dsn)")
+    parser.add_argument("--in-flight", type=int, default=4)
+    parser.add_argument("--dsn", help="Postgres DSN (writes bench_ rows into live_trades)")
+    parser.add_argument("--check", action="store_true", help="verify the writer SQL in a scratch schema (needs --dsn)")
+    args = parser.parse_args()
+
+    if args.check:
+        if not args.dsn:
+            parser.error("--check needs --dsn")
+        sys.exit(0 if await check(args.dsn) else 1)
+
+    records = synthetic_records(args.trades)
+
+    def make_writer(max_in_flight: int):
+        if args.dsn:
+            return AsyncpgTradeWriter(args.dsn, max_in_flight=max_in_flight)
+        return MemoryTradeWriter(latency_seconds=args.write_ms / 1000, max_in_flight=max_in_flight)
+
+    if args.dsn:
+        baseline = await run(make_writer(1), records)
+    else:
+        baseline = await run(None, records, block_seconds=args.write_ms / 1000)
+    results = [baseline, await run(make_writer(args.in_flight), records)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
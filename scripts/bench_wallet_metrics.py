@@ -0,0 +1,205 @@
+"""
+Parity check and benchmark: dict-based vs columnar wallet metrics.
+
+Usage:
+    python -m scripts.bench_wallet_metrics [wallet.json ...] [--repeat N]
+
+Each wallet.json holds raw API responses for one wallet:
+
+    {"positions": [...], "closed_positions": [...], "balance": 1234.5}
+
+Without files, synthetic wallets of 50 to 30,000 closed positions are
+generated, covering hedged markets, re-entries, unredeemed losses with ISO
+resolve dates, millisecond timestamps, missing fields and string numbers.
+
+For every wallet the reference helpers (scripts/wallet_metrics_reference.py)
+and compute_wallet_metrics must produce identical results (exit status 1 on any
+mismatch); both are then timed on the same input, the columnar path
+including the frame parse.
+"""
+
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts import wallet_metrics_reference as ref
+from src.metrics.wallet_metrics import PositionFrame, compute_wallet_metrics
+from src.realtime.wallet_discovery import WalletDiscoveryProcessor
+
+SYNTHETIC_SIZES = (50, 1_000, 10_000, 30_000)
+
+
+def synthetic_wallet(closed_count: int, seed: int) -> dict:
+    """Raw /positions + /closed-positions shaped like production responses."""
+    rng = random.Random(seed)
+    now = int(time.time())
+    markets = ["0x" + "%064x" % rng.getrandbits(256) for _ in range(max(closed_count // 3, 5))]
+    markets.append("")  # a few records without a conditionId
+
+    closed = []
+    for i in range(closed_count):
+        cid = rng.choice(markets)
+        avg_price = round(rng.uniform(0.02, 0.98), 4)
+        size = round(rng.uniform(5, 5000), 2)
+        bought = round(size * avg_price, 4)
+        pnl = round(rng.uniform(-1.0, 1.6) * bought, 4)
+        # Newest first, spread over ~400 days; ~20 s apart at most so no
+        # record sits on a 7d / 30d cutoff between the two runs
+        ts = now - 3600 - i * (34_000_000 // closed_count) - rng.randint(0, 20)
+        record = {
+            "proxyWallet": "0xwallet",
+            "asset": str(rng.getrandbits(200)),
+            "conditionId": cid,
+            "outcome": rng.choice(["Yes", "No"]),
+            "avgPrice": avg_price,
+            "totalBought": bought,
+            "realizedPnl": pnl,
+            "curPrice": 1 if pnl > 0 else 0,
+            "timestamp": ts * 1000 if i % 97 == 0 else ts,
+            "title": "Will something happen?",
+            "slug": f"market-{i}",
+            "eventSlug": f"event-{i % 200}",
+        }
+        if i % 11 == 0:
+            record["totalBought"] = str(bought)  # string numbers
+        if i % 13 == 0:
+            del record["totalBought"]
+            record["initialValue"] = bought
+            record["size"] = size
+        closed.append(record)
+
+    positions = []
+    for i in range(max(closed_count // 20, 3)):
+        avg_price = round(rng.uniform(0.02, 0.98), 4)
+        size = round(rng.uniform(5, 2000), 2)
+        current_value = 0 if i % 3 == 0 else round(size * rng.uniform(0, 1), 2)
+        cash_pnl = round(current_value - size * avg_price, 4)
+        end = datetime.now(timezone.utc) - timedelta(days=rng.uniform(0.5, 60))
+        positions.append({
+            "conditionId": rng.choice(markets),
+            "outcome": rng.choice(["Yes", "No"]),
+            "size": size,
+            "avgPrice": avg_price,
+            "initialValue": round(size * avg_price, 4),
+            "currentValue": current_value,
+            "cashPnl": cash_pnl,
+            "redeemable": i % 3 == 0,
+            "endDate": end.isoformat().replace("+00:00", "Z"),
+            "eventSlug": f"event-{i % 200}",
+        })
+
+    return {"positions": positions, "closed_positions": closed, "balance": rng.uniform(0, 50_000)}
+
+
+def prepare(positions: list[dict], closed_positions: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Split open positions and fold in unredeemed losses, as _process_wallet does."""
+    losses = [
+        WalletDiscoveryProcessor._unredeemed_loss(p) for p in positions
+        if float(p.get("currentValue", 0)) == 0
+        and p.get("redeemable", False)
+        and float(p.get("cashPnl", 0)) < 0
+    ]
+    open_positions = [p for p in positions if float(p.get("currentValue", 0)) > 0]
+    return open_positions, closed_positions + losses
+
+
+def legacy_metrics(open_positions, closed, balance) -> dict:
+    """The per-helper computation _process_wallet ran before the columnar engine."""
+    metrics_7d = ref.calculate_period_metrics(closed, 7, balance)
+    metrics_30d = ref.calculate_period_metrics(closed, 30, balance)
+    metrics_all = ref.calculate_period_metrics(closed, 36500, balance)
+    return {
+        "overall": ref.calculate_metrics(open_positions, closed, balance),
+        "periods": {7: metrics_7d, 30: metrics_30d, 36500: metrics_all},
+        "growth_quality": {
+            7: ref.calculate_growth_quality(
+                [p for p in closed if ref.in_period(p, 7)], metrics_7d["roi"]
+            ),
+            30: ref.calculate_growth_quality(
+                [p for p in closed if ref.in_period(p, 30)], metrics_30d["roi"]
+            ),
+            36500: ref.calculate_growth_quality(closed, metrics_all["roi"]),
+        },
+        "weekly_profit_rate": ref.calculate_weekly_profit_rate(closed),
+        "diff_win_rate_all": ref.calculate_diff_win_rate(closed),
+        "avg_trades_per_day": ref.calculate_avg_trades_per_day(closed),
+        "median_profit_pct": ref.calculate_median_profit_pct(closed),
+        "best_trade_pct": ref.calculate_best_trade_pct(closed),
+    }
+
+
+def columnar_metrics(open_positions, closed, balance) -> dict:
+    return compute_wallet_metrics(PositionFrame.from_positions(closed, open_positions), balance)
+
+
+def diff(expected, actual, path: str = "") -> list[str]:
+    """Paths where two results differ (exact comparison)."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        out = []
+        for key in expected.keys() | actual.keys():
+            out += diff(expected.get(key, "<missing>"), actual.get(key, "<missing>"), f"{path}.{key}")
+        return out
+    return [] if expected == actual else [f"{path}: {expected!r} != {actual!r}"]
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    repeat = 3
+    if "--repeat" in args:
+        i = args.index("--repeat")
+        repeat = int(args[i + 1])
+        del args[i:i + 2]
+
+    if args:
+        wallets = []
+        for name in args:
+            data = json.loads(Path(name).read_text())
+            wallets.append((Path(name).stem, data))
+    else:
+        wallets = [
+            (f"synthetic-{n:,}", synthetic_wallet(n, seed=n)) for n in SYNTHETIC_SIZES
+        ]
+
+    failures = 0
+
+    print(f"{'wallet':>18} {'closed':>8} {'dicts':>10} {'columnar':>10} {'speedup':>8}  parity")
+    for name, data in wallets:
+        open_positions, closed = prepare(data.get("positions", []), data.get("closed_positions", []))
+        balance = data.get("balance", 0)
+
+        mismatches = diff(
+            legacy_metrics(open_positions, closed, balance),
+            columnar_metrics(open_positions, closed, balance),
+        )
+        failures += bool(mismatches)
+
+        legacy_s = best_of(lambda: legacy_metrics(open_positions, closed, balance), repeat)
+        columnar_s = best_of(lambda: columnar_metrics(open_positions, closed, balance), repeat)
+        print(
+            f"{name:>18} {len(closed):>8,} {legacy_s * 1000:>8.1f}ms {columnar_s * 1000:>8.1f}ms "
+            f"{legacy_s / columnar_s:>7.1f}x  {'ok' if not mismatches else 'MISMATCH'}"
+        )
+        for line in mismatches[:10]:
+            print(f"    {line}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
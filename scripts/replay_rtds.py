@@ -0,0 +1,100 @@
+"""
+Offline RTDS ingestion benchmark: replay recorded frames through RTDSClient.
+
+Usage:
+    python -m scripts.replay_rtds CAPTURE_DIR [--speed N|max] [--handler-ms MS]
+    python -m scripts.replay_rtds CAPTURE_DIR --synthesize 50000
+
+CAPTURE_DIR holds segments written by FrameRecorder (RTDS_RECORD_DIR).
+--synthesize writes a synthetic capture (production payload layout, 50
+frames/s) into CAPTURE_DIR instead of replaying.
+
+The client runs unchanged against a local ReplayServer; on_trade only
+counts trades, optionally sleeping --handler-ms to simulate downstream
+work. For the full pipeline use the service with RTDS_REPLAY_DIR set.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.bench_rtds_parser import synthetic_frames
+from src.realtime.frame_log import FrameRecorder, ReplayServer
+from src.realtime.rtds_client import RTDSClient
+
+
+def synthesize(directory: Path, count: int) -> None:
+    """Write a synthetic capture at 50 frames per second."""
+    recorder = FrameRecorder(directory)
+    start = time.time()
+    for i, frame in enumerate(synthetic_frames(count)):
+        recorder.write(frame, start + i / 50)
+    recorder.close()
+    print(json.dumps(recorder.stats, indent=2))
+
+
+async def replay(directory: Path, speed: float, handler_ms: float) -> None:
+    server = ReplayServer(directory, speed=speed)
+    await server.start()
+
+    trades = 0
+
+    async def on_trade(trade) -> None:
+        nonlocal trades
+        trades += 1
+        if handler_ms:
+            await asyncio.sleep(handler_ms / 1000)
+
+    client = RTDSClient(on_trade=on_trade, url=server.url)
+    client_task = asyncio.create_task(client.start())
+    await server.finished.wait()
+    await client.stop()  # drains the ring buffer
+    client_task.cancel()
+    await server.stop()
+
+    replay_stats = server.stats
+    client_stats = client.stats
+    print(f"Replay:  {json.dumps(replay_stats)}")
+    print(f"Trades delivered: {trades:,} (parsed {client_stats['trade_count']:,})")
+    print(f"Buffer:  {json.dumps(client_stats['buffer'])}")
+    elapsed = replay_stats["elapsed_seconds"]
+    if elapsed:
+        print(f"Throughput: {trades / elapsed:,.0f} trades/s")
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    speed = 0.0
+    handler_ms = 0.0
+    synthesize_count = 0
+    for flag in ("--speed", "--handler-ms", "--synthesize"):
+        if flag in args:
+            idx = args.index(flag)
+            value = args[idx + 1]
+            del args[idx:idx + 2]
+            if flag == "--speed":
+                speed = 0.0 if value == "max" else float(value)
+            elif flag == "--handler-ms":
+                handler_ms = float(value)
+            else:
+                synthesize_count = int(value)
+
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    directory = Path(args[0])
+
+    if synthesize_count:
+        synthesize(directory, synthesize_count)
+    else:
+        asyncio.run(replay(directory, speed, handler_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ Debug script to verify wallet metrics calculation.
 Usage:
     python -m scripts.verify_wallet_metrics <wallet_address>
 
+    Set POLYMARKET_API_CACHE=<file> to reuse cached API responses across runs
+    (POLYMARKET_API_CACHE_READ_ONLY=1 replays them without refreshing).
+
 Metrics Formulas:
     - Realized PnL = sum of realizedPnl from closed-positions
     - Unrealized PnL = sum of cashPnl from open positions
@@ -181,6 +184,13 @@ async def verify_wallet(address: str):
         print("    - They might not include all unrealized losses")
         print("    - Data refresh timing differences")
 
+        if api.cache:
+            cache = api.cache.stats
+            print(
+                f"\n[CACHE] hits={cache['hits']} misses={cache['misses']} "
+                f"saved={cache['mb_saved']}MB entries={cache['entries']} ({cache['size_mb']}MB)"
+            )
+
 
 async def main():
     load_dotenv()
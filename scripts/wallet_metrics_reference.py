@@ -0,0 +1,659 @@
+"""
+Reference wallet metrics: the per-helper dict implementation.
+
+These are the WalletDiscoveryProcessor helpers _process_wallet ran before
+src.metrics.wallet_metrics replaced them with the columnar engine, frozen
+here unchanged (as module functions) so bench_wallet_metrics and the parity
+test can check compute_wallet_metrics against them. Nothing in src/ imports
+this module.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+
+def group_into_trades(
+    closed_positions: list[dict],
+    open_positions: list[dict]
+) -> list[dict]:
+    """
+    Group positions into trades.
+    - Same conditionId + different outcomes (hedging) = 1 trade
+    - Same conditionId + same outcome (re-entry) = separate trades
+    """
+    market_groups: dict[str, dict] = {}
+
+    # Process closed positions
+    for pos in closed_positions:
+        condition_id = pos.get("conditionId", "")
+        outcome = pos.get("outcome", "unknown")
+        pnl = float(pos.get("realizedPnl", 0))
+        bought = float(pos.get("totalBought", 0)) or float(pos.get("initialValue", 0)) or (float(pos.get("size", 0)) * float(pos.get("avgPrice", 0)))
+
+        if condition_id not in market_groups:
+            market_groups[condition_id] = {"outcomes": {}}
+
+        if outcome not in market_groups[condition_id]["outcomes"]:
+            market_groups[condition_id]["outcomes"][outcome] = []
+
+        market_groups[condition_id]["outcomes"][outcome].append({
+            "pnl": pnl,
+            "bought": bought,
+            "is_resolved": True,
+            "resolved_at": pos.get("resolvedAt") or pos.get("timestamp")
+        })
+
+    # Process open positions
+    # NOTE: Open positions are ALWAYS unrealized, even if currentValue = 0
+    # The market hasn't officially resolved, so we don't count them as realized
+    for pos in open_positions:
+        condition_id = pos.get("conditionId", "")
+        outcome = pos.get("outcome", "unknown")
+        pnl = float(pos.get("cashPnl", 0))
+        bought = float(pos.get("totalBought", 0)) or float(pos.get("initialValue", 0)) or (float(pos.get("size", 0)) * float(pos.get("avgPrice", 0)))
+
+        if condition_id not in market_groups:
+            market_groups[condition_id] = {"outcomes": {}}
+
+        if outcome not in market_groups[condition_id]["outcomes"]:
+            market_groups[condition_id]["outcomes"][outcome] = []
+
+        market_groups[condition_id]["outcomes"][outcome].append({
+            "pnl": pnl,
+            "bought": bought,
+            "is_resolved": False,  # Open positions are always unrealized
+            "resolved_at": None
+        })
+
+    # Convert to trades
+    trades = []
+    for condition_id, group in market_groups.items():
+        outcome_keys = list(group["outcomes"].keys())
+
+        if len(outcome_keys) > 1:
+            # Multiple outcomes (hedging) = 1 trade
+            total_pnl = 0
+            total_bought = 0
+            is_resolved = False
+            latest_resolved_at = None
+
+            for outcome, entries in group["outcomes"].items():
+                for entry in entries:
+                    total_pnl += entry["pnl"]
+                    total_bought += entry["bought"]
+                    if entry["is_resolved"]:
+                        is_resolved = True
+                    if entry["resolved_at"]:
+                        # Normalize to string for safe comparison
+                        # (API can return int timestamps or ISO date strings)
+                        entry_ra = str(entry["resolved_at"])
+                        latest_ra = str(latest_resolved_at) if latest_resolved_at else ""
+                        if not latest_resolved_at or entry_ra > latest_ra:
+                            latest_resolved_at = entry["resolved_at"]
+
+            trades.append({
+                "condition_id": condition_id,
+                "total_pnl": total_pnl,
+                "total_bought": total_bought,
+                "is_resolved": is_resolved,
+                "resolved_at": latest_resolved_at
+            })
+        else:
+            # Single outcome - each entry is a separate trade
+            outcome = outcome_keys[0]
+            for entry in group["outcomes"][outcome]:
+                trades.append({
+                    "condition_id": condition_id,
+                    "total_pnl": entry["pnl"],
+                    "total_bought": entry["bought"],
+                    "is_resolved": entry["is_resolved"],
+                    "resolved_at": entry["resolved_at"]
+                })
+
+    return trades
+
+def calculate_max_drawdown(
+    closed_positions: list[dict],
+    initial_balance: float = 0,
+) -> float:
+    """
+    Calculate max drawdown from equity curve.
+
+    Tracks balance starting from initial_balance, adding realized PnL
+    for each position chronologically.
+    Max Drawdown = (peak - trough) / peak * 100
+    """
+    sorted_positions = sorted(
+        [p for p in closed_positions if p.get("timestamp")],
+        key=lambda p: p.get("timestamp") or 0
+    )
+
+    if not sorted_positions:
+        return 0
+
+    balance = initial_balance
+    max_balance = initial_balance
+    max_drawdown_pct = 0
+
+    for pos in sorted_positions:
+        pnl = float(pos.get("realizedPnl", 0))
+        balance += pnl
+
+        if balance > max_balance:
+            max_balance = balance
+
+        if max_balance > 0:
+            drawdown_pct = ((max_balance - balance) / max_balance) * 100
+            if drawdown_pct > max_drawdown_pct:
+                max_drawdown_pct = drawdown_pct
+
+    return min(round(max_drawdown_pct * 100) / 100, 100)
+
+def calculate_metrics(
+    positions: list[dict],
+    closed_positions: list[dict],
+    current_balance: float = 0
+) -> dict:
+    """
+    Calculate all metrics from positions data.
+
+    Trade counting:
+    - Same conditionId + different outcomes (hedging) = 1 trade
+    - Same conditionId + same outcome (re-entry) = separate trades
+
+    ROI calculation:
+    - Account ROI = Total PnL / Initial Balance * 100
+    - Initial Balance = Current Balance - Total PnL
+    """
+    trades = group_into_trades(closed_positions, positions)
+
+    realized_pnl = 0
+    unrealized_pnl = 0
+    total_bought = 0
+    win_count = 0
+    loss_count = 0
+    active_count = 0
+    gross_wins = 0
+    gross_losses = 0
+
+    for trade in trades:
+        if trade["is_resolved"]:
+            realized_pnl += trade["total_pnl"]
+            total_bought += trade["total_bought"]
+            if trade["total_pnl"] > 0:
+                win_count += 1
+                gross_wins += trade["total_pnl"]
+            else:
+                loss_count += 1
+                gross_losses += abs(trade["total_pnl"])
+        else:
+            unrealized_pnl += trade["total_pnl"]
+            active_count += 1
+
+    total_pnl = realized_pnl + unrealized_pnl
+    trade_count = win_count + loss_count
+
+    # ROI = Total PnL / Initial Capital * 100
+    # Initial Capital estimated as current_balance - total_pnl (what was deposited)
+    initial_capital = current_balance - total_pnl
+    if initial_capital > 0:
+        roi_all = (total_pnl / initial_capital * 100)
+    elif total_pnl > 0 and total_bought > 0:
+        roi_all = (total_pnl / total_bought * 100)
+    else:
+        roi_all = 0
+
+    # Win rate from resolved trades
+    win_rate_all = (win_count / trade_count * 100) if trade_count > 0 else 0
+
+    # Calculate max drawdown
+    # Include volume-based floor for high-frequency traders with low current balance
+    avg_trade_size = total_bought / trade_count if trade_count > 0 else 0
+    drawdown_base = max(current_balance - realized_pnl - unrealized_pnl, current_balance, avg_trade_size * 3, 1)
+    max_drawdown = calculate_max_drawdown(closed_positions, drawdown_base)
+
+    # Count unique markets (conditionId), not raw position entries
+    # Each market has YES/NO outcomes, so raw len() double-counts
+    unique_closed_markets = len(set(
+        p.get("conditionId", "") for p in closed_positions if p.get("conditionId")
+    ))
+    unique_open_markets = len(set(
+        p.get("conditionId", "") for p in positions
+        if p.get("conditionId") and float(p.get("currentValue", 0)) > 0
+    ))
+
+    # Profit Factor = gross wins / abs(gross losses)
+    if gross_losses > 0:
+        profit_factor_all = round(gross_wins / gross_losses, 2)
+    elif gross_wins > 0:
+        profit_factor_all = 10.0  # Cap when no losses
+    else:
+        profit_factor_all = 0
+
+    return {
+        "realized_pnl": round(realized_pnl, 2),
+        "unrealized_pnl": round(unrealized_pnl, 2),
+        "total_pnl": round(total_pnl, 2),
+        "total_bought": round(total_bought, 2),
+        "roi_all": round(roi_all, 2),
+        "win_rate_all": round(win_rate_all, 2),
+        "win_count": win_count,
+        "loss_count": loss_count,
+        "trade_count": trade_count,
+        "active_count": active_count,
+        "open_count": unique_open_markets,
+        "closed_count": unique_closed_markets,
+        "max_drawdown": max_drawdown,
+        "gross_wins": round(gross_wins, 2),
+        "gross_losses": round(gross_losses, 2),
+        "profit_factor_all": profit_factor_all,
+    }
+
+def calculate_period_metrics(
+    closed_positions: list[dict],
+    days: int,
+    current_balance: float = 0
+) -> dict:
+    """Calculate metrics for a specific time period (7d, 30d)."""
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=days)
+    cutoff_ts = cutoff.timestamp()
+
+    # Filter positions resolved within the period
+    period_positions = []
+    for pos in closed_positions:
+        resolved_at = pos.get("resolvedAt") or pos.get("timestamp")
+        if resolved_at:
+            try:
+                if isinstance(resolved_at, (int, float)):
+                    resolved_ts = resolved_at / 1000 if resolved_at > 4102444800 else resolved_at
+                else:
+                    resolved_ts = datetime.fromisoformat(
+                        str(resolved_at).replace("Z", "+00:00")
+                    ).timestamp()
+
+                if resolved_ts >= cutoff_ts:
+                    period_positions.append(pos)
+            except Exception:
+                pass
+
+    if not period_positions:
+        return {
+            "pnl": 0, "roi": 0, "volume": 0,
+            "trade_count": 0, "win_rate": 0, "drawdown": 0,
+            "sum_profit_pct": 0,
+        }
+
+    # Group by conditionId to count unique markets (not raw entries)
+    # Each market has YES/NO outcomes, raw count double-counts
+    market_pnl: dict[str, float] = {}
+    # Track per-market avg entry price for difficulty-weighted win rate
+    market_difficulty: dict[str, list[float]] = {}
+    for p in period_positions:
+        cid = p.get("conditionId", "")
+        rpnl = float(p.get("realizedPnl", 0))
+        market_pnl[cid] = market_pnl.get(cid, 0) + rpnl
+        # avgPrice = entry probability (what they paid per share)
+        avg_price = float(p.get("avgPrice", 0.5))
+        avg_price = max(0.01, min(avg_price, 0.99))  # Clamp to valid range
+        if cid not in market_difficulty:
+            market_difficulty[cid] = []
+        market_difficulty[cid].append(avg_price)
+
+    # Calculate PnL
+    pnl = sum(market_pnl.values())
+
+    # Calculate volume
+    volume = sum(
+        float(p.get("totalBought", 0)) or float(p.get("initialValue", 0)) or (float(p.get("size", 0)) * float(p.get("avgPrice", 0)))
+        for p in period_positions
+    )
+
+    # Sum of per-trade profit percentages
+    sum_profit_pct = 0.0
+    for p in period_positions:
+        realized_pnl = float(p.get("realizedPnl", 0))
+        initial_value = float(p.get("totalBought", 0) or 0)
+        if initial_value <= 0:
+            initial_value = float(p.get("initialValue", 0))
+        if initial_value <= 0:
+            initial_value = float(p.get("size", 0)) * float(p.get("avgPrice", 0))
+        if initial_value > 0:
+            sum_profit_pct += (realized_pnl / initial_value) * 100
+
+    # Calculate win rate from unique markets
+    wins = sum(1 for v in market_pnl.values() if v > 0)
+    trade_count = len(market_pnl)
+    win_rate = (wins / trade_count * 100) if trade_count > 0 else 0
+
+    # Profit Factor for period
+    gross_wins = sum(v for v in market_pnl.values() if v > 0)
+    gross_losses_abs = sum(abs(v) for v in market_pnl.values() if v < 0)
+    if gross_losses_abs > 0:
+        profit_factor = round(gross_wins / gross_losses_abs, 2)
+    elif gross_wins > 0:
+        profit_factor = 10.0
+    else:
+        profit_factor = 0
+
+    # Difficulty-weighted win rate for period
+    # difficulty = 1 - avg_entry_price (lower entry price = harder bet = more credit)
+    total_difficulty = 0
+    wins_difficulty = 0
+    for cid, prices in market_difficulty.items():
+        avg_entry = sum(prices) / len(prices)
+        difficulty = 1 - avg_entry
+        total_difficulty += difficulty
+        if market_pnl.get(cid, 0) > 0:
+            wins_difficulty += difficulty
+    diff_win_rate = (wins_difficulty / total_difficulty * 100) if total_difficulty > 0 else 0
+
+    # ROI = Period PnL / Starting Balance
+    # Starting balance estimated as current_balance - period_pnl
+    estimated_start = current_balance - pnl
+    if estimated_start > 0:
+        roi = (pnl / estimated_start * 100)
+    elif pnl > 0 and volume > 0:
+        roi = (pnl / volume * 100)
+    else:
+        roi = 0
+
+    # Calculate drawdown for period
+    # Use volume-based floor to handle high-frequency traders with low
+    # current balance (e.g., profits withdrawn, capital rotated rapidly)
+    avg_position_size = volume / trade_count if trade_count > 0 else 0
+    initial_balance = max(current_balance - pnl, current_balance, avg_position_size * 3, 1)
+    drawdown = calculate_max_drawdown(period_positions, initial_balance)
+
+    losses = trade_count - wins
+
+    return {
+        "pnl": round(pnl, 2),
+        "roi": round(roi, 2),
+        "volume": round(volume, 2),
+        "trade_count": trade_count,
+        "win_rate": round(win_rate, 2),
+        "wins": wins,
+        "losses": losses,
+        "drawdown": drawdown,
+        "profit_factor": profit_factor,
+        "diff_win_rate": round(diff_win_rate, 2),
+        "sum_profit_pct": round(sum_profit_pct, 2),
+    }
+
+def calculate_weekly_profit_rate(closed_positions: list[dict]) -> float:
+    """
+    Calculate percentage of active weeks that were profitable.
+    Groups closed positions by ISO week and counts profitable weeks.
+    """
+    if not closed_positions:
+        return 0
+
+    # Group PnL by ISO week
+    week_pnl: dict[str, float] = {}
+    for pos in closed_positions:
+        resolved_at = pos.get("resolvedAt") or pos.get("timestamp")
+        if not resolved_at:
+            continue
+        try:
+            if isinstance(resolved_at, (int, float)):
+                resolved_ts = resolved_at / 1000 if resolved_at > 4102444800 else resolved_at
+                dt = datetime.fromtimestamp(resolved_ts, tz=timezone.utc)
+            else:
+                dt = datetime.fromisoformat(str(resolved_at).replace("Z", "+00:00"))
+            iso_year, iso_week, _ = dt.isocalendar()
+            week_key = f"{iso_year}-W{iso_week:02d}"
+            pnl = float(pos.get("realizedPnl", 0))
+            week_pnl[week_key] = week_pnl.get(week_key, 0) + pnl
+        except Exception:
+            continue
+
+    if not week_pnl:
+        return 0
+
+    profitable_weeks = sum(1 for v in week_pnl.values() if v > 0)
+    return round(profitable_weeks / len(week_pnl) * 100, 2)
+
+def calculate_diff_win_rate(closed_positions: list[dict]) -> float:
+    """
+    Calculate difficulty-weighted win rate from closed positions.
+    Difficulty = 1 - avgPrice (lower entry price = harder bet = more credit).
+    """
+    if not closed_positions:
+        return 0
+
+    # Group by conditionId
+    market_pnl: dict[str, float] = {}
+    market_prices: dict[str, list[float]] = {}
+
+    for pos in closed_positions:
+        cid = pos.get("conditionId", "")
+        if not cid:
+            continue
+        pnl = float(pos.get("realizedPnl", 0))
+        avg_price = float(pos.get("avgPrice", 0.5))
+        avg_price = max(0.01, min(avg_price, 0.99))
+
+        market_pnl[cid] = market_pnl.get(cid, 0) + pnl
+        if cid not in market_prices:
+            market_prices[cid] = []
+        market_prices[cid].append(avg_price)
+
+    if not market_pnl:
+        return 0
+
+    total_difficulty = 0
+    wins_difficulty = 0
+    for cid, prices in market_prices.items():
+        avg_entry = sum(prices) / len(prices)
+        difficulty = 1 - avg_entry
+        total_difficulty += difficulty
+        if market_pnl.get(cid, 0) > 0:
+            wins_difficulty += difficulty
+
+    return round((wins_difficulty / total_difficulty * 100) if total_difficulty > 0 else 0, 2)
+
+def calculate_avg_trades_per_day(closed_positions: list[dict]) -> float:
+    """Calculate average trades per active day from closed positions."""
+    if not closed_positions:
+        return 0
+
+    # Collect unique active days
+    active_days: set[str] = set()
+    for pos in closed_positions:
+        resolved_at = pos.get("resolvedAt") or pos.get("timestamp")
+        if not resolved_at:
+            continue
+        try:
+            if isinstance(resolved_at, (int, float)):
+                resolved_ts = resolved_at / 1000 if resolved_at > 4102444800 else resolved_at
+                dt = datetime.fromtimestamp(resolved_ts, tz=timezone.utc)
+            else:
+                dt = datetime.fromisoformat(str(resolved_at).replace("Z", "+00:00"))
+            active_days.add(dt.strftime("%Y-%m-%d"))
+        except Exception:
+            continue
+
+    if not active_days:
+        return 0
+
+    # Count unique markets (trades) rather than raw positions
+    unique_markets = len(set(p.get("conditionId", "") for p in closed_positions if p.get("conditionId")))
+    return round(unique_markets / len(active_days), 2)
+
+def calculate_median_profit_pct(closed_positions: list[dict]) -> float | None:
+    """
+    Calculate median profit percentage per closed trade with IQR outlier removal.
+
+    For each closed position: profit_pct = (realizedPnl / initialValue) * 100
+    Then remove outliers via IQR method and return median.
+
+    Returns None if fewer than 3 valid positions.
+    """
+    profit_pcts: list[float] = []
+
+    for pos in closed_positions:
+        realized_pnl = float(pos.get("realizedPnl", 0))
+        # Try totalBought first (newer API format), then initialValue, then size*avgPrice
+        initial_value = 0
+        total_bought = pos.get("totalBought")
+        if total_bought is not None:
+            initial_value = float(total_bought)
+        if initial_value <= 0:
+            initial_value = float(pos.get("initialValue", 0))
+        if initial_value <= 0:
+            size = float(pos.get("size", 0))
+            avg_price = float(pos.get("avgPrice", 0))
+            initial_value = size * avg_price
+
+        if initial_value <= 0:
+            continue
+
+        pct = (realized_pnl / initial_value) * 100
+        profit_pcts.append(pct)
+
+    if len(profit_pcts) < 3:
+        return None
+
+    profit_pcts.sort()
+    n = len(profit_pcts)
+
+    def interpolate(sorted_data: list[float], frac_idx: float) -> float:
+        lower = int(frac_idx)
+        upper = min(lower + 1, len(sorted_data) - 1)
+        weight = frac_idx - lower
+        return sorted_data[lower] * (1 - weight) + sorted_data[upper] * weight
+
+    q1 = interpolate(profit_pcts, n * 0.25)
+    q3 = interpolate(profit_pcts, n * 0.75)
+    iqr = q3 - q1
+
+    lower_bound = q1 - 1.5 * iqr
+    upper_bound = q3 + 1.5 * iqr
+
+    filtered = [p for p in profit_pcts if lower_bound <= p <= upper_bound]
+    if not filtered:
+        return None
+
+    filtered.sort()
+    mid = len(filtered) // 2
+    if len(filtered) % 2 == 0:
+        median_val = (filtered[mid - 1] + filtered[mid]) / 2
+    else:
+        median_val = filtered[mid]
+
+    return round(median_val, 2)
+
+def in_period(position: dict, days: int) -> bool:
+    """Check if a position's resolvedAt is within the last N days."""
+    resolved_at = position.get("resolvedAt") or position.get("timestamp")
+    if not resolved_at:
+        return False
+    try:
+        if isinstance(resolved_at, (int, float)):
+            ts = resolved_at / 1000 if resolved_at > 4102444800 else resolved_at
+        else:
+            ts = datetime.fromisoformat(
+                str(resolved_at).replace("Z", "+00:00")
+            ).timestamp()
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).timestamp()
+        return ts >= cutoff
+    except Exception:
+        return False
+
+def calculate_growth_quality(
+    closed_positions: list[dict],
+    roi: float,
+) -> int:
+    """
+    Calculate Growth Quality score (1-10).
+    Combines R² of cumulative PnL equity curve (60%) with ROI magnitude (40%).
+
+    R² measures steadiness: 1.0 = perfectly linear growth, 0 = random.
+    """
+    # Filter positions with resolvedAt and sort by time
+    sorted_positions = []
+    for p in closed_positions:
+        resolved_at = p.get("resolvedAt") or p.get("timestamp")
+        if resolved_at:
+            try:
+                if isinstance(resolved_at, (int, float)):
+                    ts = resolved_at / 1000 if resolved_at > 4102444800 else resolved_at
+                else:
+                    ts = datetime.fromisoformat(
+                        str(resolved_at).replace("Z", "+00:00")
+                    ).timestamp()
+                sorted_positions.append((ts, float(p.get("realizedPnl", 0))))
+            except Exception:
+                pass
+
+    sorted_positions.sort(key=lambda x: x[0])
+
+    if len(sorted_positions) < 3:
+        return 0
+
+    # Build cumulative PnL points
+    cum_pnl = 0.0
+    points = []
+    for i, (_, pnl) in enumerate(sorted_positions):
+        cum_pnl += pnl
+        points.append((float(i), cum_pnl))
+
+    n = len(points)
+    sum_x = sum(p[0] for p in points)
+    sum_y = sum(p[1] for p in points)
+    sum_xy = sum(p[0] * p[1] for p in points)
+    sum_xx = sum(p[0] * p[0] for p in points)
+
+    mean_y = sum_y / n
+    ss_tot = sum((p[1] - mean_y) ** 2 for p in points)
+
+    if ss_tot == 0:
+        return 7 if roi > 0 else 1
+
+    denom = n * sum_xx - sum_x * sum_x
+    if denom == 0:
+        return 1
+
+    slope = (n * sum_xy - sum_x * sum_y) / denom
+    intercept = (sum_y - slope * sum_x) / n
+
+    ss_res = sum((p[1] - (intercept + slope * p[0])) ** 2 for p in points)
+    r2 = max(1 - ss_res / ss_tot, 0)
+
+    # Only reward upward trends
+    if slope <= 0:
+        return 1
+
+    steadiness = r2
+    return_score = min(max(roi / 20, 0), 1.0)
+    raw = steadiness * 0.6 + return_score * 0.4
+    return max(1, min(10, round(raw * 9 + 1)))
+
+def calculate_best_trade_pct(closed_positions: list[dict]) -> float | None:
+    """
+    Calculate what % of total positive PnL comes from the single best trade.
+
+    A high value (e.g. 80%) means the trader's profits depend on one lucky bet.
+    A low value (e.g. 10%) means profits are well-distributed across trades.
+
+    Returns None if no positive PnL trades.
+    """
+    # Group by conditionId to get per-market PnL
+    market_pnl: dict[str, float] = {}
+    for pos in closed_positions:
+        cid = pos.get("conditionId", "")
+        if not cid:
+            continue
+        pnl = float(pos.get("realizedPnl", 0))
+        market_pnl[cid] = market_pnl.get(cid, 0) + pnl
+
+    positive_pnls = [v for v in market_pnl.values() if v > 0]
+    if not positive_pnls:
+        return None
+
+    total_positive = sum(positive_pnls)
+    if total_positive <= 0:
+        return None
+
+    max_single = max(positive_pnls)
+    return round((max_single / total_positive) * 100, 2)
@@ -33,6 +33,9 @@ class PolymarketApiConfig(BaseModel):
     """Polymarket Data API configuration."""
     base_url: str = "https://data-api.polymarket.com"
     rate_limit: int = 60
+    cache_path: Optional[str] = None  # on-disk response cache (off if unset)
+    cache_max_mb: float = 256
+    cache_read_only: bool = False
 
 
 class AnalyticsConfig(BaseModel):
@@ -86,8 +89,17 @@ class Settings(BaseModel):
 
         # Load API config from yaml
         api_data = config_data.get("api", {})
+        polymarket_api_data = dict(api_data.get("polymarket", {}))
+        if os.getenv("POLYMARKET_API_CACHE"):
+            polymarket_api_data["cache_path"] = os.getenv("POLYMARKET_API_CACHE")
+        if os.getenv("POLYMARKET_API_CACHE_MB"):
+            polymarket_api_data["cache_max_mb"] = float(os.getenv("POLYMARKET_API_CACHE_MB"))
+        if os.getenv("POLYMARKET_API_CACHE_READ_ONLY"):
+            polymarket_api_data["cache_read_only"] = (
+                os.getenv("POLYMARKET_API_CACHE_READ_ONLY").lower() in ("1", "true", "yes")
+            )
         api_config = ApiConfig(
-            polymarket=PolymarketApiConfig(**api_data.get("polymarket", {})),
+            polymarket=PolymarketApiConfig(**polymarket_api_data),
         )
 
         # Load analytics config from yaml
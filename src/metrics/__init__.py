@@ -2,5 +2,6 @@
 
 from .calculations import MetricsCalculator
 from .insider_detection import InsiderDetector
+from .wallet_metrics import PositionFrame, compute_wallet_metrics
 
-__all__ = ["MetricsCalculator", "InsiderDetector"]
+__all__ = ["MetricsCalculator", "InsiderDetector", "PositionFrame", "compute_wallet_metrics"]
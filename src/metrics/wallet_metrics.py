@@ -0,0 +1,718 @@
+"""
+Single-pass columnar wallet metrics.
+
+WalletDiscoveryProcessor used to compute a wallet's metrics with a dozen
+helpers that each walked the raw position dicts again: three period passes
+(7d / 30d / all), three growth-quality passes behind their own period
+filters, weekly profit rate, difficulty-weighted win rate, median profit and
+best-trade share. Every pass re-parsed ISO timestamps and float(...) fields
+and re-sorted for drawdown.
+
+PositionFrame parses the closed and open positions once into NumPy columns
+(market / outcome codes, PnL, cost basis, entry price, resolve time, ISO
+week and day). compute_wallet_metrics derives every window from the frame
+with masks, bincount grouping and cumulative sums.
+
+Results are identical to the dict-based helpers, not just close: groups are
+visited in first-appearance order and reductions that feed the stored
+numbers are summed left to right (cumsum / bincount) as the original loops
+did, rather than with NumPy's pairwise sum. The helpers are kept in
+scripts/wallet_metrics_reference.py; tests/test_wallet_metrics_parity.py
+checks parity and scripts/bench_wallet_metrics.py measures the speed-up.
+
+wallet_metrics_result adds the PF trend and copy score on top, and
+wallet_metrics_job is its process-pool entry point (see
+src/realtime/metrics_pool.py): the module imports nothing beyond NumPy so
+worker processes start quickly.
+"""
+
+import marshal
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+
+# Period windows in days; 36500 (100 years) is all-time
+PERIOD_DAYS = (7, 30, 36500)
+
+# Numeric resolve times above this are milliseconds (2100-01-01 in seconds)
+_MS_THRESHOLD = 4102444800
+
+# datetime.fromtimestamp range (years 1-9999) and the ordinal of 1970-01-01
+_MIN_EPOCH = -62135596800
+_MAX_EPOCH = 253402300800
+_EPOCH_ORDINAL = 719163
+
+_EMPTY_PERIOD = {
+    "pnl": 0, "roi": 0, "volume": 0,
+    "trade_count": 0, "win_rate": 0, "drawdown": 0,
+    "sum_profit_pct": 0,
+}
+
+
+def _parse_resolved(value) -> tuple[float, int, int]:
+    """
+    Parse a resolvedAt / timestamp value the way the metric helpers did.
+
+    Returns (epoch seconds or NaN, ISO year*100 + week or -1, day ordinal or -1).
+    Numeric values above _MS_THRESHOLD are milliseconds; strings are ISO 8601.
+    """
+    if not value:
+        return math.nan, -1, -1
+    try:
+        if isinstance(value, (int, float)):
+            ts = value / 1000 if value > _MS_THRESHOLD else value
+            try:
+                dt = datetime.fromtimestamp(ts, tz=timezone.utc)
+            except (OverflowError, OSError, ValueError):
+                return float(ts), -1, -1
+        else:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+            ts = dt.timestamp()
+    except Exception:
+        return math.nan, -1, -1
+    iso_year, iso_week, _ = dt.isocalendar()
+    return float(ts), iso_year * 100 + iso_week, dt.toordinal()
+
+
+def _utc_week_and_day(ts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized _parse_resolved for epoch seconds: (ISO year*100 + week, day ordinal)."""
+    day = (np.floor_divide(ts, 86400)).astype(np.int64) + _EPOCH_ORDINAL
+    # ISO week: the week's Thursday decides the ISO year
+    thursday = day - (day + 6) % 7 + 3
+    year_start = (thursday - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[Y]")
+    iso_year = year_start.astype(np.int64) + 1970
+    jan1 = year_start.astype("datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+    iso_week = (thursday - jan1) // 7 + 1
+    return iso_year * 100 + iso_week, day
+
+
+def _ordered_sum(values: np.ndarray) -> float:
+    """Left-to-right sum, matching the += loops (NumPy's sum is pairwise)."""
+    return float(np.cumsum(values)[-1]) if len(values) else 0.0
+
+
+def _first_appearance(codes: np.ndarray) -> np.ndarray:
+    """Distinct codes in order of first appearance (dict insertion order)."""
+    uniq, first = np.unique(codes, return_index=True)
+    return uniq[np.argsort(first, kind="stable")]
+
+
+def _max_drawdown(pnl: np.ndarray, initial_balance: float) -> float:
+    """Max peak-to-trough drop (%) of initial_balance plus cumulative PnL."""
+    if not len(pnl):
+        return 0
+    balance = np.cumsum(np.concatenate(([float(initial_balance)], pnl)))
+    peak = np.maximum.accumulate(balance)
+    balance, peak = balance[1:], peak[1:]
+    positive = peak > 0
+    max_drawdown_pct = 0.0
+    if positive.any():
+        max_drawdown_pct = max(
+            float(np.max((peak[positive] - balance[positive]) / peak[positive] * 100)), 0.0
+        )
+    return min(round(max_drawdown_pct * 100) / 100, 100)
+
+
+class PositionFrame:
+    """
+    Closed and open positions of one wallet as NumPy columns.
+
+    Rows are the closed positions followed by the open ones, in input order.
+    Market (conditionId) and (market, outcome) codes are assigned in order
+    of first appearance.
+    """
+
+    __slots__ = (
+        "n_closed", "pnl", "bought", "init_value", "price", "current_value",
+        "market", "has_market", "pair", "pair_market", "n_markets",
+        "resolved_ts", "week", "day", "timestamp",
+    )
+
+    def __init__(self, **columns):
+        for name in self.__slots__:
+            setattr(self, name, columns[name])
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    @classmethod
+    def from_positions(
+        cls,
+        closed_positions: list[dict],
+        open_positions: list[dict] = (),
+    ) -> "PositionFrame":
+        """Parse raw /closed-positions and /positions records (open = cashPnl)."""
+        n = len(closed_positions) + len(open_positions)
+        pnl = np.empty(n)
+        bought = np.empty(n)
+        init_value = np.empty(n)
+        price = np.empty(n)
+        current_value = np.zeros(n)
+        market = np.empty(n, dtype=np.int64)
+        has_market = np.empty(n, dtype=bool)
+        pair = np.empty(n, dtype=np.int64)
+        resolved_ts = np.full(n, math.nan)
+        week = np.full(n, -1, dtype=np.int64)
+        day = np.full(n, -1, dtype=np.int64)
+        timestamp = np.full(n, math.nan)
+        numeric = np.zeros(n, dtype=bool)
+
+        market_codes: dict = {}
+        pair_codes: dict = {}
+        pair_market: list[int] = []
+        n_closed = len(closed_positions)
+
+        for i, pos in enumerate((*closed_positions, *open_positions)):
+            closed = i < n_closed
+            cid = pos.get("conditionId", "")
+            code = market_codes.setdefault(cid, len(market_codes))
+            market[i] = code
+            has_market[i] = bool(cid)
+            key = (cid, pos.get("outcome", "unknown"))
+            if key not in pair_codes:
+                pair_codes[key] = len(pair_codes)
+                pair_market.append(code)
+            pair[i] = pair_codes[key]
+
+            pnl[i] = float(pos.get("realizedPnl", 0)) if closed else float(pos.get("cashPnl", 0))
+            bought[i] = (
+                float(pos.get("totalBought", 0))
+                or float(pos.get("initialValue", 0))
+                or (float(pos.get("size", 0)) * float(pos.get("avgPrice", 0)))
+            )
+            value = float(pos.get("totalBought", 0) or 0)
+            if value <= 0:
+                value = float(pos.get("initialValue", 0))
+            if value <= 0:
+                value = float(pos.get("size", 0)) * float(pos.get("avgPrice", 0))
+            init_value[i] = value
+
+            if not closed:
+                current_value[i] = float(pos.get("currentValue", 0))
+                price[i] = 0.5
+                continue
+
+            price[i] = max(0.01, min(float(pos.get("avgPrice", 0.5)), 0.99))
+            resolved = pos.get("resolvedAt") or pos.get("timestamp")
+            if resolved and isinstance(resolved, (int, float)):
+                # Epoch seconds / ms: week and day are derived below in bulk
+                resolved_ts[i] = resolved / 1000 if resolved > _MS_THRESHOLD else resolved
+                numeric[i] = True
+            else:
+                resolved_ts[i], week[i], day[i] = _parse_resolved(resolved)
+            raw_ts = pos.get("timestamp")
+            if raw_ts:
+                try:
+                    timestamp[i] = float(raw_ts)
+                except (TypeError, ValueError):
+                    pass
+
+        numeric &= (resolved_ts >= _MIN_EPOCH) & (resolved_ts < _MAX_EPOCH)
+        week[numeric], day[numeric] = _utc_week_and_day(resolved_ts[numeric])
+
+        return cls(
+            n_closed=n_closed,
+            pnl=pnl,
+            bought=bought,
+            init_value=init_value,
+            price=price,
+            current_value=current_value,
+            market=market,
+            has_market=has_market,
+            pair=pair,
+            pair_market=np.array(pair_market, dtype=np.int64),
+            n_markets=len(market_codes),
+            resolved_ts=resolved_ts,
+            week=week,
+            day=day,
+            timestamp=timestamp,
+        )
+
+    @property
+    def closed(self) -> np.ndarray:
+        """Row mask of closed positions."""
+        mask = np.zeros(len(self), dtype=bool)
+        mask[:self.n_closed] = True
+        return mask
+
+
+def _market_totals(frame: PositionFrame, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-market PnL and mean clamped entry price over the given rows.
+
+    Returns (market codes, pnl, avg entry price), markets in first-appearance
+    order within the rows.
+    """
+    codes = frame.market[rows]
+    order = _first_appearance(codes)
+    pnl = np.bincount(codes, weights=frame.pnl[rows], minlength=frame.n_markets)[order]
+    price_sum = np.bincount(codes, weights=frame.price[rows], minlength=frame.n_markets)[order]
+    count = np.bincount(codes, minlength=frame.n_markets)[order]
+    return order, pnl, price_sum / count
+
+
+def _diff_win_rate(market_pnl: np.ndarray, avg_entry: np.ndarray) -> float:
+    """Difficulty-weighted win rate: difficulty = 1 - avg entry price."""
+    difficulty = 1 - avg_entry
+    total_difficulty = _ordered_sum(difficulty)
+    wins_difficulty = _ordered_sum(np.where(market_pnl > 0, difficulty, 0.0))
+    return (wins_difficulty / total_difficulty * 100) if total_difficulty > 0 else 0
+
+
+def _overall_metrics(frame: PositionFrame, current_balance: float) -> dict:
+    """Account-wide metrics over closed and open positions (reference calculate_metrics)."""
+    closed = frame.closed
+
+    # Trades: a market with several outcomes (hedge) is one trade; otherwise
+    # every position is its own trade. Visit them market by market, outcome
+    # by outcome, as the grouping dicts did.
+    outcomes_per_market = np.bincount(frame.pair_market, minlength=frame.n_markets)
+    order = np.lexsort((frame.pair, frame.market))
+    market = frame.market[order]
+    hedged = outcomes_per_market[market] > 1
+    group_pnl = np.bincount(market, weights=frame.pnl[order], minlength=frame.n_markets)
+    group_bought = np.bincount(market, weights=frame.bought[order], minlength=frame.n_markets)
+    group_resolved = np.bincount(market, weights=closed[order], minlength=frame.n_markets) > 0
+    first_of_market = np.ones(len(market), dtype=bool)
+    first_of_market[1:] = market[1:] != market[:-1]
+    keep = ~hedged | first_of_market
+
+    trade_pnl = np.where(hedged, group_pnl[market], frame.pnl[order])[keep]
+    trade_bought = np.where(hedged, group_bought[market], frame.bought[order])[keep]
+    resolved = np.where(hedged, group_resolved[market], closed[order])[keep]
+    win = resolved & (trade_pnl > 0)
+    loss = resolved & ~(trade_pnl > 0)
+
+    realized_pnl = _ordered_sum(np.where(resolved, trade_pnl, 0.0))
+    unrealized_pnl = _ordered_sum(np.where(resolved, 0.0, trade_pnl))
+    total_bought = _ordered_sum(np.where(resolved, trade_bought, 0.0))
+    gross_wins = _ordered_sum(np.where(win, trade_pnl, 0.0))
+    gross_losses = _ordered_sum(np.where(loss, np.abs(trade_pnl), 0.0))
+    win_count = int(win.sum())
+    loss_count = int(loss.sum())
+    active_count = int((~resolved).sum())
+
+    total_pnl = realized_pnl + unrealized_pnl
+    trade_count = win_count + loss_count
+
+    initial_capital = current_balance - total_pnl
+    if initial_capital > 0:
+        roi_all = (total_pnl / initial_capital * 100)
+    elif total_pnl > 0 and total_bought > 0:
+        roi_all = (total_pnl / total_bought * 100)
+    else:
+        roi_all = 0
+
+    win_rate_all = (win_count / trade_count * 100) if trade_count > 0 else 0
+
+    avg_trade_size = total_bought / trade_count if trade_count > 0 else 0
+    drawdown_base = max(current_balance - realized_pnl - unrealized_pnl, current_balance, avg_trade_size * 3, 1)
+    max_drawdown = _period_drawdown(frame, closed, drawdown_base)
+
+    unique_closed_markets = len(np.unique(frame.market[closed & frame.has_market]))
+    unique_open_markets = len(np.unique(frame.market[~closed & frame.has_market & (frame.current_value > 0)]))
+
+    if gross_losses > 0:
+        profit_factor_all = round(gross_wins / gross_losses, 2)
+    elif gross_wins > 0:
+        profit_factor_all = 10.0
+    else:
+        profit_factor_all = 0
+
+    return {
+        "realized_pnl": round(realized_pnl, 2),
+        "unrealized_pnl": round(unrealized_pnl, 2),
+        "total_pnl": round(total_pnl, 2),
+        "total_bought": round(total_bought, 2),
+        "roi_all": round(roi_all, 2),
+        "win_rate_all": round(win_rate_all, 2),
+        "win_count": win_count,
+        "loss_count": loss_count,
+        "trade_count": trade_count,
+        "active_count": active_count,
+        "open_count": unique_open_markets,
+        "closed_count": unique_closed_markets,
+        "max_drawdown": max_drawdown,
+        "gross_wins": round(gross_wins, 2),
+        "gross_losses": round(gross_losses, 2),
+        "profit_factor_all": profit_factor_all,
+    }
+
+
+def _period_drawdown(frame: PositionFrame, rows: np.ndarray, initial_balance: float) -> float:
+    """Drawdown over rows with a close timestamp, in timestamp order."""
+    rows = np.flatnonzero(rows & ~np.isnan(frame.timestamp))
+    rows = rows[np.argsort(frame.timestamp[rows], kind="stable")]
+    return _max_drawdown(frame.pnl[rows], initial_balance)
+
+
+def _period_metrics(frame: PositionFrame, rows: np.ndarray, current_balance: float) -> dict:
+    """Metrics of the closed positions resolved in one window (reference calculate_period_metrics)."""
+    if not rows.any():
+        return dict(_EMPTY_PERIOD)
+
+    _, market_pnl, avg_entry = _market_totals(frame, rows)
+    pnl = _ordered_sum(market_pnl)
+    volume = _ordered_sum(frame.bought[rows])
+
+    init_value = frame.init_value[rows]
+    profit_pct = np.divide(
+        frame.pnl[rows], init_value, out=np.zeros(len(init_value)), where=init_value > 0
+    ) * 100
+    sum_profit_pct = _ordered_sum(profit_pct)
+
+    won = market_pnl > 0
+    wins = int(won.sum())
+    trade_count = len(market_pnl)
+    win_rate = (wins / trade_count * 100) if trade_count > 0 else 0
+
+    gross_wins = _ordered_sum(market_pnl[won])
+    gross_losses_abs = _ordered_sum(np.abs(market_pnl[market_pnl < 0]))
+    if gross_losses_abs > 0:
+        profit_factor = round(gross_wins / gross_losses_abs, 2)
+    elif gross_wins > 0:
+        profit_factor = 10.0
+    else:
+        profit_factor = 0
+
+    diff_win_rate = _diff_win_rate(market_pnl, avg_entry)
+
+    estimated_start = current_balance - pnl
+    if estimated_start > 0:
+        roi = (pnl / estimated_start * 100)
+    elif pnl > 0 and volume > 0:
+        roi = (pnl / volume * 100)
+    else:
+        roi = 0
+
+    avg_position_size = volume / trade_count if trade_count > 0 else 0
+    initial_balance = max(current_balance - pnl, current_balance, avg_position_size * 3, 1)
+    drawdown = _period_drawdown(frame, rows, initial_balance)
+
+    return {
+        "pnl": round(pnl, 2),
+        "roi": round(roi, 2),
+        "volume": round(volume, 2),
+        "trade_count": trade_count,
+        "win_rate": round(win_rate, 2),
+        "wins": wins,
+        "losses": trade_count - wins,
+        "drawdown": drawdown,
+        "profit_factor": profit_factor,
+        "diff_win_rate": round(diff_win_rate, 2),
+        "sum_profit_pct": round(sum_profit_pct, 2),
+    }
+
+
+def _growth_quality(frame: PositionFrame, rows: np.ndarray, roi: float) -> int:
+    """Growth Quality (1-10): R² of the cumulative PnL curve (60%) and ROI (40%)."""
+    rows = np.flatnonzero(rows)
+    if len(rows) < 3:
+        return 0
+    rows = rows[np.argsort(frame.resolved_ts[rows], kind="stable")]
+
+    y = np.cumsum(frame.pnl[rows])
+    n = len(y)
+    x = np.arange(n, dtype=float)
+    sum_x = _ordered_sum(x)
+    sum_y = _ordered_sum(y)
+    sum_xy = _ordered_sum(x * y)
+    sum_xx = _ordered_sum(x * x)
+
+    mean_y = sum_y / n
+    ss_tot = _ordered_sum((y - mean_y) ** 2)
+    if ss_tot == 0:
+        return 7 if roi > 0 else 1
+
+    denom = n * sum_xx - sum_x * sum_x
+    if denom == 0:
+        return 1
+
+    slope = (n * sum_xy - sum_x * sum_y) / denom
+    intercept = (sum_y - slope * sum_x) / n
+
+    ss_res = _ordered_sum((y - (intercept + slope * x)) ** 2)
+    r2 = max(1 - ss_res / ss_tot, 0)
+
+    if slope <= 0:
+        return 1
+
+    return_score = min(max(roi / 20, 0), 1.0)
+    raw = r2 * 0.6 + return_score * 0.4
+    return max(1, min(10, round(raw * 9 + 1)))
+
+
+def _weekly_profit_rate(frame: PositionFrame) -> float:
+    """Share of active ISO weeks with positive PnL."""
+    rows = frame.closed & (frame.week >= 0)
+    if not rows.any():
+        return 0
+    _, week_index = np.unique(frame.week[rows], return_inverse=True)
+    week_pnl = np.bincount(week_index, weights=frame.pnl[rows])
+    return round(int((week_pnl > 0).sum()) / len(week_pnl) * 100, 2)
+
+
+def _avg_trades_per_day(frame: PositionFrame) -> float:
+    """Distinct markets per active day."""
+    closed = frame.closed
+    active_days = len(np.unique(frame.day[closed & (frame.day >= 0)]))
+    if not active_days:
+        return 0
+    unique_markets = len(np.unique(frame.market[closed & frame.has_market]))
+    return round(unique_markets / active_days, 2)
+
+
+def _median_profit_pct(frame: PositionFrame) -> Optional[float]:
+    """Median per-position profit % after IQR outlier removal (None if < 3)."""
+    rows = frame.closed & (frame.init_value > 0)
+    profit_pcts = np.sort(frame.pnl[rows] / frame.init_value[rows] * 100).tolist()
+    n = len(profit_pcts)
+    if n < 3:
+        return None
+
+    def interpolate(frac_idx: float) -> float:
+        lower = int(frac_idx)
+        upper = min(lower + 1, n - 1)
+        weight = frac_idx - lower
+        return profit_pcts[lower] * (1 - weight) + profit_pcts[upper] * weight
+
+    q1 = interpolate(n * 0.25)
+    q3 = interpolate(n * 0.75)
+    iqr = q3 - q1
+    lower_bound = q1 - 1.5 * iqr
+    upper_bound = q3 + 1.5 * iqr
+
+    filtered = [p for p in profit_pcts if lower_bound <= p <= upper_bound]
+    if not filtered:
+        return None
+    mid = len(filtered) // 2
+    if len(filtered) % 2 == 0:
+        median_val = (filtered[mid - 1] + filtered[mid]) / 2
+    else:
+        median_val = filtered[mid]
+    return round(median_val, 2)
+
+
+def compute_wallet_metrics(
+    frame: PositionFrame,
+    current_balance: float = 0,
+    now: Optional[datetime] = None,
+) -> dict:
+    """
+    Compute every wallet metric from one frame.
+
+    Args:
+        frame: Closed positions (including unredeemed losses) and open
+            positions with value
+        current_balance: Portfolio value used for ROI and drawdown bases
+        now: Reference time for the 7d / 30d windows (default: now, UTC)
+
+    Returns:
+        {"overall": calculate_metrics dict,
+         "periods": {days: calculate_period_metrics dict},
+         "growth_quality": {days: int},
+         "weekly_profit_rate", "diff_win_rate_all", "avg_trades_per_day",
+         "median_profit_pct", "best_trade_pct"}
+    """
+    now = now or datetime.now(timezone.utc)
+    closed = frame.closed
+    has_ts = closed & ~np.isnan(frame.resolved_ts)
+
+    periods = {}
+    growth_quality = {}
+    for days in PERIOD_DAYS:
+        cutoff_ts = (now - timedelta(days=days)).timestamp()
+        with np.errstate(invalid="ignore"):
+            rows = has_ts & (frame.resolved_ts >= cutoff_ts)
+        periods[days] = _period_metrics(frame, rows, current_balance)
+        # All-time growth quality covers every closed position with a resolve time
+        growth_quality[days] = _growth_quality(
+            frame, has_ts if days == PERIOD_DAYS[-1] else rows, periods[days]["roi"]
+        )
+
+    diff_win_rate_all = 0
+    best_trade_pct = None
+    with_market = closed & frame.has_market
+    if with_market.any():
+        _, market_pnl, avg_entry = _market_totals(frame, with_market)
+        diff_win_rate_all = round(_diff_win_rate(market_pnl, avg_entry), 2)
+        positive = market_pnl[market_pnl > 0]
+        total_positive = _ordered_sum(positive)
+        if len(positive) and total_positive > 0:
+            best_trade_pct = round(float(positive.max()) / total_positive * 100, 2)
+
+    return {
+        "overall": _overall_metrics(frame, current_balance),
+        "periods": periods,
+        "growth_quality": growth_quality,
+        "weekly_profit_rate": _weekly_profit_rate(frame),
+        "diff_win_rate_all": diff_win_rate_all,
+        "avg_trades_per_day": _avg_trades_per_day(frame),
+        "median_profit_pct": _median_profit_pct(frame),
+        "best_trade_pct": best_trade_pct,
+    }
+
+
+def pf_trend(profit_factor_30d: float, profit_factor_all: float) -> float | None:
+    """
+    Calculate PF trend = profit_factor_30d / profit_factor_all.
+
+    > 1.0 = improving edge (recent PF better than historical)
+    < 1.0 = decaying edge (recent PF worse than historical)
+    = 1.0 = stable
+
+    Returns None if either PF is 0 or unavailable.
+    """
+    if not profit_factor_all or profit_factor_all <= 0:
+        return None
+    if profit_factor_30d is None or profit_factor_30d < 0:
+        return None
+    return round(profit_factor_30d / profit_factor_all, 2)
+
+
+def copy_score(
+    profit_factor_30d: float,
+    profit_factor_all: float,
+    drawdown_30d: float,
+    diff_win_rate_30d: float,
+    weekly_profit_rate: float,
+    trade_count_all: int,
+    median_profit_pct: float | None = None,
+    avg_trades_per_day: float | None = None,
+    overall_pnl: float = 0,
+    best_trade_pct: float | None = None,
+    pf_trend: float | None = None,
+) -> int:
+    """
+    Calculate composite copy-trade score (0-100).
+
+    5-pillar formula:
+    - Edge (25%): Blended Profit Factor (70% 30d + 30% all-time), normalized 1.2-3.0
+    - Skill (20%): Difficulty-weighted win rate, normalized 45%-75%
+    - Consistency (20%): Weekly Profit Rate, normalized 40%-85%
+    - Risk (15%): Inverse drawdown, DD 5%-25%
+    - Discipline (10%): Inverse best_trade_pct, penalizes one-hit wonders
+
+    Multiplied by:
+    - Confidence: min(1, trade_count_all / 150) — stricter than before
+    - Decay: pf_trend ratio clamped to [0.5, 1.0] — penalizes fading edge
+    """
+    # Hard filters — all must pass or score = 0
+    if overall_pnl < 0:
+        return 0
+    if trade_count_all < 40:
+        return 0
+    if profit_factor_30d < 1.2:
+        return 0
+    if median_profit_pct is None or median_profit_pct < 5.0:
+        return 0
+    if avg_trades_per_day is not None and (avg_trades_per_day < 0.5 or avg_trades_per_day > 25):
+        return 0
+
+    # Pillar 1: Edge (25%) — Blended PF (70% recent + 30% all-time)
+    blended_pf = profit_factor_30d * 0.7 + (profit_factor_all or profit_factor_30d) * 0.3
+    edge_score = min(max((blended_pf - 1.2) / (3.0 - 1.2), 0), 1.0)
+
+    # Pillar 2: Skill (20%) — Difficulty-weighted win rate 45% → 0, 75%+ → 1.0
+    skill_score = min(max((diff_win_rate_30d - 45) / (75 - 45), 0), 1.0)
+
+    # Pillar 3: Consistency (20%) — Weekly profit rate 40% → 0, 85%+ → 1.0
+    consistency_score = min(max((weekly_profit_rate - 40) / (85 - 40), 0), 1.0)
+
+    # Pillar 4: Risk (15%) — Inverse drawdown: DD 5% → 1.0, DD 25%+ → 0
+    if drawdown_30d <= 0:
+        risk_score = 1.0
+    else:
+        risk_score = min(max((25 - drawdown_30d) / (25 - 5), 0), 1.0)
+
+    # Pillar 5: Discipline (10%) — Penalizes one-hit wonders
+    # best_trade_pct = 15% → full score, 85%+ → zero
+    if best_trade_pct is not None and best_trade_pct > 0:
+        discipline_score = min(max((1 - best_trade_pct / 100 - 0.15) / (0.85 - 0.15), 0), 1.0)
+    else:
+        discipline_score = 0.5  # Unknown = neutral
+
+    # Weighted sum
+    raw_score = (
+        edge_score * 0.25 +
+        skill_score * 0.20 +
+        consistency_score * 0.20 +
+        risk_score * 0.15 +
+        discipline_score * 0.10
+    ) * 100
+
+    # Confidence multiplier — stricter: 150 trades for full confidence
+    confidence = min(1.0, trade_count_all / 150)
+
+    # Decay multiplier — penalizes fading edge
+    if pf_trend is not None and pf_trend > 0:
+        decay = max(0.5, min(pf_trend, 1.0))
+    else:
+        decay = 1.0  # Unknown = no penalty
+
+    return min(round(raw_score * confidence * decay), 100)
+
+
+def pack_positions(closed: list[dict], open_positions: list[dict]) -> bytes:
+    """
+    Serialize a wallet's positions for a metrics worker process.
+
+    marshal handles the plain JSON-shaped lists several times faster than
+    pickle and needs no projection step; the payload only ever travels
+    between processes of the same interpreter.
+    """
+    return marshal.dumps((closed, open_positions))
+
+
+def wallet_metrics_result(
+    closed: list[dict],
+    open_positions: list[dict],
+    current_balance: float = 0,
+    now: Optional[datetime] = None,
+) -> dict:
+    """
+    compute_wallet_metrics plus the PF trend and copy score derived from it.
+
+    Everything _process_wallet needs from a wallet's positions, in one call
+    that can run inline or in a worker process.
+    """
+    result = compute_wallet_metrics(
+        PositionFrame.from_positions(closed, open_positions), current_balance, now
+    )
+    overall = result["overall"]
+    metrics_30d = result["periods"][30]
+    result["pf_trend"] = pf_trend(
+        metrics_30d.get("profit_factor", 0),
+        overall.get("profit_factor_all", 0),
+    )
+    result["copy_score"] = copy_score(
+        profit_factor_30d=metrics_30d.get("profit_factor", 0),
+        profit_factor_all=overall.get("profit_factor_all", 0),
+        drawdown_30d=metrics_30d["drawdown"],
+        diff_win_rate_30d=metrics_30d.get("diff_win_rate", 0),
+        weekly_profit_rate=result["weekly_profit_rate"],
+        trade_count_all=overall.get("trade_count", 0),
+        median_profit_pct=result["median_profit_pct"],
+        avg_trades_per_day=result["avg_trades_per_day"],
+        overall_pnl=overall.get("total_pnl", 0),
+        best_trade_pct=result["best_trade_pct"],
+        pf_trend=result["pf_trend"],
+    )
+    return result
+
+
+def wallet_metrics_job(payload: bytes, current_balance: float, now_ts: float) -> tuple[dict, float]:
+    """
+    Worker-process entry point: unpack a pack_positions payload and compute.
+
+    Returns (wallet_metrics_result dict, seconds spent in the worker).
+    """
+    start = time.perf_counter()
+    closed, open_positions = marshal.loads(payload)
+    result = wallet_metrics_result(
+        closed, open_positions, current_balance, datetime.fromtimestamp(now_ts, timezone.utc)
+    )
+    return result, time.perf_counter() - start
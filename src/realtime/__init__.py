@@ -1,6 +1,7 @@
 """Real-time trade monitoring module."""
 
 from .rtds_client import RTDSClient, RTDSMessage
+from .rtds_pool import RTDSConnectionPool
 from .trade_processor import TradeProcessor
 from .wallet_discovery import WalletDiscoveryProcessor
 from .service import TradeMonitorService
@@ -8,6 +9,7 @@ from .service import TradeMonitorService
 __all__ = [
     "RTDSClient",
     "RTDSMessage",
+    "RTDSConnectionPool",
     "TradeProcessor",
     "WalletDiscoveryProcessor",
     "TradeMonitorService",
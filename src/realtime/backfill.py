@@ -0,0 +1,210 @@
+"""
+Post-reconnect gap backfill for the RTDS trade stream.
+
+While the socket is down (including the reconnect backoff) trades are
+never delivered by RTDS. After reconnecting, GapBackfiller pages the
+data-api /trades endpoint for the disconnect window and merges the
+recovered trades into the live stream, deduplicated by trade_id and
+tagged as backfilled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from ..scrapers.data_api import PolymarketDataAPI
+from .dedup import RecentTradeIndex
+
+if TYPE_CHECKING:
+    from .rtds_client import RTDSMessage
+
+logger = logging.getLogger(__name__)
+
+
+class GapBackfiller:
+    """
+    Tracks disconnect windows and recovers their trades from the data-api.
+
+    Usage:
+        backfiller = GapBackfiller(deliver=dispatch, parse=client._parse_trade)
+        backfiller.note_live(trade)            # every live trade; False = already backfilled
+        backfiller.mark_disconnected(last_message_time)
+        backfiller.mark_connected()            # starts the backfill task
+    """
+
+    SAFETY_MARGIN_SECONDS = 5  # widen the window for clock skew / second-resolution timestamps
+    MAX_GAP_SECONDS = 1800  # older parts of longer gaps are not recovered
+    MIN_USD = 50  # same threshold as storage; smaller trades are not worth the API budget
+
+    def __init__(
+        self,
+        deliver: Callable[[RTDSMessage], Awaitable[None]],
+        parse: Callable[[dict], Optional[RTDSMessage]],
+        min_usd: float = MIN_USD,
+    ):
+        """
+        Args:
+            deliver: Async callable that feeds a trade into the live stream
+            parse: Trade parser for data-api /trades rows
+            min_usd: Only recover trades at or above this USD value
+        """
+        self.deliver = deliver
+        self.parse = parse
+        self.min_usd = min_usd
+
+        # Live and backfilled trade_ids, kept long enough to cover both
+        # edges of the longest gap we backfill
+        self._seen = RecentTradeIndex(
+            window_seconds=self.MAX_GAP_SECONDS + 600,
+            bucket_seconds=60,
+            max_entries=1_000_000,
+        )
+
+        self._api: Optional[PolymarketDataAPI] = None
+        self._gap_start: Optional[float] = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # Stats
+        self._gaps = 0
+        self._gaps_backfilled = 0
+        self._gaps_incomplete = 0
+        self._trades_recovered = 0
+        self._already_live = 0
+        self._live_duplicates = 0
+        self._errors = 0
+        self._last_gap_seconds = 0.0
+        self._last_latency_ms = 0.0
+        self._latency_ms_total = 0.0
+
+    def note_live(self, trade: RTDSMessage) -> bool:
+        """
+        Record a live trade.
+
+        Returns:
+            False if the trade was already delivered by a backfill
+        """
+        if trade.trade_id in self._seen:
+            self._live_duplicates += 1
+            return False
+        self._seen.add(trade.trade_id)
+        return True
+
+    def mark_disconnected(self, last_message_time: Optional[datetime] = None) -> None:
+        """
+        Open a gap (no-op if one is already open, e.g. failed reconnect attempts).
+
+        Args:
+            last_message_time: Last time data arrived; a stale connection
+                stops delivering long before it is detected as closed
+        """
+        if self._gap_start is not None:
+            return
+        self._gap_start = (
+            last_message_time.timestamp() if last_message_time else time.time()
+        )
+
+    def mark_connected(self) -> None:
+        """Close the open gap (if any) and backfill it in the background."""
+        if self._gap_start is None:
+            return
+        gap_start, gap_end = self._gap_start, time.time()
+        self._gap_start = None
+        self._gaps += 1
+
+        task = asyncio.create_task(self._backfill(gap_start, gap_end))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _backfill(self, gap_start: float, gap_end: float) -> None:
+        """Fetch, dedupe and deliver the trades of one gap."""
+        started = time.monotonic()
+        gap_seconds = gap_end - gap_start
+        self._last_gap_seconds = gap_seconds
+
+        since = max(gap_start, gap_end - self.MAX_GAP_SECONDS) - self.SAFETY_MARGIN_SECONDS
+        until = gap_end + self.SAFETY_MARGIN_SECONDS
+        complete = since <= gap_start - self.SAFETY_MARGIN_SECONDS
+
+        try:
+            if self._api is None:
+                self._api = PolymarketDataAPI()
+            rows, fetched_all = await self._api.get_recent_trades(
+                since, until, min_usd=self.min_usd
+            )
+            complete = complete and fetched_all
+
+            recovered = 0
+            # Oldest first, like the live stream
+            for row in reversed(rows):
+                trade = self.parse(row)
+                if trade is None:
+                    continue
+                if trade.trade_id in self._seen:
+                    self._already_live += 1
+                    continue
+                self._seen.add(trade.trade_id)
+                trade.backfilled = True
+                trade.raw_frame = json.dumps(row)
+                trade.received_at = time.monotonic()
+                await self.deliver(trade)
+                recovered += 1
+
+            latency_ms = (time.monotonic() - started) * 1000
+            self._trades_recovered += recovered
+            self._gaps_backfilled += 1
+            self._last_latency_ms = latency_ms
+            self._latency_ms_total += latency_ms
+            if not complete:
+                self._gaps_incomplete += 1
+
+            logger.info(
+                f"Backfilled RTDS gap of {gap_seconds:.0f}s: {recovered} trades recovered "
+                f"({len(rows)} fetched) in {latency_ms:.0f}ms"
+                + ("" if complete else " [incomplete]")
+            )
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Gap backfill error: {type(e).__name__}: {e}")
+            self._errors += 1
+
+    async def stop(self) -> None:
+        """Cancel in-flight backfills and close the API session."""
+        for task in list(self._tasks):
+            task.cancel()
+        for task in list(self._tasks):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._api:
+            await self._api.__aexit__(None, None, None)
+            self._api = None
+
+    @property
+    def stats(self) -> dict:
+        """Get backfill statistics."""
+        return {
+            "gap_open": self._gap_start is not None,
+            "gaps": self._gaps,
+            "gaps_backfilled": self._gaps_backfilled,
+            "gaps_incomplete": self._gaps_incomplete,
+            "trades_recovered": self._trades_recovered,
+            "already_live": self._already_live,
+            "live_duplicates": self._live_duplicates,
+            "errors": self._errors,
+            "in_flight": len(self._tasks),
+            "last_gap_seconds": round(self._last_gap_seconds, 1),
+            "last_latency_ms": round(self._last_latency_ms, 1),
+            "avg_latency_ms": (
+                round(self._latency_ms_total / self._gaps_backfilled, 1)
+                if self._gaps_backfilled
+                else 0
+            ),
+        }
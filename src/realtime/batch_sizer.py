@@ -0,0 +1,146 @@
+"""
+Adaptive batch size and linger time for the regular trade lane.
+
+The batch size follows AIMD on observed flush latency: while flushes
+finish within TARGET_FLUSH_SECONDS and batches fill up before their linger
+expires, the size grows by a fixed step; a slow or failed flush halves it.
+The linger time is the expected time to fill a batch at the current
+(EWMA) arrival rate, clamped to [LINGER_MIN_SECONDS, LINGER_MAX_SECONDS],
+so a burst flushes full batches quickly and a quiet feed still flushes
+within the old 0.5s timeout.
+"""
+
+import time
+from typing import Optional
+
+
+class BatchSizeDistribution:
+    """Counts of flushed batch sizes in fixed buckets."""
+
+    BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500)  # upper bounds, inclusive
+
+    def __init__(self):
+        self._counts = [0] * (len(self.BUCKETS) + 1)
+        self._batches = 0
+        self._records = 0
+
+    def record(self, size: int) -> None:
+        """Count one batch."""
+        for index, bound in enumerate(self.BUCKETS):
+            if size <= bound:
+                break
+        else:
+            index = len(self.BUCKETS)
+        self._counts[index] += 1
+        self._batches += 1
+        self._records += size
+
+    def summary(self) -> dict:
+        """Batch count, mean size and non-empty buckets."""
+        labels = []
+        low = 1
+        for bound in self.BUCKETS:
+            labels.append(str(bound) if low == bound else f"{low}-{bound}")
+            low = bound + 1
+        labels.append(f">{self.BUCKETS[-1]}")
+        return {
+            "batches": self._batches,
+            "avg_size": round(self._records / self._batches, 1) if self._batches else 0,
+            "sizes": {label: count for label, count in zip(labels, self._counts) if count},
+        }
+
+
+class AdaptiveBatchSizer:
+    """
+    AIMD batch sizing plus arrival-rate linger.
+
+    Usage:
+        sizer = AdaptiveBatchSizer()
+        sizer.record_arrival()                      # per queued trade
+        if len(batch) >= sizer.batch_size or age >= sizer.linger_seconds: flush
+        sizer.record_flush(size, seconds, ok=True)  # from the writer callback
+    """
+
+    MIN_BATCH_SIZE = 10
+    MAX_BATCH_SIZE = 500
+    INITIAL_BATCH_SIZE = 50
+
+    ADDITIVE_STEP = 10
+    DECREASE_FACTOR = 0.5
+    TARGET_FLUSH_SECONDS = 0.25  # flush latency above this backs off
+
+    LINGER_MIN_SECONDS = 0.02
+    LINGER_MAX_SECONDS = 0.5
+
+    RATE_WINDOW_SECONDS = 1.0  # arrival counts are folded into the EWMA per window
+    RATE_ALPHA = 0.3
+
+    def __init__(self, initial_batch_size: Optional[int] = None):
+        """
+        Args:
+            initial_batch_size: Starting batch size (default INITIAL_BATCH_SIZE)
+        """
+        self.batch_size = initial_batch_size or self.INITIAL_BATCH_SIZE
+        self.linger_seconds = self.LINGER_MAX_SECONDS
+
+        self._rate = 0.0  # EWMA arrivals per second
+        self._window_start = time.monotonic()
+        self._window_arrivals = 0
+
+        # Stats
+        self._increases = 0
+        self._decreases = 0
+
+    def record_arrival(self) -> None:
+        """Count one trade entering the lane."""
+        self._window_arrivals += 1
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= self.RATE_WINDOW_SECONDS:
+            rate = self._window_arrivals / elapsed
+            self._rate = rate if not self._rate else self._rate + self.RATE_ALPHA * (rate - self._rate)
+            self._window_start = now
+            self._window_arrivals = 0
+            self._update_linger()
+
+    def _update_linger(self) -> None:
+        fill_seconds = self.batch_size / self._rate if self._rate else self.LINGER_MAX_SECONDS
+        self.linger_seconds = min(self.LINGER_MAX_SECONDS, max(self.LINGER_MIN_SECONDS, fill_seconds))
+
+    def record_flush(self, size: int, seconds: float, ok: bool = True) -> None:
+        """
+        Adjust the batch size from one completed flush.
+
+        Args:
+            size: Records in the flushed batch
+            seconds: Write duration
+            ok: False if the write failed
+        """
+        if not ok or seconds > self.TARGET_FLUSH_SECONDS:
+            new_size = max(self.MIN_BATCH_SIZE, int(self.batch_size * self.DECREASE_FACTOR))
+            if new_size < self.batch_size:
+                self._decreases += 1
+        elif size >= self.batch_size:
+            # Batch filled before its linger expired: arrivals can feed a larger one
+            new_size = min(self.MAX_BATCH_SIZE, self.batch_size + self.ADDITIVE_STEP)
+            if new_size > self.batch_size:
+                self._increases += 1
+        else:
+            return
+        self.batch_size = new_size
+        self._update_linger()
+
+    @property
+    def arrival_rate(self) -> float:
+        return self._rate
+
+    @property
+    def stats(self) -> dict:
+        """Get sizing statistics."""
+        return {
+            "batch_size": self.batch_size,
+            "linger_ms": round(self.linger_seconds * 1000, 1),
+            "arrival_rate": round(self._rate, 1),
+            "increases": self._increases,
+            "decreases": self._decreases,
+        }
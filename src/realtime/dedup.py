@@ -0,0 +1,97 @@
+"""
+Bounded, time-bucketed index of recently seen trade IDs.
+
+Used to merge and deduplicate trade streams that can deliver the same
+trade more than once (parallel RTDS connections, gap backfill).
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+
+class RecentTradeIndex:
+    """
+    Map of trade_id -> value for trades seen within a sliding time window.
+
+    Values live in one dict (O(1) lookup); trade_ids are also appended to
+    fixed-width time buckets so whole buckets expire at once, with no
+    per-entry timestamps. Memory is bounded by max_entries: when exceeded,
+    the oldest bucket is expired early.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300,
+        bucket_seconds: float = 30,
+        max_entries: int = 500_000,
+        on_expire: Optional[Callable[[dict], None]] = None,
+    ):
+        """
+        Args:
+            window_seconds: How long a trade_id is remembered
+            bucket_seconds: Width of each time bucket
+            max_entries: Hard cap on remembered trade_ids
+            on_expire: Optional callback receiving each expired bucket's dict
+        """
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self.on_expire = on_expire
+
+        self._entries: dict[str, Any] = {}
+        # (bucket_number, [trade_id, ...]), oldest first
+        self._buckets: deque[tuple[int, list[str]]] = deque()
+        self._forced_expiries = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, trade_id: str) -> bool:
+        return trade_id in self._entries
+
+    def get(self, trade_id: str) -> Any:
+        """Return the stored value for a recently seen trade_id, or None."""
+        return self._entries.get(trade_id)
+
+    def add(self, trade_id: str, value: Any = True, now: Optional[float] = None) -> None:
+        """Remember a trade_id (value must not be None)."""
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+
+        if trade_id in self._entries:
+            self._entries[trade_id] = value
+            return
+
+        bucket_number = int(now // self.bucket_seconds)
+        if not self._buckets or self._buckets[-1][0] != bucket_number:
+            self._buckets.append((bucket_number, []))
+        self._buckets[-1][1].append(trade_id)
+        self._entries[trade_id] = value
+
+        while len(self._entries) > self.max_entries and len(self._buckets) > 1:
+            self._expire_oldest()
+            self._forced_expiries += 1
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """Drop buckets that fell out of the window."""
+        now = time.monotonic() if now is None else now
+        oldest_allowed = int((now - self.window_seconds) // self.bucket_seconds)
+        while self._buckets and self._buckets[0][0] < oldest_allowed:
+            self._expire_oldest()
+
+    def _expire_oldest(self) -> None:
+        _, trade_ids = self._buckets.popleft()
+        pop = self._entries.pop
+        expired = {trade_id: pop(trade_id) for trade_id in trade_ids}
+        if self.on_expire:
+            self.on_expire(expired)
+
+    @property
+    def stats(self) -> dict:
+        """Get index statistics."""
+        return {
+            "entries": len(self._entries),
+            "buckets": len(self._buckets),
+            "forced_expiries": self._forced_expiries,
+        }
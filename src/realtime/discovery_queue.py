@@ -0,0 +1,236 @@
+"""
+Priority scheduler for wallet discovery.
+
+Wallets waiting for analysis are ordered by a priority built from the
+triggering trade's size, whether the wallet is new or due for
+re-analysis (and how stale its last analysis is), plus an aging term
+that grows linearly while it waits, so low-value wallets are delayed but
+never starve.
+
+Aging is free: effective priority = base + AGING_PER_MINUTE * waited
+minutes, and since every entry ages at the same rate, ordering by
+base - AGING_PER_MINUTE * enqueued_minute gives the same order at any
+time. Entries therefore sit in plain heaps with fixed keys: a max-heap for
+the workers and a min-heap for evicting the lowest entry when the queue
+is full. Updates (the wallet traded again) and evictions invalidate the
+old heap entries lazily.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Optional
+
+
+class QueuedWallet:
+    """A queued wallet and the inputs of its priority."""
+
+    __slots__ = ("address", "usd_value", "is_new", "stale_days", "enqueued_at", "key", "live")
+
+    def __init__(self, address: str, usd_value: float, is_new: bool, stale_days: float, enqueued_at: float):
+        self.address = address
+        self.usd_value = usd_value
+        self.is_new = is_new
+        self.stale_days = stale_days
+        self.enqueued_at = enqueued_at
+        self.key = 0.0
+        self.live = True
+
+
+class DiscoveryQueue:
+    """
+    Bounded priority queue of wallets to analyze.
+
+    Usage:
+        queue = DiscoveryQueue(capacity=5000)
+        queue.put(addr, usd_value, is_new=True)            # or raises priority if queued
+        wallet = await queue.get()                         # highest priority first
+        queue.requeue(wallet)                              # put back with its original priority
+    """
+
+    CAPACITY = 5000
+
+    SIZE_WEIGHT = 10.0  # per factor of 10 in trade USD value ($50 -> 17, $50K -> 47)
+    NEW_WALLET_BONUS = 20.0
+    STALENESS_WEIGHT = 2.0  # per day since the last analysis
+    MAX_STALE_DAYS = 30
+    AGING_PER_MINUTE = 1.0  # a $50 wallet overtakes a fresh $50K one after ~30 min
+
+    def __init__(self, capacity: int = CAPACITY):
+        """
+        Args:
+            capacity: Maximum queued wallets; beyond it the lowest priority is evicted
+        """
+        self.capacity = capacity
+        self._entries: dict[str, QueuedWallet] = {}
+        self._max_heap: list[tuple[float, int, QueuedWallet]] = []  # (-key, seq, entry)
+        self._min_heap: list[tuple[float, int, QueuedWallet]] = []  # (key, seq, entry)
+        self._seq = itertools.count()
+        self._not_empty = asyncio.Event()
+
+        # Stats
+        self._queued = 0
+        self._updated = 0
+        self._evicted = 0
+        self._rejected = 0
+        self._dequeued = 0
+        self._wait_seconds_total = 0.0
+        self._max_wait_seconds = 0.0
+
+    def priority(self, usd_value: float, is_new: bool, stale_days: float) -> float:
+        """Base priority of a wallet (before aging)."""
+        return (
+            self.SIZE_WEIGHT * math.log10(max(usd_value, 1.0))
+            + (self.NEW_WALLET_BONUS if is_new else 0.0)
+            + self.STALENESS_WEIGHT * min(stale_days, self.MAX_STALE_DAYS)
+        )
+
+    def _key(self, entry: QueuedWallet) -> float:
+        base = self.priority(entry.usd_value, entry.is_new, entry.stale_days)
+        return base - self.AGING_PER_MINUTE * entry.enqueued_at / 60
+
+    def _push(self, entry: QueuedWallet) -> None:
+        entry.key = self._key(entry)
+        seq = next(self._seq)
+        heapq.heappush(self._max_heap, (-entry.key, seq, entry))
+        heapq.heappush(self._min_heap, (entry.key, seq, entry))
+        self._entries[entry.address] = entry
+
+    def _retire(self, entry: QueuedWallet) -> None:
+        """Remove an entry (its heap slots are skipped later)."""
+        entry.live = False
+        del self._entries[entry.address]
+        # Rebuild once dead slots dominate the heaps
+        if len(self._max_heap) > 2 * len(self._entries) + 64:
+            self._max_heap = [item for item in self._max_heap if item[2].live]
+            self._min_heap = [item for item in self._min_heap if item[2].live]
+            heapq.heapify(self._max_heap)
+            heapq.heapify(self._min_heap)
+
+    def _lowest(self) -> Optional[QueuedWallet]:
+        while self._min_heap:
+            key, _, entry = self._min_heap[0]
+            if entry.live and entry.key == key:
+                return entry
+            heapq.heappop(self._min_heap)
+        return None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._entries
+
+    def qsize(self) -> int:
+        return len(self._entries)
+
+    def put(
+        self,
+        address: str,
+        usd_value: float,
+        is_new: bool,
+        stale_days: float = 0.0,
+        now: Optional[float] = None,
+    ) -> bool:
+        """
+        Queue a wallet, or raise its priority if it is already queued.
+
+        Args:
+            address: Wallet address (lowercase)
+            usd_value: Triggering trade USD value
+            is_new: Never analyzed before
+            stale_days: Days since the last analysis (re-analysis only)
+            now: Current time (default: time.time())
+
+        Returns:
+            True if the wallet is queued (new or updated), False if it was
+            rejected because the queue is full of higher-priority wallets
+        """
+        now = now if now is not None else time.time()
+        entry = self._entries.get(address)
+        if entry is not None:
+            # Traded again while waiting: keep its age, take the larger trade
+            if usd_value > entry.usd_value:
+                entry.usd_value = usd_value
+                old_key = entry.key
+                self._push(entry)
+                if entry.key != old_key:
+                    self._updated += 1
+            return True
+
+        return self._insert(QueuedWallet(address, usd_value, is_new, stale_days, now))
+
+    def requeue(self, wallet: QueuedWallet) -> bool:
+        """
+        Put a dequeued wallet back with its original priority inputs and age.
+
+        Returns:
+            True if the wallet is queued, False if the queue is now full of
+            higher-priority wallets
+        """
+        entry = self._entries.get(wallet.address)
+        if entry is not None:
+            # Queued again meanwhile: keep the earlier age and the larger trade
+            entry.enqueued_at = min(entry.enqueued_at, wallet.enqueued_at)
+            entry.usd_value = max(entry.usd_value, wallet.usd_value)
+            self._push(entry)
+            return True
+
+        # A fresh entry: heap slots of the dequeued one may still be around
+        return self._insert(QueuedWallet(
+            wallet.address, wallet.usd_value, wallet.is_new, wallet.stale_days, wallet.enqueued_at
+        ))
+
+    def _insert(self, entry: QueuedWallet) -> bool:
+        if len(self._entries) >= self.capacity:
+            lowest = self._lowest()
+            if lowest is None or self._key(entry) <= lowest.key:
+                self._rejected += 1
+                return False
+            self._retire(lowest)
+            self._evicted += 1
+
+        self._push(entry)
+        self._queued += 1
+        self._not_empty.set()
+        return True
+
+    def get_nowait(self, now: Optional[float] = None) -> QueuedWallet:
+        """Remove and return the highest-priority wallet."""
+        while self._max_heap:
+            neg_key, _, entry = heapq.heappop(self._max_heap)
+            if entry.live and entry.key == -neg_key:
+                self._retire(entry)
+                waited = (now if now is not None else time.time()) - entry.enqueued_at
+                self._dequeued += 1
+                self._wait_seconds_total += waited
+                self._max_wait_seconds = max(self._max_wait_seconds, waited)
+                return entry
+        raise asyncio.QueueEmpty
+
+    async def get(self) -> QueuedWallet:
+        """Highest-priority wallet, waiting if none is queued."""
+        while not self._entries:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    @property
+    def stats(self) -> dict:
+        """Get queue statistics."""
+        now = time.time()
+        oldest = min((e.enqueued_at for e in self._entries.values()), default=now)
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "queued": self._queued,
+            "updated": self._updated,
+            "evicted": self._evicted,
+            "rejected": self._rejected,
+            "dequeued": self._dequeued,
+            "avg_wait_seconds": round(self._wait_seconds_total / self._dequeued, 1) if self._dequeued else 0,
+            "max_wait_seconds": round(self._max_wait_seconds, 1),
+            "oldest_wait_seconds": round(now - oldest, 1),
+        }
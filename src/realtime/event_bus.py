@@ -0,0 +1,140 @@
+"""
+In-process publish/subscribe bus between pipeline stages.
+
+TradeProcessor publishes each enriched trade it stores; consumers such
+as the InsiderScorer subscribe instead of polling live_trades. Every
+subscription owns a bounded TradeRingBuffer, so a slow subscriber applies
+its own overflow policy without affecting other subscribers:
+
+- block: publish() waits for the subscriber (backpressure on the publisher)
+- drop_oldest / drop_below_usd: publish() never waits; when the buffer is
+  full, events are rejected or older ones evicted, and the subscriber can
+  see how many it lost in Subscription.evicted
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+
+from .ring_buffer import OVERFLOW_BLOCK, TradeRingBuffer
+
+logger = logging.getLogger(__name__)
+
+TOPIC_TRADES = "trades"
+
+
+@dataclass(slots=True)
+class TradeEvent:
+    """An enriched live_trades record as published by the processor."""
+
+    record: dict
+    usd_value: float  # read by the drop_below_usd overflow policy
+    published_at: float = field(default_factory=time.monotonic)
+
+
+class Subscription:
+    """A subscriber's bounded queue on one topic."""
+
+    def __init__(self, topic: str, name: str, buffer: TradeRingBuffer):
+        self.topic = topic
+        self.name = name
+        self.buffer = buffer
+        self.created_at = time.time()  # wall clock, for catch-up boundaries
+
+    async def get(self):
+        """Next event, waiting if none is buffered."""
+        return await self.buffer.get()
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    @property
+    def evicted(self) -> int:
+        """Buffered events evicted to make room (not counting below-threshold ones)."""
+        return self.buffer.evicted
+
+    @property
+    def stats(self) -> dict:
+        """Get subscription statistics."""
+        return {"topic": self.topic, **self.buffer.stats}
+
+
+class EventBus:
+    """
+    Topic-based fan-out to bounded subscriptions.
+
+    Usage:
+        bus = EventBus()
+        sub = bus.subscribe(TOPIC_TRADES, "insider_scorer", capacity=5000)
+        await bus.publish(TOPIC_TRADES, TradeEvent(record, usd_value))
+        event = await sub.get()
+    """
+
+    DEFAULT_CAPACITY = 10000
+
+    def __init__(self):
+        self._subscriptions: dict[str, list[Subscription]] = {}
+        self._published: dict[str, int] = {}
+        self._dropped = 0
+
+    def subscribe(
+        self,
+        topic: str,
+        name: str,
+        capacity: int = DEFAULT_CAPACITY,
+        overflow_policy: str = OVERFLOW_BLOCK,
+        drop_below_usd: float = 0.0,
+    ) -> Subscription:
+        """
+        Subscribe to a topic.
+
+        Args:
+            topic: Topic name (e.g. TOPIC_TRADES)
+            name: Subscriber name (stats / logs)
+            capacity: Events buffered before the overflow policy applies
+            overflow_policy: Ring buffer overflow policy; OVERFLOW_BLOCK makes
+                publish() wait for this subscriber (backpressure), the
+                others drop or evict events instead
+            drop_below_usd: USD threshold for the drop_below_usd policy
+        """
+        subscription = Subscription(topic, name, TradeRingBuffer(capacity, overflow_policy, drop_below_usd))
+        self._subscriptions.setdefault(topic, []).append(subscription)
+        logger.info(f"Event bus: {name} subscribed to '{topic}' (capacity={capacity}, policy={overflow_policy})")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription (buffered events are discarded)."""
+        subscribers = self._subscriptions.get(subscription.topic, [])
+        if subscription in subscribers:
+            subscribers.remove(subscription)
+
+    def has_subscribers(self, topic: str) -> bool:
+        """True if anyone listens on the topic (publishers may skip building events)."""
+        return bool(self._subscriptions.get(topic))
+
+    async def publish(self, topic: str, event) -> int:
+        """
+        Deliver an event to every subscriber of a topic.
+
+        Returns:
+            Number of subscriptions that buffered the event
+        """
+        delivered = 0
+        for subscription in self._subscriptions.get(topic, ()):
+            if await subscription.buffer.put(event):
+                delivered += 1
+            else:
+                self._dropped += 1
+        self._published[topic] = self._published.get(topic, 0) + 1
+        return delivered
+
+    @property
+    def stats(self) -> dict:
+        """Get bus statistics."""
+        return {
+            "published": dict(self._published),
+            "dropped": self._dropped,
+            "subscriptions": {
+                s.name: s.stats for subscribers in self._subscriptions.values() for s in subscribers
+            },
+        }
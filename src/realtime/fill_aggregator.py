@@ -0,0 +1,209 @@
+"""
+Collapse multi-fill orders into logical trades.
+
+A large order usually reaches RTDS as several fills that share one
+transactionHash. Processed one by one, each fill is enriched, stored and
+scored separately: volume is inflated, session counts see many small
+trades, and a $20k order can stay under the whale threshold.
+
+FillAggregator sits between the RTDS client and the trade processor and
+merges fills with the same (tx_hash, trader, condition, asset, side) that
+arrive within WINDOW_SECONDS of the first one (a processing-time
+watermark). The merged trade keeps the first fill's trade_id, executed_at
+and receive time, and carries the total size and USD value, the
+volume-weighted average price and fill_count.
+
+A fill arriving after its group was emitted (up to LATE_SECONDS later)
+re-emits the cumulative trade under the same trade_id and executed_at.
+The trade processor recognizes the trade_id and adds only the growth to its
+session and market aggregates (discovery and the event bus are skipped),
+and the live_trades writers update the earlier row, moving it to the
+important tier if the re-emit made it a whale.
+
+Optional: the service enables it with FILL_AGGREGATION_WINDOW_MS.
+"""
+
+import asyncio
+import dataclasses
+import logging
+import time
+from typing import Awaitable, Callable
+
+from .dedup import RecentTradeIndex
+from .rtds_client import RTDSMessage
+
+logger = logging.getLogger(__name__)
+
+
+class _FillGroup:
+    """Running totals of one logical trade."""
+
+    __slots__ = ("first", "size", "usd_value", "fill_count", "deadline")
+
+    def __init__(self, first: RTDSMessage, deadline: float):
+        self.first = first
+        self.size = first.size
+        self.usd_value = first.usd_value
+        self.fill_count = first.fill_count
+        self.deadline = deadline
+
+    def add(self, fill: RTDSMessage) -> None:
+        self.size += fill.size
+        self.usd_value += fill.usd_value
+        self.fill_count += fill.fill_count
+
+    def merged(self) -> RTDSMessage:
+        if self.fill_count == 1:
+            return self.first
+        return dataclasses.replace(
+            self.first,
+            size=self.size,
+            usd_value=self.usd_value,
+            price=self.usd_value / self.size if self.size else self.first.price,
+            fill_count=self.fill_count,
+        )
+
+
+class FillAggregator:
+    """
+    Watermark-windowed merge of fills by transaction.
+
+    Usage:
+        aggregator = FillAggregator(processor.process_trade, window_seconds=0.25)
+        task = asyncio.create_task(aggregator.run())
+        await aggregator.add(trade)      # from the RTDS on_trade callback
+        await aggregator.flush()         # on shutdown
+    """
+
+    WINDOW_SECONDS = 0.25
+    LATE_SECONDS = 60  # emitted groups are remembered this long for late fills
+    MAX_OPEN_GROUPS = 50_000  # beyond this the oldest groups are emitted early
+
+    def __init__(
+        self,
+        emit: Callable[[RTDSMessage], Awaitable[None]],
+        window_seconds: float = WINDOW_SECONDS,
+    ):
+        """
+        Args:
+            emit: Async callable receiving each logical trade
+            window_seconds: How long a group waits for more fills
+        """
+        self.emit = emit
+        self.window_seconds = window_seconds
+
+        # Open groups in arrival order (so deadlines are ordered too)
+        self._open: dict[str, _FillGroup] = {}
+        self._closed = RecentTradeIndex(window_seconds=self.LATE_SECONDS, bucket_seconds=10)
+        self._wakeup = asyncio.Event()
+
+        # Stats
+        self._fills_in = 0
+        self._trades_out = 0
+        self._merged_trades = 0
+        self._fills_merged = 0
+        self._late_fills = 0
+        self._passed_through = 0
+        self._forced_emits = 0
+        self._max_fills = 0
+
+    @staticmethod
+    def _key(trade: RTDSMessage) -> str:
+        return (
+            f"{trade.tx_hash}|{trade.trader_address.lower()}|"
+            f"{trade.condition_id}|{trade.asset_id}|{trade.side}"
+        )
+
+    async def add(self, trade: RTDSMessage) -> None:
+        """Add one fill; it is emitted (merged) once its window closes."""
+        self._fills_in += 1
+        if not trade.tx_hash:
+            self._passed_through += 1
+            await self._emit(trade)
+            return
+
+        key = self._key(trade)
+        group = self._open.get(key)
+        if group is not None:
+            group.add(trade)
+            return
+
+        closed = self._closed.get(key)
+        if closed is not None:
+            # Late fill: re-emit the cumulative trade under the same trade_id
+            closed.add(trade)
+            self._late_fills += 1
+            await self._emit(closed.merged())
+            return
+
+        self._open[key] = _FillGroup(trade, time.monotonic() + self.window_seconds)
+        if len(self._open) == 1:
+            self._wakeup.set()
+        while len(self._open) > self.MAX_OPEN_GROUPS:
+            self._forced_emits += 1
+            await self._close(next(iter(self._open)))
+
+    async def _close(self, key: str) -> None:
+        group = self._open.pop(key)
+        self._closed.add(key, group)
+        if group.fill_count > 1:
+            self._merged_trades += 1
+            self._fills_merged += group.fill_count
+            self._max_fills = max(self._max_fills, group.fill_count)
+        await self._emit(group.merged())
+
+    async def _emit(self, trade: RTDSMessage) -> None:
+        self._trades_out += 1
+        try:
+            await self.emit(trade)
+        except Exception as e:
+            logger.error(f"Fill aggregator emit error: {type(e).__name__}: {e}")
+
+    async def run(self) -> None:
+        """Background task emitting groups whose window has passed."""
+        logger.info(f"Starting fill aggregator (window={self.window_seconds * 1000:.0f}ms)")
+        while True:
+            try:
+                if not self._open:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                key, group = next(iter(self._open.items()))
+                delay = group.deadline - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                await self._close(key)
+
+            except asyncio.CancelledError:
+                logger.info("Fill aggregator stopped")
+                break
+
+            except Exception as e:
+                logger.error(f"Fill aggregator error: {type(e).__name__}: {e}")
+                await asyncio.sleep(1)
+
+    async def flush(self) -> None:
+        """Emit every open group now (shutdown)."""
+        while self._open:
+            await self._close(next(iter(self._open)))
+
+    @property
+    def stats(self) -> dict:
+        """Get aggregation statistics."""
+        return {
+            "window_ms": round(self.window_seconds * 1000),
+            "fills_in": self._fills_in,
+            "trades_out": self._trades_out,
+            "merged_trades": self._merged_trades,
+            "fills_merged": self._fills_merged,
+            "max_fills": self._max_fills,
+            "late_fills": self._late_fills,
+            "passed_through": self._passed_through,
+            "forced_emits": self._forced_emits,
+            "open_groups": len(self._open),
+            "row_reduction_pct": (
+                round((1 - self._trades_out / self._fills_in) * 100, 1) if self._fills_in else 0
+            ),
+        }
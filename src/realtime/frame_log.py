@@ -0,0 +1,287 @@
+"""
+Record and replay raw RTDS frames.
+
+FrameRecorder appends every raw WebSocket frame with its receive timestamp
+to gzip-compressed, size/time-rotated segment files. ReplayServer serves
+those segments from a local WebSocket endpoint, so RTDSClient (and the
+whole TradeMonitorService) can be run against recorded traffic offline,
+at the original pace, N times faster, or as fast as possible.
+
+Segment format: a sequence of records, each a little-endian
+(float64 receive_time, uint32 length) header followed by the frame bytes.
+"""
+
+import asyncio
+import gzip
+import logging
+import struct
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct("<dI")
+SEGMENT_GLOB = "rtds-*.log.gz"
+
+
+class FrameRecorder:
+    """
+    Append-only, segmented, compressed log of raw RTDS frames.
+
+    Usage:
+        recorder = FrameRecorder("captures/")
+        recorder.write(message)        # from the receive loop
+        recorder.close()
+    """
+
+    SEGMENT_MAX_BYTES = 256 * 1024 * 1024  # uncompressed bytes per segment
+    SEGMENT_MAX_SECONDS = 3600
+    FLUSH_INTERVAL_SECONDS = 5  # bounds what a crash can lose
+    COMPRESS_LEVEL = 3  # cheap enough to run on the receive path
+
+    def __init__(
+        self,
+        directory: str | Path,
+        segment_max_bytes: Optional[int] = None,
+        segment_max_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            directory: Directory for segment files (created if missing)
+            segment_max_bytes: Rotate after this many uncompressed bytes
+            segment_max_seconds: Rotate after this many seconds
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes or self.SEGMENT_MAX_BYTES
+        self.segment_max_seconds = segment_max_seconds or self.SEGMENT_MAX_SECONDS
+
+        self._file: Optional[gzip.GzipFile] = None
+        self._segment_path: Optional[Path] = None
+        self._segment_bytes = 0
+        self._segment_opened = 0.0
+        self._last_flush = 0.0
+        self._sequence = 0
+
+        self._frames_written = 0
+        self._bytes_written = 0
+        self._segments_written = 0
+        self._errors = 0
+
+    def write(self, frame: bytes | str, received_at: Optional[float] = None) -> None:
+        """Append one raw frame with its receive time (epoch seconds)."""
+        try:
+            now = time.time()
+            if received_at is None:
+                received_at = now
+            if isinstance(frame, str):
+                frame = frame.encode("utf-8")
+
+            if self._file is None or self._should_rotate(now):
+                self._open_segment(now)
+
+            self._file.write(RECORD_HEADER.pack(received_at, len(frame)))
+            self._file.write(frame)
+            self._segment_bytes += RECORD_HEADER.size + len(frame)
+            self._frames_written += 1
+            self._bytes_written += len(frame)
+
+            if now - self._last_flush >= self.FLUSH_INTERVAL_SECONDS:
+                self._file.flush()
+                self._last_flush = now
+        except Exception as e:
+            logger.error(f"Frame recorder error: {type(e).__name__}: {e}")
+            self._errors += 1
+
+    def _should_rotate(self, now: float) -> bool:
+        return (
+            self._segment_bytes >= self.segment_max_bytes
+            or now - self._segment_opened >= self.segment_max_seconds
+        )
+
+    def _open_segment(self, now: float) -> None:
+        """Close the current segment (if any) and start a new one."""
+        self.close()
+        stamp = datetime.fromtimestamp(now, timezone.utc).strftime("%Y%m%d-%H%M%S")
+        self._sequence += 1
+        self._segment_path = self.directory / f"rtds-{stamp}-{self._sequence:04d}.log.gz"
+        self._file = gzip.open(self._segment_path, "wb", compresslevel=self.COMPRESS_LEVEL)
+        self._segment_bytes = 0
+        self._segment_opened = now
+        self._last_flush = now
+        self._segments_written += 1
+        logger.info(f"Recording RTDS frames to {self._segment_path}")
+
+    def close(self) -> None:
+        """Finish the current segment."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception as e:
+                logger.error(f"Error closing frame segment {self._segment_path}: {e}")
+                self._errors += 1
+            self._file = None
+
+    @property
+    def stats(self) -> dict:
+        """Get recorder statistics."""
+        return {
+            "directory": str(self.directory),
+            "current_segment": self._segment_path.name if self._segment_path else None,
+            "frames_written": self._frames_written,
+            "mb_written": round(self._bytes_written / 1024 / 1024, 2),
+            "segments_written": self._segments_written,
+            "errors": self._errors,
+        }
+
+
+def list_segments(source: str | Path) -> list[Path]:
+    """Segment files for a directory (in recording order) or a single file."""
+    path = Path(source)
+    if path.is_dir():
+        return sorted(path.glob(SEGMENT_GLOB))
+    return [path]
+
+
+def iter_frames(segments: Iterable[Path]) -> Iterator[tuple[float, bytes]]:
+    """
+    Yield (received_at, frame) from recorded segments in order.
+
+    A truncated tail (recorder killed mid-write) ends that segment quietly.
+    """
+    for segment in segments:
+        try:
+            with gzip.open(segment, "rb") as f:
+                while True:
+                    header = f.read(RECORD_HEADER.size)
+                    if len(header) < RECORD_HEADER.size:
+                        break
+                    received_at, length = RECORD_HEADER.unpack(header)
+                    frame = f.read(length)
+                    if len(frame) < length:
+                        break
+                    yield received_at, frame
+        except (EOFError, gzip.BadGzipFile) as e:
+            logger.warning(f"Truncated frame segment {segment}: {e}")
+
+
+class ReplayServer:
+    """
+    Local WebSocket stand-in for RTDS that plays back recorded frames.
+
+    Waits for the client's subscribe message, then sends every recorded
+    frame. Unless speed is 0 (max), frames are scheduled against the
+    recording's receive timestamps (absolute, so sleep overshoot does not
+    accumulate), divided by speed.
+
+    Usage:
+        server = ReplayServer("captures/", speed=10)
+        await server.start()
+        client = RTDSClient(on_trade=..., url=server.url)
+        ...
+        await server.finished.wait()
+    """
+
+    def __init__(
+        self,
+        source: str | Path,
+        speed: float = 1.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            source: Segment directory or a single segment file
+            speed: Playback speed multiplier (1 = real time, 0 = as fast as possible)
+            host: Interface to bind
+            port: Port to bind (0 = pick a free port)
+        """
+        if speed < 0:
+            raise ValueError("Replay speed must be >= 0")
+        self.segments = list_segments(source)
+        if not self.segments:
+            raise ValueError(f"No recorded RTDS segments found in {source}")
+
+        self.speed = speed
+        self.host = host
+        self.port = port
+        self.finished = asyncio.Event()
+
+        self._server = None
+        self._frames_sent = 0
+        self._max_behind_ms = 0.0
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start listening."""
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(
+            f"RTDS replay server on {self.url}: {len(self.segments)} segment(s), "
+            f"speed={'max' if self.speed == 0 else f'{self.speed}x'}"
+        )
+
+    async def stop(self) -> None:
+        """Stop listening and close client connections."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, ws) -> None:
+        """Play the recording to one client connection."""
+        if self.finished.is_set():
+            # Replay is one-shot; keep late reconnects idle
+            await ws.wait_closed()
+            return
+
+        await ws.recv()  # subscribe message
+        self._started_at = time.monotonic()
+        first_ts: Optional[float] = None
+
+        for received_at, frame in iter_frames(self.segments):
+            if self.speed:
+                if first_ts is None:
+                    first_ts = received_at
+                target = self._started_at + (received_at - first_ts) / self.speed
+                delay = target - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif -delay * 1000 > self._max_behind_ms:
+                    self._max_behind_ms = -delay * 1000
+            await ws.send(frame.decode("utf-8"))
+            self._frames_sent += 1
+
+        self._finished_at = time.monotonic()
+        logger.info(
+            f"RTDS replay finished: {self._frames_sent:,} frames in "
+            f"{self._finished_at - self._started_at:.1f}s"
+        )
+        self.finished.set()
+        await ws.wait_closed()
+
+    @property
+    def stats(self) -> dict:
+        """Get replay statistics."""
+        elapsed = 0.0
+        if self._started_at is not None:
+            end = self._finished_at or time.monotonic()
+            elapsed = end - self._started_at
+        return {
+            "segments": len(self.segments),
+            "speed": self.speed,
+            "frames_sent": self._frames_sent,
+            "elapsed_seconds": round(elapsed, 2),
+            "frames_per_second": round(self._frames_sent / elapsed, 1) if elapsed else 0,
+            "max_behind_ms": round(self._max_behind_ms, 1),
+            "finished": self.finished.is_set(),
+        }
@@ -2,20 +2,28 @@
 Async insider scoring pipeline.
 
 Runs independently from the main trade processor.
-Reads from live_trades, scores trades with 6 insider signals,
+Receives enriched trades over the in-process event bus (or polls
+live_trades when run standalone), scores trades with 6 insider signals,
 writes high-scoring trades to insider_alerts table.
 
-Zero coupling with trade_processor.py or wallet_discovery.py.
+No direct coupling with trade_processor.py or wallet_discovery.py.
 """
 
 import asyncio
 import logging
-from datetime import datetime, timezone, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import aiohttp
 from supabase import create_client, Client
 
+from .event_bus import TOPIC_TRADES, EventBus
+from .latency import LatencyTracker
+from .market_analytics import MarketAnalytics
+from .ring_buffer import OVERFLOW_DROP_BELOW_USD
+from .wallet_index import WalletIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,8 +42,16 @@ class InsiderScorer:
 
     POLL_INTERVAL = 3.0
     SCORE_THRESHOLD = 50
-    CLEANUP_INTERVAL_SECONDS = 3600
-    ALERT_RETENTION_DAYS = 30
+    MIN_TRADE_USD = 200
+
+    # Event bus subscription. The publisher (the trade path) never waits: when
+    # the buffer is full, trades below MIN_TRADE_USD are dropped and larger
+    # ones evict the oldest small trade, or else the oldest trade. Trades
+    # evicted that way are re-read from live_trades (gap catch-up).
+    SUBSCRIPTION_CAPACITY = 5000
+    # Poll catch-up on start (trades stored before the subscription existed)
+    CATCHUP_SECONDS = 900
+    CATCHUP_PAGE_SIZE = 500
 
     # Signal weights (must sum to 1.0)
     W_WALLET_AGE = 0.20
@@ -50,7 +66,25 @@ class InsiderScorer:
     MARKET_VOL_CACHE_TTL = 3600   # 1h
     WALLETS_CACHE_TTL = 300       # 5min
 
-    def __init__(self, supabase_url: str, supabase_key: str):
+    def __init__(
+        self,
+        supabase_url: str,
+        supabase_key: str,
+        wallets: Optional[WalletIndex] = None,
+        bus: Optional[EventBus] = None,
+        analytics: Optional[MarketAnalytics] = None,
+    ):
+        """
+        Args:
+            supabase_url: Supabase project URL
+            supabase_key: Supabase service role key
+            wallets: Shared wallet index, refreshed by its owner; if omitted the
+                scorer loads its own and refreshes it every WALLETS_CACHE_TTL
+            bus: Event bus carrying enriched trades from the processor; without
+                one the scorer polls live_trades every POLL_INTERVAL
+            analytics: Market analytics fed by the trade stream; once warm its
+                24h volume replaces the per-market Gamma lookup
+        """
         self.supabase: Client = create_client(supabase_url, supabase_key)
         self._running = False
         self._session: Optional[aiohttp.ClientSession] = None
@@ -58,19 +92,48 @@ class InsiderScorer:
         # Caches
         self._wallet_age_cache: dict[str, tuple[int, int, float]] = {}  # addr -> (age_days, nonce, cached_at)
         self._market_vol_cache: dict[str, tuple[float, float]] = {}     # condition_id -> (daily_vol, cached_at)
-        self._wallets_cache: dict[str, dict] = {}                       # addr -> wallet row
+        self.analytics = analytics
+        self._owns_wallets = wallets is None
+        self.wallets = wallets if wallets is not None else WalletIndex(self.supabase)
         self._wallets_cache_time: float = 0
 
         # Session conviction tracking: addr:condition_id -> list of sides
         self._conviction_cache: dict[str, list[str]] = {}
 
-        # Track last processed trade ID
+        # Enriched trades straight from the processor (subscribed now, so
+        # nothing published before run() starts is missed)
+        self._subscription = (
+            bus.subscribe(
+                TOPIC_TRADES,
+                "insider_scorer",
+                capacity=self.SUBSCRIPTION_CAPACITY,
+                overflow_policy=OVERFLOW_DROP_BELOW_USD,
+                drop_below_usd=self.MIN_TRADE_USD,
+            )
+            if bus
+            else None
+        )
+
+        # Track last processed trade ID (polling and catch-up)
         self._last_id: int = 0
+        self._caught_up = 0
+
+        # Gap catch-up: subscription evictions seen, received_at of the last bus trade
+        self._evictions_seen = 0
+        self._last_received_at: Optional[str] = None
+        self._gap_catch_ups = 0
+        self._gap_trades = 0
 
         # Stats
         self._trades_scored = 0
         self._alerts_written = 0
         self._errors = 0
+        self._market_vol_local = 0
+        self._market_vol_fetched = 0
+
+        # Per-stage latency: scoring one trade (incl. cache misses),
+        # enrichment (live_trades.received_at) -> scored
+        self._latency = LatencyTracker(("score", "enrich_to_score"))
 
     async def _ensure_session(self) -> None:
         if not self._session or self._session.closed:
@@ -81,75 +144,51 @@ class InsiderScorer:
             await self._session.close()
 
     async def run(self) -> None:
-        """Main loop: poll live_trades, score, write insider_alerts."""
+        """Main loop: score trades (from the event bus, else by polling live_trades), write insider_alerts."""
         self._running = True
         logger.info("Insider scorer starting...")
 
         await self._ensure_session()
-        await self._load_wallets_cache()
+        if self._owns_wallets:
+            await self._refresh_wallets()
 
-        # Get last processed ID from insider_alerts
-        try:
-            result = self.supabase.table("insider_alerts").select("id").order(
-                "id", desc=True
-            ).limit(1).execute()
-            # We track by live_trades.id, not insider_alerts.id
+        if self._subscription is not None:
+            await self._catch_up()
+            logger.info("Insider scorer running (event bus)")
+        else:
             # Start from the latest trade in live_trades
-        except Exception:
-            pass
-
-        # Get current max ID from live_trades to start from
-        try:
-            result = self.supabase.table("live_trades").select("id").order(
-                "id", desc=True
-            ).limit(1).execute()
-            if result.data:
-                self._last_id = result.data[0]["id"]
-                logger.info(f"Starting from live_trades id={self._last_id}")
-        except Exception as e:
-            logger.warning(f"Failed to get last trade ID: {e}")
-
-        last_cleanup = datetime.now(timezone.utc)
-        logger.info("Insider scorer running")
+            try:
+                result = self.supabase.table("live_trades").select("id").order(
+                    "id", desc=True
+                ).limit(1).execute()
+                if result.data:
+                    self._last_id = result.data[0]["id"]
+                    logger.info(f"Starting from live_trades id={self._last_id}")
+            except Exception as e:
+                logger.warning(f"Failed to get last trade ID: {e}")
+            logger.info("Insider scorer running (polling)")
 
         while self._running:
             try:
-                # Poll for new trades
-                new_trades = self._fetch_new_trades()
-
-                for trade in new_trades:
+                if self._subscription is not None:
                     try:
-                        # Skip tiny trades — insiders don't bet $50
-                        if float(trade.get("usd_value", 0)) < 200:
-                            self._last_id = max(self._last_id, trade.get("id", self._last_id))
-                            continue
-
-                        score, signals, details = await self._score_trade(trade)
-
-                        if score >= self.SCORE_THRESHOLD:
-                            profitability = self._get_profitability(trade["trader_address"])
-                            await self._write_alert(trade, score, signals, details, profitability)
-
-                        self._trades_scored += 1
-                        self._last_id = max(self._last_id, trade["id"])
-
-                    except Exception as e:
-                        logger.error(f"Error scoring trade {trade.get('trade_id', '?')}: {e}")
-                        self._errors += 1
+                        event = await asyncio.wait_for(self._subscription.get(), self.POLL_INTERVAL)
+                        if self._subscription.evicted > self._evictions_seen:
+                            await self._catch_up_gap(event.record.get("received_at"))
+                        await self._handle_trade(event.record)
+                        self._last_received_at = event.record.get("received_at") or self._last_received_at
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    for trade in self._fetch_new_trades():
+                        await self._handle_trade(trade)
                         self._last_id = max(self._last_id, trade.get("id", self._last_id))
+                    await asyncio.sleep(self.POLL_INTERVAL)
 
-                # Refresh wallets cache periodically
+                # Refresh a private wallet index periodically (a shared one has its own loop)
                 now_ts = datetime.now(timezone.utc).timestamp()
-                if now_ts - self._wallets_cache_time > self.WALLETS_CACHE_TTL:
-                    await self._load_wallets_cache()
-
-                # Cleanup old alerts periodically
-                now = datetime.now(timezone.utc)
-                if (now - last_cleanup).total_seconds() > self.CLEANUP_INTERVAL_SECONDS:
-                    await self._cleanup_old_alerts()
-                    last_cleanup = now
-
-                await asyncio.sleep(self.POLL_INTERVAL)
+                if self._owns_wallets and now_ts - self._wallets_cache_time > self.WALLETS_CACHE_TTL:
+                    await self._refresh_wallets()
 
             except asyncio.CancelledError:
                 logger.info("Insider scorer stopped")
@@ -161,6 +200,93 @@ class InsiderScorer:
 
         await self._close_session()
 
+    async def _handle_trade(self, trade: dict) -> None:
+        """Score one trade and write an alert if it crosses the threshold."""
+        # Skip tiny trades — insiders don't bet $50
+        if float(trade.get("usd_value", 0)) < self.MIN_TRADE_USD:
+            return
+
+        try:
+            started = time.perf_counter()
+            score, signals, details = await self._score_trade(trade)
+            self._latency.record("score", time.perf_counter() - started)
+            self._record_pipeline_latency(trade)
+
+            if score >= self.SCORE_THRESHOLD:
+                profitability = self._get_profitability(trade["trader_address"])
+                await self._write_alert(trade, score, signals, details, profitability)
+
+            self._trades_scored += 1
+
+        except Exception as e:
+            logger.error(f"Error scoring trade {trade.get('trade_id', '?')}: {e}")
+            self._errors += 1
+
+    async def _catch_up(self) -> None:
+        """
+        Score trades stored while the scorer was not subscribed.
+
+        Covers trades enriched in the last CATCHUP_SECONDS before the bus
+        subscription was created (e.g. across a restart); later trades
+        arrive through the subscription. Alerts upsert on trade_id, so
+        re-scoring a trade is harmless.
+        """
+        subscribed_at = datetime.fromtimestamp(self._subscription.created_at, timezone.utc)
+        since = (subscribed_at - timedelta(seconds=self.CATCHUP_SECONDS)).isoformat()
+        self._caught_up = await self._score_stored(since, subscribed_at.isoformat())
+        logger.info(f"Insider scorer caught up on {self._caught_up} trades from live_trades")
+
+    async def _catch_up_gap(self, until: Optional[str]) -> None:
+        """
+        Score trades the subscription evicted while the scorer lagged.
+
+        Evictions always take the oldest buffered trades, so the lost ones
+        were received after the last trade scored from the bus and before
+        the trade about to be scored. Trades not yet written to live_trades
+        by the time of the query are missed.
+        """
+        self._evictions_seen = self._subscription.evicted
+        since = self._last_received_at or datetime.fromtimestamp(
+            self._subscription.created_at, timezone.utc
+        ).isoformat()
+        until = until or datetime.now(timezone.utc).isoformat()
+        trades = await self._score_stored(since, until)
+        self._gap_catch_ups += 1
+        self._gap_trades += trades
+        logger.warning(f"Insider scorer fell behind; re-scored {trades} evicted trades from live_trades")
+
+    async def _score_stored(self, since: str, until: str) -> int:
+        """Score live_trades rows >= MIN_TRADE_USD with received_at in [since, until); returns the count."""
+        scored = 0
+        after_id = 0
+        while self._running:
+            try:
+                result = (
+                    self.supabase.table("live_trades")
+                    .select("*")
+                    .gte("received_at", since)
+                    .lt("received_at", until)
+                    .gte("usd_value", self.MIN_TRADE_USD)
+                    .gt("id", after_id)
+                    .order("id", desc=False)
+                    .limit(self.CATCHUP_PAGE_SIZE)
+                    .execute()
+                )
+            except Exception as e:
+                logger.warning(f"Insider scorer catch-up failed: {e}")
+                self._errors += 1
+                break
+
+            trades = result.data or []
+            for trade in trades:
+                await self._handle_trade(trade)
+                after_id = trade["id"]
+                self._last_id = max(self._last_id, after_id)
+            scored += len(trades)
+            if len(trades) < self.CATCHUP_PAGE_SIZE:
+                break
+        return scored
+
     def _fetch_new_trades(self) -> list[dict]:
         """Fetch trades from live_trades with id > last_id."""
         try:
@@ -178,6 +304,19 @@ class InsiderScorer:
             self._errors += 1
             return []
 
+    def _record_pipeline_latency(self, trade: dict) -> None:
+        """Record time from trade enrichment to scoring."""
+        received_at = trade.get("received_at")
+        if not received_at:
+            return
+        try:
+            enriched = datetime.fromisoformat(str(received_at).replace("Z", "+00:00"))
+            self._latency.record(
+                "enrich_to_score", (datetime.now(timezone.utc) - enriched).total_seconds()
+            )
+        except ValueError:
+            pass
+
     async def _score_trade(self, trade: dict) -> tuple[int, list[str], dict]:
         """
         Score a trade using 6 insider signals.
@@ -374,12 +513,12 @@ class InsiderScorer:
 
     def _score_category_winrate(self, addr: str) -> int:
         """Score 0-100 based on historical win rate from wallets table."""
-        wallet = self._wallets_cache.get(addr.lower())
+        wallet = self.wallets.insider_fields(addr.lower())
         if not wallet:
             return 0  # Unknown trader
 
-        win_rate = wallet.get("win_rate_all", 0) or 0
-        trade_count = wallet.get("trade_count_all", 0) or 0
+        win_rate = wallet.win_rate_all
+        trade_count = wallet.trade_count_all
 
         # Need minimum trades for win rate to be meaningful
         if trade_count < 10:
@@ -414,21 +553,14 @@ class InsiderScorer:
                 return age, nonce
 
         # Check wallets table
-        wallet = self._wallets_cache.get(address)
+        wallet = self.wallets.insider_fields(address.lower())
         if wallet:
-            trade_count = wallet.get("trade_count_all", 0) or wallet.get("total_trades", 0) or 0
-            created_at = wallet.get("account_created_at")
-            if created_at:
-                try:
-                    created = datetime.fromisoformat(
-                        str(created_at).replace("Z", "+00:00")
-                    )
-                    age_days = (datetime.now(timezone.utc) - created).days
-                    nonce = trade_count
-                    self._wallet_age_cache[address] = (age_days, nonce, now_ts)
-                    return age_days, nonce
-                except Exception:
-                    pass
+            trade_count = wallet.trade_count
+            if wallet.account_created_at:
+                age_days = (datetime.now(timezone.utc) - wallet.account_created_at).days
+                nonce = trade_count
+                self._wallet_age_cache[address] = (age_days, nonce, now_ts)
+                return age_days, nonce
 
             # Wallet is in our DB with trades but no created_at date
             # Polymarket proxy wallets have low on-chain nonce (CLOB trades are off-chain)
@@ -480,7 +612,13 @@ class InsiderScorer:
             return 100  # Default to established on error
 
     async def _get_market_daily_volume(self, condition_id: str, market_slug: Optional[str] = None) -> float:
-        """Get market daily volume from Gamma API (cached)."""
+        """Get market daily volume (locally observed, else Gamma API, cached)."""
+        if self.analytics is not None:
+            local = self.analytics.daily_volume(condition_id)
+            if local is not None:
+                self._market_vol_local += 1
+                return local
+
         now_ts = datetime.now(timezone.utc).timestamp()
 
         # Check cache
@@ -490,6 +628,7 @@ class InsiderScorer:
                 return vol
 
         # Fetch from Gamma API
+        self._market_vol_fetched += 1
         try:
             await self._ensure_session()
             url = f"https://gamma-api.polymarket.com/markets?condition_id={condition_id}&limit=1"
@@ -528,7 +667,7 @@ class InsiderScorer:
 
     def _get_profitability(self, address: str) -> dict:
         """Join with wallets table for profitability data."""
-        wallet = self._wallets_cache.get(address.lower())
+        wallet = self.wallets.profitability(address.lower())
         if not wallet:
             return {
                 "status": "pending",
@@ -539,11 +678,11 @@ class InsiderScorer:
                 "trade_count_all": None,
             }
 
-        copy_score = wallet.get("copy_score", 0) or 0
-        pf_30d = wallet.get("profit_factor_30d", 0) or 0
-        pnl = wallet.get("pnl_all", 0) or wallet.get("overall_pnl", 0) or 0
-        win_rate = wallet.get("win_rate_all", 0) or wallet.get("overall_win_rate", 0) or 0
-        trade_count = wallet.get("trade_count_all", 0) or wallet.get("total_trades", 0) or 0
+        copy_score = wallet.copy_score
+        pf_30d = wallet.profit_factor_30d
+        pnl = wallet.pnl
+        win_rate = wallet.win_rate
+        trade_count = wallet.trade_count
 
         if copy_score >= 60 and pf_30d >= 1.5:
             status = "copyable"
@@ -608,7 +747,7 @@ class InsiderScorer:
             }
 
             self.supabase.table("insider_alerts").upsert(
-                alert, on_conflict="trade_id"
+                alert, on_conflict="trade_id,executed_at"
             ).execute()
 
             self._alerts_written += 1
@@ -627,61 +766,11 @@ class InsiderScorer:
 
     # ---- Cache Loading ----
 
-    async def _load_wallets_cache(self) -> None:
-        """Load wallets table into memory for profitability lookups."""
-        try:
-            # Load all analyzed wallets with pagination (Supabase caps at 1000 per request).
-            # A trader may have $165K in positions but <$10 cash, we still need their data.
-            self._wallets_cache = {}
-            page_size = 1000
-            offset = 0
-
-            while True:
-                result = (
-                    self.supabase.table("wallets")
-                    .select(
-                        "address, account_created_at, copy_score, profit_factor_30d, "
-                        "pnl_all, overall_pnl, win_rate_all, overall_win_rate, "
-                        "trade_count_all, total_trades"
-                    )
-                    .or_("trade_count_all.gt.0,total_trades.gt.0")
-                    .range(offset, offset + page_size - 1)
-                    .execute()
-                )
-
-                rows = result.data or []
-                for w in rows:
-                    self._wallets_cache[w["address"].lower()] = w
-
-                if len(rows) < page_size:
-                    break
-                offset += page_size
-
-            self._wallets_cache_time = datetime.now(timezone.utc).timestamp()
-            logger.info(f"Wallets cache loaded: {len(self._wallets_cache)} wallets")
-
-        except Exception as e:
-            logger.warning(f"Failed to load wallets cache: {e}")
-
-    # ---- Cleanup ----
-
-    async def _cleanup_old_alerts(self) -> None:
-        """Delete alerts older than retention period."""
-        try:
-            cutoff = (
-                datetime.now(timezone.utc) - timedelta(days=self.ALERT_RETENTION_DAYS)
-            ).isoformat()
-
-            result = self.supabase.table("insider_alerts").delete().lt(
-                "created_at", cutoff
-            ).execute()
-
-            deleted = len(result.data) if result.data else 0
-            if deleted > 0:
-                logger.info(f"Cleaned up {deleted} old insider alerts")
-
-        except Exception as e:
-            logger.error(f"Alert cleanup failed: {e}")
+    async def _refresh_wallets(self) -> None:
+        """Refresh the scorer's own wallet index (unused when the index is shared)."""
+        await self.wallets.refresh()
+        self._wallets_cache_time = datetime.now(timezone.utc).timestamp()
+        logger.info(f"Wallets cache loaded: {len(self.wallets)} wallets")
 
     # ---- Lifecycle ----
 
@@ -698,6 +787,15 @@ class InsiderScorer:
             "errors": self._errors,
             "wallet_age_cache_size": len(self._wallet_age_cache),
             "market_vol_cache_size": len(self._market_vol_cache),
-            "wallets_cache_size": len(self._wallets_cache),
+            "market_vol_local": self._market_vol_local,
+            "market_vol_fetched": self._market_vol_fetched,
+            "wallets_cache_size": len(self.wallets),
+            "source": "bus" if self._subscription is not None else "poll",
+            "backlog": len(self._subscription) if self._subscription is not None else 0,
+            "caught_up": self._caught_up,
+            "evicted": self._subscription.evicted if self._subscription is not None else 0,
+            "gap_catch_ups": self._gap_catch_ups,
+            "gap_trades": self._gap_trades,
             "last_trade_id": self._last_id,
+            "latency": self._latency.stats,
         }
@@ -0,0 +1,186 @@
+"""
+Constant-cost latency histograms for the live trade pipeline.
+
+LatencyHistogram is an HDR-style log-linear histogram: values (stored in
+microseconds) below 2**SUB_BUCKET_BITS are counted exactly, larger values
+fall into 2**(SUB_BUCKET_BITS - 1) linear sub-buckets per power of two.
+Recording is O(1) with no allocation, memory is a fixed ~2K counters, and
+percentiles are accurate to about 1.6% relative error.
+
+EventLoopLagMonitor records how late the event loop wakes a periodic sleep,
+i.e. how long CPU-bound work held the loop.
+"""
+
+import asyncio
+import time
+from typing import Iterable, Optional
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram with p50/p99/p999/max reporting.
+
+    Usage:
+        hist = LatencyHistogram()
+        hist.record(0.0042)            # seconds
+        hist.summary()["p99_ms"]
+    """
+
+    SUB_BUCKET_BITS = 7  # 64 sub-buckets per octave
+    MAX_VALUE_US = 1 << 36  # ~19h; larger values are clamped
+
+    def __init__(self):
+        bits = self.SUB_BUCKET_BITS
+        self._sub_count = 1 << bits
+        self._half_count = 1 << (bits - 1)
+        octaves = self.MAX_VALUE_US.bit_length() - bits
+        self._counts = [0] * (self._sub_count + octaves * self._half_count)
+        self._total = 0
+        self._sum_us = 0
+        self._max_us = 0
+
+    def _index(self, value_us: int) -> int:
+        if value_us < self._sub_count:
+            return value_us
+        shift = value_us.bit_length() - self.SUB_BUCKET_BITS
+        return self._sub_count + (shift - 1) * self._half_count + (value_us >> shift) - self._half_count
+
+    def _highest_equivalent(self, index: int) -> int:
+        """Largest value (us) that maps to a bucket index."""
+        if index < self._sub_count:
+            return index
+        shift, offset = divmod(index - self._sub_count, self._half_count)
+        shift += 1
+        return ((offset + self._half_count + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        """Record one latency sample (negative values count as 0)."""
+        value_us = int(seconds * 1_000_000)
+        if value_us < 0:
+            value_us = 0
+        elif value_us > self.MAX_VALUE_US:
+            value_us = self.MAX_VALUE_US
+        self._counts[self._index(value_us)] += 1
+        self._total += 1
+        self._sum_us += value_us
+        if value_us > self._max_us:
+            self._max_us = value_us
+
+    def percentile(self, percent: float) -> float:
+        """Latency (us) at or below which `percent` of samples fall."""
+        if not self._total:
+            return 0.0
+        target = max(1, int(self._total * percent / 100 + 0.5))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            if count:
+                seen += count
+                if seen >= target:
+                    return float(min(self._highest_equivalent(index), self._max_us))
+        return float(self._max_us)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add another histogram's samples into this one."""
+        for index, count in enumerate(other._counts):
+            if count:
+                self._counts[index] += count
+        self._total += other._total
+        self._sum_us += other._sum_us
+        self._max_us = max(self._max_us, other._max_us)
+
+    def reset(self) -> None:
+        """Drop all samples."""
+        self._counts = [0] * len(self._counts)
+        self._total = 0
+        self._sum_us = 0
+        self._max_us = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def summary(self) -> dict:
+        """Sample count plus mean/p50/p99/p999/max in milliseconds."""
+        return {
+            "count": self._total,
+            "mean_ms": round(self._sum_us / self._total / 1000, 3) if self._total else 0,
+            "p50_ms": round(self.percentile(50) / 1000, 3),
+            "p99_ms": round(self.percentile(99) / 1000, 3),
+            "p999_ms": round(self.percentile(99.9) / 1000, 3),
+            "max_ms": round(self._max_us / 1000, 3),
+        }
+
+
+class LatencyTracker:
+    """
+    One LatencyHistogram per named pipeline stage.
+
+    Usage:
+        latency = LatencyTracker(("parse", "dispatch"))
+        latency.record("parse", elapsed_seconds)
+        latency.stats   # {"parse": {...}, "dispatch": {...}}
+    """
+
+    def __init__(self, stages: Iterable[str]):
+        self.histograms: dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in stages}
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record one sample for a stage."""
+        self.histograms[stage].record(seconds)
+
+    def __getitem__(self, stage: str) -> LatencyHistogram:
+        return self.histograms[stage]
+
+    @classmethod
+    def merged(cls, trackers: Iterable["LatencyTracker"]) -> Optional["LatencyTracker"]:
+        """Combine trackers with the same stages (e.g. one per connection)."""
+        trackers = list(trackers)
+        if not trackers:
+            return None
+        combined = cls(trackers[0].histograms)
+        for tracker in trackers:
+            for stage, histogram in tracker.histograms.items():
+                combined.histograms[stage].merge(histogram)
+        return combined
+
+    @property
+    def stats(self) -> dict:
+        """Per-stage summaries."""
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+
+class EventLoopLagMonitor:
+    """
+    Event loop lag: how much later than requested a short sleep returns.
+
+    Usage:
+        monitor = EventLoopLagMonitor()
+        task = asyncio.create_task(monitor.run())
+        monitor.stats   # {"count": ..., "p99_ms": ..., "max_ms": ...}
+    """
+
+    INTERVAL_SECONDS = 0.1
+
+    def __init__(self, interval: float = INTERVAL_SECONDS):
+        self.interval = interval
+        self.histogram = LatencyHistogram()
+
+    async def run(self) -> None:
+        """Sample the lag until cancelled."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.histogram.record(time.perf_counter() - start - self.interval)
+
+    @property
+    def stats(self) -> dict:
+        """Lag summary since start (LatencyHistogram.summary)."""
+        return self.histogram.summary()
+
+
+def format_latency(stats: dict) -> str:
+    """One-line p50/p99/p999/max rendering of LatencyTracker.stats for logs."""
+    return " | ".join(
+        f"{stage} {s['p50_ms']}/{s['p99_ms']}/{s['p999_ms']}/{s['max_ms']}ms (n={s['count']:,})"
+        for stage, s in stats.items()
+        if s["count"]
+    )
@@ -0,0 +1,444 @@
+"""
+In-memory rolling analytics per market, fed by the live trade stream.
+
+For every condition_id the engine keeps one ring of time buckets per
+window (1m, 5m, 1h, 24h; BUCKET_COUNT buckets each). A bucket holds trade
+count, USD and share volume, buy / sell volume and a HyperLogLog sketch of
+the traders in it. Recording a trade touches one bucket per window in O(1);
+a window query sums its live buckets and unions their sketches, so nothing
+is ever subtracted and nothing drifts. Windows are as precise as their
+bucket width (the 24h window covers 22-24h).
+
+Markets idle for longer than the largest window are evicted in
+least-recently-traded order. A background task snapshots every live
+market to the market_analytics table (migration 036); the rows are built
+SNAPSHOT_YIELD_MARKETS markets at a time, yielding to the event loop in
+between, so tens of thousands of sketch unions never stall trade
+ingestion.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterable, NamedTuple, Optional
+
+from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter with a sparse (exact) start.
+
+    Up to SPARSE_MAX distinct hashes are kept as a set, so small buckets
+    are exact and cheap; beyond that the sketch switches to 2**PRECISION
+    one-byte registers (~3% standard error at PRECISION = 10).
+    """
+
+    PRECISION = 10
+    SPARSE_MAX = 128
+
+    __slots__ = ("_sparse", "_registers")
+
+    def __init__(self):
+        self._sparse: Optional[set[int]] = set()
+        self._registers: Optional[bytearray] = None
+
+    @staticmethod
+    def hash(value: str) -> int:
+        """64-bit hash of a value (compute once, add to several sketches)."""
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+    def add_hash(self, hashed: int) -> None:
+        """Add a value by its 64-bit hash."""
+        if self._sparse is not None:
+            self._sparse.add(hashed)
+            if len(self._sparse) > self.SPARSE_MAX:
+                self._densify()
+            return
+        self._set_register(self._registers, hashed)
+
+    @classmethod
+    def _set_register(cls, registers: bytearray, hashed: int) -> None:
+        index = hashed >> (64 - cls.PRECISION)
+        remaining = (hashed << cls.PRECISION) & 0xFFFFFFFFFFFFFFFF
+        rank = min(64 - remaining.bit_length() + 1, 64 - cls.PRECISION + 1)
+        if rank > registers[index]:
+            registers[index] = rank
+
+    def _densify(self) -> None:
+        registers = bytearray(1 << self.PRECISION)
+        for hashed in self._sparse:
+            self._set_register(registers, hashed)
+        self._registers = registers
+        self._sparse = None
+
+    @classmethod
+    def count_union(cls, sketches: Iterable["HyperLogLog"]) -> int:
+        """Estimated distinct count of the union of sketches."""
+        sparse: set[int] = set()
+        registers: Optional[bytearray] = None
+        for sketch in sketches:
+            if sketch._sparse is not None:
+                sparse |= sketch._sparse
+            elif registers is None:
+                registers = bytearray(sketch._registers)
+            else:
+                for index, rank in enumerate(sketch._registers):
+                    if rank > registers[index]:
+                        registers[index] = rank
+
+        if registers is None:
+            if len(sparse) <= cls.SPARSE_MAX:
+                return len(sparse)
+            registers = bytearray(1 << cls.PRECISION)
+        for hashed in sparse:
+            cls._set_register(registers, hashed)
+        return cls._estimate(registers)
+
+    @classmethod
+    def _estimate(cls, registers: bytearray) -> int:
+        m = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -rank for rank in registers)
+        zeros = registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting for small cardinalities
+        return round(raw)
+
+    def count(self) -> int:
+        """Estimated distinct count."""
+        return self.count_union((self,))
+
+
+class WindowSpec(NamedTuple):
+    label: str
+    seconds: int
+    bucket_seconds: int
+
+
+class WindowStats(NamedTuple):
+    """Aggregates of one market over one window."""
+
+    trades: int
+    volume: float  # USD
+    buy_volume: float
+    sell_volume: float
+    vwap: float  # volume-weighted average price (0 if no shares traded)
+    imbalance: float  # (buy - sell) / (buy + sell), -1..1
+    unique_traders: int
+
+
+class _Bucket:
+    __slots__ = ("number", "trades", "volume", "shares", "buy_volume", "sell_volume", "traders")
+
+    def __init__(self, number: int):
+        self.number = number
+        self.trades = 0
+        self.volume = 0.0
+        self.shares = 0.0
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+        self.traders = HyperLogLog()
+
+
+class _Market:
+    __slots__ = ("rings", "last_trade")
+
+    def __init__(self, windows: int, slots: int):
+        self.rings: list[list[Optional[_Bucket]]] = [[None] * slots for _ in range(windows)]
+        self.last_trade = 0.0
+
+
+class MarketAnalytics:
+    """
+    Rolling per-market volume, VWAP, buy/sell imbalance and unique traders.
+
+    Usage:
+        analytics = MarketAnalytics(supabase)
+        analytics.record(condition_id, trader, side, size, usd_value, executed_at.timestamp())
+        analytics.window(condition_id, "24h")    # WindowStats or None
+        task = asyncio.create_task(analytics.run())   # periodic table snapshots
+    """
+
+    WINDOWS = (
+        WindowSpec("1m", 60, 5),
+        WindowSpec("5m", 300, 25),
+        WindowSpec("1h", 3600, 300),
+        WindowSpec("24h", 86400, 7200),
+    )
+    BUCKET_COUNT = 12  # per window (seconds / bucket_seconds)
+
+    MAX_MARKETS = 20_000
+    SNAPSHOT_TABLE = "market_analytics"
+    SNAPSHOT_INTERVAL_SECONDS = 60
+    SNAPSHOT_CHUNK_SIZE = 500
+    SNAPSHOT_YIELD_MARKETS = 250  # markets per event loop slice while building rows
+
+    def __init__(self, supabase: Optional[Client] = None, max_markets: int = MAX_MARKETS):
+        """
+        Args:
+            supabase: supabase-py Client for snapshots (None = in-process only)
+            max_markets: Hard cap on tracked markets (least recently traded evicted)
+        """
+        self.supabase = supabase
+        self.max_markets = max_markets
+        self._labels = {spec.label: index for index, spec in enumerate(self.WINDOWS)}
+        self._horizon = max(spec.seconds for spec in self.WINDOWS)
+        self._started_at = time.time()
+
+        # Least recently traded market first
+        self._markets: OrderedDict[str, _Market] = OrderedDict()
+
+        # Stats
+        self._trades_recorded = 0
+        self._late_trades = 0
+        self._markets_evicted = 0
+        self._snapshots = 0
+        self._rows_snapshotted = 0
+        self._last_snapshot_ms = 0.0
+        self._errors = 0
+
+    def record(
+        self,
+        condition_id: str,
+        trader: str,
+        side: str,
+        size: float,
+        usd_value: float,
+        executed_at: float,
+        now: Optional[float] = None,
+        trades: int = 1,
+    ) -> None:
+        """
+        Count one trade.
+
+        Args:
+            condition_id: Market condition ID
+            trader: Trader key (lowercased address)
+            side: "BUY" / "SELL"
+            size: Shares traded
+            usd_value: Trade USD value
+            executed_at: Execution time (unix seconds, clamped to now)
+            now: Current time (default: time.time())
+            trades: Trades counted (0 = extra size / volume of a trade already counted)
+        """
+        now = now if now is not None else time.time()
+        executed_at = min(executed_at, now)
+        if executed_at <= now - self._horizon:
+            self._late_trades += 1
+            return
+
+        market = self._markets.get(condition_id)
+        if market is None:
+            market = self._markets[condition_id] = _Market(len(self.WINDOWS), self.BUCKET_COUNT)
+        else:
+            self._markets.move_to_end(condition_id)
+        market.last_trade = max(market.last_trade, executed_at)
+
+        hashed = HyperLogLog.hash(trader)
+        for spec, ring in zip(self.WINDOWS, market.rings):
+            number = int(executed_at // spec.bucket_seconds)
+            if number <= int(now // spec.bucket_seconds) - self.BUCKET_COUNT:
+                continue  # older than this window
+            slot = number % self.BUCKET_COUNT
+            bucket = ring[slot]
+            if bucket is None or bucket.number != number:
+                if bucket is not None and bucket.number > number:
+                    continue  # slot already reused by a newer bucket
+                bucket = ring[slot] = _Bucket(number)
+            bucket.trades += trades
+            bucket.volume += usd_value
+            bucket.shares += size
+            if side == "BUY":
+                bucket.buy_volume += usd_value
+            elif side == "SELL":
+                bucket.sell_volume += usd_value
+            bucket.traders.add_hash(hashed)
+
+        self._trades_recorded += trades
+        self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop markets with no trade inside the largest window (or over the cap)."""
+        cutoff = now - self._horizon
+        while self._markets:
+            condition_id, market = next(iter(self._markets.items()))
+            if market.last_trade > cutoff and len(self._markets) <= self.max_markets:
+                break
+            del self._markets[condition_id]
+            self._markets_evicted += 1
+
+    def window(self, condition_id: str, label: str, now: Optional[float] = None) -> Optional[WindowStats]:
+        """
+        Aggregates of a market over a window.
+
+        Args:
+            condition_id: Market condition ID
+            label: Window label ("1m", "5m", "1h", "24h")
+            now: Window end (default: time.time())
+
+        Returns:
+            WindowStats, or None if the market has no trades in the window
+        """
+        market = self._markets.get(condition_id)
+        if market is None:
+            return None
+        buckets = self._live_buckets(market, self._labels[label], now if now is not None else time.time())
+        trades = sum(b.trades for b in buckets)
+        if not trades:
+            return None
+
+        volume = sum(b.volume for b in buckets)
+        shares = sum(b.shares for b in buckets)
+        buy = sum(b.buy_volume for b in buckets)
+        sell = sum(b.sell_volume for b in buckets)
+        return WindowStats(
+            trades=trades,
+            volume=volume,
+            buy_volume=buy,
+            sell_volume=sell,
+            vwap=volume / shares if shares else 0.0,
+            imbalance=(buy - sell) / (buy + sell) if buy + sell else 0.0,
+            unique_traders=HyperLogLog.count_union(b.traders for b in buckets),
+        )
+
+    def _live_buckets(self, market: _Market, index: int, now: float) -> list[_Bucket]:
+        first_live = int(now // self.WINDOWS[index].bucket_seconds) - self.BUCKET_COUNT + 1
+        return [b for b in market.rings[index] if b is not None and b.number >= first_live]
+
+    def daily_volume(self, condition_id: str) -> Optional[float]:
+        """
+        Locally observed 24h USD volume of a market.
+
+        Returns:
+            Volume, or None until the engine has observed a full 24h
+            (callers should fall back to another source)
+        """
+        if time.time() - self._started_at < self.WINDOWS[self._labels["24h"]].seconds:
+            return None
+        stats = self.window(condition_id, "24h")
+        return stats.volume if stats else 0.0
+
+    def top_markets(self, label: str, limit: int = 20) -> list[tuple[str, WindowStats]]:
+        """
+        Markets with the highest USD volume in a window.
+
+        Markets are ranked on bucket volume sums; full stats (and their
+        sketch unions) are only computed for the top `limit`.
+        """
+        now = time.time()
+        index = self._labels[label]
+        volumes = []
+        for condition_id, market in self._markets.items():
+            buckets = self._live_buckets(market, index, now)
+            if any(b.trades for b in buckets):
+                volumes.append((sum(b.volume for b in buckets), condition_id))
+        volumes.sort(reverse=True)
+
+        ranked = []
+        for _, condition_id in volumes[:limit]:
+            stats = self.window(condition_id, label, now)
+            if stats:
+                ranked.append((condition_id, stats))
+        return ranked
+
+    def snapshot_rows(self, now: Optional[float] = None) -> list[dict]:
+        """One market_analytics row per live market and window (blocking; see snapshot())."""
+        now = now if now is not None else time.time()
+        updated_at = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        rows = []
+        for condition_id in list(self._markets):
+            rows.extend(self._market_rows(condition_id, now, updated_at))
+        return rows
+
+    async def _build_snapshot_rows(self, now: float) -> list[dict]:
+        """snapshot_rows(), yielding to the event loop every SNAPSHOT_YIELD_MARKETS markets."""
+        updated_at = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        rows = []
+        for i, condition_id in enumerate(list(self._markets), 1):
+            rows.extend(self._market_rows(condition_id, now, updated_at))
+            if i % self.SNAPSHOT_YIELD_MARKETS == 0:
+                await asyncio.sleep(0)
+        return rows
+
+    def _market_rows(self, condition_id: str, now: float, updated_at: str) -> list[dict]:
+        rows = []
+        for spec in self.WINDOWS:
+            stats = self.window(condition_id, spec.label, now)
+            if stats is None:
+                continue  # no trades in the window, or evicted since the snapshot began
+            rows.append(
+                {
+                    "condition_id": condition_id,
+                    "window_label": spec.label,
+                    "trades": stats.trades,
+                    "volume": round(stats.volume, 2),
+                    "buy_volume": round(stats.buy_volume, 2),
+                    "sell_volume": round(stats.sell_volume, 2),
+                    "vwap": round(stats.vwap, 6),
+                    "imbalance": round(stats.imbalance, 4),
+                    "unique_traders": stats.unique_traders,
+                    "updated_at": updated_at,
+                }
+            )
+        return rows
+
+    def _write_snapshot(self, rows: list[dict], stale_before: str) -> None:
+        table = self.supabase.table(self.SNAPSHOT_TABLE)
+        for i in range(0, len(rows), self.SNAPSHOT_CHUNK_SIZE):
+            table.upsert(rows[i:i + self.SNAPSHOT_CHUNK_SIZE], on_conflict="condition_id,window_label").execute()
+        # Windows that emptied since the last snapshot
+        table.delete().lt("updated_at", stale_before).execute()
+
+    async def snapshot(self) -> int:
+        """Write the current windows of every live market; returns rows written."""
+        started = time.monotonic()
+        now = time.time()
+        rows = await self._build_snapshot_rows(now)
+        stale_before = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        await asyncio.to_thread(self._write_snapshot, rows, stale_before)
+        self._snapshots += 1
+        self._rows_snapshotted += len(rows)
+        self._last_snapshot_ms = (time.monotonic() - started) * 1000
+        return len(rows)
+
+    async def run(self) -> None:
+        """Background snapshot loop (no-op without a supabase client)."""
+        if self.supabase is None:
+            return
+        logger.info("Starting market analytics snapshots")
+        while True:
+            try:
+                await asyncio.sleep(self.SNAPSHOT_INTERVAL_SECONDS)
+                self._evict(time.time())
+                await self.snapshot()
+            except asyncio.CancelledError:
+                logger.info("Market analytics snapshots stopped")
+                break
+            except Exception as e:
+                logger.error(f"Market analytics snapshot failed: {e}")
+                self._errors += 1
+
+    def __len__(self) -> int:
+        return len(self._markets)
+
+    @property
+    def stats(self) -> dict:
+        """Get engine statistics."""
+        return {
+            "markets": len(self._markets),
+            "trades_recorded": self._trades_recorded,
+            "late_trades": self._late_trades,
+            "markets_evicted": self._markets_evicted,
+            "warm": time.time() - self._started_at >= self._horizon,
+            "snapshots": self._snapshots,
+            "rows_snapshotted": self._rows_snapshotted,
+            "last_snapshot_ms": round(self._last_snapshot_ms, 1),
+            "errors": self._errors,
+        }
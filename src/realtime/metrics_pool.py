@@ -0,0 +1,219 @@
+"""
+Process-pool offload for wallet metric computation.
+
+Wallet discovery computes metrics on the same event loop as the RTDS
+consumers, the batch writer and the insider scorer; for a wallet with tens
+of thousands of positions that is hundreds of milliseconds of CPU during
+which nothing else runs. MetricsPool moves the computation
+(wallet_metrics_result: trade grouping, period metrics, growth quality,
+copy score) into worker processes:
+
+- inputs travel as one marshal payload (pack_positions), results come back
+  as a plain dict
+- at most max_in_flight jobs are submitted at once; further callers wait
+  for a slot, so a burst of large wallets cannot queue unbounded payloads
+- the pool is replaced after max_tasks_per_worker jobs per worker, so
+  worker memory fragmented by large wallets is returned to the OS
+- wallets below INLINE_MAX_POSITIONS are computed inline: their compute
+  time is below the cost of the round-trip
+- a crashed pool is restarted and the job computed inline, so discovery
+  keeps working with degraded latency; after MAX_RESTARTS crashes in a row
+  the pool is abandoned and everything is computed inline
+
+workers=0 computes everything inline (the pre-pool behaviour).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from ..metrics.wallet_metrics import pack_positions, wallet_metrics_job, wallet_metrics_result
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsPool:
+    """
+    Bounded process pool for wallet_metrics_result.
+
+    Usage:
+        pool = MetricsPool(workers=2)
+        pool.start()
+        computed = await pool.compute(closed, open_positions, balance)
+        pool.shutdown()
+    """
+
+    WORKERS = 2
+    MAX_IN_FLIGHT = 4
+    MAX_TASKS_PER_WORKER = 100
+    INLINE_MAX_POSITIONS = 500  # smaller wallets are cheaper to compute inline
+    MAX_RESTARTS = 3  # consecutive crashes before falling back to inline for good
+
+    def __init__(
+        self,
+        workers: int = WORKERS,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        max_tasks_per_worker: int = MAX_TASKS_PER_WORKER,
+        inline_max_positions: int = INLINE_MAX_POSITIONS,
+    ):
+        """
+        Args:
+            workers: Worker processes (0 = compute inline on the event loop)
+            max_in_flight: Jobs submitted to the pool at once
+            max_tasks_per_worker: Jobs per worker before the pool is replaced
+            inline_max_positions: Wallets with at most this many positions
+                skip the pool
+        """
+        self.workers = max(0, workers)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_tasks_per_worker = max(1, max_tasks_per_worker)
+        self.inline_max_positions = inline_max_positions
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_jobs = 0
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._in_flight = 0
+        self._consecutive_restarts = 0
+
+        # Stats
+        self._jobs = 0
+        self._inline_jobs = 0
+        self._peak_in_flight = 0
+        self._slot_waits = 0
+        self._worker_seconds = 0.0
+        self._max_worker_seconds = 0.0
+        self._pack_seconds = 0.0
+        self._max_pack_seconds = 0.0
+        self._payload_bytes = 0
+        self._recycles = 0
+        self._restarts = 0
+        self._errors = 0
+
+    def start(self) -> None:
+        """Start the worker processes (no-op when computing inline)."""
+        if self.workers and not self._executor:
+            self._executor = self._new_executor()
+            logger.info(
+                f"Metrics pool started: {self.workers} workers, "
+                f"max_in_flight={self.max_in_flight}, recycle after "
+                f"{self.max_tasks_per_worker} jobs/worker"
+            )
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; jobs still running are waited for."""
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the parent runs an event loop and helper threads
+        self._executor_jobs = 0
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _replace_executor(self) -> None:
+        """Swap in a fresh pool; the old one finishes its jobs and exits."""
+        old = self._executor
+        self._executor = self._new_executor()
+        if old:
+            old.shutdown(wait=False)
+
+    async def compute(
+        self,
+        closed: list[dict],
+        open_positions: list[dict],
+        current_balance: float = 0,
+    ) -> dict:
+        """wallet_metrics_result for one wallet, in a worker process if the wallet is large."""
+        if not self._executor or len(closed) + len(open_positions) <= self.inline_max_positions:
+            self._inline_jobs += 1
+            return wallet_metrics_result(closed, open_positions, current_balance)
+
+        if self._slots.locked():
+            self._slot_waits += 1
+        async with self._slots:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            try:
+                return await self._submit(closed, open_positions, current_balance)
+            finally:
+                self._in_flight -= 1
+
+    async def _submit(self, closed: list[dict], open_positions: list[dict], current_balance: float) -> dict:
+        if not self._executor:  # abandoned while this job waited for a slot
+            self._inline_jobs += 1
+            return wallet_metrics_result(closed, open_positions, current_balance)
+
+        start = time.perf_counter()
+        payload = pack_positions(closed, open_positions)
+        pack_seconds = time.perf_counter() - start
+        self._pack_seconds += pack_seconds
+        self._max_pack_seconds = max(self._max_pack_seconds, pack_seconds)
+        self._payload_bytes += len(payload)
+
+        if self._executor_jobs >= self.workers * self.max_tasks_per_worker:
+            self._recycles += 1
+            self._replace_executor()
+        self._executor_jobs += 1
+
+        executor = self._executor
+        loop = asyncio.get_running_loop()
+        try:
+            result, worker_seconds = await loop.run_in_executor(
+                executor, wallet_metrics_job, payload, current_balance, time.time()
+            )
+        except BrokenProcessPool as e:
+            # Jobs in flight on the same pool all fail; only the first restarts it
+            if executor is self._executor:
+                self._restarts += 1
+                self._consecutive_restarts += 1
+                if self._consecutive_restarts >= self.MAX_RESTARTS:
+                    logger.error(
+                        f"Metrics pool broken {self._consecutive_restarts} times in a row ({e}); "
+                        f"computing inline from now on"
+                    )
+                    executor.shutdown(wait=False)
+                    self._executor = None
+                else:
+                    logger.warning(f"Metrics pool broken ({e}); restarting, computing inline")
+                    self._replace_executor()
+            self._inline_jobs += 1
+            return wallet_metrics_result(closed, open_positions, current_balance)
+        except Exception:
+            self._errors += 1
+            raise
+
+        self._consecutive_restarts = 0
+        self._jobs += 1
+        self._worker_seconds += worker_seconds
+        self._max_worker_seconds = max(self._max_worker_seconds, worker_seconds)
+        return result
+
+    @property
+    def stats(self) -> dict:
+        """Get pool statistics."""
+        jobs = self._jobs
+        return {
+            "workers": self.workers,
+            "jobs": jobs,
+            "inline_jobs": self._inline_jobs,
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "slot_waits": self._slot_waits,
+            "avg_worker_ms": round(self._worker_seconds / jobs * 1000, 1) if jobs else 0,
+            "max_worker_ms": round(self._max_worker_seconds * 1000, 1),
+            "offloaded_seconds": round(self._worker_seconds, 1),
+            "avg_pack_ms": round(self._pack_seconds / jobs * 1000, 1) if jobs else 0,
+            "max_pack_ms": round(self._max_pack_seconds * 1000, 1),
+            "avg_payload_kb": round(self._payload_bytes / jobs / 1024, 1) if jobs else 0,
+            "recycles": self._recycles,
+            "restarts": self._restarts,
+            "errors": self._errors,
+        }
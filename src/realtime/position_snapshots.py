@@ -0,0 +1,251 @@
+"""
+Per-wallet local snapshots of closed positions for incremental re-analysis.
+
+Active wallets are re-analyzed daily, and a heavy trader's /closed-positions
+history runs to thousands of pages. The snapshot keeps every closed position
+seen so far (projected to the fields the metrics read), so re-analysis only
+fetches the pages newer than the snapshot: /closed-positions is sorted by
+TIMESTAMP DESC, so paging stops at the first record the snapshot already has.
+
+On disk each wallet is one gzip-compressed JSON file, sharded by address
+prefix (<dir>/<addr[2:4]>/<addr>.json.gz) and replaced atomically:
+
+    {"version": 1, "address": "0x...", "synced_at": ..., "full_synced_at": ...,
+     "closed": [{"conditionId": ..., "realizedPnl": ..., "timestamp": ...}, ...]}
+
+/closed-positions holds one cumulative record per asset: when a re-entered
+asset is closed again, the API returns that record with a new timestamp.
+The snapshot therefore keeps one record per asset, and a newer record for
+an asset it holds replaces the old one. Snapshots are fully re-fetched every
+FULL_RESYNC_DAYS to pick up anything the delta walk cannot see (records
+rewritten in place by the API).
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Fields of a /closed-positions record the wallet metrics read; everything
+# else (titles, icons, outcome indices...) is dropped from the snapshot
+SNAPSHOT_FIELDS = (
+    "conditionId",
+    "asset",
+    "outcome",
+    "size",
+    "avgPrice",
+    "totalBought",
+    "initialValue",
+    "realizedPnl",
+    "timestamp",
+    "resolvedAt",
+    "eventSlug",
+    "slug",
+)
+
+
+def normalize_position(record: dict) -> dict:
+    """Project a /closed-positions record to SNAPSHOT_FIELDS (values unchanged)."""
+    return {k: record[k] for k in SNAPSHOT_FIELDS if k in record}
+
+
+def position_key(record: dict) -> tuple[str, int]:
+    """Identity of a closed position: (asset, close timestamp)."""
+    asset = record.get("asset") or f"{record.get('conditionId', '')}:{record.get('outcome', '')}"
+    try:
+        ts = int(record.get("timestamp") or 0)
+    except (TypeError, ValueError):
+        ts = 0
+    return asset, ts
+
+
+class PositionSnapshot:
+    """Closed positions of one wallet, newest first."""
+
+    __slots__ = ("address", "closed", "synced_at", "full_synced_at", "watermark", "_keys", "_assets")
+
+    def __init__(
+        self,
+        address: str,
+        closed: list[dict],
+        synced_at: float = 0.0,
+        full_synced_at: float = 0.0,
+    ):
+        self.address = address
+        self.synced_at = synced_at
+        self.full_synced_at = full_synced_at
+        # asset -> close timestamp of the record held for it (newest wins;
+        # drops duplicates kept by older snapshots)
+        self._assets: dict[str, int] = {}
+        self.closed = []
+        for p in sorted(closed, key=lambda p: position_key(p)[1], reverse=True):
+            asset, ts = position_key(p)
+            if asset not in self._assets:
+                self._assets[asset] = ts
+                self.closed.append(p)
+        self._keys = set(self._assets.items())
+        # Newest close timestamp held: anything older is already in the snapshot
+        self.watermark = max((k[1] for k in self._keys), default=0)
+
+    def is_known(self, record: dict) -> bool:
+        """True once the DESC walk reaches records the snapshot already holds."""
+        key = position_key(record)
+        return key in self._keys or key[1] < self.watermark
+
+    def merge(self, delta: list[dict]) -> int:
+        """
+        Prepend newer records from a delta fetch, replacing the held record
+        of any asset closed again. Returns the number added (replacements
+        included).
+        """
+        added = []
+        replaced: set[str] = set()
+        for record in delta:
+            asset, ts = key = position_key(record)
+            held = self._assets.get(asset)
+            if held is not None:
+                if ts <= held:
+                    continue  # already held, or older than the held record
+                self._keys.discard((asset, held))
+                replaced.add(asset)
+            self._assets[asset] = ts
+            self._keys.add(key)
+            added.append(normalize_position(record))
+            if ts > self.watermark:
+                self.watermark = ts
+        if replaced:
+            self.closed = [p for p in self.closed if position_key(p)[0] not in replaced]
+        if added:
+            self.closed = added + self.closed
+        return len(added)
+
+
+class PositionSnapshotStore:
+    """
+    Directory of per-wallet closed-position snapshots.
+
+    Usage:
+        store = PositionSnapshotStore("data/position_snapshots")
+        snapshot = await store.load(address)    # None if missing or due a full sync
+        ...fetch the delta, snapshot.merge(delta)...
+        await store.save(snapshot)
+    """
+
+    FULL_RESYNC_DAYS = 7
+    COMPRESS_LEVEL = 5
+
+    def __init__(self, directory: str | Path, full_resync_days: float = FULL_RESYNC_DAYS):
+        """
+        Args:
+            directory: Snapshot directory (created if missing)
+            full_resync_days: Re-fetch a wallet's whole history after this long
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.full_resync_seconds = full_resync_days * 86400
+
+        # Stats
+        self._full_syncs = 0
+        self._delta_syncs = 0
+        self._records_fetched = 0
+        self._records_reused = 0
+        self._incomplete = 0
+        self._errors = 0
+
+    def _path(self, address: str) -> Path:
+        return self.directory / address[2:4] / f"{address}.json.gz"
+
+    async def load(self, address: str) -> Optional[PositionSnapshot]:
+        """Load a wallet's snapshot, or None if it has none or is due a full sync."""
+        try:
+            snapshot = await asyncio.to_thread(self._read, address)
+        except Exception as e:
+            logger.warning(f"Unreadable position snapshot for {address[:10]}...: {e}")
+            self._errors += 1
+            return None
+        if snapshot and time.time() - snapshot.full_synced_at >= self.full_resync_seconds:
+            return None
+        return snapshot
+
+    def _read(self, address: str) -> Optional[PositionSnapshot]:
+        path = self._path(address)
+        if not path.exists():
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SNAPSHOT_VERSION:
+            return None
+        return PositionSnapshot(
+            address,
+            data.get("closed", []),
+            synced_at=data.get("synced_at", 0.0),
+            full_synced_at=data.get("full_synced_at", 0.0),
+        )
+
+    async def save(self, snapshot: PositionSnapshot) -> None:
+        """Persist a snapshot (atomic replace)."""
+        try:
+            await asyncio.to_thread(self._write, snapshot)
+        except Exception as e:
+            logger.warning(f"Failed to save position snapshot for {snapshot.address[:10]}...: {e}")
+            self._errors += 1
+
+    def _write(self, snapshot: PositionSnapshot) -> None:
+        path = self._path(snapshot.address)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "address": snapshot.address,
+            "synced_at": snapshot.synced_at,
+            "full_synced_at": snapshot.full_synced_at,
+            "closed": snapshot.closed,
+        }
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=self.COMPRESS_LEVEL) as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def full_snapshot(self, address: str, closed: list[dict]) -> PositionSnapshot:
+        """Build a snapshot from a complete /closed-positions fetch."""
+        now = time.time()
+        self._full_syncs += 1
+        self._records_fetched += len(closed)
+        return PositionSnapshot(
+            address,
+            [normalize_position(p) for p in closed],
+            synced_at=now,
+            full_synced_at=now,
+        )
+
+    def record_delta(self, snapshot: PositionSnapshot, fetched: int, added: int) -> None:
+        """Count a delta sync of `fetched` records that added `added` to the snapshot."""
+        snapshot.synced_at = time.time()
+        self._delta_syncs += 1
+        self._records_fetched += fetched
+        self._records_reused += len(snapshot.closed) - added
+
+    def record_incomplete(self) -> None:
+        """Count a fetch that failed part-way (the snapshot is left untouched)."""
+        self._incomplete += 1
+
+    @property
+    def stats(self) -> dict:
+        """Get snapshot store statistics."""
+        total = self._records_fetched + self._records_reused
+        return {
+            "full_syncs": self._full_syncs,
+            "delta_syncs": self._delta_syncs,
+            "records_fetched": self._records_fetched,
+            "records_reused": self._records_reused,
+            "reuse_pct": round(self._records_reused / total * 100, 1) if total else 0,
+            "incomplete": self._incomplete,
+            "errors": self._errors,
+        }
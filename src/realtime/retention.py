@@ -0,0 +1,191 @@
+"""
+Partition-based retention for live_trades and insider_alerts.
+
+Migration 033 range-partitions both tables by executed_at (live_trades is
+first split into a regular and an important retention tier). Instead of
+deleting expired rows, the retention manager pre-creates upcoming
+partitions and detaches and drops whole expired ones, which costs a
+catalog change rather than a WAL record and index update per row.
+
+With a TradeArchiver, expiring live_trades partitions, and the expired
+rows of each tier's DEFAULT partition, are exported to Parquet first; if
+an export fails nothing is dropped for that tier until the next run.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from supabase import Client
+
+from .trade_archive import TradeArchiver
+
+logger = logging.getLogger(__name__)
+
+TIER_REGULAR = "regular"
+TIER_IMPORTANT = "important"
+
+
+def retention_tier(is_whale: bool, is_insider_suspect: bool) -> str:
+    """live_trades retention tier for a trade's flags."""
+    return TIER_IMPORTANT if is_whale or is_insider_suspect else TIER_REGULAR
+
+
+class RetentionPolicy(NamedTuple):
+    """Retention for one range-partitioned table."""
+
+    table: str  # range-partitioned parent
+    column: str  # partition key
+    retention: timedelta
+    step: timedelta  # partition width
+    archive_tier: Optional[str] = None  # live_trades tier to archive before dropping
+
+
+class PartitionRetention:
+    """
+    Keeps partitions ahead of writes and drops expired ones.
+
+    Usage:
+        retention = PartitionRetention(supabase)
+        task = asyncio.create_task(retention.run())
+    """
+
+    POLICIES = (
+        # Non-whale, non-insider trades: kept 1 day (up to 1 day + 6h)
+        RetentionPolicy(
+            f"live_trades_{TIER_REGULAR}", "executed_at", timedelta(days=1), timedelta(hours=6), TIER_REGULAR
+        ),
+        # Whale / insider suspect trades
+        RetentionPolicy(
+            f"live_trades_{TIER_IMPORTANT}", "executed_at", timedelta(days=7), timedelta(days=1), TIER_IMPORTANT
+        ),
+        RetentionPolicy("insider_alerts", "executed_at", timedelta(days=30), timedelta(days=1)),
+    )
+
+    INTERVAL_SECONDS = 3600
+    PRECREATE = timedelta(days=2)  # partitions kept ready ahead of now
+
+    def __init__(
+        self,
+        supabase: Client,
+        policies: tuple[RetentionPolicy, ...] = POLICIES,
+        archiver: Optional[TradeArchiver] = None,
+    ):
+        """
+        Args:
+            supabase: supabase-py Client (service role; the partition
+                functions are not granted to anon/authenticated)
+            policies: Tables to maintain
+            archiver: Optional Parquet archive for expiring live_trades partitions
+        """
+        self.supabase = supabase
+        self.policies = policies
+        self.archiver = archiver
+
+        # Stats
+        self._runs = 0
+        self._partitions_created = 0
+        self._partitions_dropped = 0
+        self._rows_dropped = 0
+        self._last_run_ms = 0.0
+        self._errors = 0
+
+    def _ensure(self, policy: RetentionPolicy, now: datetime) -> int:
+        result = self.supabase.rpc(
+            "ensure_time_partitions",
+            {
+                "p_parent": policy.table,
+                "p_column": policy.column,
+                "p_step": f"{int(policy.step.total_seconds())} seconds",
+                "p_from": now.isoformat(),
+                "p_to": (now + self.PRECREATE).isoformat(),
+            },
+        ).execute()
+        return int(result.data or 0)
+
+    def _list_expired(self, policy: RetentionPolicy, now: datetime) -> list[dict]:
+        result = self.supabase.rpc(
+            "list_expired_partitions",
+            {"p_parent": policy.table, "p_before": (now - policy.retention).isoformat()},
+        ).execute()
+        return result.data or []
+
+    async def _archive_expired(self, policy: RetentionPolicy, now: datetime) -> None:
+        """
+        Export every partition about to be dropped, then the DEFAULT-partition
+        rows about to be purged (raises if any export fails).
+        """
+        for partition in await asyncio.to_thread(self._list_expired, policy, now):
+            await self.archiver.archive_window(
+                partition["partition_name"],
+                datetime.fromisoformat(partition["lower_bound"]),
+                datetime.fromisoformat(partition["upper_bound"]),
+                policy.archive_tier,
+            )
+        await self.archiver.archive_default(policy.table, now - policy.retention)
+
+    def _drop_expired(self, policy: RetentionPolicy, now: datetime) -> list[dict]:
+        result = self.supabase.rpc(
+            "drop_expired_partitions",
+            {
+                "p_parent": policy.table,
+                "p_column": policy.column,
+                "p_before": (now - policy.retention).isoformat(),
+            },
+        ).execute()
+        return result.data or []
+
+    async def run_once(self) -> None:
+        """Pre-create upcoming partitions and drop expired ones for every policy."""
+        started = time.monotonic()
+        now = datetime.now(timezone.utc)
+
+        for policy in self.policies:
+            try:
+                created = await asyncio.to_thread(self._ensure, policy, now)
+                if self.archiver and policy.archive_tier:
+                    await self._archive_expired(policy, now)
+                dropped = await asyncio.to_thread(self._drop_expired, policy, now)
+            except Exception as e:
+                logger.error(f"Retention failed for {policy.table}: {e}")
+                self._errors += 1
+                continue
+
+            rows = sum(int(d.get("approx_rows") or 0) for d in dropped)
+            self._partitions_created += created
+            self._partitions_dropped += sum(1 for d in dropped if not d["partition_name"].endswith("_default"))
+            self._rows_dropped += rows
+            if dropped:
+                logger.info(
+                    f"Retention: {policy.table} dropped "
+                    f"{', '.join(d['partition_name'] for d in dropped)} (~{rows:,} rows)"
+                )
+
+        self._runs += 1
+        self._last_run_ms = (time.monotonic() - started) * 1000
+
+    async def run(self) -> None:
+        """Background retention loop."""
+        logger.info("Starting partition retention task")
+        while True:
+            try:
+                await self.run_once()
+                await asyncio.sleep(self.INTERVAL_SECONDS)
+            except asyncio.CancelledError:
+                logger.info("Partition retention task stopped")
+                break
+
+    @property
+    def stats(self) -> dict:
+        """Get retention statistics."""
+        return {
+            "runs": self._runs,
+            "partitions_created": self._partitions_created,
+            "partitions_dropped": self._partitions_dropped,
+            "rows_dropped": self._rows_dropped,
+            "last_run_ms": round(self._last_run_ms, 1),
+            "errors": self._errors,
+            "archive": self.archiver.stats if self.archiver else None,
+        }
@@ -0,0 +1,291 @@
+"""
+Bounded ring buffer between the RTDS socket reader and trade handlers.
+
+The reader pushes parsed trades into a preallocated ring and returns to
+the websocket immediately; a pool of consumer tasks drains the ring and
+runs the (possibly slow) downstream handlers.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Overflow policies
+OVERFLOW_BLOCK = "block"                    # reader waits for free space
+OVERFLOW_DROP_OLDEST = "drop_oldest"        # evict the oldest buffered trade
+OVERFLOW_DROP_BELOW_USD = "drop_below_usd"  # drop incoming trades below a USD threshold;
+                                            # larger ones evict the oldest buffered trade
+                                            # below it (or the oldest overall), never wait
+
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_BELOW_USD)
+
+_DEAD = object()  # slot of an item evicted from the middle of the ring
+
+
+class TradeRingBuffer:
+    """
+    Fixed-capacity FIFO ring with a configurable overflow policy.
+
+    Slots are preallocated once and put/get are O(1). Under drop_below_usd
+    the ring also keeps a FIFO of the positions of below-threshold items; an
+    eviction marks that slot dead (get skips it) instead of shifting items.
+    The ring has 2 x capacity slots, so dead slots are only compacted away
+    when it runs out of room, after at least `capacity` evictions.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        overflow_policy: str = OVERFLOW_DROP_BELOW_USD,
+        drop_below_usd: float = 50.0,
+    ):
+        """
+        Args:
+            capacity: Maximum number of buffered trades
+            overflow_policy: One of OVERFLOW_POLICIES
+            drop_below_usd: USD threshold for the drop_below_usd policy
+        """
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.drop_below_usd = drop_below_usd
+
+        # Positions are ever-increasing sequence numbers; slot = position % len(slots)
+        self._slots: list[Any] = [None] * (2 * capacity)
+        self._head = 0  # position of the oldest slot (item or dead)
+        self._tail = 0  # position of the next put
+        self._size = 0  # live items
+        self._small: deque[int] = deque()  # positions of below-threshold items, oldest first
+
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+        # Counters
+        self._pushed = 0
+        self._popped = 0
+        self._dropped_oldest = 0
+        self._dropped_below_usd = 0
+        self._blocked_puts = 0
+        self._high_water_mark = 0
+        self._compactions = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def evicted(self) -> int:
+        """Items evicted to make room (drop_oldest, or drop_below_usd with no small item to evict)."""
+        return self._dropped_oldest
+
+    async def put(self, item: Any) -> bool:
+        """
+        Add an item, applying the overflow policy when full.
+
+        Returns:
+            True if the item was buffered, False if it was dropped
+        """
+        if self._size >= self.capacity:
+            if self.overflow_policy == OVERFLOW_DROP_OLDEST:
+                self._evict_oldest()
+            elif self.overflow_policy == OVERFLOW_DROP_BELOW_USD:
+                if getattr(item, "usd_value", 0) < self.drop_below_usd:
+                    self._dropped_below_usd += 1
+                    return False
+                if not self._evict_oldest_below_usd():
+                    self._evict_oldest()
+            else:
+                self._blocked_puts += 1
+                while self._size >= self.capacity:
+                    self._not_full.clear()
+                    await self._not_full.wait()
+
+        if self._tail - self._head == len(self._slots):
+            self._compact()
+        if self.overflow_policy == OVERFLOW_DROP_BELOW_USD and getattr(item, "usd_value", 0) < self.drop_below_usd:
+            self._small.append(self._tail)
+        self._slots[self._tail % len(self._slots)] = item
+        self._tail += 1
+        self._size += 1
+        self._pushed += 1
+        if self._size > self._high_water_mark:
+            self._high_water_mark = self._size
+        self._not_empty.set()
+        return True
+
+    async def get(self) -> Any:
+        """Remove and return the oldest item, waiting if the ring is empty."""
+        while self._size == 0:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        item = self._pop_head()
+        self._popped += 1
+        self._not_full.set()
+        return item
+
+    def _pop_head(self) -> Any:
+        """Remove the oldest live item (the ring must not be empty)."""
+        slots = self._slots
+        while True:
+            index = self._head % len(slots)
+            item = slots[index]
+            slots[index] = None
+            self._head += 1
+            if item is not _DEAD:
+                break
+        self._size -= 1
+        # The popped item was the oldest live one, so it leads the small FIFO if it is in it
+        if self._small and self._small[0] < self._head:
+            self._small.popleft()
+        return item
+
+    def _evict_oldest(self) -> None:
+        """Drop the oldest buffered item to make room."""
+        self._pop_head()
+        self._dropped_oldest += 1
+
+    def _evict_oldest_below_usd(self) -> bool:
+        """Drop the oldest buffered item below drop_below_usd; its slot is marked dead."""
+        if not self._small:
+            return False
+        self._slots[self._small.popleft() % len(self._slots)] = _DEAD
+        self._size -= 1
+        self._dropped_below_usd += 1
+        return True
+
+    def _compact(self) -> None:
+        """Squeeze out dead slots (only when the ring is out of slots)."""
+        items = [
+            item
+            for item in (self._slots[position % len(self._slots)] for position in range(self._head, self._tail))
+            if item is not _DEAD
+        ]
+        self._slots[:len(items)] = items
+        self._slots[len(items):] = [None] * (len(self._slots) - len(items))
+        self._head, self._tail = 0, len(items)
+        if self.overflow_policy == OVERFLOW_DROP_BELOW_USD:
+            self._small = deque(
+                position
+                for position, item in enumerate(items)
+                if getattr(item, "usd_value", 0) < self.drop_below_usd
+            )
+        self._compactions += 1
+
+    @property
+    def stats(self) -> dict:
+        """Get buffer statistics."""
+        return {
+            "capacity": self.capacity,
+            "size": self._size,
+            "overflow_policy": self.overflow_policy,
+            "pushed": self._pushed,
+            "popped": self._popped,
+            "dropped": self._dropped_oldest + self._dropped_below_usd,
+            "dropped_oldest": self._dropped_oldest,
+            "dropped_below_usd": self._dropped_below_usd,
+            "blocked_puts": self._blocked_puts,
+            "high_water_mark": self._high_water_mark,
+            "compactions": self._compactions,
+        }
+
+
+class TradeDispatcher:
+    """
+    Ring buffer plus a pool of consumer tasks delivering trades to a handler.
+
+    Usage:
+        dispatcher = TradeDispatcher(handle_trade, capacity=10000, consumers=4)
+        dispatcher.start()
+        await dispatcher.dispatch(trade)   # returns without running handle_trade
+        await dispatcher.stop()
+    """
+
+    DRAIN_TIMEOUT_SECONDS = 5
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        capacity: int,
+        overflow_policy: str = OVERFLOW_DROP_BELOW_USD,
+        drop_below_usd: float = 50.0,
+        consumers: int = 4,
+    ):
+        """
+        Args:
+            handler: Async callable run by consumer tasks for each trade
+            capacity: Ring buffer capacity
+            overflow_policy: Ring buffer overflow policy
+            drop_below_usd: USD threshold for the drop_below_usd policy
+            consumers: Number of consumer tasks
+        """
+        self.handler = handler
+        self.buffer = TradeRingBuffer(capacity, overflow_policy, drop_below_usd)
+        self.consumers = max(1, consumers)
+        self._tasks: list[asyncio.Task] = []
+        self._handler_errors = 0
+
+    def start(self) -> None:
+        """Start consumer tasks."""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._consume(worker_id)) for worker_id in range(self.consumers)
+        ]
+        logger.info(
+            f"Trade dispatcher started: {self.consumers} consumers, "
+            f"capacity={self.buffer.capacity}, policy={self.buffer.overflow_policy}"
+        )
+
+    async def stop(self) -> None:
+        """Drain buffered trades (bounded wait) and stop consumers."""
+        if not self._tasks:
+            return
+
+        waited = 0.0
+        while len(self.buffer) and waited < self.DRAIN_TIMEOUT_SECONDS:
+            await asyncio.sleep(0.1)
+            waited += 0.1
+        if len(self.buffer):
+            logger.warning(f"Trade dispatcher stopping with {len(self.buffer)} undelivered trades")
+
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def dispatch(self, trade: Any) -> bool:
+        """Buffer a trade for the consumers. Returns False if it was dropped."""
+        return await self.buffer.put(trade)
+
+    async def _consume(self, worker_id: int) -> None:
+        """Consumer loop: deliver buffered trades to the handler."""
+        while True:
+            try:
+                trade = await self.buffer.get()
+                await self.handler(trade)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Trade consumer {worker_id} error: {type(e).__name__}: {e}")
+                self._handler_errors += 1
+
+    @property
+    def stats(self) -> dict:
+        """Get dispatcher statistics."""
+        return {
+            **self.buffer.stats,
+            "consumers": self.consumers,
+            "handler_errors": self._handler_errors,
+        }
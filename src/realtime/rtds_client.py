@@ -6,21 +6,66 @@ the activity/trades topic to receive all trades in real-time.
 """
 
 import asyncio
+import hashlib
 import json
 import logging
+import time
 from datetime import datetime, timezone
+from operator import itemgetter
 from typing import Optional, Callable, Any, Awaitable
 from dataclasses import dataclass, field
 
 import websockets
 from websockets.exceptions import ConnectionClosed, ConnectionClosedError
 
-logger = logging.getLogger(__name__)
+from .ring_buffer import TradeDispatcher, OVERFLOW_DROP_BELOW_USD
+from .frame_log import FrameRecorder
+from .backfill import GapBackfiller
+from .trade_filter import TradeFilter
+from .latency import LatencyTracker
+
+try:
+    import orjson
 
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional, fall back to the stdlib decoder
+    _json_loads = json.loads
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+# Candidate payload keys per trade field, in lookup priority order.
+# The tolerant parser walks these chains on every frame; the compiled
+# parser resolves them once against the first frame of a connection.
+TRADE_FIELD_KEYS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("trade_id", ("id", "tradeId", "trade_id")),
+    ("trader_address", ("proxyWallet", "user", "userAddress", "trader_address", "maker", "taker")),
+    ("timestamp", ("timestamp", "executedAt", "executed_at")),
+    ("size", ("size", "amount")),
+    ("price", ("price", "avgPrice")),
+    ("usd_value", ("usdValue", "usd_value")),
+    ("side", ("side", "type")),
+    ("condition_id", ("conditionId", "condition_id", "marketId", "market_id")),
+    ("market_slug", ("slug", "marketSlug", "market_slug")),
+    ("event_slug", ("eventSlug", "event_slug")),
+    ("asset_id", ("asset", "assetId", "asset_id")),
+    ("outcome", ("outcome", "outcomeName", "outcome_name")),
+    ("outcome_index", ("outcomeIndex", "outcome_index")),
+    ("tx_hash", ("transactionHash", "txHash", "tx_hash")),
+)
+
+PARSER_TOLERANT = "tolerant"
+PARSER_COMPILED = "compiled"
+
+
+@dataclass(slots=True)
 class RTDSMessage:
-    """Parsed RTDS trade message."""
+    """
+    Parsed RTDS trade message.
+
+    Slotted to keep per-trade overhead small. The original frame is kept
+    as received (shared by all trades of a multi-trade frame) and only
+    decoded when ``raw_data`` is accessed.
+    """
 
     trade_id: str
     trader_address: str
@@ -36,7 +81,92 @@ class RTDSMessage:
     usd_value: float
     tx_hash: Optional[str]
     executed_at: datetime
-    raw_data: dict = field(repr=False)
+    raw_frame: bytes | str = field(default=b"", repr=False)
+    frame_index: int = field(default=-1, repr=False)  # index into a list payload, -1 = single
+    backfilled: bool = False  # recovered from the data-api after a disconnect
+    received_at: float = field(default=0.0, repr=False)  # time.monotonic() when the frame arrived
+    fill_count: int = 1  # fills merged into this trade by the FillAggregator
+
+    @property
+    def raw_data(self) -> dict:
+        """Decode this trade's payload from the raw frame (on demand)."""
+        if not self.raw_frame:
+            return {}
+        data = _json_loads(self.raw_frame)
+        payload = data.get("payload", data) if isinstance(data, dict) else data
+        if isinstance(payload, list):
+            return payload[self.frame_index] if self.frame_index >= 0 else {}
+        return payload
+
+
+class CompiledTradeLayout:
+    """
+    Direct key map for one RTDS payload layout.
+
+    Built from the first trade of a connection, and rebuilt when
+    RTDSClient.LAYOUT_RELEARN_MISSES frames in a row carry a different key
+    set (the feed changed shape mid-connection). A frame matches when it has
+    exactly the same key set, in which case every field resolves to the same
+    key the tolerant parser would pick, so a single itemgetter call replaces
+    the per-field fallback chains.
+    """
+
+    __slots__ = ("keys", "getter", "positions", "ambiguous", "falsy_to_none")
+
+    def __init__(self, data: dict):
+        self.keys = frozenset(data)
+
+        primary_keys: list[str] = []
+        # field index -> position in the getter tuple (None = key absent)
+        self.positions: list[Optional[int]] = []
+        # field indexes that have more than one candidate key in this layout
+        self.ambiguous: list[int] = []
+        # field indexes whose `or` chain ends in an absent key, so a falsy
+        # value resolves to None rather than to the value itself
+        self.falsy_to_none: list[int] = []
+
+        for field_idx, (_, candidates) in enumerate(TRADE_FIELD_KEYS):
+            present = [k for k in candidates if k in self.keys]
+            if not present:
+                self.positions.append(None)
+                continue
+            self.positions.append(len(primary_keys))
+            primary_keys.append(present[0])
+            if len(present) > 1:
+                self.ambiguous.append(field_idx)
+            elif present[0] != candidates[-1]:
+                self.falsy_to_none.append(field_idx)
+
+        if len(primary_keys) == 1:
+            key = primary_keys[0]
+            self.getter = lambda d: (d[key],)
+        elif primary_keys:
+            self.getter = itemgetter(*primary_keys)
+        else:
+            self.getter = lambda d: ()
+
+    def extract(self, data: dict) -> Optional[list]:
+        """
+        Extract raw field values in TRADE_FIELD_KEYS order.
+
+        Returns None when the frame does not match this layout, or when a
+        primary key holds a falsy value and a later candidate key exists
+        (the tolerant ``or`` chain would then pick a different key).
+        """
+        if data.keys() != self.keys:
+            return None
+
+        values = self.getter(data)
+        fields = [None if pos is None else values[pos] for pos in self.positions]
+
+        for field_idx in self.ambiguous:
+            if not fields[field_idx]:
+                return None
+        for field_idx in self.falsy_to_none:
+            if not fields[field_idx]:
+                fields[field_idx] = None
+
+        return fields
 
 
 # Type alias for callbacks
@@ -67,6 +197,15 @@ class RTDSClient:
     CONNECTION_TIMEOUT = 30  # seconds
     STALE_THRESHOLD = 120  # seconds without messages = stale connection
 
+    # Ingestion ring buffer between the socket reader and on_trade
+    RING_BUFFER_CAPACITY = 10000
+    CONSUMER_COUNT = 4
+
+    # Consecutive frames with a different key set before the compiled
+    # layout is rebuilt from the current frame
+    LAYOUT_RELEARN_MISSES = 100
+    DROP_BELOW_USD = 50  # trades under this are not stored, only used for session scoring
+
     def __init__(
         self,
         on_trade: TradeCallback,
@@ -74,6 +213,15 @@ class RTDSClient:
         on_disconnect: Optional[DisconnectCallback] = None,
         filter_markets: Optional[list[str]] = None,
         filter_events: Optional[list[str]] = None,
+        filter_conditions: Optional[list[str]] = None,
+        filter_wallets: Optional[list[str]] = None,
+        parser_mode: str = PARSER_COMPILED,
+        buffer_capacity: Optional[int] = None,
+        overflow_policy: str = OVERFLOW_DROP_BELOW_USD,
+        consumer_count: Optional[int] = None,
+        url: Optional[str] = None,
+        recorder: Optional[FrameRecorder] = None,
+        backfill: bool = False,
     ):
         """
         Initialize RTDS client.
@@ -84,12 +232,66 @@ class RTDSClient:
             on_disconnect: Optional async callback when disconnected
             filter_markets: Optional list of market_slugs to filter (empty = all)
             filter_events: Optional list of event_slugs to filter (empty = all)
+            filter_conditions: Optional list of condition_ids to filter (empty = all)
+            filter_wallets: Optional list of trader wallets to filter (empty = all)
+                (filters are a union: a trade passes if it matches any list)
+            parser_mode: "compiled" (layout-compiled fast path with tolerant
+                fallback) or "tolerant" (per-field fallback chains only)
+            buffer_capacity: Ring buffer size between the socket reader and
+                on_trade (default RING_BUFFER_CAPACITY, 0 = call on_trade inline)
+            overflow_policy: Ring buffer overflow policy
+                ("block", "drop_oldest" or "drop_below_usd")
+            consumer_count: Number of tasks delivering buffered trades to on_trade
+            url: WebSocket URL (default RTDS_URL; a ReplayServer URL for offline runs)
+            recorder: Optional FrameRecorder that logs every raw frame received
+            backfill: Recover trades missed while disconnected from the
+                data-api after each reconnect
         """
+        if parser_mode not in (PARSER_COMPILED, PARSER_TOLERANT):
+            raise ValueError(f"Unknown parser mode: {parser_mode}")
+
         self.on_trade = on_trade
         self.on_connect = on_connect
         self.on_disconnect = on_disconnect
         self.filter_markets = filter_markets
         self.filter_events = filter_events
+        self.parser_mode = parser_mode
+        self.url = url or self.RTDS_URL
+        self.recorder = recorder
+
+        # Client-side filter (raw pre-check + exact match); None = firehose
+        trade_filter = TradeFilter(filter_markets, filter_events, filter_conditions, filter_wallets)
+        self._filter: Optional[TradeFilter] = trade_filter if trade_filter.active else None
+        self._subscription: Optional[dict] = None
+
+        # Payload layout compiled from the first trade of each connection
+        self._layout: Optional[CompiledTradeLayout] = None
+        self._layout_misses = 0
+        self._parse = (
+            self._parse_trade_compiled if parser_mode == PARSER_COMPILED else self._parse_trade
+        )
+
+        # Decouple on_trade from the socket read path
+        if buffer_capacity is None:
+            buffer_capacity = self.RING_BUFFER_CAPACITY
+        self._dispatcher: Optional[TradeDispatcher] = None
+        if buffer_capacity > 0:
+            self._dispatcher = TradeDispatcher(
+                self._deliver_trade,
+                capacity=buffer_capacity,
+                overflow_policy=overflow_policy,
+                drop_below_usd=self.DROP_BELOW_USD,
+                consumers=consumer_count or self.CONSUMER_COUNT,
+            )
+
+        # Post-reconnect gap recovery (trades >= DROP_BELOW_USD)
+        self._backfiller: Optional[GapBackfiller] = None
+        if backfill:
+            self._backfiller = GapBackfiller(
+                deliver=self._dispatch,
+                parse=self._parse_filtered,
+                min_usd=self.DROP_BELOW_USD,
+            )
 
         self._ws: Optional[websockets.WebSocketClientProtocol] = None
         self._running = False
@@ -99,15 +301,23 @@ class RTDSClient:
         self._trade_count = 0
         self._error_count = 0
         self._connected_at: Optional[datetime] = None
+        self._parse_fast_count = 0
+        self._parse_fallback_count = 0
+        self._layout_relearns = 0
+        self._dropped_no_timestamp = 0
+
+        # Per-stage latency: exchange timestamp -> socket, frame parse,
+        # socket -> on_trade (ring buffer wait)
+        self._latency = LatencyTracker(("exchange_to_receive", "parse", "dispatch"))
 
     async def connect(self) -> None:
         """Establish WebSocket connection and subscribe to trades."""
         while self._running:
             try:
-                logger.info(f"Connecting to RTDS: {self.RTDS_URL}")
+                logger.info(f"Connecting to RTDS: {self.url}")
 
                 async with websockets.connect(
-                    self.RTDS_URL,
+                    self.url,
                     ping_interval=self.HEARTBEAT_INTERVAL,
                     ping_timeout=10,
                     close_timeout=10,
@@ -117,6 +327,8 @@ class RTDSClient:
                     self._ws = ws
                     self._reconnect_count = 0
                     self._connected_at = datetime.now(timezone.utc)
+                    self._layout = None  # Re-learn the payload layout per connection
+                    self._layout_misses = 0
 
                     logger.info("Connected to RTDS successfully")
 
@@ -126,6 +338,9 @@ class RTDSClient:
                     # Subscribe to trades
                     await self._subscribe()
 
+                    if self._backfiller:
+                        self._backfiller.mark_connected()
+
                     # Start stale connection monitor
                     stale_task = asyncio.create_task(self._monitor_stale_connection())
 
@@ -168,6 +383,8 @@ class RTDSClient:
 
     async def _handle_disconnect(self, reason: str) -> None:
         """Handle disconnection."""
+        if self._backfiller and self._connected_at:
+            self._backfiller.mark_disconnected(self._last_message_time or self._connected_at)
         self._ws = None
         self._connected_at = None
         if self.on_disconnect:
@@ -204,15 +421,11 @@ class RTDSClient:
             "type": "trades",
         }
 
-        # Add filters if specified
-        filters = {}
-        if self.filter_markets:
-            filters["market_slug"] = self.filter_markets[0] if len(self.filter_markets) == 1 else None
-        if self.filter_events:
-            filters["event_slug"] = self.filter_events[0] if len(self.filter_events) == 1 else None
-
+        # Server-side filter only when RTDS can express the whole filter
+        # (a single slug); everything else is filtered client-side
+        filters = self._filter.server_filters() if self._filter else {}
         if filters:
-            subscription["filters"] = json.dumps({k: v for k, v in filters.items() if v})
+            subscription["filters"] = json.dumps(filters)
 
         subscribe_msg = {
             "action": "subscribe",
@@ -220,15 +433,65 @@ class RTDSClient:
         }
 
         await self._ws.send(json.dumps(subscribe_msg))
-        logger.info(f"Subscribed to activity/trades topic (filters: {filters or 'none'})")
+        self._subscription = subscription
+        logger.info(
+            f"Subscribed to activity/trades topic (server filters: {filters or 'none'}, "
+            f"client filter: {self._filter.stats if self._filter else 'none'})"
+        )
+
+    async def update_filters(
+        self,
+        markets: Optional[list[str]] = None,
+        events: Optional[list[str]] = None,
+        conditions: Optional[list[str]] = None,
+        wallets: Optional[list[str]] = None,
+    ) -> None:
+        """Replace the filter sets without reconnecting (all empty = firehose)."""
+        await self.set_filter(TradeFilter(markets, events, conditions, wallets))
+
+    async def set_filter(self, trade_filter: Optional[TradeFilter]) -> None:
+        """
+        Hot-swap the compiled filter.
+
+        The swap is a single reference assignment, so the receive loop sees
+        either the old or the new filter for any given frame. If the
+        server-side part of the filter changed, the subscription is replaced
+        on the open connection.
+        """
+        old_server = self._filter.server_filters() if self._filter else {}
+        self._filter = trade_filter if trade_filter and trade_filter.active else None
+        self.filter_markets = sorted(trade_filter.sets["markets"]) if self._filter else None
+        self.filter_events = sorted(trade_filter.sets["events"]) if self._filter else None
+        new_server = self._filter.server_filters() if self._filter else {}
+
+        logger.info(f"RTDS filter updated: {self._filter.stats if self._filter else 'none'}")
+        if new_server != old_server and self.is_connected:
+            try:
+                await self._ws.send(json.dumps({
+                    "action": "unsubscribe",
+                    "subscriptions": [self._subscription],
+                }))
+                await self._subscribe()
+            except Exception as e:
+                logger.error(f"RTDS resubscribe error: {type(e).__name__}: {e}")
+                self._error_count += 1
 
     async def _receive_loop(self) -> None:
         """Main message receive loop."""
         async for message in self._ws:
+            received_at = time.monotonic()
+            if self.recorder:
+                self.recorder.write(message)
+            self._last_message_time = datetime.now(timezone.utc)
+            self._message_count += 1
+
+            # Skip frames the client filter rules out before decoding them
+            trade_filter = self._filter
+            if trade_filter is not None and not trade_filter.prefilter(message):
+                continue
+
             try:
-                data = json.loads(message)
-                self._last_message_time = datetime.now(timezone.utc)
-                self._message_count += 1
+                data = _json_loads(message)
 
                 # Handle different message types
                 msg_type = data.get("type") or data.get("topic")
@@ -239,10 +502,10 @@ class RTDSClient:
 
                     # Handle array of trades
                     if isinstance(payload, list):
-                        for trade_data in payload:
-                            await self._process_trade(trade_data)
+                        for index, trade_data in enumerate(payload):
+                            await self._process_trade(trade_data, message, index, received_at)
                     else:
-                        await self._process_trade(payload)
+                        await self._process_trade(payload, message, -1, received_at)
 
                 elif msg_type == "subscribed":
                     logger.debug(f"Subscription confirmed: {data}")
@@ -264,105 +527,120 @@ class RTDSClient:
                 logger.error(f"Error processing message: {type(e).__name__}: {e}")
                 self._error_count += 1
 
-    async def _process_trade(self, data: dict) -> None:
+    async def _process_trade(
+        self,
+        data: dict,
+        frame: bytes | str = b"",
+        frame_index: int = -1,
+        received_at: float = 0.0,
+    ) -> None:
         """Process a single trade message."""
-        trade = self._parse_trade(data)
+        started = time.perf_counter()
+        trade = self._parse(data)
         if trade:
+            self._latency.record("parse", time.perf_counter() - started)
+            self._latency.record("exchange_to_receive", time.time() - trade.executed_at.timestamp())
+            if self._filter is not None and not self._filter.matches(trade):
+                return
+            if self._backfiller and not self._backfiller.note_live(trade):
+                return  # already recovered by a gap backfill
+            trade.raw_frame = frame
+            trade.frame_index = frame_index
+            trade.received_at = received_at or time.monotonic()
             self._trade_count += 1
-            await self._safe_callback(self.on_trade, trade)
+            await self._dispatch(trade)
+
+    async def _dispatch(self, trade: RTDSMessage) -> None:
+        """Buffer a trade for on_trade (or deliver inline when unbuffered)."""
+        if self._dispatcher:
+            await self._dispatcher.dispatch(trade)
+        else:
+            await self._deliver_trade(trade)
+
+    async def _deliver_trade(self, trade: RTDSMessage) -> None:
+        """Hand a parsed trade to the on_trade callback."""
+        if trade.received_at:
+            self._latency.record("dispatch", time.monotonic() - trade.received_at)
+        await self._safe_callback(self.on_trade, trade)
+
+    def _parse_filtered(self, data: dict) -> Optional[RTDSMessage]:
+        """Tolerant parse plus the client filter (for backfilled rows)."""
+        trade = self._parse_trade(data)
+        if trade and self._filter is not None and not self._filter.matches(trade):
+            return None
+        return trade
+
+    def _parse_trade_compiled(self, data: dict) -> Optional[RTDSMessage]:
+        """
+        Parse a trade using the layout compiled for this connection.
+
+        Falls back to the tolerant parser for frames that do not match
+        the compiled layout (different key set, or ambiguous empty values).
+        After LAYOUT_RELEARN_MISSES key-set mismatches in a row the layout
+        is recompiled from the current frame.
+        """
+        if not isinstance(data, dict):
+            return self._parse_trade(data)
+
+        layout = self._layout
+        if layout is None:
+            layout = self._layout = CompiledTradeLayout(data)
+            logger.debug(f"Compiled RTDS payload layout: {sorted(layout.keys)}")
+
+        fields = layout.extract(data)
+        if fields is None:
+            self._parse_fallback_count += 1
+            if data.keys() != layout.keys:
+                self._layout_misses += 1
+                if self._layout_misses >= self.LAYOUT_RELEARN_MISSES:
+                    self._layout = CompiledTradeLayout(data)
+                    self._layout_misses = 0
+                    self._layout_relearns += 1
+                    logger.info(f"RTDS payload layout changed, recompiled: {sorted(self._layout.keys)}")
+            return self._parse_trade(data)
+
+        self._layout_misses = 0
+        self._parse_fast_count += 1
+        try:
+            return self._build_trade(data, *fields)
+        except Exception as e:
+            logger.error(f"Failed to parse trade: {e}, data: {str(data)[:200]}")
+            self._error_count += 1
+            return None
 
     def _parse_trade(self, data: dict) -> Optional[RTDSMessage]:
         """Parse raw RTDS message into RTDSMessage."""
         try:
-            # Extract trade ID
-            trade_id = (
-                data.get("id")
-                or data.get("tradeId")
-                or data.get("trade_id")
-                or f"{data.get('user', 'unknown')}_{data.get('timestamp', 0)}"
-            )
-
-            # Extract trader address (proxyWallet is the main field in RTDS)
-            trader_address = (
-                data.get("proxyWallet")
-                or data.get("user")
-                or data.get("userAddress")
-                or data.get("trader_address")
-                or data.get("maker")
-                or data.get("taker")
-            )
-            if not trader_address:
-                logger.debug(f"No trader address in trade: {str(data)[:200]}")
-                return None
-            trader_address = trader_address.lower()
-
-            # Extract execution timestamp
-            ts = data.get("timestamp") or data.get("executedAt") or data.get("executed_at")
-            if ts:
-                if isinstance(ts, (int, float)):
-                    # Handle milliseconds vs seconds
-                    if ts > 1e12:
-                        executed_at = datetime.fromtimestamp(ts / 1000, tz=timezone.utc)
-                    else:
-                        executed_at = datetime.fromtimestamp(ts, tz=timezone.utc)
-                elif isinstance(ts, str):
-                    executed_at = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                else:
-                    executed_at = datetime.now(timezone.utc)
-            else:
-                executed_at = datetime.now(timezone.utc)
-
-            # Extract size and price
-            size = float(data.get("size") or data.get("amount") or 0)
-            price = float(data.get("price") or data.get("avgPrice") or 0)
-
-            # Calculate USD value (size * price for shares, or direct if already USD)
-            usd_value = float(data.get("usdValue") or data.get("usd_value") or (size * price))
-
-            # Extract side
-            side = (data.get("side") or data.get("type") or "BUY").upper()
-            if side not in ("BUY", "SELL"):
-                # Map common variations
-                side = "BUY" if side in ("LONG", "YES", "0") else "SELL"
-
-            # Extract condition/market info
-            condition_id = (
-                data.get("conditionId")
-                or data.get("condition_id")
-                or data.get("marketId")
-                or data.get("market_id")
-                or ""
-            )
-
-            # Extract market slug (RTDS uses 'slug' field)
-            market_slug = (
-                data.get("slug")
-                or data.get("marketSlug")
-                or data.get("market_slug")
-            )
-
-            # Extract event slug
-            event_slug = (
-                data.get("eventSlug")
-                or data.get("event_slug")
-            )
-
-            return RTDSMessage(
-                trade_id=str(trade_id),
-                trader_address=trader_address,
-                condition_id=str(condition_id),
+            return self._build_trade(
+                data,
+                trade_id=data.get("id") or data.get("tradeId") or data.get("trade_id"),
+                # proxyWallet is the main field in RTDS
+                trader_address=(
+                    data.get("proxyWallet")
+                    or data.get("user")
+                    or data.get("userAddress")
+                    or data.get("trader_address")
+                    or data.get("maker")
+                    or data.get("taker")
+                ),
+                ts=data.get("timestamp") or data.get("executedAt") or data.get("executed_at"),
+                size=data.get("size") or data.get("amount"),
+                price=data.get("price") or data.get("avgPrice"),
+                usd_value=data.get("usdValue") or data.get("usd_value"),
+                side=data.get("side") or data.get("type"),
+                condition_id=(
+                    data.get("conditionId")
+                    or data.get("condition_id")
+                    or data.get("marketId")
+                    or data.get("market_id")
+                ),
+                # RTDS uses 'slug' field for the market slug
+                market_slug=data.get("slug") or data.get("marketSlug") or data.get("market_slug"),
+                event_slug=data.get("eventSlug") or data.get("event_slug"),
                 asset_id=data.get("asset") or data.get("assetId") or data.get("asset_id"),
-                event_slug=event_slug,
-                market_slug=market_slug,
-                side=side,
                 outcome=data.get("outcome") or data.get("outcomeName") or data.get("outcome_name"),
-                outcome_index=int(data.get("outcomeIndex") or data.get("outcome_index") or 0),
-                size=size,
-                price=price,
-                usd_value=usd_value,
+                outcome_index=data.get("outcomeIndex") or data.get("outcome_index"),
                 tx_hash=data.get("transactionHash") or data.get("txHash") or data.get("tx_hash"),
-                executed_at=executed_at,
-                raw_data=data,
             )
 
         except Exception as e:
@@ -370,6 +648,92 @@ class RTDSClient:
             self._error_count += 1
             return None
 
+    def _build_trade(
+        self,
+        data: dict,
+        trade_id: Any,
+        trader_address: Any,
+        ts: Any,
+        size: Any,
+        price: Any,
+        usd_value: Any,
+        side: Any,
+        condition_id: Any,
+        market_slug: Any,
+        event_slug: Any,
+        asset_id: Any,
+        outcome: Any,
+        outcome_index: Any,
+        tx_hash: Any,
+    ) -> Optional[RTDSMessage]:
+        """
+        Build an RTDSMessage from extracted raw field values.
+
+        Shared by both parsers so they apply identical defaults and conversions.
+        """
+        if not trader_address:
+            logger.debug(f"No trader address in trade: {str(data)[:200]}")
+            return None
+        trader_address = trader_address.lower()
+
+        # Extract execution timestamp. executed_at is part of the live_trades
+        # key, so a trade without one is dropped rather than stamped with the
+        # receive time (a redelivery would then become a second row)
+        if isinstance(ts, (int, float)) and ts:
+            # Handle milliseconds vs seconds
+            if ts > 1e12:
+                executed_at = datetime.fromtimestamp(ts / 1000, tz=timezone.utc)
+            else:
+                executed_at = datetime.fromtimestamp(ts, tz=timezone.utc)
+        elif isinstance(ts, str) and ts:
+            executed_at = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        else:
+            self._dropped_no_timestamp += 1
+            if self._dropped_no_timestamp == 1:
+                logger.warning(f"Dropping trade without a timestamp (further drops counted in stats): {str(data)[:200]}")
+            else:
+                logger.debug(f"No timestamp in trade: {str(data)[:200]}")
+            return None
+
+        # Extract size and price
+        size = float(size or 0)
+        price = float(price or 0)
+
+        # Calculate USD value (size * price for shares, or direct if already USD)
+        usd_value = float(usd_value or (size * price))
+
+        # Extract side
+        side = (side or "BUY").upper()
+        if side not in ("BUY", "SELL"):
+            # Map common variations
+            side = "BUY" if side in ("LONG", "YES", "0") else "SELL"
+
+        # RTDS and data-api trades carry no id: key on the fill itself so that
+        # distinct trades in the same second get distinct, source-independent ids
+        if not trade_id:
+            if tx_hash:
+                fill_key = f"{trader_address}|{asset_id}|{side}|{size}|{price}".encode()
+                trade_id = f"{tx_hash}_{hashlib.blake2b(fill_key, digest_size=8).hexdigest()}"
+            else:
+                trade_id = f"{data.get('user', 'unknown')}_{data.get('timestamp', 0)}"
+
+        return RTDSMessage(
+            trade_id=str(trade_id),
+            trader_address=trader_address,
+            condition_id=str(condition_id or ""),
+            asset_id=asset_id,
+            event_slug=event_slug,
+            market_slug=market_slug,
+            side=side,
+            outcome=outcome,
+            outcome_index=int(outcome_index or 0),
+            size=size,
+            price=price,
+            usd_value=usd_value,
+            tx_hash=tx_hash,
+            executed_at=executed_at,
+        )
+
     async def _safe_callback(self, callback: Callable, *args: Any) -> None:
         """Execute callback safely (handles both sync and async)."""
         try:
@@ -387,6 +751,8 @@ class RTDSClient:
             return
         self._running = True
         logger.info("Starting RTDS client")
+        if self._dispatcher:
+            self._dispatcher.start()
         await self.connect()
 
     async def stop(self) -> None:
@@ -399,6 +765,10 @@ class RTDSClient:
             except Exception as e:
                 logger.warning(f"Error closing WebSocket: {e}")
             self._ws = None
+        if self._backfiller:
+            await self._backfiller.stop()
+        if self._dispatcher:
+            await self._dispatcher.stop()
 
     @property
     def is_connected(self) -> bool:
@@ -429,6 +799,16 @@ class RTDSClient:
             "last_message": self._last_message_time.isoformat() if self._last_message_time else None,
             "connected_at": self._connected_at.isoformat() if self._connected_at else None,
             "reconnect_count": self._reconnect_count,
+            "parser_mode": self.parser_mode,
+            "parse_fast_count": self._parse_fast_count,
+            "parse_fallback_count": self._parse_fallback_count,
+            "layout_relearns": self._layout_relearns,
+            "dropped_no_timestamp": self._dropped_no_timestamp,
+            "buffer": self._dispatcher.stats if self._dispatcher else None,
+            "recorder": self.recorder.stats if self.recorder else None,
+            "backfill": self._backfiller.stats if self._backfiller else None,
+            "filter": self._filter.stats if self._filter else None,
+            "latency": self._latency.stats,
             "uptime_seconds": (
                 (datetime.now(timezone.utc) - self._connected_at).total_seconds()
                 if self._connected_at
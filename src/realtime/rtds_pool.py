@@ -0,0 +1,376 @@
+"""
+Redundant RTDS ingestion over several parallel WebSocket connections.
+
+Each connection receives the full trade stream; the pool merges them into
+one stream deduplicated by trade_id, so a single socket dropping (and
+sitting out its reconnect backoff) does not lose trades.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Optional
+
+from .backfill import GapBackfiller
+from .dedup import RecentTradeIndex
+from .frame_log import FrameRecorder
+from .latency import LatencyTracker
+from .ring_buffer import OVERFLOW_DROP_BELOW_USD, TradeDispatcher
+from .rtds_client import (
+    PARSER_COMPILED,
+    ConnectCallback,
+    DisconnectCallback,
+    RTDSClient,
+    RTDSMessage,
+    TradeCallback,
+)
+from .trade_filter import TradeFilter
+
+logger = logging.getLogger(__name__)
+
+
+class RTDSConnectionPool:
+    """
+    N parallel RTDSClient connections merged into one deduplicated stream.
+
+    Exposes the same start/stop/is_connected/stats surface as RTDSClient,
+    so it can be used in its place.
+
+    Usage:
+        pool = RTDSConnectionPool(on_trade=handle_trade, connections=3, stagger_seconds=10)
+        await pool.start()
+    """
+
+    DEDUP_WINDOW_SECONDS = 300  # a trade_id is merged if seen again within this window
+    DEDUP_BUCKET_SECONDS = 30
+    DEDUP_MAX_ENTRIES = 500_000
+
+    def __init__(
+        self,
+        on_trade: TradeCallback,
+        on_connect: Optional[ConnectCallback] = None,
+        on_disconnect: Optional[DisconnectCallback] = None,
+        connections: int = 2,
+        stagger_seconds: float = 0,
+        filter_markets: Optional[list[str]] = None,
+        filter_events: Optional[list[str]] = None,
+        filter_conditions: Optional[list[str]] = None,
+        filter_wallets: Optional[list[str]] = None,
+        parser_mode: str = PARSER_COMPILED,
+        buffer_capacity: Optional[int] = None,
+        overflow_policy: str = OVERFLOW_DROP_BELOW_USD,
+        consumer_count: Optional[int] = None,
+        url: Optional[str] = None,
+        recorder: Optional[FrameRecorder] = None,
+        backfill: bool = False,
+    ):
+        """
+        Initialize the connection pool.
+
+        Args:
+            on_trade: Async callback for each unique trade
+            on_connect: Optional callback when the pool goes from no live
+                connections to at least one
+            on_disconnect: Optional callback when the last live connection drops
+            connections: Number of parallel RTDS connections
+            stagger_seconds: Delay between starting consecutive connections,
+                so their reconnect cycles are less likely to line up
+            filter_markets: Optional list of market_slugs to filter (empty = all)
+            filter_events: Optional list of event_slugs to filter (empty = all)
+            filter_conditions: Optional list of condition_ids to filter (empty = all)
+            filter_wallets: Optional list of trader wallets to filter (empty = all)
+            parser_mode: Trade parser mode for every connection
+            buffer_capacity: Shared ring buffer size (default
+                RTDSClient.RING_BUFFER_CAPACITY, 0 = call on_trade inline)
+            overflow_policy: Shared ring buffer overflow policy
+            consumer_count: Number of tasks delivering buffered trades to on_trade
+            url: WebSocket URL for every connection (default RTDSClient.RTDS_URL)
+            recorder: Optional FrameRecorder; only connection 0 records, so
+                the log holds one copy of the stream
+            backfill: Recover trades from the data-api after every window in
+                which all connections were down
+        """
+        if connections < 1:
+            raise ValueError("Connection pool needs at least one connection")
+
+        self.on_trade = on_trade
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self.stagger_seconds = stagger_seconds
+
+        # Children call back inline; buffering happens once, after the merge
+        self.clients = [
+            RTDSClient(
+                on_trade=partial(self._on_client_trade, index),
+                on_connect=partial(self._on_client_connect, index),
+                on_disconnect=partial(self._on_client_disconnect, index),
+                filter_markets=filter_markets,
+                filter_events=filter_events,
+                filter_conditions=filter_conditions,
+                filter_wallets=filter_wallets,
+                parser_mode=parser_mode,
+                buffer_capacity=0,
+                url=url,
+                recorder=recorder if index == 0 else None,
+            )
+            for index in range(connections)
+        ]
+
+        if buffer_capacity is None:
+            buffer_capacity = RTDSClient.RING_BUFFER_CAPACITY
+        self._dispatcher: Optional[TradeDispatcher] = None
+        if buffer_capacity > 0:
+            self._dispatcher = TradeDispatcher(
+                self._deliver_trade,
+                capacity=buffer_capacity,
+                overflow_policy=overflow_policy,
+                drop_below_usd=RTDSClient.DROP_BELOW_USD,
+                consumers=consumer_count or RTDSClient.CONSUMER_COUNT,
+            )
+
+        # Only a gap in the merged stream (every connection down) needs recovery
+        self._backfiller: Optional[GapBackfiller] = None
+        if backfill:
+            self._backfiller = GapBackfiller(
+                deliver=self._dispatch,
+                parse=self.clients[0]._parse_filtered,
+                min_usd=RTDSClient.DROP_BELOW_USD,
+            )
+
+        # trade_id -> [first connection, first seen (monotonic), bitmask of connections]
+        self._seen = RecentTradeIndex(
+            window_seconds=self.DEDUP_WINDOW_SECONDS,
+            bucket_seconds=self.DEDUP_BUCKET_SECONDS,
+            max_entries=self.DEDUP_MAX_ENTRIES,
+            on_expire=self._on_seen_expired,
+        )
+
+        self._tasks: list[asyncio.Task] = []
+        self._live: set[int] = set()
+        self._running = False
+        self._started_at: Optional[datetime] = None
+        self._trade_count = 0
+        self._duplicate_count = 0
+        self._error_count = 0
+        self._latency = LatencyTracker(("dispatch",))  # socket -> on_trade after the merge
+
+        # Per-connection merge statistics
+        self._received = [0] * connections
+        self._first = [0] * connections
+        self._unique = [0] * connections
+        self._lead_ms_total = [0.0] * connections
+        self._lag_ms_total = [0.0] * connections
+        self._lag_samples = [0] * connections
+        self._disconnects = [0] * connections
+
+    async def _on_client_trade(self, index: int, trade: RTDSMessage) -> None:
+        """Merge a trade from one connection into the deduplicated stream."""
+        now = time.monotonic()
+        self._received[index] += 1
+        bit = 1 << index
+
+        entry = self._seen.get(trade.trade_id)
+        if entry is None:
+            self._seen.add(trade.trade_id, [index, now, bit], now)
+            self._first[index] += 1
+            if self._backfiller and not self._backfiller.note_live(trade):
+                return  # already recovered by a gap backfill
+            self._trade_count += 1
+            await self._dispatch(trade)
+            return
+
+        self._duplicate_count += 1
+        if entry[2] & bit:
+            return  # repeated by the same connection
+        entry[2] |= bit
+        lag_ms = (now - entry[1]) * 1000
+        self._lag_ms_total[index] += lag_ms
+        self._lag_samples[index] += 1
+        self._lead_ms_total[entry[0]] += lag_ms
+
+    def _on_seen_expired(self, entries: dict) -> None:
+        """Credit trades that only one connection ever delivered."""
+        for first, _, mask in entries.values():
+            if mask & (mask - 1) == 0:
+                self._unique[first] += 1
+
+    async def _dispatch(self, trade: RTDSMessage) -> None:
+        """Buffer a merged trade for on_trade (or deliver inline when unbuffered)."""
+        if self._dispatcher:
+            await self._dispatcher.dispatch(trade)
+        else:
+            await self._deliver_trade(trade)
+
+    async def _deliver_trade(self, trade: RTDSMessage) -> None:
+        """Hand a merged trade to on_trade."""
+        if trade.received_at:
+            self._latency.record("dispatch", time.monotonic() - trade.received_at)
+        await self._safe_callback(self.on_trade, trade)
+
+    async def _on_client_connect(self, index: int) -> None:
+        """Track live connections; notify when the pool comes up."""
+        was_down = not self._live
+        self._live.add(index)
+        logger.info(f"RTDS pool connection {index} up ({len(self._live)}/{len(self.clients)} live)")
+        if was_down:
+            if self._backfiller:
+                self._backfiller.mark_connected()
+            if self.on_connect:
+                await self._safe_callback(self.on_connect)
+
+    async def _on_client_disconnect(self, index: int, reason: str) -> None:
+        """Track live connections; notify only when every connection is down."""
+        if index not in self._live:
+            return  # failed reconnect attempt, already counted
+        self._disconnects[index] += 1
+        self._live.discard(index)
+        if self._live:
+            logger.warning(
+                f"RTDS pool connection {index} down ({reason}), "
+                f"{len(self._live)}/{len(self.clients)} still live"
+            )
+        else:
+            if self._backfiller:
+                last_messages = [c._last_message_time for c in self.clients if c._last_message_time]
+                self._backfiller.mark_disconnected(max(last_messages) if last_messages else None)
+            if self.on_disconnect:
+                await self._safe_callback(
+                    self.on_disconnect, f"all {len(self.clients)} connections down ({reason})"
+                )
+
+    async def update_filters(
+        self,
+        markets: Optional[list[str]] = None,
+        events: Optional[list[str]] = None,
+        conditions: Optional[list[str]] = None,
+        wallets: Optional[list[str]] = None,
+    ) -> None:
+        """Replace the filter sets on every connection without reconnecting."""
+        trade_filter = TradeFilter(markets, events, conditions, wallets)
+        await asyncio.gather(*(client.set_filter(trade_filter) for client in self.clients))
+
+    async def _safe_callback(self, callback, *args: Any) -> None:
+        """Execute callback safely, handling both sync and async."""
+        try:
+            result = callback(*args)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"Callback error: {type(e).__name__}: {e}")
+            self._error_count += 1
+
+    async def _start_client(self, index: int, client: RTDSClient) -> None:
+        """Start one connection after its stagger delay."""
+        if index and self.stagger_seconds > 0:
+            await asyncio.sleep(index * self.stagger_seconds)
+        await client.start()
+
+    async def start(self) -> None:
+        """Start all connections (blocks until stopped)."""
+        if self._running:
+            logger.warning("Connection pool already running")
+            return
+        self._running = True
+        self._started_at = datetime.now(timezone.utc)
+        logger.info(
+            f"Starting RTDS connection pool: {len(self.clients)} connections, "
+            f"stagger={self.stagger_seconds}s"
+        )
+        if self._dispatcher:
+            self._dispatcher.start()
+
+        self._tasks = [
+            asyncio.create_task(self._start_client(index, client))
+            for index, client in enumerate(self.clients)
+        ]
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            for task in self._tasks:
+                task.cancel()
+            raise
+
+    async def stop(self) -> None:
+        """Stop all connections gracefully."""
+        logger.info("Stopping RTDS connection pool")
+        self._running = False
+        await asyncio.gather(*(client.stop() for client in self.clients))
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._backfiller:
+            await self._backfiller.stop()
+        if self._dispatcher:
+            await self._dispatcher.stop()
+
+    @property
+    def is_connected(self) -> bool:
+        """Check if at least one connection is live."""
+        return any(client.is_connected for client in self.clients)
+
+    @property
+    def stats(self) -> dict:
+        """Get pool statistics (RTDSClient-compatible keys plus per-connection merge stats)."""
+        client_stats = [client.stats for client in self.clients]
+
+        connections = []
+        for index, cs in enumerate(client_stats):
+            first = self._first[index]
+            lag_samples = self._lag_samples[index]
+            connections.append({
+                "index": index,
+                "connected": cs["connected"],
+                "received": self._received[index],
+                "first": first,
+                "first_pct": round(first / self._trade_count * 100, 1) if self._trade_count else 0,
+                "unique": self._unique[index],
+                "avg_lead_ms": round(self._lead_ms_total[index] / first, 1) if first else 0,
+                "avg_lag_ms": (
+                    round(self._lag_ms_total[index] / lag_samples, 1) if lag_samples else 0
+                ),
+                "disconnects": self._disconnects[index],
+                "reconnect_count": cs["reconnect_count"],
+                "uptime_seconds": cs["uptime_seconds"],
+            })
+
+        # Receive/parse latency across all connections; dispatch is measured post-merge
+        latency = LatencyTracker.merged(client._latency for client in self.clients)
+        latency.histograms["dispatch"] = self._latency["dispatch"]
+
+        last_messages = [cs["last_message"] for cs in client_stats if cs["last_message"]]
+        connected_ats = [cs["connected_at"] for cs in client_stats if cs["connected_at"]]
+
+        return {
+            "connected": self.is_connected,
+            "live_connections": sum(1 for cs in client_stats if cs["connected"]),
+            "message_count": sum(cs["message_count"] for cs in client_stats),
+            "trade_count": self._trade_count,
+            "duplicate_count": self._duplicate_count,
+            "error_count": self._error_count + sum(cs["error_count"] for cs in client_stats),
+            "last_message": max(last_messages) if last_messages else None,
+            "connected_at": min(connected_ats) if connected_ats else None,
+            "reconnect_count": sum(cs["reconnect_count"] for cs in client_stats),
+            "parser_mode": self.clients[0].parser_mode,
+            "parse_fast_count": sum(cs["parse_fast_count"] for cs in client_stats),
+            "parse_fallback_count": sum(cs["parse_fallback_count"] for cs in client_stats),
+            "layout_relearns": sum(cs["layout_relearns"] for cs in client_stats),
+            "dropped_no_timestamp": sum(cs["dropped_no_timestamp"] for cs in client_stats),
+            "buffer": self._dispatcher.stats if self._dispatcher else None,
+            "dedup": self._seen.stats,
+            "backfill": self._backfiller.stats if self._backfiller else None,
+            "filter": client_stats[0]["filter"],
+            "connections": connections,
+            "latency": latency.stats,
+            "uptime_seconds": (
+                (datetime.now(timezone.utc) - self._started_at).total_seconds()
+                if self._started_at and self._live
+                else 0
+            ),
+        }
@@ -20,8 +20,22 @@ sys.path.insert(0, str(project_root))
 from dotenv import load_dotenv
 
 from src.realtime.rtds_client import RTDSClient, RTDSMessage
+from src.realtime.rtds_pool import RTDSConnectionPool
+from src.realtime.frame_log import FrameRecorder, ReplayServer
+from src.realtime.ring_buffer import OVERFLOW_DROP_BELOW_USD
 from src.realtime.trade_processor import TradeProcessor
+from src.realtime.tiered_queue import TieredTradeQueue
+from src.realtime.trade_spool import FSYNC_INTERVAL, TradeSpool
+from src.realtime.trade_writer import AsyncpgTradeWriter
+from src.realtime.event_bus import EventBus
+from src.realtime.fill_aggregator import FillAggregator
 from src.realtime.insider_scorer import InsiderScorer
+from src.realtime.metrics_pool import MetricsPool
+from src.realtime.position_snapshots import PositionSnapshotStore
+from src.realtime.retention import PartitionRetention
+from src.realtime.trade_archive import TradeArchiver
+from src.realtime.wallet_index import WalletIndex
+from src.realtime.latency import EventLoopLagMonitor, format_latency
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +59,25 @@ class TradeMonitorService:
         supabase_key: str,
         filter_markets: list[str] | None = None,
         filter_events: list[str] | None = None,
+        filter_conditions: list[str] | None = None,
+        filter_wallets: list[str] | None = None,
+        overflow_policy: str | None = None,
+        consumer_count: int | None = None,
+        connections: int = 1,
+        stagger_seconds: float = 0,
+        record_dir: str | None = None,
+        replay_dir: str | None = None,
+        replay_speed: float = 1.0,
+        backfill: bool = True,
+        database_url: str | None = None,
+        spool_dir: str | None = None,
+        spool_fsync: str = FSYNC_INTERVAL,
+        wallet_index_mb: float = WalletIndex.MAX_MEMORY_MB,
+        archive_dir: str | None = None,
+        queue_max_mb: float = TieredTradeQueue.MAX_MEMORY_MB,
+        fill_window_seconds: float = 0,
+        snapshot_dir: str | None = None,
+        metrics_workers: int = MetricsPool.WORKERS,
     ):
         """
         Initialize the trade monitor service.
@@ -54,33 +87,136 @@ class TradeMonitorService:
             supabase_key: Supabase service role key
             filter_markets: Optional list of market slugs to filter
             filter_events: Optional list of event slugs to filter
+            filter_conditions: Optional list of condition IDs to filter
+            filter_wallets: Optional list of trader wallets to filter
+                (filters are a union: a trade passes if it matches any list)
+            overflow_policy: Optional RTDS ring buffer overflow policy
+            consumer_count: Optional number of RTDS trade consumer tasks
+            connections: Number of parallel RTDS connections (>1 = redundant
+                ingestion merged by trade_id)
+            stagger_seconds: Delay between starting consecutive RTDS connections
+            record_dir: Optional directory to record raw RTDS frames into
+            replay_dir: Optional recorded frames to replay instead of live RTDS
+                (the service stops when the replay is finished)
+            replay_speed: Replay speed multiplier (1 = real time, 0 = max)
+            backfill: Recover trades missed while RTDS was disconnected from
+                the data-api (always off when replaying)
+            database_url: Optional direct Postgres DSN; live_trades batches are
+                then bulk-upserted over a native connection pool instead of
+                through the supabase REST client
+            spool_dir: Optional write-ahead spool directory for live_trades
+                batches (failed batches are replayed instead of dropped)
+            spool_fsync: Spool fsync policy ("always", "interval", "never")
+            wallet_index_mb: Memory budget for the shared in-process wallet index
+            archive_dir: Optional Parquet archive directory; expiring live_trades
+                partitions are exported there before they are dropped
+            queue_max_mb: Memory budget for trades waiting to be batched; beyond
+                it the smallest trades are shed to the spool (or dropped)
+            fill_window_seconds: Window for merging fills of one order into a
+                single trade (0 = store every fill as received)
+            snapshot_dir: Optional per-wallet closed-position snapshot directory;
+                wallet re-analysis then fetches only newly closed positions
+            metrics_workers: Worker processes for wallet metric computation
+                (0 = compute on the event loop)
         """
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
 
+        # Enriched trades fan out to in-process consumers (insider scorer)
+        self.bus = EventBus()
+
         # Create processor
-        self.processor = TradeProcessor(supabase_url, supabase_key)
+        trade_writer = AsyncpgTradeWriter(database_url) if database_url else None
+        spool = TradeSpool(spool_dir, fsync=spool_fsync) if spool_dir else None
+        snapshots = PositionSnapshotStore(snapshot_dir) if snapshot_dir else None
+        self.metrics_pool = MetricsPool(workers=metrics_workers)
+        self.processor = TradeProcessor(
+            supabase_url,
+            supabase_key,
+            trade_writer=trade_writer,
+            spool=spool,
+            wallet_index_mb=wallet_index_mb,
+            bus=self.bus,
+            queue_max_mb=queue_max_mb,
+            position_snapshots=snapshots,
+            metrics_pool=self.metrics_pool,
+        )
+
+        # Multi-fill orders are merged by transaction before processing
+        self.aggregator = (
+            FillAggregator(self.processor.process_trade, window_seconds=fill_window_seconds)
+            if fill_window_seconds > 0
+            else None
+        )
 
-        # Create WebSocket client
-        self.client = RTDSClient(
+        # Optional raw frame capture / offline replay
+        self.recorder = FrameRecorder(record_dir) if record_dir else None
+        self.replay_server = ReplayServer(replay_dir, speed=replay_speed) if replay_dir else None
+        if self.replay_server:
+            connections = 1  # one replay stream, nothing to merge
+            backfill = False  # the data-api has no trades for recorded windows
+
+        # Create WebSocket client (or a redundant pool of them)
+        client_kwargs = dict(
             on_trade=self._handle_trade,
             on_connect=self._on_connect,
             on_disconnect=self._on_disconnect,
             filter_markets=filter_markets,
             filter_events=filter_events,
+            filter_conditions=filter_conditions,
+            filter_wallets=filter_wallets,
+            overflow_policy=overflow_policy or OVERFLOW_DROP_BELOW_USD,
+            consumer_count=consumer_count,
+            recorder=self.recorder,
+            backfill=backfill,
+        )
+        self.client: RTDSClient | RTDSConnectionPool
+        if connections > 1:
+            self.client = RTDSConnectionPool(
+                connections=connections,
+                stagger_seconds=stagger_seconds,
+                **client_kwargs,
+            )
+        else:
+            self.client = RTDSClient(**client_kwargs)
+
+        # Insider scorer (independent pipeline, shares the processor's wallet index)
+        self.insider_scorer = InsiderScorer(
+            supabase_url,
+            supabase_key,
+            wallets=self.processor.wallets,
+            bus=self.bus,
+            analytics=self.processor.analytics,
         )
 
-        # Insider scorer (independent pipeline)
-        self.insider_scorer = InsiderScorer(supabase_url, supabase_key)
+        # live_trades / insider_alerts retention (drops expired partitions,
+        # archiving live_trades to Parquet first)
+        archiver = None
+        if archive_dir:
+            try:
+                archiver = TradeArchiver(self.processor.supabase, archive_dir)
+            except Exception as e:
+                logger.warning(f"Trade archive disabled: {e}")
+        self.retention = PartitionRetention(self.processor.supabase, archiver=archiver)
+
+        # How long CPU-bound work holds the event loop
+        self.loop_lag = EventLoopLagMonitor()
 
         self._start_time: datetime | None = None
         self._running = False
         self._stats_task: asyncio.Task | None = None
+        self._loop_lag_task: asyncio.Task | None = None
         self._insider_task: asyncio.Task | None = None
+        self._retention_task: asyncio.Task | None = None
+        self._aggregator_task: asyncio.Task | None = None
+        self._client_task: asyncio.Task | None = None
 
     async def _handle_trade(self, trade: RTDSMessage) -> None:
         """Handle incoming trade from RTDS."""
-        await self.processor.process_trade(trade)
+        if self.aggregator:
+            await self.aggregator.add(trade)
+        else:
+            await self.processor.process_trade(trade)
 
     async def _on_connect(self) -> None:
         """Handle WebSocket connection."""
@@ -90,6 +226,16 @@ class TradeMonitorService:
         """Handle WebSocket disconnection."""
         logger.warning(f"RTDS disconnected: {reason}")
 
+    async def update_filters(
+        self,
+        markets: list[str] | None = None,
+        events: list[str] | None = None,
+        conditions: list[str] | None = None,
+        wallets: list[str] | None = None,
+    ) -> None:
+        """Hot-swap the RTDS trade filter without reconnecting."""
+        await self.client.update_filters(markets, events, conditions, wallets)
+
     async def start(self) -> None:
         """Start the monitoring service."""
         self._start_time = datetime.now(timezone.utc)
@@ -104,24 +250,46 @@ class TradeMonitorService:
 
         # Start background tasks
         await self.processor.start_background_tasks()
+        if self.aggregator:
+            self._aggregator_task = asyncio.create_task(self.aggregator.run())
         self._stats_task = asyncio.create_task(self._stats_reporter())
+        self._loop_lag_task = asyncio.create_task(self.loop_lag.run())
 
         # Start insider scorer (independent pipeline)
         self._insider_task = asyncio.create_task(self.insider_scorer.run())
         logger.info("Insider scorer started")
 
+        self._retention_task = asyncio.create_task(self.retention.run())
+
         logger.info("Trade monitor service started")
         logger.info(f"Whale threshold: ${self.processor.WHALE_THRESHOLD_USD:,}")
         logger.info(f"Wallet discovery: $50+ trades, {self.processor._discovery_processor.NUM_WORKERS} workers")
         logger.info(f"Re-analysis cooldown: {self.processor._discovery_processor.REANALYSIS_COOLDOWN_DAYS} day(s)")
         logger.info("=" * 60)
 
-        # Start WebSocket client (this blocks until stopped)
+        # Start WebSocket client (this blocks until stopped, or the replay ends)
         try:
-            await self.client.start()
+            if self.replay_server:
+                await self._run_replay()
+            else:
+                await self.client.start()
         except asyncio.CancelledError:
             logger.info("Service received cancel signal")
 
+    async def _run_replay(self) -> None:
+        """Feed recorded frames through the client until the recording ends."""
+        await self.replay_server.start()
+        self.client.url = self.replay_server.url
+        self._client_task = asyncio.create_task(self.client.start())
+        await self.replay_server.finished.wait()
+
+        replay = self.replay_server.stats
+        logger.info(
+            f"[REPLAY] {replay['frames_sent']:,} frames in {replay['elapsed_seconds']}s "
+            f"({replay['frames_per_second']:,}/s, speed={replay['speed'] or 'max'}, "
+            f"max_behind={replay['max_behind_ms']}ms)"
+        )
+
     async def stop(self) -> None:
         """Stop the monitoring service gracefully."""
         logger.info("Stopping trade monitor service...")
@@ -129,14 +297,34 @@ class TradeMonitorService:
 
         # Stop WebSocket client
         await self.client.stop()
-
-        # Stop background tasks
-        if self._stats_task:
-            self._stats_task.cancel()
+        if self._client_task:
+            self._client_task.cancel()
             try:
-                await self._stats_task
+                await self._client_task
             except asyncio.CancelledError:
                 pass
+        if self.replay_server:
+            await self.replay_server.stop()
+        if self.recorder:
+            self.recorder.close()
+
+        # Emit fills still waiting for their window
+        if self._aggregator_task:
+            self._aggregator_task.cancel()
+            try:
+                await self._aggregator_task
+            except asyncio.CancelledError:
+                pass
+            await self.aggregator.flush()
+
+        # Stop background tasks
+        for task in (self._stats_task, self._loop_lag_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
 
         # Stop insider scorer
         if self._insider_task:
@@ -147,6 +335,13 @@ class TradeMonitorService:
             except asyncio.CancelledError:
                 pass
 
+        if self._retention_task:
+            self._retention_task.cancel()
+            try:
+                await self._retention_task
+            except asyncio.CancelledError:
+                pass
+
         await self.processor.stop_background_tasks()
 
         # Final stats
@@ -180,22 +375,184 @@ class TradeMonitorService:
 
         insider_stats = self.insider_scorer.stats
 
+        buffer = client_stats.get("buffer") or {}
+
         logger.info(
             f"[STATS] "
             f"Trades: {processor_stats['trades_processed']:,} seen, "
             f"{processor_stats['trades_stored']:,} saved (>=$50) | "
             f"Wallets: {discovered:,} discovered, {analyzed:,} analyzed | "
-            f"Insider: {insider_stats['trades_scored']:,} scored, {insider_stats['alerts_written']:,} alerts | "
+            f"Insider: {insider_stats['trades_scored']:,} scored, {insider_stats['alerts_written']:,} alerts "
+            f"(backlog={insider_stats['backlog']}, evicted={insider_stats['evicted']}) | "
             f"Errors: {processor_stats['errors']} | "
             f"Uptime: {uptime_str}"
         )
 
+        if buffer:
+            logger.info(
+                f"[BUFFER] size={buffer['size']}/{buffer['capacity']} "
+                f"high_water={buffer['high_water_mark']} "
+                f"dropped={buffer['dropped']} (oldest={buffer['dropped_oldest']}, "
+                f"below_usd={buffer['dropped_below_usd']}) "
+                f"blocked_puts={buffer['blocked_puts']}"
+            )
+
+        # Per-stage latency: p50/p99/p999/max
+        for name, stats in (
+            ("rtds", client_stats),
+            ("processor", processor_stats),
+            ("insider", insider_stats),
+        ):
+            line = format_latency(stats.get("latency") or {})
+            if line:
+                logger.info(f"[LATENCY:{name}] {line}")
+
+        lag = self.loop_lag.stats
+        if lag["count"]:
+            logger.info(
+                f"[LOOP] lag p50={lag['p50_ms']}ms p99={lag['p99_ms']}ms "
+                f"p999={lag['p999_ms']}ms max={lag['max_ms']}ms (n={lag['count']:,})"
+            )
+
+        writer = processor_stats["writer"]
+        logger.info(
+            f"[WRITER] {writer['writer']} in_flight={writer['in_flight']}/{writer['max_in_flight']} "
+            f"peak={writer['peak_in_flight']} batches={writer['batches_written']:,} "
+            f"failed={writer['batches_failed']} avg={writer['avg_write_ms']}ms "
+            f"ordering_waits={writer['ordering_waits']}"
+        )
+
+        fast = processor_stats["batching"]["fast"]
+        regular = processor_stats["batching"]["regular"]
+        logger.info(
+            f"[BATCHING] fast: {fast['batches']:,} batches avg={fast['avg_size']} {fast['sizes']} | "
+            f"regular: size={regular['batch_size']} linger={regular['linger_ms']}ms "
+            f"rate={regular['arrival_rate']}/s +{regular['increases']}/-{regular['decreases']} "
+            f"{regular['batches']:,} batches avg={regular['avg_size']} {regular['sizes']}"
+        )
+
+        discovery_queue = discovery.get("queue")
+        if discovery_queue:
+            logger.info(
+                f"[DISCOVERY] queue={discovery_queue['size']:,}/{discovery_queue['capacity']:,} "
+                f"updated={discovery_queue['updated']:,} evicted={discovery_queue['evicted']:,} "
+                f"rejected={discovery_queue['rejected']:,} wait(avg/max)="
+                f"{discovery_queue['avg_wait_seconds']}/{discovery_queue['max_wait_seconds']}s "
+                f"oldest={discovery_queue['oldest_wait_seconds']}s"
+            )
+
+        snapshots = discovery.get("snapshots")
+        if snapshots:
+            logger.info(
+                f"[SNAPSHOTS] full={snapshots['full_syncs']:,} delta={snapshots['delta_syncs']:,} "
+                f"fetched={snapshots['records_fetched']:,} reused={snapshots['records_reused']:,} "
+                f"({snapshots['reuse_pct']}%) incomplete={snapshots['incomplete']} "
+                f"errors={snapshots['errors']}"
+            )
+
+        api_cache = discovery.get("api_cache")
+        if api_cache:
+            logger.info(
+                f"[API_CACHE] hits={api_cache['hits']:,} misses={api_cache['misses']:,} "
+                f"({api_cache['hit_rate_pct']}%) saved={api_cache['mb_saved']}MB "
+                f"entries={api_cache['entries']:,} ~{api_cache['size_mb']}/{api_cache['max_mb']}MB "
+                f"expired={api_cache['expired']:,} evicted={api_cache['evicted']:,} "
+                f"errors={api_cache['errors']}{' read-only' if api_cache['read_only'] else ''}"
+            )
+
+        pool = discovery.get("metrics_pool")
+        if pool:
+            logger.info(
+                f"[METRICS_POOL] workers={pool['workers']} jobs={pool['jobs']:,} "
+                f"inline={pool['inline_jobs']:,} in_flight={pool['in_flight']}/{pool['max_in_flight']} "
+                f"peak={pool['peak_in_flight']} slot_waits={pool['slot_waits']} "
+                f"worker(avg/max)={pool['avg_worker_ms']}/{pool['max_worker_ms']}ms "
+                f"pack(avg/max)={pool['avg_pack_ms']}/{pool['max_pack_ms']}ms "
+                f"payload={pool['avg_payload_kb']}KB offloaded={pool['offloaded_seconds']}s "
+                f"recycles={pool['recycles']} restarts={pool['restarts']} errors={pool['errors']}"
+            )
+
+        wallets = processor_stats["wallet_index"]
+        logger.info(
+            f"[WALLETS] {wallets['wallets']:,} wallets ~{wallets['memory_mb']}/{wallets['max_memory_mb']}MB "
+            f"skipped={wallets['skipped_over_budget']:,} last_delta={wallets['last_delta_rows']} "
+            f"local_writes={wallets['local_writes']:,} errors={wallets['errors']}"
+        )
+
+        markets = processor_stats["markets"]
+        logger.info(
+            f"[MARKETS] {markets['markets']:,} markets trades={markets['trades_recorded']:,} "
+            f"warm={markets['warm']} snapshots={markets['snapshots']} "
+            f"(last {markets['last_snapshot_ms']}ms) errors={markets['errors']} | "
+            f"scorer volume local={insider_stats['market_vol_local']:,} "
+            f"gamma={insider_stats['market_vol_fetched']:,}"
+        )
+
+        retention = self.retention.stats
+        logger.info(
+            f"[RETENTION] runs={retention['runs']} created={retention['partitions_created']} "
+            f"dropped={retention['partitions_dropped']} (~{retention['rows_dropped']:,} rows) "
+            f"last={retention['last_run_ms']}ms errors={retention['errors']}"
+        )
+        archive = retention["archive"]
+        if archive:
+            logger.info(
+                f"[ARCHIVE] windows={archive['windows_archived']} rows={archive['rows_archived']:,} "
+                f"written={archive['mb_written']}MB last={archive['last_archive_ms']}ms"
+            )
+
+        if self.aggregator:
+            fills = self.aggregator.stats
+            logger.info(
+                f"[FILLS] in={fills['fills_in']:,} out={fills['trades_out']:,} "
+                f"(-{fills['row_reduction_pct']}%) merged={fills['merged_trades']:,} "
+                f"max_fills={fills['max_fills']} late={fills['late_fills']} "
+                f"open={fills['open_groups']} window={fills['window_ms']}ms"
+            )
+
+        queue = processor_stats["queue"]
+        logger.info(
+            f"[QUEUE] regular={queue['size']:,}/{queue['capacity']:,} "
+            f"~{queue['memory_mb']}/{queue['max_memory_mb']}MB depth={queue['depth']} "
+            f"fast={processor_stats['fast_queue_size']} high_water={queue['high_water_mark']:,} "
+            f"dropped={queue['dropped']} spooled={queue['spooled']}"
+        )
+
+        spool = processor_stats.get("spool")
+        if spool:
+            logger.info(
+                f"[SPOOL] pending={spool['pending_batches']} ({spool['pending_trades']:,} trades) "
+                f"segments={spool['segments']} disk={spool['disk_mb']}MB "
+                f"failed={spool['failed_batches']} deferred={spool['deferred_batches']} "
+                f"replayed={spool['replayed_batches']} "
+                f"recovered={spool['recovered_batches']} evicted_trades={spool['evicted_trades']}"
+            )
+
+        backfill = client_stats.get("backfill")
+        if backfill:
+            logger.info(
+                f"[BACKFILL] gaps={backfill['gaps']} recovered={backfill['trades_recovered']:,} "
+                f"already_live={backfill['already_live']} incomplete={backfill['gaps_incomplete']} "
+                f"last_gap={backfill['last_gap_seconds']}s "
+                f"latency(last/avg)={backfill['last_latency_ms']}/{backfill['avg_latency_ms']}ms "
+                f"errors={backfill['errors']}"
+            )
+
+        for conn in client_stats.get("connections", []):
+            logger.info(
+                f"[RTDS#{conn['index']}] {'up' if conn['connected'] else 'DOWN'} "
+                f"recv={conn['received']:,} first={conn['first']:,} ({conn['first_pct']}%) "
+                f"unique={conn['unique']:,} lead={conn['avg_lead_ms']}ms lag={conn['avg_lag_ms']}ms "
+                f"disconnects={conn['disconnects']}"
+            )
+
     @property
     def stats(self) -> dict:
         """Get combined service statistics."""
         return {
             "client": self.client.stats,
             "processor": self.processor.stats,
+            "loop_lag": self.loop_lag.stats,
             "start_time": self._start_time.isoformat() if self._start_time else None,
             "running": self._running,
         }
@@ -237,10 +594,65 @@ async def main() -> None:
     # Optional filters
     filter_markets = None
     filter_events = None
+    filter_conditions = None
+    filter_wallets = None
     if os.getenv("FILTER_MARKETS"):
         filter_markets = os.getenv("FILTER_MARKETS").split(",")
     if os.getenv("FILTER_EVENTS"):
         filter_events = os.getenv("FILTER_EVENTS").split(",")
+    if os.getenv("FILTER_CONDITIONS"):
+        filter_conditions = os.getenv("FILTER_CONDITIONS").split(",")
+    if os.getenv("FILTER_WALLETS"):
+        filter_wallets = os.getenv("FILTER_WALLETS").split(",")
+
+    # Optional ingestion buffer tuning
+    overflow_policy = os.getenv("RTDS_OVERFLOW_POLICY")
+    consumer_count = int(os.getenv("RTDS_CONSUMERS", "0")) or None
+
+    # Optional redundant ingestion
+    connections = int(os.getenv("RTDS_CONNECTIONS", "1"))
+    stagger_seconds = float(os.getenv("RTDS_STAGGER_SECONDS", "0"))
+
+    # Optional raw frame capture / offline replay ("max" = as fast as possible)
+    record_dir = os.getenv("RTDS_RECORD_DIR")
+    replay_dir = os.getenv("RTDS_REPLAY_DIR")
+    replay_speed_env = os.getenv("RTDS_REPLAY_SPEED", "1")
+    replay_speed = 0.0 if replay_speed_env.lower() == "max" else float(replay_speed_env)
+
+    # Post-reconnect gap backfill (on by default)
+    backfill = os.getenv("RTDS_BACKFILL", "1") not in ("0", "false", "no")
+
+    # Optional direct Postgres connection for live_trades bulk writes
+    database_url = os.getenv("DATABASE_URL")
+
+    # Write-ahead spool for live_trades batches (on by default, "off" disables)
+    spool_dir = os.getenv("TRADE_SPOOL_DIR", "data/trade_spool")
+    if spool_dir.lower() in ("", "0", "off", "none"):
+        spool_dir = None
+    spool_fsync = os.getenv("TRADE_SPOOL_FSYNC", FSYNC_INTERVAL)
+
+    # Parquet archive of expiring live_trades partitions (on by default, "off" disables)
+    archive_dir = os.getenv("TRADE_ARCHIVE_DIR", "data/trade_archive")
+    if archive_dir.lower() in ("", "0", "off", "none"):
+        archive_dir = None
+
+    # Memory budget for the shared wallet index
+    wallet_index_mb = float(os.getenv("WALLET_INDEX_MAX_MB", str(WalletIndex.MAX_MEMORY_MB)))
+
+    # Memory budget for queued trades before value-tiered shedding
+    queue_max_mb = float(os.getenv("TRADE_QUEUE_MAX_MB", str(TieredTradeQueue.MAX_MEMORY_MB)))
+
+    # Merge fills of one order within this window (0 = off, the default;
+    # 250 is a typical window)
+    fill_window_ms = float(os.getenv("FILL_AGGREGATION_WINDOW_MS", "0"))
+
+    # Closed-position snapshots for incremental wallet re-analysis (on by default, "off" disables)
+    snapshot_dir = os.getenv("POSITION_SNAPSHOT_DIR", "data/position_snapshots")
+    if snapshot_dir.lower() in ("", "0", "off", "none"):
+        snapshot_dir = None
+
+    # Worker processes for wallet metric computation (0 computes on the event loop)
+    metrics_workers = int(os.getenv("METRICS_POOL_WORKERS", str(MetricsPool.WORKERS)))
 
     # Create service
     service = TradeMonitorService(
@@ -248,6 +660,25 @@ async def main() -> None:
         supabase_key=supabase_key,
         filter_markets=filter_markets,
         filter_events=filter_events,
+        filter_conditions=filter_conditions,
+        filter_wallets=filter_wallets,
+        overflow_policy=overflow_policy,
+        consumer_count=consumer_count,
+        connections=connections,
+        stagger_seconds=stagger_seconds,
+        record_dir=record_dir,
+        replay_dir=replay_dir,
+        replay_speed=replay_speed,
+        backfill=backfill,
+        database_url=database_url,
+        spool_dir=spool_dir,
+        spool_fsync=spool_fsync,
+        wallet_index_mb=wallet_index_mb,
+        archive_dir=archive_dir,
+        queue_max_mb=queue_max_mb,
+        fill_window_seconds=fill_window_ms / 1000,
+        snapshot_dir=snapshot_dir,
+        metrics_workers=metrics_workers,
     )
 
     # Setup signal handlers for graceful shutdown
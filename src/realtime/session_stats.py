@@ -0,0 +1,231 @@
+"""
+Rolling per-trader session aggregates for realtime insider scoring.
+
+Each trader gets a ring of time buckets (BUCKET_SECONDS wide, covering
+WINDOW_SECONDS) holding trade count, USD volume, per-side counts and
+per-condition counts, plus running totals over the live buckets. A trade
+updates one bucket and the totals in O(1); buckets that fall out of the
+window are subtracted lazily the next time the trader is touched, and
+idle traders are evicted in least-recently-active order, so memory is
+bounded by traders active within the window rather than by trades.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Optional
+
+SIDE_BUY = 1
+SIDE_SELL = 2
+SIDE_OTHER = 4
+_SIDE_BITS = {"BUY": SIDE_BUY, "SELL": SIDE_SELL}
+_SIDE_INDEX = {SIDE_BUY: 0, SIDE_SELL: 1, SIDE_OTHER: 2}
+
+
+def side_bit(side: str) -> int:
+    """Side mask bit for a trade side."""
+    return _SIDE_BITS.get(side, SIDE_OTHER)
+
+
+class _Bucket:
+    __slots__ = ("number", "trades", "volume", "sides", "conditions")
+
+    def __init__(self, number: int):
+        self.number = number
+        self.trades = 0
+        self.volume = 0.0
+        self.sides = [0, 0, 0]
+        self.conditions: dict[str, int] = {}
+
+
+class TraderSession:
+    """Running totals over one trader's live buckets."""
+
+    __slots__ = ("_ring", "_low", "last_bucket", "trades", "volume", "_sides", "_conditions")
+
+    def __init__(self, slots: int):
+        self._ring: list[Optional[_Bucket]] = [None] * slots
+        self._low = 0  # lowest bucket number that may still be live
+        self.last_bucket = 0
+        self.trades = 0
+        self.volume = 0.0
+        self._sides = [0, 0, 0]
+        self._conditions: dict[str, int] = {}
+
+    def condition_count(self, condition_id: str) -> int:
+        """Trades in the window on this condition."""
+        return self._conditions.get(condition_id, 0)
+
+    @property
+    def side_mask(self) -> int:
+        """Bitmask of sides traded in the window (SIDE_BUY | SIDE_SELL | SIDE_OTHER)."""
+        return (
+            (SIDE_BUY if self._sides[0] else 0)
+            | (SIDE_SELL if self._sides[1] else 0)
+            | (SIDE_OTHER if self._sides[2] else 0)
+        )
+
+    def _drop(self, bucket: _Bucket) -> None:
+        """Subtract an expired bucket from the totals."""
+        self.trades -= bucket.trades
+        self.volume -= bucket.volume
+        for i, count in enumerate(bucket.sides):
+            self._sides[i] -= count
+        for condition_id, count in bucket.conditions.items():
+            remaining = self._conditions[condition_id] - count
+            if remaining:
+                self._conditions[condition_id] = remaining
+            else:
+                del self._conditions[condition_id]
+        if not self.trades:
+            self.volume = 0.0  # no float drift once empty
+
+    def expire(self, now_bucket: int) -> None:
+        """Drop buckets older than the window ending at now_bucket."""
+        slots = len(self._ring)
+        first_live = now_bucket - slots + 1
+        if self._low >= first_live:
+            return
+        # An idle gap longer than the ring only needs one pass over it
+        for number in range(max(self._low, first_live - slots), first_live):
+            bucket = self._ring[number % slots]
+            if bucket is not None and bucket.number < first_live:
+                self._drop(bucket)
+                self._ring[number % slots] = None
+        self._low = first_live
+
+    def add(self, number: int, condition_id: str, usd_value: float, side: int, trades: int = 1) -> None:
+        """Count a trade into bucket `number` (must be within the live window).
+
+        trades=0 adds volume to an already counted trade.
+        """
+        slot = number % len(self._ring)
+        bucket = self._ring[slot]
+        if bucket is None or bucket.number != number:
+            bucket = self._ring[slot] = _Bucket(number)
+
+        bucket.volume += usd_value
+        self.volume += usd_value
+        self.last_bucket = max(self.last_bucket, number)
+        if not trades:
+            return
+
+        side_index = _SIDE_INDEX[side]
+        bucket.trades += trades
+        bucket.sides[side_index] += trades
+        bucket.conditions[condition_id] = bucket.conditions.get(condition_id, 0) + trades
+
+        self.trades += trades
+        self._sides[side_index] += trades
+        self._conditions[condition_id] = self._conditions.get(condition_id, 0) + trades
+
+
+class SessionAggregates:
+    """
+    Per-trader rolling aggregates over the last WINDOW_SECONDS.
+
+    Usage:
+        sessions = SessionAggregates()
+        session = sessions.get(addr)          # None if no trades in the window
+        if session:
+            session.condition_count(condition_id), session.volume, session.side_mask
+        sessions.record(addr, condition_id, usd_value, side, executed_at.timestamp())
+    """
+
+    WINDOW_SECONDS = 7200
+    BUCKET_SECONDS = 300
+
+    def __init__(self, window_seconds: int = WINDOW_SECONDS, bucket_seconds: int = BUCKET_SECONDS):
+        """
+        Args:
+            window_seconds: Session length; older trades drop out
+            bucket_seconds: Expiry granularity
+        """
+        self.bucket_seconds = bucket_seconds
+        self.slots = max(1, -(-window_seconds // bucket_seconds))
+
+        # Least recently active trader first
+        self._traders: OrderedDict[str, TraderSession] = OrderedDict()
+
+        # Stats
+        self._trades_recorded = 0
+        self._late_trades = 0
+        self._traders_evicted = 0
+        self._peak_traders = 0
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def get(self, trader: str, now: Optional[float] = None) -> Optional[TraderSession]:
+        """Trader's aggregates over the window, or None if there are none."""
+        session = self._traders.get(trader)
+        if session is None:
+            return None
+        session.expire(self._bucket(now if now is not None else time.time()))
+        return session if session.trades else None
+
+    def record(
+        self,
+        trader: str,
+        condition_id: str,
+        usd_value: float,
+        side: str,
+        executed_at: float,
+        now: Optional[float] = None,
+        trades: int = 1,
+    ) -> None:
+        """
+        Count a trade into the trader's session.
+
+        Args:
+            trader: Trader key (lowercased address)
+            condition_id: Market condition ID
+            usd_value: Trade USD value
+            side: Trade side ("BUY" / "SELL")
+            executed_at: Trade execution time (unix seconds); trades already
+                outside the window are ignored
+            now: Current time (default: time.time())
+            trades: Trades counted (0 = extra volume of a trade already counted)
+        """
+        now_bucket = self._bucket(now if now is not None else time.time())
+        number = min(self._bucket(executed_at), now_bucket)
+        if number <= now_bucket - self.slots:
+            self._late_trades += 1
+            return
+
+        session = self._traders.get(trader)
+        if session is None:
+            session = self._traders[trader] = TraderSession(self.slots)
+            session._low = now_bucket - self.slots + 1
+        else:
+            self._traders.move_to_end(trader)
+            session.expire(now_bucket)
+
+        session.add(number, condition_id, usd_value, side_bit(side), trades)
+        self._trades_recorded += trades
+        self._peak_traders = max(self._peak_traders, len(self._traders))
+
+        self._evict_idle(now_bucket)
+
+    def _evict_idle(self, now_bucket: int) -> None:
+        """Drop traders whose newest bucket has left the window."""
+        cutoff = now_bucket - self.slots
+        while self._traders:
+            trader, session = next(iter(self._traders.items()))
+            if session.last_bucket > cutoff:
+                break
+            del self._traders[trader]
+            self._traders_evicted += 1
+
+    def __len__(self) -> int:
+        return len(self._traders)
+
+    @property
+    def stats(self) -> dict:
+        """Get session aggregate statistics."""
+        return {
+            "traders": len(self._traders),
+            "peak_traders": self._peak_traders,
+            "trades_recorded": self._trades_recorded,
+            "late_trades": self._late_trades,
+            "traders_evicted": self._traders_evicted,
+        }
@@ -0,0 +1,203 @@
+"""
+Memory-bounded trade queue with value-tiered load shedding.
+
+The regular lane of the trade processor queues every stored trade until
+the batch processor picks it up. If the database stalls, that queue must
+not grow until the process is OOM-killed, so TieredTradeQueue holds its
+records within a memory budget (estimated from sampled record sizes).
+
+Records are kept in one FIFO per USD value tier. When the budget is
+reached, a chunk of the smallest queued trades is shed: the lowest tiers
+go first, oldest first within a tier, and never a tier above the incoming
+trade's. If nothing smaller is queued, the incoming trade itself is shed.
+With a TradeSpool, shed records are appended to the spool and replayed
+by its drainer instead of being dropped.
+
+Whale and insider-suspect trades never enter this queue (they take the
+unbounded fast lane), so they are never shed.
+"""
+
+import asyncio
+import logging
+import sys
+from collections import deque
+from typing import Optional
+
+from .trade_spool import TradeSpool
+
+logger = logging.getLogger(__name__)
+
+# (enqueued_at, received_at, record), both time.monotonic()
+QueueItem = tuple[float, float, dict]
+
+
+def deep_sizeof(obj: object) -> int:
+    """Approximate memory footprint of a decoded JSON value in bytes."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k) + deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(v) for v in obj)
+    return size
+
+
+class TieredTradeQueue:
+    """
+    FIFO trade queue bounded by memory, shedding the smallest trades first.
+
+    Usage:
+        queue = TieredTradeQueue(max_memory_mb=256, spool=spool)
+        queue.put_nowait((enqueued_at, received_at, record))  # never blocks
+        item = await queue.get()                              # oldest across tiers
+    """
+
+    MAX_MEMORY_MB = 256
+
+    # (tier name, upper USD bound exclusive), lowest value first
+    TIERS = (("small", 100.0), ("medium", 1000.0), ("large", float("inf")))
+
+    SHED_FRACTION = 0.05  # capacity freed per shedding round (hysteresis)
+    SIZE_SAMPLE_INTERVAL = 500  # measure one record per N puts
+    DEFAULT_RECORD_BYTES = 4096  # estimate until the first sample
+
+    def __init__(self, max_memory_mb: float = MAX_MEMORY_MB, spool: Optional[TradeSpool] = None):
+        """
+        Args:
+            max_memory_mb: Memory budget for queued records
+            spool: Optional spool; shed records are replayed from it instead of dropped
+        """
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self.spool = spool
+
+        self._tiers: list[deque[QueueItem]] = [deque() for _ in self.TIERS]
+        self._size = 0
+        self._not_empty = asyncio.Event()
+
+        self._record_bytes = float(self.DEFAULT_RECORD_BYTES)
+        self._size_samples = 0
+        self._puts = 0
+        self.capacity = self._capacity()
+
+        # Stats
+        self._high_water_mark = 0
+        self._shed_rounds = 0
+        self._dropped = [0] * len(self.TIERS)
+        self._spooled = [0] * len(self.TIERS)
+
+    def _capacity(self) -> int:
+        return max(1, int(self.max_bytes / self._record_bytes))
+
+    def _tier(self, record: dict) -> int:
+        usd_value = record.get("usd_value") or 0
+        for index, (_, upper) in enumerate(self.TIERS):
+            if usd_value < upper:
+                return index
+        return len(self.TIERS) - 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def put_nowait(self, item: QueueItem) -> bool:
+        """
+        Queue a trade, shedding smaller ones if the memory budget is reached.
+
+        Returns:
+            True if the trade was queued, False if it was itself shed
+        """
+        self._puts += 1
+        if self._puts % self.SIZE_SAMPLE_INTERVAL == 1:
+            self._sample(item)
+
+        tier = self._tier(item[2])
+        if self._size >= self.capacity and not self._shed(tier):
+            self._shed_items(tier, [item])
+            return False
+
+        self._tiers[tier].append(item)
+        self._size += 1
+        if self._size > self._high_water_mark:
+            self._high_water_mark = self._size
+        self._not_empty.set()
+        return True
+
+    def _sample(self, item: QueueItem) -> None:
+        """Update the running average record size and the derived capacity."""
+        self._size_samples += 1
+        self._record_bytes += (deep_sizeof(item) - self._record_bytes) / self._size_samples
+        self.capacity = self._capacity()
+
+    def _shed(self, max_tier: int) -> bool:
+        """
+        Free a chunk of capacity from tiers up to max_tier, lowest first.
+
+        Returns:
+            False if no queued trade is at or below max_tier
+        """
+        target = max(1, int(self.capacity * self.SHED_FRACTION))
+        freed = 0
+        for tier in range(max_tier + 1):
+            queue = self._tiers[tier]
+            if not queue:
+                continue
+            count = min(len(queue), target - freed)
+            self._shed_items(tier, [queue.popleft() for _ in range(count)])
+            self._size -= count
+            freed += count
+            if freed >= target:
+                break
+        if freed:
+            self._shed_rounds += 1
+        return freed > 0
+
+    def _shed_items(self, tier: int, items: list[QueueItem]) -> None:
+        """Spool (or drop) shed trades."""
+        if self.spool:
+            try:
+                # Not written now: the spool drainer replays it
+                self.spool.append_for_replay([item[2] for item in items])
+                self._spooled[tier] += len(items)
+                return
+            except OSError as e:
+                logger.error(f"Trade spool append failed while shedding: {e}")
+        self._dropped[tier] += len(items)
+
+    def get_nowait(self) -> QueueItem:
+        """Remove and return the oldest queued trade across all tiers."""
+        if not self._size:
+            raise asyncio.QueueEmpty
+        oldest = None
+        for queue in self._tiers:
+            if queue and (oldest is None or queue[0][0] < oldest[0][0]):
+                oldest = queue
+        self._size -= 1
+        return oldest.popleft()
+
+    async def get(self) -> QueueItem:
+        """Oldest queued trade, waiting if the queue is empty."""
+        while not self._size:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    @property
+    def stats(self) -> dict:
+        """Get queue statistics (depth and shed counters per tier)."""
+        names = [name for name, _ in self.TIERS]
+        return {
+            "size": self._size,
+            "capacity": self.capacity,
+            "memory_mb": round(self._size * self._record_bytes / (1024 * 1024), 1),
+            "max_memory_mb": round(self.max_bytes / (1024 * 1024), 1),
+            "record_bytes": int(self._record_bytes),
+            "high_water_mark": self._high_water_mark,
+            "shed_rounds": self._shed_rounds,
+            "depth": {name: len(queue) for name, queue in zip(names, self._tiers)},
+            "dropped": dict(zip(names, self._dropped)),
+            "spooled": dict(zip(names, self._spooled)),
+        }
@@ -0,0 +1,328 @@
+"""
+Cold-tier Parquet archive of expiring live_trades partitions.
+
+Before the retention manager drops a live_trades partition, TradeArchiver
+exports its rows to zstd-compressed Parquet under a hive-style layout:
+
+    <directory>/day=2026-10-16/live_trades_regular_p2026101600-0.parquet
+
+Files are named after the source partition, so re-archiving a partition
+(e.g. after a crash between archive and drop) overwrites instead of
+duplicating. Expired rows of a tier's DEFAULT partition, which the
+retention manager purges by DELETE, are exported the same way under
+<tier table>_default_<cutoff>; a crash between that export and the purge
+archives those rows twice. Rows are sorted by condition_id,
+trader_address inside each file so row-group min/max statistics can skip
+most of a file for market / trader lookups.
+
+query_archive() scans the archive with partition pruning on day and
+predicate pushdown on condition_id, trader_address and usd_value.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError:  # only needed when the archive is enabled
+    pa = None
+
+
+def _schema() -> "pa.Schema":
+    timestamp = pa.timestamp("us", tz="UTC")
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("trade_id", pa.string()),
+            ("tx_hash", pa.string()),
+            ("trader_address", pa.string()),
+            ("trader_username", pa.string()),
+            ("is_known_trader", pa.bool_()),
+            ("trader_insider_score", pa.int32()),
+            ("trader_red_flags", pa.list_(pa.string())),
+            ("is_insider_suspect", pa.bool_()),
+            ("trader_portfolio_value", pa.float64()),
+            ("condition_id", pa.string()),
+            ("asset_id", pa.string()),
+            ("market_slug", pa.string()),
+            ("market_title", pa.string()),
+            ("event_slug", pa.string()),
+            ("category", pa.string()),
+            ("side", pa.string()),
+            ("outcome", pa.string()),
+            ("outcome_index", pa.int32()),
+            ("size", pa.float64()),
+            ("price", pa.float64()),
+            ("usd_value", pa.float64()),
+            ("executed_at", timestamp),
+            ("received_at", timestamp),
+            ("processing_latency_ms", pa.int32()),
+            ("fill_count", pa.int32()),
+            ("is_whale", pa.bool_()),
+            ("retention_tier", pa.string()),
+        ]
+    )
+
+
+def _partitioning() -> "ds.Partitioning":
+    return ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+class TradeArchiver:
+    """
+    Exports live_trades time windows to Parquet.
+
+    Usage:
+        archiver = TradeArchiver(supabase, "data/trade_archive")
+        rows = await archiver.archive_window(
+            "live_trades_regular_p2026101600", start, end, tier="regular"
+        )
+    """
+
+    PAGE_SIZE = 1000  # PostgREST default max rows per request
+    ROW_GROUP_SIZE = 64 * 1024
+    COMPRESSION = "zstd"
+
+    def __init__(self, supabase: Client, directory: str):
+        """
+        Args:
+            supabase: supabase-py Client
+            directory: Archive root directory
+        """
+        if pa is None:
+            raise RuntimeError("pyarrow is required for TradeArchiver")
+        self.supabase = supabase
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.schema = _schema()
+        self._columns = ", ".join(self.schema.names)
+
+        # Stats
+        self._windows_archived = 0
+        self._rows_archived = 0
+        self._bytes_written = 0
+        self._last_archive_ms = 0.0
+
+    def _fetch_page(self, start: datetime, end: datetime, tier: str, after_id: int) -> list[dict]:
+        return (
+            self.supabase.table("live_trades")
+            .select(self._columns)
+            .eq("retention_tier", tier)
+            .gte("executed_at", start.isoformat())
+            .lt("executed_at", end.isoformat())
+            .gt("id", after_id)
+            .order("id")
+            .limit(self.PAGE_SIZE)
+            .execute()
+            .data
+            or []
+        )
+
+    def _fetch_default_page(self, parent: str, before: datetime, after_id: int) -> list[dict]:
+        return (
+            self.supabase.rpc(
+                "expired_default_rows",
+                {
+                    "p_parent": parent,
+                    "p_column": "executed_at",
+                    "p_before": before.isoformat(),
+                    "p_after_id": after_id,
+                    "p_limit": self.PAGE_SIZE,
+                },
+            )
+            .execute()
+            .data
+            or []
+        )
+
+    def _to_batch(self, rows: list[dict]) -> "pa.RecordBatch":
+        for row in rows:
+            row["executed_at"] = _parse_timestamp(row.get("executed_at"))
+            row["received_at"] = _parse_timestamp(row.get("received_at"))
+            for column in ("trader_portfolio_value", "size", "price", "usd_value"):
+                if row.get(column) is not None:
+                    row[column] = float(row[column])
+        return pa.RecordBatch.from_pylist(rows, schema=self.schema)
+
+    def _write(self, name: str, batches: list["pa.RecordBatch"]) -> int:
+        """Write one window's rows; returns bytes written."""
+        table = pa.Table.from_batches(batches, schema=self.schema)
+        # Partition column (stored in the path, not in the files)
+        table = table.append_column("day", pc.strftime(table["executed_at"], format="%Y-%m-%d"))
+        table = table.sort_by(
+            [("day", "ascending"), ("condition_id", "ascending"), ("trader_address", "ascending")]
+        )
+
+        written: list[int] = []
+        ds.write_dataset(
+            table,
+            self.directory,
+            format="parquet",
+            partitioning=_partitioning(),
+            basename_template=f"{name}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(compression=self.COMPRESSION),
+            max_rows_per_group=self.ROW_GROUP_SIZE,
+            min_rows_per_group=min(self.ROW_GROUP_SIZE, table.num_rows),
+            file_visitor=lambda f: written.append(f.size),
+        )
+        return sum(written)
+
+    async def archive_window(self, name: str, start: datetime, end: datetime, tier: str) -> int:
+        """
+        Export trades with executed_at in [start, end) and the given tier.
+
+        Args:
+            name: Source partition name (archive file prefix)
+            start: Window start (inclusive)
+            end: Window end (exclusive)
+            tier: live_trades retention_tier
+
+        Returns:
+            Number of rows archived
+
+        Raises:
+            Exception: on fetch or write failure (the partition must not be dropped)
+        """
+        return await self._archive(name, lambda after_id: self._fetch_page(start, end, tier, after_id))
+
+    async def archive_default(self, parent: str, before: datetime) -> int:
+        """
+        Export the rows of parent's DEFAULT partition with executed_at before
+        the cutoff (the rows drop_expired_partitions is about to delete).
+
+        Args:
+            parent: Tier table (live_trades_regular / live_trades_important)
+            before: Retention cutoff passed to drop_expired_partitions
+
+        Returns:
+            Number of rows archived
+
+        Raises:
+            Exception: on fetch or write failure (the rows must not be purged)
+        """
+        return await self._archive(
+            f"{parent}_default_{before:%Y%m%d%H%M%S}",
+            lambda after_id: self._fetch_default_page(parent, before, after_id),
+            skip_empty=True,
+        )
+
+    async def _archive(
+        self,
+        name: str,
+        fetch_page: Callable[[int], list[dict]],
+        skip_empty: bool = False,
+    ) -> int:
+        """Page through rows by id and write them as one archive file set."""
+        started = time.monotonic()
+        batches = []
+        rows = 0
+        after_id = 0
+        while True:
+            page = await asyncio.to_thread(fetch_page, after_id)
+            if page:
+                after_id = page[-1]["id"]
+                batches.append(self._to_batch(page))
+                rows += len(page)
+            if len(page) < self.PAGE_SIZE:
+                break
+
+        if not rows and skip_empty:
+            return 0
+        if rows:
+            self._bytes_written += await asyncio.to_thread(self._write, name, batches)
+        self._windows_archived += 1
+        self._rows_archived += rows
+        self._last_archive_ms = (time.monotonic() - started) * 1000
+        logger.info(f"Archived {name}: {rows:,} trades in {self._last_archive_ms:.0f}ms")
+        return rows
+
+    @property
+    def stats(self) -> dict:
+        """Get archiver statistics."""
+        return {
+            "directory": str(self.directory),
+            "windows_archived": self._windows_archived,
+            "rows_archived": self._rows_archived,
+            "mb_written": round(self._bytes_written / (1024 * 1024), 1),
+            "last_archive_ms": round(self._last_archive_ms, 1),
+        }
+
+
+def query_archive(
+    directory: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    condition_ids: Optional[Iterable[str]] = None,
+    trader_addresses: Optional[Iterable[str]] = None,
+    min_usd: Optional[float] = None,
+    max_usd: Optional[float] = None,
+    columns: Optional[list[str]] = None,
+) -> "pa.Table":
+    """
+    Scan archived trades.
+
+    Day directories outside [start, end] are never opened; the remaining
+    predicates are pushed down to Parquet row-group statistics before rows
+    are decoded.
+
+    Args:
+        directory: Archive root directory
+        start: Earliest executed_at (inclusive)
+        end: Latest executed_at (exclusive)
+        condition_ids: Only these markets
+        trader_addresses: Only these traders (any case; stored lowercase)
+        min_usd: Minimum usd_value
+        max_usd: Maximum usd_value
+        columns: Columns to return (default: all)
+
+    Returns:
+        pyarrow Table (use .to_pandas() for a DataFrame)
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is required for query_archive")
+
+    dataset = ds.dataset(
+        directory,
+        schema=_schema().append(pa.field("day", pa.string())),
+        format="parquet",
+        partitioning=_partitioning(),
+    )
+    predicates = []
+    if start is not None:
+        start = start.astimezone(timezone.utc)
+        predicates.append(ds.field("day") >= start.strftime("%Y-%m-%d"))
+        predicates.append(ds.field("executed_at") >= pa.scalar(start, type=pa.timestamp("us", tz="UTC")))
+    if end is not None:
+        end = end.astimezone(timezone.utc)
+        predicates.append(ds.field("day") <= end.strftime("%Y-%m-%d"))
+        predicates.append(ds.field("executed_at") < pa.scalar(end, type=pa.timestamp("us", tz="UTC")))
+    if condition_ids is not None:
+        predicates.append(ds.field("condition_id").isin(list(condition_ids)))
+    if trader_addresses is not None:
+        predicates.append(ds.field("trader_address").isin([a.lower() for a in trader_addresses]))
+    if min_usd is not None:
+        predicates.append(ds.field("usd_value") >= min_usd)
+    if max_usd is not None:
+        predicates.append(ds.field("usd_value") <= max_usd)
+
+    expression = None
+    for predicate in predicates:
+        expression = predicate if expression is None else expression & predicate
+    return dataset.to_table(columns=columns, filter=expression)
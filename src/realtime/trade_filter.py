@@ -0,0 +1,160 @@
+"""
+Compiled client-side trade filter for the RTDS stream.
+
+RTDS only filters server-side on a single market or event slug. TradeFilter
+takes arbitrarily large sets of market slugs, event slugs, condition IDs
+and wallets, compiles them into hashed lookups, and rejects most
+non-matching frames straight from the raw bytes, before JSON decoding and
+trade parsing.
+"""
+
+from typing import Iterable, Optional
+
+# (dimension, raw payload key, RTDSMessage attribute, case-insensitive)
+FILTER_FIELDS: tuple[tuple[str, str, str, bool], ...] = (
+    ("markets", "slug", "market_slug", False),
+    ("events", "eventSlug", "event_slug", False),
+    ("conditions", "conditionId", "condition_id", True),
+    ("wallets", "proxyWallet", "trader_address", True),
+)
+
+
+class _RawCheck:
+    """Raw-frame lookup for one filter dimension (str and bytes frames)."""
+
+    __slots__ = ("key_str", "key_bytes", "values_str", "values_bytes", "lower")
+
+    def __init__(self, raw_key: str, values: frozenset[str], lower: bool):
+        self.key_str = f'"{raw_key}":'
+        self.key_bytes = self.key_str.encode()
+        self.values_str = values
+        self.values_bytes = frozenset(v.encode() for v in values)
+        self.lower = lower
+
+
+class TradeFilter:
+    """
+    Union filter: a trade passes if it matches ANY configured set.
+
+    Two stages:
+        prefilter(frame)  - raw frame check; False means no trade in the frame
+                            can match, so it is skipped without decoding
+        matches(trade)    - exact check on each parsed trade
+
+    The pre-check is conservative: a frame whose layout it cannot read
+    (missing keys, escaped values) is passed on to the exact check.
+
+    Usage:
+        trade_filter = TradeFilter(markets=["will-x-happen"], wallets=wallet_set)
+        if trade_filter.prefilter(message): ...
+    """
+
+    def __init__(
+        self,
+        markets: Optional[Iterable[str]] = None,
+        events: Optional[Iterable[str]] = None,
+        conditions: Optional[Iterable[str]] = None,
+        wallets: Optional[Iterable[str]] = None,
+    ):
+        """
+        Args:
+            markets: Market slugs
+            events: Event slugs
+            conditions: Condition IDs (case-insensitive)
+            wallets: Trader proxy wallet addresses (case-insensitive)
+        """
+        values = {"markets": markets, "events": events, "conditions": conditions, "wallets": wallets}
+
+        self._exact: list[tuple[str, frozenset[str], bool]] = []
+        self._raw: list[_RawCheck] = []
+        self.sets: dict[str, frozenset[str]] = {}
+
+        for dimension, raw_key, attribute, lower in FILTER_FIELDS:
+            cleaned = frozenset(
+                (v.strip().lower() if lower else v.strip())
+                for v in (values[dimension] or ())
+                if v and v.strip()
+            )
+            self.sets[dimension] = cleaned
+            if cleaned:
+                self._exact.append((attribute, cleaned, lower))
+                self._raw.append(_RawCheck(raw_key, cleaned, lower))
+
+        # Stats
+        self._frames_checked = 0
+        self._frames_rejected = 0
+        self._trades_checked = 0
+        self._trades_rejected = 0
+
+    @property
+    def active(self) -> bool:
+        """True if any filter set is configured."""
+        return bool(self._exact)
+
+    def prefilter(self, frame: bytes | str) -> bool:
+        """Cheap raw-frame check. False = no trade in this frame can match."""
+        self._frames_checked += 1
+        is_bytes = isinstance(frame, bytes)
+        quote = b'"' if is_bytes else '"'
+        backslash = b"\\" if is_bytes else "\\"
+
+        for check in self._raw:
+            key = check.key_bytes if is_bytes else check.key_str
+            values = check.values_bytes if is_bytes else check.values_str
+
+            pos = frame.find(key)
+            if pos < 0:
+                return True  # unknown layout (or not a trade frame): let the parser decide
+            while pos >= 0:
+                value_pos = pos + len(key)
+                start = frame.find(quote, value_pos)
+                if start < 0:
+                    break
+                end = frame.find(quote, start + 1)
+                if end < 0:
+                    return True
+                if not frame[value_pos:start].strip():  # otherwise null / non-string value
+                    value = frame[start + 1:end]
+                    if check.lower:
+                        value = value.lower()
+                    if value in values or backslash in value:
+                        return True
+                pos = frame.find(key, end)
+
+        self._frames_rejected += 1
+        return False
+
+    def matches(self, trade) -> bool:
+        """Exact check on a parsed trade."""
+        self._trades_checked += 1
+        for attribute, values, lower in self._exact:
+            value = getattr(trade, attribute)
+            if value and (value.lower() if lower else value) in values:
+                return True
+        self._trades_rejected += 1
+        return False
+
+    def server_filters(self) -> dict:
+        """
+        Server-side RTDS filter equivalent to this filter, if one exists.
+
+        RTDS can only narrow to one market or event slug, so this is only
+        non-empty when that is the whole filter.
+        """
+        markets, events = self.sets["markets"], self.sets["events"]
+        if len(markets) + len(events) != 1 or self.sets["conditions"] or self.sets["wallets"]:
+            return {}
+        if markets:
+            return {"market_slug": next(iter(markets))}
+        return {"event_slug": next(iter(events))}
+
+    @property
+    def stats(self) -> dict:
+        """Get filter statistics."""
+        return {
+            **{dimension: len(values) for dimension, values in self.sets.items()},
+            "frames_checked": self._frames_checked,
+            "frames_rejected": self._frames_rejected,
+            "trades_checked": self._trades_checked,
+            "trades_rejected": self._trades_rejected,
+        }
@@ -4,16 +4,33 @@ Trade processor for enriching and storing live trades.
 
 import asyncio
 import logging
-from datetime import datetime, timezone, timedelta
+import time
+from datetime import datetime, timezone
 from typing import Optional
 
 from supabase import create_client, Client
 
+from .batch_sizer import AdaptiveBatchSizer, BatchSizeDistribution
+from .dedup import RecentTradeIndex
+from .event_bus import TOPIC_TRADES, EventBus, TradeEvent
+from .latency import LatencyTracker
+from .market_analytics import MarketAnalytics
+from .metrics_pool import MetricsPool
+from .position_snapshots import PositionSnapshotStore
+from .retention import TIER_IMPORTANT, retention_tier
 from .rtds_client import RTDSMessage
+from .session_stats import SessionAggregates, side_bit
+from .tiered_queue import TieredTradeQueue, deep_sizeof
+from .trade_spool import TradeSpool
+from .trade_writer import SupabaseTradeWriter, TradeWriter, WriteBatch
+from .wallet_index import WalletIndex
 from .wallet_discovery import WalletDiscoveryProcessor
 
 logger = logging.getLogger(__name__)
 
+LANE_FAST = "fast"
+LANE_REGULAR = "regular"
+
 
 class TradeProcessor:
     """
@@ -27,96 +44,167 @@ class TradeProcessor:
     WHALE_THRESHOLD_USD = 10000
     MEGA_WHALE_THRESHOLD_USD = 50000
 
-    # Batch processing settings
-    BATCH_SIZE = 50
-    BATCH_TIMEOUT_SECONDS = 0.5
-
-    def __init__(self, supabase_url: str, supabase_key: str):
+    # Wallets below this balance are scored with session heuristics
+    KNOWN_TRADER_MIN_BALANCE = 100
+
+    # Batch processing: whale / insider-suspect trades take the fast lane and
+    # are submitted as soon as they arrive (whatever else is queued with them
+    # goes in the same batch); regular trades are batched by AdaptiveBatchSizer
+    FAST_LANE_MAX_BATCH = 50
+
+    # Decode one raw payload per N trades to estimate memory saved by
+    # not carrying decoded raw_data dicts in queued records
+    RAW_SIZE_SAMPLE_INTERVAL = 1000
+
+    # How long processed trades are remembered. A trade delivered again
+    # under the same trade_id (the fill aggregator re-emitting a merged
+    # trade after a late fill) adds only its growth to the in-memory
+    # aggregates and keeps an important retention tier it once had
+    RECENT_TRADE_SECONDS = 900
+
+    def __init__(
+        self,
+        supabase_url: str,
+        supabase_key: str,
+        trade_writer: Optional[TradeWriter] = None,
+        spool: Optional[TradeSpool] = None,
+        wallet_index_mb: float = WalletIndex.MAX_MEMORY_MB,
+        bus: Optional[EventBus] = None,
+        queue_max_mb: float = TieredTradeQueue.MAX_MEMORY_MB,
+        position_snapshots: Optional[PositionSnapshotStore] = None,
+        metrics_pool: Optional[MetricsPool] = None,
+    ):
         """
         Initialize trade processor.
 
         Args:
             supabase_url: Supabase project URL
             supabase_key: Supabase service role key
+            trade_writer: live_trades writer (default: supabase upsert in a worker thread)
+            spool: Optional write-ahead spool; failed batches are kept on disk
+                and replayed instead of being dropped
+            wallet_index_mb: Memory budget for the shared wallet index
+            bus: Optional event bus; every stored trade is also published on
+                TOPIC_TRADES (e.g. for the insider scorer)
+            queue_max_mb: Memory budget for queued regular-lane trades; beyond
+                it the smallest trades are shed (to the spool, if any)
+            position_snapshots: Optional closed-position snapshot store for
+                incremental wallet re-analysis
+            metrics_pool: Optional process pool for wallet metric computation
+                (default: computed inline)
         """
         self.supabase: Client = create_client(supabase_url, supabase_key)
 
-        # Caches (refresh periodically)
-        self._trader_cache: dict[str, dict] = {}
+        # Batches are written in the background; flush_batch only waits for a free slot
+        self._writer = trade_writer or SupabaseTradeWriter(self.supabase)
+        self._writer.on_success = self._on_batch_stored
+        self._writer.on_failure = self._on_batch_failed
+        self._spool = spool
+        self._bus = bus
+        self._position_snapshots = position_snapshots
+        self._metrics_pool = metrics_pool
 
-        # Session-based tracking for real-time insider detection
-        self._session_trades: dict[str, list[dict]] = {}  # trader_addr -> trades
+        # Shared wallet index (also used by discovery and the insider scorer):
+        # full load once, then delta sync from its own refresh loop
+        self.wallets = WalletIndex(self.supabase, max_memory_mb=wallet_index_mb)
 
-        # Processing queue
-        self._queue: asyncio.Queue[dict] = asyncio.Queue()
+        # Rolling per-market analytics over every trade (also read by the
+        # insider scorer), snapshotted to market_analytics
+        self.analytics = MarketAnalytics(self.supabase)
+
+        # Session-based tracking for real-time insider detection
+        # (rolling 2h aggregates per trader, expired lazily)
+        self._sessions = SessionAggregates()
+
+        # trade_id -> (retention tier, usd_value, size) of recently processed
+        # trades. The tier is part of the live_trades key, so it may go up
+        # (regular -> important, the writer moves the row) but never back down
+        self._recent = RecentTradeIndex(window_seconds=self.RECENT_TRADE_SECONDS, bucket_seconds=60)
+
+        # Processing queues: (enqueued_at, received_at, record), both time.monotonic().
+        # The regular lane is memory-bounded; the fast lane is never shed.
+        self._queue = TieredTradeQueue(queue_max_mb, spool=spool)
+        self._fast_queue: asyncio.Queue[tuple[float, float, dict]] = asyncio.Queue()
         self._batch: list[dict] = []
-        self._last_flush = datetime.now(timezone.utc)
+        self._batch_received: list[float] = []  # RTDS receive time per batched record
+        self._batch_started = 0.0  # monotonic time the first record joined the batch
+        self._sizer = AdaptiveBatchSizer()
+        self._batch_sizes = {LANE_FAST: BatchSizeDistribution(), LANE_REGULAR: BatchSizeDistribution()}
 
         # Background tasks
         self._batch_task: Optional[asyncio.Task] = None
-        self._cache_task: Optional[asyncio.Task] = None
+        self._fast_lane_task: Optional[asyncio.Task] = None
+        self._wallets_task: Optional[asyncio.Task] = None
+        self._analytics_task: Optional[asyncio.Task] = None
         self._discovery_tasks: list[asyncio.Task] = []
         self._settings_poller_task: Optional[asyncio.Task] = None
+        self._spool_task: Optional[asyncio.Task] = None
 
         # Wallet discovery processor
         self._discovery_processor: Optional[WalletDiscoveryProcessor] = None
 
         # Stats
         self._trades_processed = 0
+        self._trades_redelivered = 0
         self._trades_stored = 0
         self._errors = 0
+        self._raw_size_samples = 0
+        self._raw_size_avg_bytes = 0.0
+
+        # Per-stage latency: enrichment, queue wait before batching,
+        # live_trades upsert (per batch), RTDS receive -> stored (per trade, per lane)
+        self._latency = LatencyTracker(
+            ("enrich", "queue_wait", "db_flush", "receive_to_stored_fast", "receive_to_stored_regular")
+        )
 
     async def initialize(self) -> None:
         """Load caches from database."""
         logger.info("Initializing trade processor caches...")
-        await self._load_trader_cache()
-        logger.info(f"Loaded {len(self._trader_cache)} wallets")
+        await self._start_writer()
+        try:
+            await self.wallets.load()
+        except Exception as e:
+            # Wallet cache is optional - continue without it (retried on refresh)
+            logger.warning(f"Wallet cache not available: {e}")
 
         # Initialize wallet discovery processor
-        self._discovery_processor = WalletDiscoveryProcessor(self.supabase)
+        self._discovery_processor = WalletDiscoveryProcessor(
+            self.supabase,
+            wallets=self.wallets,
+            snapshots=self._position_snapshots,
+            metrics_pool=self._metrics_pool,
+        )
         await self._discovery_processor.initialize()
         logger.info("Wallet discovery processor initialized")
 
-    async def _load_trader_cache(self) -> None:
-        """Load known wallets into cache (limited to prevent timeout)."""
+    async def _start_writer(self) -> None:
+        """Open the trade writer, falling back to supabase upserts if it fails."""
         try:
-            # Only load wallets with balance to avoid timeout
-            result = (
-                self.supabase.table("wallets")
-                .select("address, source, balance")
-                .not_.is_("balance", "null")
-                .gte("balance", 100)
-                .limit(5000)
-                .execute()
-            )
-
-            # Build cache with wallet data
-            self._trader_cache = {}
-            for w in result.data or []:
-                addr = w["address"].lower()
-                self._trader_cache[addr] = {
-                    "address": addr,
-                    "source": w.get("source"),
-                    "portfolio_value": w.get("balance"),
-                    "username": None,
-                    "insider_score": None,
-                    "insider_level": None,
-                    "insider_red_flags": [],
-                    "primary_classification": None,
-                }
-
-            logger.debug(f"Loaded {len(self._trader_cache)} wallets to cache")
-
+            await self._writer.start()
+            logger.info(f"Trade writer: {type(self._writer).__name__}")
         except Exception as e:
-            # Wallet cache is optional - continue without it
-            logger.warning(f"Wallet cache not available: {e}")
-            self._trader_cache = {}
+            if isinstance(self._writer, SupabaseTradeWriter):
+                raise
+            logger.error(
+                f"Trade writer {type(self._writer).__name__} failed to start: {e} "
+                f"- falling back to supabase upserts"
+            )
+            self._errors += 1
+            self._writer = SupabaseTradeWriter(
+                self.supabase,
+                on_success=self._on_batch_stored,
+                on_failure=self._on_batch_failed,
+            )
 
-    def _calculate_realtime_score(self, trade: RTDSMessage) -> tuple[int, list[str]]:
+    def _calculate_realtime_score(
+        self, trade: RTDSMessage, previous: Optional[tuple] = None
+    ) -> tuple[int, list[str]]:
         """
         Calculate heuristic insider score for unknown traders.
 
-        Uses session-based signals to detect suspicious patterns.
+        Uses session-based signals to detect suspicious patterns. A
+        re-delivered trade (previous = its earlier delivery) is already in
+        the session once and is not counted against itself.
 
         Returns:
             Tuple of (score 0-100, list of red flag strings)
@@ -125,8 +213,9 @@ class TradeProcessor:
         flags = []
         addr = trade.trader_address.lower()
 
-        # Get trader's session history
-        history = self._session_trades.get(addr, [])
+        # Get trader's session aggregates (None = no trades in the window)
+        session = self._sessions.get(addr)
+        prior_trades, prior_usd = (1, previous[1]) if previous else (0, 0.0)
 
         # 1. Trade size (0-30 pts)
         if trade.usd_value >= 5000:
@@ -136,7 +225,7 @@ class TradeProcessor:
             score += 15
 
         # 2. Market concentration (0-25 pts)
-        same_market = sum(1 for t in history if t.get("condition_id") == trade.condition_id)
+        same_market = max(session.condition_count(trade.condition_id) - prior_trades, 0) if session else 0
         if same_market >= 4:
             score += 25
             flags.append(f"Concentrated betting ({same_market + 1} trades same market)")
@@ -144,7 +233,7 @@ class TradeProcessor:
             score += 15
 
         # 3. Session volume (0-25 pts)
-        total_volume = sum(t.get("usd_value", 0) for t in history) + trade.usd_value
+        total_volume = max((session.volume if session else 0) - prior_usd, 0) + trade.usd_value
         if total_volume >= 50000:
             score += 25
             flags.append(f"High session volume (${total_volume:,.0f})")
@@ -158,31 +247,23 @@ class TradeProcessor:
             flags.append("Off-hours trading (2-6am UTC)")
 
         # 5. One-sided trading (0-10 pts)
-        if history:
-            sides = set(t.get("side") for t in history)
-            sides.add(trade.side)
-            if len(sides) == 1:
+        if session:
+            if session.side_mask | side_bit(trade.side) == side_bit(trade.side):
                 score += 10
                 flags.append(f"One-sided trading (all {trade.side})")
 
         return min(score, 100), flags
 
-    def _track_session_trade(self, trade: RTDSMessage) -> None:
-        """Track trade in session history for real-time scoring."""
-        addr = trade.trader_address.lower()
-        if addr not in self._session_trades:
-            self._session_trades[addr] = []
-
-        self._session_trades[addr].append({
-            "condition_id": trade.condition_id,
-            "usd_value": trade.usd_value,
-            "side": trade.side,
-            "executed_at": trade.executed_at,
-        })
-
-        # Limit history per trader to prevent memory growth
-        if len(self._session_trades[addr]) > 100:
-            self._session_trades[addr] = self._session_trades[addr][-100:]
+    def _track_session_trade(self, trade: RTDSMessage, previous: Optional[tuple] = None) -> None:
+        """Track trade in session history and market analytics."""
+        trader = trade.trader_address.lower()
+        executed_at = trade.executed_at.timestamp()
+        usd_value, size, trades = trade.usd_value, trade.size, 1
+        if previous:
+            # Re-delivered with cumulative totals: only the growth is new
+            usd_value, size, trades = usd_value - previous[1], size - previous[2], 0
+        self._sessions.record(trader, trade.condition_id, usd_value, trade.side, executed_at, trades=trades)
+        self.analytics.record(trade.condition_id, trader, trade.side, size, usd_value, executed_at, trades=trades)
 
     async def process_trade(self, trade: RTDSMessage) -> None:
         """
@@ -193,20 +274,30 @@ class TradeProcessor:
         """
         self._trades_processed += 1
 
+        if self._trades_processed % self.RAW_SIZE_SAMPLE_INTERVAL == 1:
+            self._sample_raw_payload_size(trade)
+
         # Wallet discovery threshold
         DISCOVERY_THRESHOLD_USD = 50
         # Trade storage threshold
         STORAGE_THRESHOLD_USD = 50
 
+        # Earlier delivery of the same trade, if any (see RECENT_TRADE_SECONDS)
+        previous = self._recent.get(trade.trade_id)
+        if previous:
+            self._trades_redelivered += 1
+
         # Check for new wallet discovery (non-blocking, for trades >= $50)
-        if trade.usd_value >= DISCOVERY_THRESHOLD_USD and self._discovery_processor:
+        if trade.usd_value >= DISCOVERY_THRESHOLD_USD and self._discovery_processor and not previous:
             await self._discovery_processor.check_and_queue(
                 trade.trader_address,
                 trade.usd_value
             )
 
         # Enrich trade with cached data
-        trade_record = self._enrich_trade(trade)
+        started = time.perf_counter()
+        trade_record = self._enrich_trade(trade, previous)
+        self._latency.record("enrich", time.perf_counter() - started)
 
         # Check for whale
         is_whale = trade.usd_value >= self.WHALE_THRESHOLD_USD
@@ -214,50 +305,70 @@ class TradeProcessor:
 
         # Check insider
         is_insider = trade_record.get("is_insider_suspect", False)
+        tier = retention_tier(is_whale, is_insider)
+        if previous and previous[0] == TIER_IMPORTANT:
+            tier = TIER_IMPORTANT
+        self._recent.add(trade.trade_id, (tier, trade.usd_value, trade.size))
+        trade_record["retention_tier"] = tier
 
         # Store trades >= $50 to database for live feed display
         should_store = trade.usd_value >= STORAGE_THRESHOLD_USD or is_whale or is_insider
 
         if should_store:
-            try:
-                self._queue.put_nowait(trade_record)
-            except asyncio.QueueFull:
-                logger.warning("Trade queue full, dropping trade")
-                self._errors += 1
+            item = (time.monotonic(), trade.received_at or time.monotonic(), trade_record)
+            if tier == TIER_IMPORTANT:
+                self._fast_queue.put_nowait(item)
+            else:
+                # Sheds the smallest queued trades once the memory budget is reached
+                self._queue.put_nowait(item)
+
+            if self._bus and not previous:
+                await self._bus.publish(TOPIC_TRADES, TradeEvent(trade_record, trade.usd_value))
+
+    def _sample_raw_payload_size(self, trade: RTDSMessage) -> None:
+        """Update the running average size of a decoded raw payload."""
+        try:
+            size = deep_sizeof(trade.raw_data)
+        except Exception:
+            return
+        self._raw_size_samples += 1
+        self._raw_size_avg_bytes += (size - self._raw_size_avg_bytes) / self._raw_size_samples
 
-    def _enrich_trade(self, trade: RTDSMessage) -> dict:
+    def _enrich_trade(self, trade: RTDSMessage, previous: Optional[tuple] = None) -> dict:
         """Enrich trade with cached trader data or real-time heuristics."""
-        trader_data = self._trader_cache.get(trade.trader_address.lower(), {})
+        wallet = self.wallets.get(trade.trader_address.lower())
+        if wallet and (wallet.balance or 0) < self.KNOWN_TRADER_MIN_BALANCE:
+            wallet = None
 
         now = datetime.now(timezone.utc)
         latency_ms = int((now - trade.executed_at).total_seconds() * 1000)
 
         # Determine insider score and flags
-        if trader_data:
-            # Known trader - use cached score
-            insider_score = trader_data.get("insider_score") or 0
-            red_flags = trader_data.get("insider_red_flags") or []
+        if wallet:
+            # Known trader - no insider fields cached yet
+            insider_score = 0
+            red_flags = []
         else:
             # Unknown trader - calculate real-time heuristic score
-            insider_score, red_flags = self._calculate_realtime_score(trade)
+            insider_score, red_flags = self._calculate_realtime_score(trade, previous)
 
         is_insider = insider_score >= 60
 
         # Track trade in session for future scoring
-        self._track_session_trade(trade)
+        self._track_session_trade(trade, previous)
 
         return {
             "trade_id": trade.trade_id,
             "tx_hash": trade.tx_hash,
             "trader_address": trade.trader_address,
-            "trader_username": trader_data.get("username"),
-            "is_known_trader": bool(trader_data),
-            "trader_classification": trader_data.get("primary_classification"),
+            "trader_username": wallet.username if wallet else None,
+            "is_known_trader": wallet is not None,
+            "trader_classification": None,
             "trader_insider_score": insider_score,
-            "trader_insider_level": trader_data.get("insider_level"),
+            "trader_insider_level": None,
             "trader_red_flags": red_flags,
             "is_insider_suspect": is_insider,
-            "trader_portfolio_value": trader_data.get("portfolio_value"),
+            "trader_portfolio_value": wallet.balance if wallet else None,
             "condition_id": trade.condition_id,
             "asset_id": trade.asset_id,
             "market_slug": trade.market_slug,
@@ -273,115 +384,117 @@ class TradeProcessor:
             "executed_at": trade.executed_at.isoformat(),
             "received_at": now.isoformat(),
             "processing_latency_ms": latency_ms,
+            "fill_count": trade.fill_count,
             "is_whale": False,
             "is_insider_suspect": is_insider,
-            "raw_data": trade.raw_data,
         }
 
-    async def _cleanup_old_trades(self, retention_days: int = 7) -> None:
-        """Delete trades older than retention period to manage database size.
-
-        Regular trades are kept for 1 day, while important trades
-        (whales/insiders) are kept for the full retention period.
-        """
-        try:
-            now = datetime.now(timezone.utc)
-
-            # Delete regular (non-important) trades older than 1 day
-            regular_cutoff = (now - timedelta(days=1)).isoformat()
-            regular_result = self.supabase.table("live_trades").delete().lt(
-                "received_at", regular_cutoff
-            ).eq("is_whale", False).eq("is_insider_suspect", False).execute()
-
-            regular_deleted = len(regular_result.data) if regular_result.data else 0
-
-            # Delete important trades older than retention period
-            important_cutoff = (now - timedelta(days=retention_days)).isoformat()
-            important_result = self.supabase.table("live_trades").delete().lt(
-                "received_at", important_cutoff
-            ).execute()
-
-            important_deleted = len(important_result.data) if important_result.data else 0
-
-            total_deleted = regular_deleted + important_deleted
-
-            if total_deleted > 0:
-                logger.info(
-                    f"Database cleanup: deleted {regular_deleted} regular trades (>1d), "
-                    f"{important_deleted} important trades (>{retention_days}d)"
-                )
-
-        except Exception as e:
-            logger.error(f"Database cleanup failed: {e}")
-            self._errors += 1
-
     async def flush_batch(self) -> None:
-        """Flush accumulated trades to database."""
+        """Flush the regular lane's accumulated trades to database."""
         if not self._batch:
             return
 
         batch = self._batch
+        batch_received = self._batch_received
         self._batch = []
+        self._batch_received = []
+        await self._submit(batch, batch_received, priority=False)
 
-        # Remove raw_data before insert (too large)
-        for trade in batch:
-            trade.pop("raw_data", None)
-
+    async def _submit(self, batch: list[dict], batch_received: list[float], priority: bool) -> None:
+        """Dedupe, spool and hand one lane's batch to the writer."""
         # Deduplicate by trade_id (keep latest) to avoid ON CONFLICT error
         seen_ids: dict[str, dict] = {}
         for trade in batch:
             seen_ids[trade["trade_id"]] = trade
         batch = list(seen_ids.values())
 
-        try:
-            # Use upsert to handle duplicate trade_ids
-            self.supabase.table("live_trades").upsert(
-                batch, on_conflict="trade_id"
-            ).execute()
-
-            self._trades_stored += len(batch)
-            logger.debug(f"Flushed {len(batch)} trades to database")
+        # Write-ahead: the batch survives a failed upsert or a crash
+        spool_id = None
+        if self._spool:
+            try:
+                spool_id = await self._spool.append(batch)
+            except OSError as e:
+                logger.error(f"Trade spool append failed: {e}")
+                self._errors += 1
 
-        except Exception as e:
-            logger.error(f"Failed to flush batch: {e}")
-            self._errors += 1
-            # Put trades back in queue for retry (limited)
-            for trade in batch[:10]:
-                try:
-                    self._queue.put_nowait(trade)
-                except asyncio.QueueFull:
-                    break
+        self._batch_sizes[LANE_FAST if priority else LANE_REGULAR].record(len(batch))
+        # Waits only when the lane's in-flight slots are all taken
+        await self._writer.submit(WriteBatch(batch, batch_received, spool_id=spool_id, priority=priority))
+
+    async def _submit_spooled(self, spool_id: int, records: list[dict]) -> None:
+        """Spool drainer callback: replay a pending batch."""
+        await self._writer.submit(WriteBatch(records, spool_id=spool_id))
+
+    def _on_batch_stored(self, batch: WriteBatch) -> None:
+        """Writer callback: batch committed."""
+        elapsed = batch.finished_at - batch.started_at
+        self._latency.record("db_flush", elapsed)
+        stage = "receive_to_stored_fast" if batch.priority else "receive_to_stored_regular"
+        for received_at in batch.received_at:
+            self._latency.record(stage, batch.finished_at - received_at)
+        if not batch.priority:
+            self._sizer.record_flush(len(batch.records), elapsed)
+
+        self._trades_stored += len(batch.records)
+        if batch.spool_id is not None:
+            self._spool.ack(batch.spool_id)
+        logger.debug(f"Flushed {len(batch.records)} trades to database")
+
+    def _on_batch_failed(self, batch: WriteBatch, error: Exception) -> None:
+        """Writer callback: batch failed."""
+        logger.error(f"Failed to flush batch: {error}")
+        self._errors += 1
+        if not batch.priority:
+            self._sizer.record_flush(len(batch.records), batch.finished_at - batch.started_at, ok=False)
+        if batch.spool_id is not None:
+            # Still pending in the spool; the drainer replays it
+            self._spool.release(batch.spool_id)
+            return
+        # No spool: put trades back in queue for retry (limited)
+        queue = self._fast_queue if batch.priority else self._queue
+        for trade, received_at in zip(batch.records[:10], batch.received_at):
+            queue.put_nowait((time.monotonic(), received_at, trade))
+
+    def _add_to_batch(self, item: tuple[float, float, dict]) -> None:
+        enqueued_at, received_at, trade = item
+        self._latency.record("queue_wait", time.monotonic() - enqueued_at)
+        if not self._batch:
+            self._batch_started = time.monotonic()
+        self._batch.append(trade)
+        self._batch_received.append(received_at)
+        self._sizer.record_arrival()
 
     async def batch_processor(self) -> None:
-        """Background task to batch and flush trades."""
+        """Background task to batch and flush regular-lane trades."""
         logger.info("Starting batch processor")
 
         while True:
             try:
-                # Get trade from queue with timeout
+                # Wait for the next trade, but no longer than the open batch may linger
+                timeout = None
+                if self._batch:
+                    timeout = max(0.0, self._batch_started + self._sizer.linger_seconds - time.monotonic())
                 try:
-                    trade = await asyncio.wait_for(
-                        self._queue.get(), timeout=self.BATCH_TIMEOUT_SECONDS
-                    )
-                    self._batch.append(trade)
+                    self._add_to_batch(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                    # Take whatever else is already queued without another wait
+                    while len(self._batch) < self._sizer.batch_size and not self._queue.empty():
+                        self._add_to_batch(self._queue.get_nowait())
                 except asyncio.TimeoutError:
                     pass
 
-                # Flush if batch is full or timeout reached
-                now = datetime.now(timezone.utc)
-                time_since_flush = (now - self._last_flush).total_seconds()
-
-                should_flush = len(self._batch) >= self.BATCH_SIZE or (
-                    self._batch and time_since_flush >= self.BATCH_TIMEOUT_SECONDS
+                # Flush if batch is full or its linger time is up
+                should_flush = len(self._batch) >= self._sizer.batch_size or (
+                    self._batch and time.monotonic() - self._batch_started >= self._sizer.linger_seconds
                 )
 
                 if should_flush:
                     await self.flush_batch()
-                    self._last_flush = now
 
             except asyncio.CancelledError:
-                # Flush remaining on shutdown
+                # Flush remaining on shutdown and wait for in-flight writes
+                # (the fast lane is stopped first)
                 await self.flush_batch()
+                await self._writer.close()
                 logger.info("Batch processor stopped")
                 break
 
@@ -390,54 +503,46 @@ class TradeProcessor:
                 self._errors += 1
                 await asyncio.sleep(1)
 
-    async def refresh_caches(self) -> None:
-        """Periodically refresh caches."""
-        logger.info("Starting cache refresh task")
+    def _drain_fast_queue(self, batch: list[dict], batch_received: list[float]) -> None:
+        while len(batch) < self.FAST_LANE_MAX_BATCH and not self._fast_queue.empty():
+            enqueued_at, received_at, trade = self._fast_queue.get_nowait()
+            self._latency.record("queue_wait", time.monotonic() - enqueued_at)
+            batch.append(trade)
+            batch_received.append(received_at)
 
-        # Track last cleanup time for database cleanup (runs hourly)
-        last_db_cleanup = datetime.now(timezone.utc)
-        DB_CLEANUP_INTERVAL = timedelta(hours=1)
-        TRADE_RETENTION_DAYS = 7
+    async def fast_lane_processor(self) -> None:
+        """Background task that submits whale / insider-suspect trades immediately."""
+        logger.info("Starting fast lane")
 
         while True:
             try:
-                await asyncio.sleep(60)  # Refresh every minute
-
-                await self._load_trader_cache()
-
-                # Clean up old session data (> 2 hours) to prevent memory growth
-                cutoff = datetime.now(timezone.utc) - timedelta(hours=2)
-                for addr in list(self._session_trades.keys()):
-                    self._session_trades[addr] = [
-                        t for t in self._session_trades[addr]
-                        if t["executed_at"] > cutoff
-                    ]
-                    if not self._session_trades[addr]:
-                        del self._session_trades[addr]
-
-                # Database cleanup: delete old trades (runs hourly)
-                now = datetime.now(timezone.utc)
-                if now - last_db_cleanup >= DB_CLEANUP_INTERVAL:
-                    last_db_cleanup = now
-                    await self._cleanup_old_trades(TRADE_RETENTION_DAYS)
-
-                logger.debug(
-                    f"Caches refreshed: {len(self._trader_cache)} wallets, "
-                    f"{len(self._session_trades)} session traders"
-                )
+                enqueued_at, received_at, trade = await self._fast_queue.get()
+                self._latency.record("queue_wait", time.monotonic() - enqueued_at)
+                batch, batch_received = [trade], [received_at]
+                self._drain_fast_queue(batch, batch_received)
+                await self._submit(batch, batch_received, priority=True)
 
             except asyncio.CancelledError:
-                logger.info("Cache refresh task stopped")
+                batch, batch_received = [], []
+                self._drain_fast_queue(batch, batch_received)
+                if batch:
+                    await self._submit(batch, batch_received, priority=True)
+                logger.info("Fast lane stopped")
                 break
 
             except Exception as e:
-                logger.error(f"Cache refresh failed: {e}")
+                logger.error(f"Fast lane error: {e}")
                 self._errors += 1
+                await asyncio.sleep(1)
 
     async def start_background_tasks(self) -> None:
         """Start background processing tasks."""
         self._batch_task = asyncio.create_task(self.batch_processor())
-        self._cache_task = asyncio.create_task(self.refresh_caches())
+        self._fast_lane_task = asyncio.create_task(self.fast_lane_processor())
+        self._wallets_task = asyncio.create_task(self.wallets.run())
+        self._analytics_task = asyncio.create_task(self.analytics.run())
+        if self._spool:
+            self._spool_task = asyncio.create_task(self._spool.run_drainer(self._submit_spooled))
 
         # Start multiple wallet discovery workers + settings poller
         if self._discovery_processor:
@@ -453,20 +558,40 @@ class TradeProcessor:
 
     async def stop_background_tasks(self) -> None:
         """Stop background tasks gracefully."""
-        if self._batch_task:
-            self._batch_task.cancel()
+        if self._spool_task:
+            self._spool_task.cancel()
             try:
-                await self._batch_task
+                await self._spool_task
             except asyncio.CancelledError:
                 pass
 
-        if self._cache_task:
-            self._cache_task.cancel()
+        # Fast lane first: the batch processor closes the writer
+        if self._fast_lane_task:
+            self._fast_lane_task.cancel()
             try:
-                await self._cache_task
+                await self._fast_lane_task
             except asyncio.CancelledError:
                 pass
 
+        if self._batch_task:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+
+        # Unacked batches stay on disk for the next start
+        if self._spool:
+            await asyncio.to_thread(self._spool.close)
+
+        for task in (self._wallets_task, self._analytics_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
         # Stop settings poller
         if hasattr(self, '_settings_poller_task') and self._settings_poller_task:
             self._settings_poller_task.cancel()
@@ -493,12 +618,30 @@ class TradeProcessor:
         """Get processor statistics."""
         stats = {
             "trades_processed": self._trades_processed,
+            "trades_redelivered": self._trades_redelivered,
             "trades_stored": self._trades_stored,
             "errors": self._errors,
             "queue_size": self._queue.qsize(),
+            "queue": self._queue.stats,
+            "fast_queue_size": self._fast_queue.qsize(),
             "batch_size": len(self._batch),
-            "cached_traders": len(self._trader_cache),
+            "batching": {
+                LANE_FAST: self._batch_sizes[LANE_FAST].summary(),
+                LANE_REGULAR: {**self._sizer.stats, **self._batch_sizes[LANE_REGULAR].summary()},
+            },
+            "cached_traders": len(self.wallets),
+            "wallet_index": self.wallets.stats,
+            "sessions": self._sessions.stats,
+            "markets": self.analytics.stats,
+            # Decoded raw payloads no longer held per queued trade (estimate)
+            "raw_payload_mb_saved_per_100k": round(
+                self._raw_size_avg_bytes * 100_000 / (1024 * 1024), 1
+            ),
+            "latency": self._latency.stats,
+            "writer": self._writer.stats,
         }
+        if self._spool:
+            stats["spool"] = self._spool.stats
 
         # Add discovery stats
         if self._discovery_processor:
@@ -0,0 +1,467 @@
+"""
+Durable write-ahead spool for live_trades batches.
+
+Every batch is appended to the spool before it is upserted and
+acknowledged after the upsert commits. Batches that fail (database
+outage) or were still unacknowledged when the process stopped are
+replayed by a background drainer at a limited rate.
+
+On disk the spool is a directory of append-only JSONL segments
+(spool-<first batch id>.jsonl) holding two kinds of lines:
+
+    {"op": "batch", "id": 17, "records": [...]}
+    {"op": "ack", "id": 17}
+
+A segment is deleted once it is no longer the active segment and every
+batch in it (and in all older segments) has been acknowledged. Replaying
+an already-stored batch is harmless: the upsert is idempotent on trade_id.
+
+All file I/O (writes, fsync, segment rotation and deletion, replay reads)
+runs on one dedicated thread in submission order, so a slow disk never
+stalls the event loop. append() waits (without blocking the loop) until
+its line is written, and fsynced if the policy says so, before the batch
+goes to the database; acks and shed batches are written behind.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+FSYNC_ALWAYS = "always"  # fsync after every appended batch
+FSYNC_INTERVAL = "interval"  # fsync at most every FSYNC_INTERVAL_SECONDS
+FSYNC_NEVER = "never"  # leave it to the OS page cache
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER)
+
+SEGMENT_GLOB = "spool-*.jsonl"
+
+
+class TradeSpool:
+    """
+    Segmented write-ahead log of live_trades batches.
+
+    Usage:
+        spool = TradeSpool("data/trade_spool")
+        batch_id = await spool.append(records)   # before the upsert
+        spool.ack(batch_id)                  # after it commits
+        spool.release(batch_id)              # after it failed: drainer retries
+        spool.append_for_replay(records)     # not written now: drainer writes it
+        spool.close()                        # waits for queued I/O
+        task = asyncio.create_task(spool.run_drainer(submit))
+    """
+
+    SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+    MAX_BYTES = 512 * 1024 * 1024  # disk budget; oldest segments are evicted beyond it
+    FSYNC_INTERVAL_SECONDS = 1.0
+
+    REPLAY_TRADES_PER_SECOND = 500
+    REPLAY_INTERVAL_SECONDS = 2.0
+    REPLAY_MAX_BACKOFF_SECONDS = 60.0
+
+    def __init__(
+        self,
+        directory: str | Path,
+        fsync: str = FSYNC_INTERVAL,
+        max_bytes: int = MAX_BYTES,
+        segment_max_bytes: int = SEGMENT_MAX_BYTES,
+        replay_trades_per_second: float = REPLAY_TRADES_PER_SECOND,
+    ):
+        """
+        Args:
+            directory: Spool directory (created if missing)
+            fsync: One of FSYNC_POLICIES
+            max_bytes: Disk budget for all segments
+            segment_max_bytes: Rotate the active segment beyond this size
+            replay_trades_per_second: Drainer replay rate limit
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync} (expected one of {FSYNC_POLICIES})")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.segment_max_bytes = segment_max_bytes
+        self.replay_trades_per_second = replay_trades_per_second
+
+        # batch_id -> (segment, byte offset, trade count) for unacked batches
+        self._pending: dict[int, tuple[Path, int, int]] = {}
+        self._in_flight: set[int] = set()
+        self._segments: list[Path] = []  # oldest first; last is active
+        self._segment_unacked: dict[Path, int] = {}
+        self._segment_bytes: dict[Path, int] = {}
+        self._next_id = 1
+        self._consecutive_failures = 0
+
+        # Owned by the I/O thread once it runs
+        self._file = None
+        self._last_fsync = 0.0
+        self._ops: queue.SimpleQueue = queue.SimpleQueue()
+        self._io_thread = threading.Thread(target=self._io_loop, name="trade-spool-io", daemon=True)
+
+        # Stats
+        self._appended_batches = 0
+        self._deferred_batches = 0
+        self._acked_batches = 0
+        self._failed_batches = 0
+        self._replayed_batches = 0
+        self._replayed_trades = 0
+        self._recovered_batches = 0
+        self._evicted_batches = 0
+        self._evicted_trades = 0
+        self._corrupt_batches = 0
+        self._segments_deleted = 0
+        self._io_errors = 0
+
+        self._recover()
+        self._open_segment()
+        self._io_thread.start()
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def _recover(self) -> None:
+        """Rebuild the pending index from existing segments."""
+        acked: set[int] = set()
+        for segment in sorted(self.directory.glob(SEGMENT_GLOB)):
+            if not segment.stat().st_size:
+                segment.unlink()
+                continue
+            self._segments.append(segment)
+            self._segment_unacked[segment] = 0
+            self._segment_bytes[segment] = segment.stat().st_size
+            offset = 0
+            with open(segment, "rb") as f:
+                for line in f:
+                    line_offset, offset = offset, offset + len(line)
+                    if not line.endswith(b"\n"):
+                        break  # torn write at crash; the batch was never upserted-and-acked
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        self._corrupt_batches += 1
+                        continue
+                    batch_id = entry.get("id", 0)
+                    self._next_id = max(self._next_id, batch_id + 1)
+                    if entry.get("op") == "ack":
+                        acked.add(batch_id)
+                    elif entry.get("op") == "batch":
+                        self._pending[batch_id] = (segment, line_offset, len(entry.get("records", ())))
+
+        for batch_id in acked:
+            self._pending.pop(batch_id, None)
+        for segment, _, _ in self._pending.values():
+            self._segment_unacked[segment] += 1
+
+        self._recovered_batches = len(self._pending)
+        if self._pending:
+            trades = sum(count for _, _, count in self._pending.values())
+            logger.warning(
+                f"Trade spool recovered {len(self._pending)} unacknowledged batches "
+                f"({trades} trades) from {len(self._segments)} segments"
+            )
+        self._delete_acked_segments(include_active=True)
+
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+
+    def _open_segment(self) -> None:
+        """Start a new active segment."""
+        segment = self.directory / f"spool-{self._next_id:012d}.jsonl"
+        if segment not in self._segment_bytes:  # else a recovered ack-only segment: append to it
+            self._segments.append(segment)
+            self._segment_unacked[segment] = 0
+            self._segment_bytes[segment] = 0
+        self._io(self._io_open, segment)
+
+    def _write(self, entry: dict, batch: bool = False) -> tuple[Path, int, Future]:
+        """
+        Queue one line for the active segment.
+
+        Returns (segment, offset, future resolved once written; for batch
+        lines that includes the fsync policy).
+        """
+        segment = self._segments[-1]
+        if self._segment_bytes[segment] >= self.segment_max_bytes:
+            self._open_segment()
+            segment = self._segments[-1]
+        line = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+        offset = self._segment_bytes[segment]
+        self._segment_bytes[segment] = offset + len(line)
+        return segment, offset, self._io(self._io_append if batch else self._io_write, line)
+
+    def _delete_acked_segments(self, include_active: bool = False) -> None:
+        """Delete the fully acknowledged prefix of inactive segments."""
+        while self._segments:
+            segment = self._segments[0]
+            if self._segment_unacked[segment] or (segment == self._segments[-1] and not include_active):
+                break
+            self._drop_segment(segment)
+            self._segments_deleted += 1
+
+    def _drop_segment(self, segment: Path) -> None:
+        self._segments.remove(segment)
+        del self._segment_unacked[segment]
+        del self._segment_bytes[segment]
+        self._io(self._io_unlink, segment)
+
+    # ------------------------------------------------------------------
+    # I/O thread
+    # ------------------------------------------------------------------
+
+    def _io(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Queue a file operation for the I/O thread."""
+        future: Future = Future()
+        self._ops.put((fn, args, future))
+        return future
+
+    def _io_loop(self) -> None:
+        while True:
+            op = self._ops.get()
+            if op is None:
+                return
+            fn, args, future = op
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                self._io_errors += 1
+                logger.error(f"Trade spool I/O failed: {type(e).__name__}: {e}")
+                future.set_exception(e)
+
+    def _io_open(self, segment: Path) -> None:
+        if self._file:
+            self._io_sync()
+            self._file.close()
+        self._file = open(segment, "ab")
+
+    def _io_write(self, line: bytes) -> None:
+        self._file.write(line)
+
+    def _io_append(self, line: bytes) -> None:
+        """Write a batch line and apply the fsync policy."""
+        self._file.write(line)
+        if self.fsync == FSYNC_ALWAYS or (
+            self.fsync == FSYNC_INTERVAL
+            and time.monotonic() - self._last_fsync >= self.FSYNC_INTERVAL_SECONDS
+        ):
+            self._io_sync()
+
+    def _io_sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+
+    def _io_unlink(self, segment: Path) -> None:
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _io_read(self, batch_id: int, segment: Path, offset: int) -> list[dict]:
+        self._file.flush()  # the batch may still be in the active segment's buffer
+        with open(segment, "rb") as f:
+            f.seek(offset)
+            entry = json.loads(f.readline())
+        if entry.get("id") != batch_id:  # an earlier failed write shifted the segment
+            raise ValueError(f"offset {offset} holds entry {entry.get('id')}")
+        return entry["records"]
+
+    def _io_close(self) -> None:
+        if self._file:
+            self._io_sync()
+            self._file.close()
+            self._file = None
+
+    def _enforce_budget(self) -> None:
+        """Evict the oldest segments (and their unacked batches) beyond the disk budget."""
+        while len(self._segments) > 1 and sum(self._segment_bytes.values()) > self.max_bytes:
+            segment = self._segments[0]
+            lost = [bid for bid, (seg, _, _) in self._pending.items() if seg == segment]
+            trades = sum(self._pending[bid][2] for bid in lost)
+            for batch_id in lost:
+                del self._pending[batch_id]
+                self._in_flight.discard(batch_id)
+            self._evicted_batches += len(lost)
+            self._evicted_trades += trades
+            if lost:
+                logger.error(
+                    f"Trade spool over {self.max_bytes // (1024 * 1024)}MB budget: "
+                    f"evicted {segment.name} with {len(lost)} unacked batches ({trades} trades)"
+                )
+            self._drop_segment(segment)
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    async def append(self, records: list[dict]) -> int:
+        """
+        Append a batch before it is written; returns once the line is on
+        disk (fsynced per policy).
+
+        Returns:
+            Spool batch id (pass to ack / release)
+
+        Raises:
+            OSError: The line could not be written (the batch is not spooled)
+        """
+        batch_id, written = self._append(records)
+        self._in_flight.add(batch_id)
+        try:
+            await asyncio.wrap_future(written)
+        except OSError:
+            self._in_flight.discard(batch_id)
+            self._forget(batch_id)
+            raise
+        return batch_id
+
+    def append_for_replay(self, records: list[dict]) -> int:
+        """
+        Append a batch that is not written now (e.g. shed under memory
+        pressure); the drainer replays it. Not counted as a failed write.
+        The line is written behind, without waiting.
+        """
+        batch_id, _ = self._append(records)
+        self._deferred_batches += 1
+        return batch_id
+
+    def _append(self, records: list[dict]) -> tuple[int, Future]:
+        batch_id = self._next_id
+        self._next_id += 1
+
+        segment, offset, written = self._write({"op": "batch", "id": batch_id, "records": records}, batch=True)
+        self._pending[batch_id] = (segment, offset, len(records))
+        self._segment_unacked[segment] += 1
+        self._appended_batches += 1
+
+        if sum(self._segment_bytes.values()) > self.max_bytes:
+            self._enforce_budget()
+        return batch_id, written
+
+    def _forget(self, batch_id: int) -> None:
+        """Drop a batch whose line was never written."""
+        entry = self._pending.pop(batch_id, None)
+        if entry is not None and entry[0] in self._segment_unacked:
+            self._segment_unacked[entry[0]] -= 1
+
+    def ack(self, batch_id: int) -> None:
+        """Mark a batch as stored (acks are not fsynced: a lost ack only causes a replay)."""
+        self._in_flight.discard(batch_id)
+        entry = self._pending.pop(batch_id, None)
+        if entry is None:
+            return  # evicted, or acked twice
+        self._write({"op": "ack", "id": batch_id})
+        self._segment_unacked[entry[0]] -= 1
+        self._acked_batches += 1
+        self._consecutive_failures = 0
+        self._delete_acked_segments()
+
+    def release(self, batch_id: int) -> None:
+        """Mark a batch as failed; it stays pending for the drainer."""
+        self._in_flight.discard(batch_id)
+        if batch_id in self._pending:
+            self._failed_batches += 1
+            self._consecutive_failures += 1
+
+    # ------------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------------
+
+    async def _read(self, batch_id: int) -> Optional[list[dict]]:
+        """Load a pending batch's records from disk (on the I/O thread, after its write)."""
+        segment, offset, _ = self._pending[batch_id]
+        try:
+            return await asyncio.wrap_future(self._io(self._io_read, batch_id, segment, offset))
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Trade spool batch {batch_id} unreadable, dropping: {e}")
+            self._corrupt_batches += 1
+            self._forget(batch_id)
+            return None
+
+    def _backoff_seconds(self) -> float:
+        if not self._consecutive_failures:
+            return self.REPLAY_INTERVAL_SECONDS
+        return min(
+            self.REPLAY_INTERVAL_SECONDS * 2 ** self._consecutive_failures,
+            self.REPLAY_MAX_BACKOFF_SECONDS,
+        )
+
+    async def run_drainer(self, submit: Callable[[int, list[dict]], Awaitable[None]]) -> None:
+        """
+        Replay pending batches that are not in flight, oldest first.
+
+        Args:
+            submit: Async callable(batch_id, records) that writes the batch and
+                later calls ack() or release()
+        """
+        logger.info(f"Starting trade spool drainer ({len(self._pending)} pending batches)")
+
+        while True:
+            try:
+                await asyncio.sleep(self._backoff_seconds())
+
+                for batch_id in sorted(self._pending.keys() - self._in_flight):
+                    if batch_id not in self._pending or batch_id in self._in_flight:
+                        continue
+                    records = await self._read(batch_id)
+                    if records is None or batch_id not in self._pending or batch_id in self._in_flight:
+                        continue
+                    self._in_flight.add(batch_id)
+                    await submit(batch_id, records)
+                    self._replayed_batches += 1
+                    self._replayed_trades += len(records)
+                    if self._consecutive_failures:
+                        break  # database may still be down: one probe batch per backoff
+                    await asyncio.sleep(len(records) / self.replay_trades_per_second)
+
+                self._delete_acked_segments()
+
+            except asyncio.CancelledError:
+                logger.info("Trade spool drainer stopped")
+                break
+
+            except Exception as e:
+                logger.error(f"Trade spool drainer error: {e}")
+                await asyncio.sleep(self.REPLAY_INTERVAL_SECONDS)
+
+    def close(self) -> None:
+        """Finish queued I/O, fsync the active segment and stop the I/O thread (blocks)."""
+        if self._io_thread.is_alive():
+            self._io(self._io_close)
+            self._ops.put(None)
+            self._io_thread.join()
+
+    @property
+    def stats(self) -> dict:
+        """Get spool statistics."""
+        return {
+            "pending_batches": len(self._pending),
+            "pending_trades": sum(count for _, _, count in self._pending.values()),
+            "in_flight": len(self._in_flight),
+            "segments": len(self._segments),
+            "disk_mb": round(sum(self._segment_bytes.values()) / (1024 * 1024), 2),
+            "fsync": self.fsync,
+            "appended_batches": self._appended_batches,
+            "deferred_batches": self._deferred_batches,
+            "acked_batches": self._acked_batches,
+            "failed_batches": self._failed_batches,
+            "replayed_batches": self._replayed_batches,
+            "replayed_trades": self._replayed_trades,
+            "recovered_batches": self._recovered_batches,
+            "evicted_batches": self._evicted_batches,
+            "evicted_trades": self._evicted_trades,
+            "corrupt_batches": self._corrupt_batches,
+            "segments_deleted": self._segments_deleted,
+            "io_queue": self._ops.qsize(),
+            "io_errors": self._io_errors,
+        }
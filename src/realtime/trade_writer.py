@@ -0,0 +1,488 @@
+"""
+Non-blocking bulk writers for live_trades.
+
+The batch processor hands each batch to a TradeWriter and returns to the
+event loop immediately; the upsert runs in the background with up to
+max_in_flight batches outstanding. Batches that share a trade_id are
+written in submission order (a later batch waits for the earlier one).
+
+Implementations:
+    AsyncpgTradeWriter   - pooled native Postgres connection, COPY into a
+                           temp stage table + INSERT ... ON CONFLICT
+    SupabaseTradeWriter  - supabase-py upsert, run in a worker thread
+    MemoryTradeWriter    - in-process stand-in with upsert semantics,
+                           latency and failure injection (offline runs)
+
+The retention tier is part of the live_trades key (migration 033) but can
+change when a trade is re-delivered with a higher value or insider score.
+Writers keep one row per trade in its highest tier: an important record
+replaces the trade's regular row, and a regular record for a trade already
+stored as important updates that row instead. SupabaseTradeWriter does
+this from its memory of the tiers it wrote in the last
+RECENT_TRADE_SECONDS, so the common case costs no extra request; a move it
+did not see (e.g. across a restart) leaves the regular row to expire with
+its partition.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from .dedup import RecentTradeIndex
+from .retention import TIER_IMPORTANT, TIER_REGULAR
+
+logger = logging.getLogger(__name__)
+
+try:
+    import asyncpg
+except ImportError:  # only needed for AsyncpgTradeWriter
+    asyncpg = None
+
+
+@dataclass
+class WriteBatch:
+    """A batch of live_trades records plus timing metadata."""
+
+    records: list[dict]
+    received_at: list[float] = field(default_factory=list)  # RTDS receive time per record
+    spool_id: Optional[int] = None  # TradeSpool batch id, acked once written
+    priority: bool = False  # fast lane: may use the reserved in-flight slot
+    submitted_at: float = 0.0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+
+BatchCallback = Callable[[WriteBatch], Awaitable[None] | None]
+FailureCallback = Callable[[WriteBatch, Exception], Awaitable[None] | None]
+
+
+class TradeWriter:
+    """
+    Base class: bounded in-flight batches with per-trade_id ordering.
+
+    Subclasses implement _write(records).
+
+    Usage:
+        writer = AsyncpgTradeWriter(dsn, on_success=..., on_failure=...)
+        await writer.start()
+        await writer.submit(WriteBatch(records))   # waits only for a free slot
+        await writer.close()                        # drains in-flight batches
+    """
+
+    MAX_IN_FLIGHT = 4
+    # In-flight slots only priority batches may take, so a whale trade never
+    # waits behind a full set of regular batches
+    RESERVED_PRIORITY_SLOTS = 1
+    TABLE = "live_trades"
+    # Unique key of the partitioned table (migration 033)
+    CONFLICT_COLUMNS: tuple[str, ...] = ("trade_id", "retention_tier", "executed_at")
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        on_success: Optional[BatchCallback] = None,
+        on_failure: Optional[FailureCallback] = None,
+        conflict_columns: Optional[Iterable[str]] = None,
+    ):
+        """
+        Args:
+            max_in_flight: Maximum concurrently written batches
+            on_success: Called after a batch is committed
+            on_failure: Called with the exception when a batch fails
+            conflict_columns: Upsert conflict target (default CONFLICT_COLUMNS)
+        """
+        self.max_in_flight = max_in_flight or self.MAX_IN_FLIGHT
+        self.on_success = on_success
+        self.on_failure = on_failure
+        self.conflict_columns = tuple(conflict_columns or self.CONFLICT_COLUMNS)
+
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        reserved = self.RESERVED_PRIORITY_SLOTS if self.max_in_flight > self.RESERVED_PRIORITY_SLOTS else 0
+        self._regular_slots = asyncio.Semaphore(self.max_in_flight - reserved)
+        self._tasks: set[asyncio.Task] = set()
+        self._inflight_ids: dict[str, asyncio.Task] = {}
+
+        # Stats
+        self._batches_written = 0
+        self._batches_failed = 0
+        self._records_written = 0
+        self._ordering_waits = 0
+        self._write_seconds_total = 0.0
+        self._peak_in_flight = 0
+
+    async def start(self) -> None:
+        """Open connections (no-op by default)."""
+
+    async def _write(self, records: list[dict]) -> None:
+        raise NotImplementedError
+
+    async def submit(self, batch: WriteBatch) -> None:
+        """
+        Queue a batch for writing.
+
+        Returns once the batch holds an in-flight slot; the write itself
+        completes in the background and is reported through the callbacks.
+        Regular batches leave RESERVED_PRIORITY_SLOTS free for priority ones.
+        """
+        batch.submitted_at = time.monotonic()
+        if not batch.priority:
+            await self._regular_slots.acquire()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            if not batch.priority:
+                self._regular_slots.release()
+            raise
+
+        # Earlier in-flight batches touching the same trade_ids must land first
+        depends_on = {
+            self._inflight_ids[record["trade_id"]]
+            for record in batch.records
+            if record["trade_id"] in self._inflight_ids
+        }
+        if depends_on:
+            self._ordering_waits += 1
+
+        task = asyncio.create_task(self._run(batch, depends_on))
+        self._tasks.add(task)
+        for record in batch.records:
+            self._inflight_ids[record["trade_id"]] = task
+        task.add_done_callback(lambda t, b=batch: self._release(t, b))
+        self._peak_in_flight = max(self._peak_in_flight, len(self._tasks))
+
+    def _release(self, task: asyncio.Task, batch: WriteBatch) -> None:
+        self._tasks.discard(task)
+        for record in batch.records:
+            if self._inflight_ids.get(record["trade_id"]) is task:
+                del self._inflight_ids[record["trade_id"]]
+        self._slots.release()
+        if not batch.priority:
+            self._regular_slots.release()
+
+    async def _run(self, batch: WriteBatch, depends_on: set[asyncio.Task]) -> None:
+        """Write one batch after its ordering dependencies, then report."""
+        if depends_on:
+            await asyncio.wait(depends_on)
+        batch.started_at = time.monotonic()
+        try:
+            await self._write(batch.records)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            batch.finished_at = time.monotonic()
+            self._batches_failed += 1
+            logger.error(f"Failed to write {len(batch.records)} trades: {type(e).__name__}: {e}")
+            await self._callback(self.on_failure, batch, e)
+            return
+
+        batch.finished_at = time.monotonic()
+        self._batches_written += 1
+        self._records_written += len(batch.records)
+        self._write_seconds_total += batch.finished_at - batch.started_at
+        await self._callback(self.on_success, batch)
+
+    async def _callback(self, callback: Optional[Callable], *args: Any) -> None:
+        if not callback:
+            return
+        try:
+            result = callback(*args)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"Trade writer callback error: {type(e).__name__}: {e}")
+
+    async def drain(self) -> None:
+        """Wait for all in-flight batches."""
+        while self._tasks:
+            await asyncio.wait(set(self._tasks))
+
+    async def close(self) -> None:
+        """Drain in-flight batches and release connections."""
+        await self.drain()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    @property
+    def stats(self) -> dict:
+        """Get writer statistics."""
+        return {
+            "writer": type(self).__name__,
+            "in_flight": len(self._tasks),
+            "max_in_flight": self.max_in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "batches_written": self._batches_written,
+            "batches_failed": self._batches_failed,
+            "records_written": self._records_written,
+            "ordering_waits": self._ordering_waits,
+            "avg_write_ms": (
+                round(self._write_seconds_total / self._batches_written * 1000, 1)
+                if self._batches_written
+                else 0
+            ),
+        }
+
+
+def _to_datetime(value: Any) -> Any:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
+
+
+def _to_decimal(value: Any) -> Any:
+    if isinstance(value, (int, float)):
+        return Decimal(repr(value))
+    if isinstance(value, str):
+        return Decimal(value)
+    return value
+
+
+def _to_json(value: Any) -> Any:
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _converter(pg_type: str) -> Optional[Callable[[Any], Any]]:
+    """Python -> asyncpg binary COPY conversion for a column type (None = as is)."""
+    if pg_type.startswith("timestamp") or pg_type == "date":
+        return _to_datetime
+    if pg_type.startswith("numeric"):
+        return _to_decimal
+    if pg_type in ("integer", "bigint", "smallint"):
+        return int
+    if pg_type in ("json", "jsonb"):
+        return _to_json
+    if pg_type.endswith("[]"):
+        return list
+    return None
+
+
+class AsyncpgTradeWriter(TradeWriter):
+    """
+    Native Postgres writer: COPY the batch into a transaction-scoped temp
+    table, then upsert it into live_trades with one INSERT ... SELECT.
+
+    The stage table is ON COMMIT DROP and no prepared statements are
+    cached, so it also works through transaction-mode poolers.
+    """
+
+    COMMAND_TIMEOUT_SECONDS = 30
+
+    def __init__(self, dsn: str, **kwargs: Any):
+        """
+        Args:
+            dsn: Postgres connection string (DATABASE_URL)
+            **kwargs: TradeWriter options
+        """
+        if asyncpg is None:
+            raise RuntimeError("asyncpg is required for AsyncpgTradeWriter")
+        super().__init__(**kwargs)
+        self.dsn = dsn
+        self._pool = None
+        self._column_types: dict[str, str] = {}
+        self._converters: dict[str, Optional[Callable[[Any], Any]]] = {}
+        self._skipped_columns: set[str] = set()
+
+    async def start(self) -> None:
+        """Create the connection pool and load live_trades column types."""
+        self._pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=1,
+            max_size=self.max_in_flight,
+            command_timeout=self.COMMAND_TIMEOUT_SECONDS,
+            statement_cache_size=0,
+        )
+        rows = await self._pool.fetch(
+            """
+            SELECT a.attname, format_type(a.atttypid, a.atttypmod) AS pg_type
+            FROM pg_attribute a
+            WHERE a.attrelid = $1::regclass AND a.attnum > 0 AND NOT a.attisdropped
+            """,
+            self.TABLE,
+        )
+        self._column_types = {row["attname"]: row["pg_type"] for row in rows}
+        self._converters = {name: _converter(t) for name, t in self._column_types.items()}
+        logger.info(
+            f"Asyncpg trade writer ready: {len(self._column_types)} {self.TABLE} columns, "
+            f"pool<={self.max_in_flight}"
+        )
+
+    def _columns_for(self, records: list[dict]) -> list[str]:
+        """Record keys that exist in the table (unknown keys are logged once)."""
+        columns = []
+        for key in records[0]:
+            if key in self._column_types:
+                columns.append(key)
+            elif key not in self._skipped_columns:
+                self._skipped_columns.add(key)
+                logger.warning(f"Skipping unknown {self.TABLE} column: {key}")
+        return columns
+
+    async def _write(self, records: list[dict]) -> None:
+        columns = self._columns_for(records)
+        converters = [self._converters[c] for c in columns]
+        rows = [
+            tuple(
+                conv(value) if conv is not None and value is not None else value
+                for conv, value in zip(converters, (record.get(c) for c in columns))
+            )
+            for record in records
+        ]
+
+        column_list = ", ".join(f'"{c}"' for c in columns)
+        conflict = ", ".join(f'"{c}"' for c in self.conflict_columns)
+        updates = ", ".join(
+            f'"{c}" = EXCLUDED."{c}"' for c in columns if c not in self.conflict_columns
+        )
+
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    f"CREATE TEMP TABLE live_trades_stage ON COMMIT DROP AS "
+                    f"SELECT {column_list} FROM {self.TABLE} WITH NO DATA"
+                )
+                await conn.copy_records_to_table(
+                    "live_trades_stage", records=rows, columns=columns
+                )
+                if "retention_tier" in columns:
+                    # Keep each trade's row in its highest tier (see module docstring)
+                    await conn.execute(
+                        f"UPDATE live_trades_stage s SET retention_tier = '{TIER_IMPORTANT}' "
+                        f"FROM {self.TABLE} t "
+                        f"WHERE s.retention_tier = '{TIER_REGULAR}' "
+                        f"AND t.retention_tier = '{TIER_IMPORTANT}' "
+                        f"AND t.trade_id = s.trade_id AND t.executed_at = s.executed_at"
+                    )
+                    await conn.execute(
+                        f"DELETE FROM {self.TABLE} t USING live_trades_stage s "
+                        f"WHERE s.retention_tier = '{TIER_IMPORTANT}' "
+                        f"AND t.retention_tier = '{TIER_REGULAR}' "
+                        f"AND t.trade_id = s.trade_id AND t.executed_at = s.executed_at"
+                    )
+                await conn.execute(
+                    f"INSERT INTO {self.TABLE} ({column_list}) "
+                    f"SELECT {column_list} FROM live_trades_stage "
+                    f"ON CONFLICT ({conflict}) DO UPDATE SET {updates}"
+                )
+
+    async def close(self) -> None:
+        await super().close()
+        if self._pool:
+            await self._pool.close()
+            self._pool = None
+
+
+class SupabaseTradeWriter(TradeWriter):
+    """supabase-py upsert, run in a worker thread so the event loop keeps going."""
+
+    # Tiers written are remembered this long (as TradeProcessor.RECENT_TRADE_SECONDS)
+    RECENT_TRADE_SECONDS = 900
+    # trade_ids per IN filter; the filter is part of the request URL
+    IN_FILTER_CHUNK = 100
+
+    def __init__(self, supabase, **kwargs: Any):
+        """
+        Args:
+            supabase: supabase-py Client
+            **kwargs: TradeWriter options
+        """
+        super().__init__(**kwargs)
+        self.supabase = supabase
+        # trade_id -> retention tier of the row this writer last stored
+        self._stored_tiers = RecentTradeIndex(window_seconds=self.RECENT_TRADE_SECONDS, bucket_seconds=60)
+        self._tier_moves = 0
+
+    async def _write(self, records: list[dict]) -> None:
+        # Runs after earlier batches with the same trade_ids (per-trade_id
+        # ordering), so _stored_tiers already reflects them
+        records, moved_ids = self._reconcile_tiers(records)
+        await asyncio.to_thread(self._write_sync, records, moved_ids)
+        for record in records:
+            if record.get("retention_tier") is not None:
+                self._stored_tiers.add(record["trade_id"], record["retention_tier"])
+        self._tier_moves += len(moved_ids)
+
+    def _reconcile_tiers(self, records: list[dict]) -> tuple[list[dict], list[str]]:
+        """
+        Keep each trade in its highest stored tier (see module docstring).
+
+        Returns:
+            (records, trade_ids whose regular row must be deleted)
+        """
+        reconciled = []
+        moved_ids = []
+        for record in records:
+            stored = self._stored_tiers.get(record["trade_id"])
+            tier = record.get("retention_tier")
+            if tier == TIER_REGULAR and stored == TIER_IMPORTANT:
+                record = {**record, "retention_tier": TIER_IMPORTANT}
+            elif tier == TIER_IMPORTANT and stored == TIER_REGULAR:
+                moved_ids.append(record["trade_id"])
+            reconciled.append(record)
+        return reconciled, moved_ids
+
+    def _write_sync(self, records: list[dict], moved_ids: list[str]) -> None:
+        table = self.supabase.table
+        for i in range(0, len(moved_ids), self.IN_FILTER_CHUNK):
+            chunk = moved_ids[i:i + self.IN_FILTER_CHUNK]
+            table(self.TABLE).delete().eq("retention_tier", TIER_REGULAR).in_("trade_id", chunk).execute()
+
+        on_conflict = ",".join(self.conflict_columns)
+        table(self.TABLE).upsert(records, on_conflict=on_conflict).execute()
+
+    @property
+    def stats(self) -> dict:
+        """Get writer statistics."""
+        return {**super().stats, "tier_moves": self._tier_moves}
+
+
+class MemoryTradeWriter(TradeWriter):
+    """
+    In-process live_trades stand-in with upsert-on-conflict semantics.
+
+    Used for offline runs and benchmarks; write latency and failures can
+    be injected to exercise backpressure and retry paths.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, fail_every: int = 0, **kwargs: Any):
+        """
+        Args:
+            latency_seconds: Simulated per-batch write latency
+            fail_every: Fail every Nth batch (0 = never)
+            **kwargs: TradeWriter options
+        """
+        super().__init__(**kwargs)
+        self.latency_seconds = latency_seconds
+        self.fail_every = fail_every
+        self.rows: dict[tuple, dict] = {}
+        self.write_log: list[tuple[str, ...]] = []  # trade_ids per committed batch
+        self._attempts = 0
+
+    async def _write(self, records: list[dict]) -> None:
+        self._attempts += 1
+        attempt = self._attempts
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if self.fail_every and attempt % self.fail_every == 0:
+            raise ConnectionError("injected write failure")
+        for record in records:
+            tier = record.get("retention_tier")
+            if tier is not None:
+                # Keep each trade's row in its highest tier (see module docstring)
+                other = TIER_IMPORTANT if tier == TIER_REGULAR else TIER_REGULAR
+                other_key = self._key({**record, "retention_tier": other})
+                if tier == TIER_REGULAR and other_key in self.rows:
+                    record = {**record, "retention_tier": TIER_IMPORTANT}
+                elif tier == TIER_IMPORTANT:
+                    record = {**self.rows.pop(other_key, {}), **record}
+            key = self._key(record)
+            self.rows[key] = {**self.rows.get(key, {}), **record}
+        self.write_log.append(tuple(r["trade_id"] for r in records))
+
+    def _key(self, record: dict) -> tuple:
+        return tuple(record.get(c) for c in self.conflict_columns)
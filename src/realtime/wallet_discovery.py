@@ -7,12 +7,16 @@ Uses Polymarket Data API for all metrics calculation.
 
 import asyncio
 import logging
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from typing import Optional
 
 from supabase import Client
 
 from ..scrapers.data_api import PolymarketDataAPI
+from .discovery_queue import DiscoveryQueue
+from .metrics_pool import MetricsPool
+from .position_snapshots import PositionSnapshotStore
+from .wallet_index import WalletIndex
 
 logger = logging.getLogger(__name__)
 
@@ -36,23 +40,38 @@ class WalletDiscoveryProcessor:
     HISTORY_DAYS = 30
     REANALYSIS_COOLDOWN_DAYS = 1  # Re-analyze daily for fresh data
 
-    def __init__(self, supabase: Client):
+    def __init__(
+        self,
+        supabase: Client,
+        wallets: Optional[WalletIndex] = None,
+        snapshots: Optional[PositionSnapshotStore] = None,
+        metrics_pool: Optional[MetricsPool] = None,
+    ):
         """
         Initialize the wallet discovery processor.
 
         Args:
             supabase: Supabase client instance
+            wallets: Shared wallet index (known / last analyzed); a private
+                one is created and loaded in initialize() if omitted
+            snapshots: Optional closed-position snapshot store; re-analysis
+                then fetches only positions closed since the last snapshot
+            metrics_pool: Optional process pool for the metric computation;
+                without one metrics are computed inline on the event loop
         """
         self.supabase = supabase
         self._api: Optional[PolymarketDataAPI] = None
+        self.snapshots = snapshots
+        self.metrics_pool = metrics_pool if metrics_pool is not None else MetricsPool(workers=0)
 
         # In-memory caches for O(1) lookup
-        self._known_wallets: set[str] = set()
-        self._wallet_last_analyzed: dict[str, datetime] = {}
-        self._pending_wallets: set[str] = set()
+        self._owns_wallets = wallets is None
+        self.wallets = wallets if wallets is not None else WalletIndex(supabase)
+        self._pending_wallets: set[str] = set()  # dequeued, being analyzed
 
-        # Processing queue
-        self._queue: asyncio.Queue[tuple[str, float]] = asyncio.Queue(maxsize=self.MAX_QUEUE_SIZE)
+        # Processing queue: highest priority first (trade size, new vs
+        # re-analysis, staleness, aging); the lowest is evicted when full
+        self._queue = DiscoveryQueue(capacity=self.MAX_QUEUE_SIZE)
 
         # Per-worker rate limiting
         self._worker_last_request: dict[int, datetime] = {}
@@ -69,28 +88,12 @@ class WalletDiscoveryProcessor:
         self._errors = 0
 
     async def initialize(self) -> None:
-        """Load existing wallet addresses and last analysis times into memory cache."""
+        """Load the wallet index (if not shared) and initialize the API client."""
         try:
-            logger.info("Loading wallet addresses from 'wallets' into cache...")
-            result = self.supabase.table("wallets").select("address, metrics_updated_at").execute()
-
-            self._known_wallets = set()
-            self._wallet_last_analyzed = {}
-
-            for w in result.data or []:
-                addr = w["address"].lower()
-                self._known_wallets.add(addr)
+            if self._owns_wallets:
+                await self.wallets.load()
 
-                if w.get("metrics_updated_at"):
-                    try:
-                        last_analyzed = datetime.fromisoformat(
-                            str(w["metrics_updated_at"]).replace("Z", "+00:00")
-                        )
-                        self._wallet_last_analyzed[addr] = last_analyzed
-                    except Exception:
-                        pass
-
-            logger.info(f"Loaded {len(self._known_wallets)} wallet addresses into cache")
+            self.metrics_pool.start()
 
             # Initialize Polymarket API (needed for main mode; also used for username lookup)
             self._api = PolymarketDataAPI()
@@ -105,6 +108,7 @@ class WalletDiscoveryProcessor:
         """Clean up resources."""
         if self._api:
             await self._api.__aexit__(None, None, None)
+        await asyncio.to_thread(self.metrics_pool.shutdown)
 
     def _check_enabled_flag(self) -> bool:
         """Check system_settings table for wallet_discovery_enabled flag."""
@@ -160,7 +164,8 @@ class WalletDiscoveryProcessor:
             usd_value: The trade value in USD
 
         Returns:
-            True if wallet was queued, False if skipped or queue full
+            True if wallet was queued (or its queued priority raised), False if
+            skipped or outranked by every queued wallet while the queue is full
         """
         if self._paused:
             return False
@@ -169,35 +174,43 @@ class WalletDiscoveryProcessor:
 
         self._wallets_discovered += 1
 
+        if addr in self._queue:
+            # Traded again while waiting: a larger trade raises its priority
+            return self._queue.put(addr, usd_value, is_new=False)
+
         if addr in self._pending_wallets:
-            return False
+            return False  # being analyzed right now
 
-        if addr in self._known_wallets:
-            last_analyzed = self._wallet_last_analyzed.get(addr)
+        is_new = not self.wallets.is_known(addr)
+        stale_days = 0.0
+        if not is_new:
+            last_analyzed = self.wallets.last_analyzed(addr)
             if last_analyzed:
                 now = datetime.now(timezone.utc)
                 days_since = (now - last_analyzed).days
                 if days_since < self.REANALYSIS_COOLDOWN_DAYS:
                     self._wallets_skipped_cooldown += 1
                     return False
+                stale_days = (now - last_analyzed).total_seconds() / 86400
+            else:
+                stale_days = self._queue.MAX_STALE_DAYS  # never analyzed
 
             logger.debug(f"Wallet {addr[:10]}... needs re-analysis")
 
-        try:
-            self._queue.put_nowait((addr, usd_value))
-            self._pending_wallets.add(addr)
-            is_new = addr not in self._known_wallets
-            logger.info(
-                f"{'New' if is_new else 'Re-analyzing'} wallet: {addr[:10]}... "
-                f"(${usd_value:,.0f} trade)"
-            )
-            return True
-
-        except asyncio.QueueFull:
+        if not self._queue.put(addr, usd_value, is_new=is_new, stale_days=stale_days):
             if usd_value >= 1000:
-                logger.warning(f"Queue full, but high-value trade (${usd_value:,.0f}) - wallet will be processed later")
+                logger.warning(
+                    f"Discovery queue full of higher-priority wallets - skipping "
+                    f"{addr[:10]}... (${usd_value:,.0f} trade)"
+                )
             return False
 
+        logger.info(
+            f"{'New' if is_new else 'Re-analyzing'} wallet: {addr[:10]}... "
+            f"(${usd_value:,.0f} trade)"
+        )
+        return True
+
     async def process_queue(self, worker_id: int = 0) -> None:
         """Background task to process discovery queue."""
         logger.info(f"Starting wallet discovery worker {worker_id}")
@@ -209,13 +222,14 @@ class WalletDiscoveryProcessor:
                 while self._paused:
                     await asyncio.sleep(2)
 
-                addr, usd_value = await self._queue.get()
+                wallet = await self._queue.get()
+                addr = wallet.address
+                self._pending_wallets.add(addr)
 
                 try:
                     # Re-check pause after dequeue
                     if self._paused:
-                        self._queue.put_nowait((addr, usd_value))
-                        self._queue.task_done()
+                        self._queue.requeue(wallet)
                         continue
 
                     await self._rate_limit_wait(worker_id)
@@ -227,7 +241,6 @@ class WalletDiscoveryProcessor:
 
                 finally:
                     self._pending_wallets.discard(addr)
-                    self._queue.task_done()
 
             except asyncio.CancelledError:
                 logger.info(f"Wallet discovery worker {worker_id} stopped")
@@ -265,7 +278,7 @@ class WalletDiscoveryProcessor:
         # Fetch data in parallel from Polymarket API
         api_tasks = [
             self._api.get_positions(address),
-            self._api.get_closed_positions(address),
+            self._get_closed_positions(address),
             self._api.get_total_balance(address),
             self._api.get_profile(address),
         ]
@@ -294,21 +307,7 @@ class WalletDiscoveryProcessor:
             redeemable = pos.get("redeemable", False)
             cash_pnl = float(pos.get("cashPnl", 0))
             if current_value == 0 and redeemable and cash_pnl < 0:
-                # Convert open-position format to closed-position format
-                size = float(pos.get("size", 0))
-                avg_price = float(pos.get("avgPrice", 0))
-                initial_value = float(pos.get("initialValue", 0)) or (size * avg_price)
-                unredeemed_losses.append({
-                    "conditionId": pos.get("conditionId", ""),
-                    "title": pos.get("title", ""),
-                    "outcome": pos.get("outcome", ""),
-                    "size": pos.get("size", "0"),
-                    "totalBought": str(initial_value),
-                    "avgPrice": pos.get("avgPrice", "0"),
-                    "realizedPnl": cash_pnl,
-                    "resolvedAt": pos.get("endDate"),
-                    "eventSlug": pos.get("eventSlug") or pos.get("slug", ""),
-                })
+                unredeemed_losses.append(self._unredeemed_loss(pos))
 
         if unredeemed_losses:
             logger.info(
@@ -324,30 +323,18 @@ class WalletDiscoveryProcessor:
             if float(p.get("currentValue", 0)) > 0
         ]
 
-        # Calculate all metrics using our formulas
+        # Calculate all metrics in one pass over a columnar frame, in a
+        # worker process for large wallets so the event loop keeps running
         # Pass open_positions (not raw positions) to avoid double-counting
         # unredeemed losses as both open and closed
-        metrics = self._calculate_metrics(
-            positions=open_positions,
-            closed_positions=closed_positions,
-            current_balance=portfolio_value
-        )
-
-        # Calculate period metrics (7d, 30d, all-time)
-        metrics_7d = self._calculate_period_metrics(closed_positions, 7, portfolio_value)
-        metrics_30d = self._calculate_period_metrics(closed_positions, 30, portfolio_value)
-        metrics_all = self._calculate_period_metrics(closed_positions, 36500, portfolio_value)  # 100 years = all time
-
-        # Calculate Growth Quality for each period
-        gq_7d = self._calculate_growth_quality(
-            [p for p in closed_positions if self._in_period(p, 7)],
-            metrics_7d["roi"],
-        )
-        gq_30d = self._calculate_growth_quality(
-            [p for p in closed_positions if self._in_period(p, 30)],
-            metrics_30d["roi"],
-        )
-        gq_all = self._calculate_growth_quality(closed_positions, metrics_all["roi"])
+        computed = await self.metrics_pool.compute(closed_positions, open_positions, portfolio_value)
+        metrics = computed["overall"]
+        metrics_7d = computed["periods"][7]
+        metrics_30d = computed["periods"][30]
+        metrics_all = computed["periods"][36500]  # 100 years = all time
+        gq_7d = computed["growth_quality"][7]
+        gq_30d = computed["growth_quality"][30]
+        gq_all = computed["growth_quality"][36500]
 
         logger.debug(
             f"Positions={metrics.get('closed_count', 0)}, "
@@ -355,7 +342,7 @@ class WalletDiscoveryProcessor:
         )
 
         # Skip new wallets with fewer than 15 trades
-        is_new = address not in self._known_wallets
+        is_new = not self.wallets.is_known(address)
         if is_new and metrics.get("trade_count", 0) < 15:
             logger.info(
                 f"Wallet skipped (< 15 trades): {address[:10]}... "
@@ -363,11 +350,11 @@ class WalletDiscoveryProcessor:
             )
             return
 
-        # Calculate new copy-trade metrics
-        weekly_profit_rate = self._calculate_weekly_profit_rate(closed_positions)
-        diff_win_rate_all = self._calculate_diff_win_rate(closed_positions)
-        avg_trades_per_day = self._calculate_avg_trades_per_day(closed_positions)
-        median_profit_pct = self._calculate_median_profit_pct(closed_positions)
+        # Copy-trade metrics
+        weekly_profit_rate = computed["weekly_profit_rate"]
+        diff_win_rate_all = computed["diff_win_rate_all"]
+        avg_trades_per_day = computed["avg_trades_per_day"]
+        median_profit_pct = computed["median_profit_pct"]
 
         # Fetch sell ratio and trades per market from raw trades
         sell_ratio, trades_per_market = await self._fetch_trade_stats(address)
@@ -385,26 +372,11 @@ class WalletDiscoveryProcessor:
         top_category = await self._fetch_top_category(all_event_slugs)
 
         # New metrics for improved copy score
-        best_trade_pct = self._calculate_best_trade_pct(closed_positions)
-        pf_trend = self._calculate_pf_trend(
-            metrics_30d.get("profit_factor", 0),
-            metrics.get("profit_factor_all", 0),
-        )
+        best_trade_pct = computed["best_trade_pct"]
+        pf_trend = computed["pf_trend"]
 
         # Copy Score uses 5-pillar formula
-        copy_score = self._calculate_copy_score(
-            profit_factor_30d=metrics_30d.get("profit_factor", 0),
-            profit_factor_all=metrics.get("profit_factor_all", 0),
-            drawdown_30d=metrics_30d["drawdown"],
-            diff_win_rate_30d=metrics_30d.get("diff_win_rate", 0),
-            weekly_profit_rate=weekly_profit_rate,
-            trade_count_all=metrics.get("trade_count", 0),
-            median_profit_pct=median_profit_pct,
-            avg_trades_per_day=avg_trades_per_day,
-            overall_pnl=metrics.get("total_pnl", 0),
-            best_trade_pct=best_trade_pct,
-            pf_trend=pf_trend,
-        )
+        copy_score = computed["copy_score"]
 
         wallet_data = {
             "address": address,
@@ -482,10 +454,8 @@ class WalletDiscoveryProcessor:
             wallet_data, on_conflict="address"
         ).execute()
 
-        # Update caches
-        now = datetime.now(timezone.utc)
-        self._known_wallets.add(address)
-        self._wallet_last_analyzed[address] = now
+        # Update the shared index in place (known, last analyzed, metrics)
+        self.wallets.apply_local(wallet_data)
 
         self._wallets_processed += 1
 
@@ -497,6 +467,59 @@ class WalletDiscoveryProcessor:
             f"pnl=${metrics.get('realized_pnl', 0):,.0f}"
         )
 
+    async def _get_closed_positions(self, address: str) -> list[dict]:
+        """
+        Get a wallet's closed positions, incrementally if it has a snapshot.
+
+        With a snapshot only the pages closed since it are fetched and merged;
+        otherwise (or when it is due a full resync) the whole history is
+        fetched and becomes the new snapshot. A fetch that fails part-way
+        leaves the snapshot untouched.
+        """
+        if not self.snapshots:
+            return await self._api.get_closed_positions(address)
+
+        snapshot = await self.snapshots.load(address)
+        if snapshot is None:
+            closed, complete = await self._api.get_closed_positions_since(address)
+            if not complete:
+                self.snapshots.record_incomplete()
+                return closed
+            snapshot = self.snapshots.full_snapshot(address, closed)
+        else:
+            delta, complete = await self._api.get_closed_positions_since(address, snapshot.is_known)
+            if not complete:
+                # Known history plus the part of the delta that arrived
+                self.snapshots.record_incomplete()
+                return delta + snapshot.closed
+            added = snapshot.merge(delta)
+            self.snapshots.record_delta(snapshot, len(delta), added)
+            logger.debug(
+                f"[{address[:10]}] {added} new closed positions "
+                f"({len(snapshot.closed)} in snapshot)"
+            )
+
+        await self.snapshots.save(snapshot)
+        return snapshot.closed
+
+    @staticmethod
+    def _unredeemed_loss(pos: dict) -> dict:
+        """Convert a resolved losing /positions record to closed-position format."""
+        size = float(pos.get("size", 0))
+        avg_price = float(pos.get("avgPrice", 0))
+        initial_value = float(pos.get("initialValue", 0)) or (size * avg_price)
+        return {
+            "conditionId": pos.get("conditionId", ""),
+            "title": pos.get("title", ""),
+            "outcome": pos.get("outcome", ""),
+            "size": pos.get("size", "0"),
+            "totalBought": str(initial_value),
+            "avgPrice": pos.get("avgPrice", "0"),
+            "realizedPnl": float(pos.get("cashPnl", 0)),
+            "resolvedAt": pos.get("endDate"),
+            "eventSlug": pos.get("eventSlug") or pos.get("slug", ""),
+        }
+
     def _parse_positions(self, positions: list[dict]) -> dict:
         """Parse open positions."""
         if not positions:
@@ -539,761 +562,6 @@ class WalletDiscoveryProcessor:
             "losses": losses
         }
 
-    def _group_into_trades(
-        self,
-        closed_positions: list[dict],
-        open_positions: list[dict]
-    ) -> list[dict]:
-        """
-        Group positions into trades.
-        - Same conditionId + different outcomes (hedging) = 1 trade
-        - Same conditionId + same outcome (re-entry) = separate trades
-        """
-        market_groups: dict[str, dict] = {}
-
-        # Process closed positions
-        for pos in closed_positions:
-            condition_id = pos.get("conditionId", "")
-            outcome = pos.get("outcome", "unknown")
-            pnl = float(pos.get("realizedPnl", 0))
-            bought = float(pos.get("totalBought", 0)) or float(pos.get("initialValue", 0)) or (float(pos.get("size", 0)) * float(pos.get("avgPrice", 0)))
-
-            if condition_id not in market_groups:
-                market_groups[condition_id] = {"outcomes": {}}
-
-            if outcome not in market_groups[condition_id]["outcomes"]:
-                market_groups[condition_id]["outcomes"][outcome] = []
-
-            market_groups[condition_id]["outcomes"][outcome].append({
-                "pnl": pnl,
-                "bought": bought,
-                "is_resolved": True,
-                "resolved_at": pos.get("resolvedAt") or pos.get("timestamp")
-            })
-
-        # Process open positions
-        # NOTE: Open positions are ALWAYS unrealized, even if currentValue = 0
-        # The market hasn't officially resolved, so we don't count them as realized
-        for pos in open_positions:
-            condition_id = pos.get("conditionId", "")
-            outcome = pos.get("outcome", "unknown")
-            pnl = float(pos.get("cashPnl", 0))
-            bought = float(pos.get("totalBought", 0)) or float(pos.get("initialValue", 0)) or (float(pos.get("size", 0)) * float(pos.get("avgPrice", 0)))
-
-            if condition_id not in market_groups:
-                market_groups[condition_id] = {"outcomes": {}}
-
-            if outcome not in market_groups[condition_id]["outcomes"]:
-                market_groups[condition_id]["outcomes"][outcome] = []
-
-            market_groups[condition_id]["outcomes"][outcome].append({
-                "pnl": pnl,
-                "bought": bought,
-                "is_resolved": False,  # Open positions are always unrealized
-                "resolved_at": None
-            })
-
-        # Convert to trades
-        trades = []
-        for condition_id, group in market_groups.items():
-            outcome_keys = list(group["outcomes"].keys())
-
-            if len(outcome_keys) > 1:
-                # Multiple outcomes (hedging) = 1 trade
-                total_pnl = 0
-                total_bought = 0
-                is_resolved = False
-                latest_resolved_at = None
-
-                for outcome, entries in group["outcomes"].items():
-                    for entry in entries:
-                        total_pnl += entry["pnl"]
-                        total_bought += entry["bought"]
-                        if entry["is_resolved"]:
-                            is_resolved = True
-                        if entry["resolved_at"]:
-                            # Normalize to string for safe comparison
-                            # (API can return int timestamps or ISO date strings)
-                            entry_ra = str(entry["resolved_at"])
-                            latest_ra = str(latest_resolved_at) if latest_resolved_at else ""
-                            if not latest_resolved_at or entry_ra > latest_ra:
-                                latest_resolved_at = entry["resolved_at"]
-
-                trades.append({
-                    "condition_id": condition_id,
-                    "total_pnl": total_pnl,
-                    "total_bought": total_bought,
-                    "is_resolved": is_resolved,
-                    "resolved_at": latest_resolved_at
-                })
-            else:
-                # Single outcome - each entry is a separate trade
-                outcome = outcome_keys[0]
-                for entry in group["outcomes"][outcome]:
-                    trades.append({
-                        "condition_id": condition_id,
-                        "total_pnl": entry["pnl"],
-                        "total_bought": entry["bought"],
-                        "is_resolved": entry["is_resolved"],
-                        "resolved_at": entry["resolved_at"]
-                    })
-
-        return trades
-
-    def _calculate_max_drawdown(
-        self,
-        closed_positions: list[dict],
-        initial_balance: float = 0,
-    ) -> float:
-        """
-        Calculate max drawdown from equity curve.
-
-        Tracks balance starting from initial_balance, adding realized PnL
-        for each position chronologically.
-        Max Drawdown = (peak - trough) / peak * 100
-        """
-        sorted_positions = sorted(
-            [p for p in closed_positions if p.get("timestamp")],
-            key=lambda p: p.get("timestamp") or 0
-        )
-
-        if not sorted_positions:
-            return 0
-
-        balance = initial_balance
-        max_balance = initial_balance
-        max_drawdown_pct = 0
-
-        for pos in sorted_positions:
-            pnl = float(pos.get("realizedPnl", 0))
-            balance += pnl
-
-            if balance > max_balance:
-                max_balance = balance
-
-            if max_balance > 0:
-                drawdown_pct = ((max_balance - balance) / max_balance) * 100
-                if drawdown_pct > max_drawdown_pct:
-                    max_drawdown_pct = drawdown_pct
-
-        return min(round(max_drawdown_pct * 100) / 100, 100)
-
-    def _calculate_metrics(
-        self,
-        positions: list[dict],
-        closed_positions: list[dict],
-        current_balance: float = 0
-    ) -> dict:
-        """
-        Calculate all metrics from positions data.
-
-        Trade counting:
-        - Same conditionId + different outcomes (hedging) = 1 trade
-        - Same conditionId + same outcome (re-entry) = separate trades
-
-        ROI calculation:
-        - Account ROI = Total PnL / Initial Balance * 100
-        - Initial Balance = Current Balance - Total PnL
-        """
-        trades = self._group_into_trades(closed_positions, positions)
-
-        realized_pnl = 0
-        unrealized_pnl = 0
-        total_bought = 0
-        win_count = 0
-        loss_count = 0
-        active_count = 0
-        gross_wins = 0
-        gross_losses = 0
-
-        for trade in trades:
-            if trade["is_resolved"]:
-                realized_pnl += trade["total_pnl"]
-                total_bought += trade["total_bought"]
-                if trade["total_pnl"] > 0:
-                    win_count += 1
-                    gross_wins += trade["total_pnl"]
-                else:
-                    loss_count += 1
-                    gross_losses += abs(trade["total_pnl"])
-            else:
-                unrealized_pnl += trade["total_pnl"]
-                active_count += 1
-
-        total_pnl = realized_pnl + unrealized_pnl
-        trade_count = win_count + loss_count
-
-        # ROI = Total PnL / Initial Capital * 100
-        # Initial Capital estimated as current_balance - total_pnl (what was deposited)
-        initial_capital = current_balance - total_pnl
-        if initial_capital > 0:
-            roi_all = (total_pnl / initial_capital * 100)
-        elif total_pnl > 0 and total_bought > 0:
-            roi_all = (total_pnl / total_bought * 100)
-        else:
-            roi_all = 0
-
-        # Win rate from resolved trades
-        win_rate_all = (win_count / trade_count * 100) if trade_count > 0 else 0
-
-        # Calculate max drawdown
-        # Include volume-based floor for high-frequency traders with low current balance
-        avg_trade_size = total_bought / trade_count if trade_count > 0 else 0
-        drawdown_base = max(current_balance - realized_pnl - unrealized_pnl, current_balance, avg_trade_size * 3, 1)
-        max_drawdown = self._calculate_max_drawdown(closed_positions, drawdown_base)
-
-        # Count unique markets (conditionId), not raw position entries
-        # Each market has YES/NO outcomes, so raw len() double-counts
-        unique_closed_markets = len(set(
-            p.get("conditionId", "") for p in closed_positions if p.get("conditionId")
-        ))
-        unique_open_markets = len(set(
-            p.get("conditionId", "") for p in positions
-            if p.get("conditionId") and float(p.get("currentValue", 0)) > 0
-        ))
-
-        # Profit Factor = gross wins / abs(gross losses)
-        if gross_losses > 0:
-            profit_factor_all = round(gross_wins / gross_losses, 2)
-        elif gross_wins > 0:
-            profit_factor_all = 10.0  # Cap when no losses
-        else:
-            profit_factor_all = 0
-
-        return {
-            "realized_pnl": round(realized_pnl, 2),
-            "unrealized_pnl": round(unrealized_pnl, 2),
-            "total_pnl": round(total_pnl, 2),
-            "total_bought": round(total_bought, 2),
-            "roi_all": round(roi_all, 2),
-            "win_rate_all": round(win_rate_all, 2),
-            "win_count": win_count,
-            "loss_count": loss_count,
-            "trade_count": trade_count,
-            "active_count": active_count,
-            "open_count": unique_open_markets,
-            "closed_count": unique_closed_markets,
-            "max_drawdown": max_drawdown,
-            "gross_wins": round(gross_wins, 2),
-            "gross_losses": round(gross_losses, 2),
-            "profit_factor_all": profit_factor_all,
-        }
-
-    def _calculate_period_metrics(
-        self,
-        closed_positions: list[dict],
-        days: int,
-        current_balance: float = 0
-    ) -> dict:
-        """Calculate metrics for a specific time period (7d, 30d)."""
-        now = datetime.now(timezone.utc)
-        cutoff = now - timedelta(days=days)
-        cutoff_ts = cutoff.timestamp()
-
-        # Filter positions resolved within the period
-        period_positions = []
-        for pos in closed_positions:
-            resolved_at = pos.get("resolvedAt") or pos.get("timestamp")
-            if resolved_at:
-                try:
-                    if isinstance(resolved_at, (int, float)):
-                        resolved_ts = resolved_at / 1000 if resolved_at > 4102444800 else resolved_at
-                    else:
-                        resolved_ts = datetime.fromisoformat(
-                            str(resolved_at).replace("Z", "+00:00")
-                        ).timestamp()
-
-                    if resolved_ts >= cutoff_ts:
-                        period_positions.append(pos)
-                except Exception:
-                    pass
-
-        if not period_positions:
-            return {
-                "pnl": 0, "roi": 0, "volume": 0,
-                "trade_count": 0, "win_rate": 0, "drawdown": 0,
-                "sum_profit_pct": 0,
-            }
-
-        # Group by conditionId to count unique markets (not raw entries)
-        # Each market has YES/NO outcomes, raw count double-counts
-        market_pnl: dict[str, float] = {}
-        # Track per-market avg entry price for difficulty-weighted win rate
-        market_difficulty: dict[str, list[float]] = {}
-        for p in period_positions:
-            cid = p.get("conditionId", "")
-            rpnl = float(p.get("realizedPnl", 0))
-            market_pnl[cid] = market_pnl.get(cid, 0) + rpnl
-            # avgPrice = entry probability (what they paid per share)
-            avg_price = float(p.get("avgPrice", 0.5))
-            avg_price = max(0.01, min(avg_price, 0.99))  # Clamp to valid range
-            if cid not in market_difficulty:
-                market_difficulty[cid] = []
-            market_difficulty[cid].append(avg_price)
-
-        # Calculate PnL
-        pnl = sum(market_pnl.values())
-
-        # Calculate volume
-        volume = sum(
-            float(p.get("totalBought", 0)) or float(p.get("initialValue", 0)) or (float(p.get("size", 0)) * float(p.get("avgPrice", 0)))
-            for p in period_positions
-        )
-
-        # Sum of per-trade profit percentages
-        sum_profit_pct = 0.0
-        for p in period_positions:
-            realized_pnl = float(p.get("realizedPnl", 0))
-            initial_value = float(p.get("totalBought", 0) or 0)
-            if initial_value <= 0:
-                initial_value = float(p.get("initialValue", 0))
-            if initial_value <= 0:
-                initial_value = float(p.get("size", 0)) * float(p.get("avgPrice", 0))
-            if initial_value > 0:
-                sum_profit_pct += (realized_pnl / initial_value) * 100
-
-        # Calculate win rate from unique markets
-        wins = sum(1 for v in market_pnl.values() if v > 0)
-        trade_count = len(market_pnl)
-        win_rate = (wins / trade_count * 100) if trade_count > 0 else 0
-
-        # Profit Factor for period
-        gross_wins = sum(v for v in market_pnl.values() if v > 0)
-        gross_losses_abs = sum(abs(v) for v in market_pnl.values() if v < 0)
-        if gross_losses_abs > 0:
-            profit_factor = round(gross_wins / gross_losses_abs, 2)
-        elif gross_wins > 0:
-            profit_factor = 10.0
-        else:
-            profit_factor = 0
-
-        # Difficulty-weighted win rate for period
-        # difficulty = 1 - avg_entry_price (lower entry price = harder bet = more credit)
-        total_difficulty = 0
-        wins_difficulty = 0
-        for cid, prices in market_difficulty.items():
-            avg_entry = sum(prices) / len(prices)
-            difficulty = 1 - avg_entry
-            total_difficulty += difficulty
-            if market_pnl.get(cid, 0) > 0:
-                wins_difficulty += difficulty
-        diff_win_rate = (wins_difficulty / total_difficulty * 100) if total_difficulty > 0 else 0
-
-        # ROI = Period PnL / Starting Balance
-        # Starting balance estimated as current_balance - period_pnl
-        estimated_start = current_balance - pnl
-        if estimated_start > 0:
-            roi = (pnl / estimated_start * 100)
-        elif pnl > 0 and volume > 0:
-            roi = (pnl / volume * 100)
-        else:
-            roi = 0
-
-        # Calculate drawdown for period
-        # Use volume-based floor to handle high-frequency traders with low
-        # current balance (e.g., profits withdrawn, capital rotated rapidly)
-        avg_position_size = volume / trade_count if trade_count > 0 else 0
-        initial_balance = max(current_balance - pnl, current_balance, avg_position_size * 3, 1)
-        drawdown = self._calculate_max_drawdown(period_positions, initial_balance)
-
-        losses = trade_count - wins
-
-        return {
-            "pnl": round(pnl, 2),
-            "roi": round(roi, 2),
-            "volume": round(volume, 2),
-            "trade_count": trade_count,
-            "win_rate": round(win_rate, 2),
-            "wins": wins,
-            "losses": losses,
-            "drawdown": drawdown,
-            "profit_factor": profit_factor,
-            "diff_win_rate": round(diff_win_rate, 2),
-            "sum_profit_pct": round(sum_profit_pct, 2),
-        }
-
-    def _calculate_weekly_profit_rate(self, closed_positions: list[dict]) -> float:
-        """
-        Calculate percentage of active weeks that were profitable.
-        Groups closed positions by ISO week and counts profitable weeks.
-        """
-        if not closed_positions:
-            return 0
-
-        # Group PnL by ISO week
-        week_pnl: dict[str, float] = {}
-        for pos in closed_positions:
-            resolved_at = pos.get("resolvedAt") or pos.get("timestamp")
-            if not resolved_at:
-                continue
-            try:
-                if isinstance(resolved_at, (int, float)):
-                    resolved_ts = resolved_at / 1000 if resolved_at > 4102444800 else resolved_at
-                    dt = datetime.fromtimestamp(resolved_ts, tz=timezone.utc)
-                else:
-                    dt = datetime.fromisoformat(str(resolved_at).replace("Z", "+00:00"))
-                iso_year, iso_week, _ = dt.isocalendar()
-                week_key = f"{iso_year}-W{iso_week:02d}"
-                pnl = float(pos.get("realizedPnl", 0))
-                week_pnl[week_key] = week_pnl.get(week_key, 0) + pnl
-            except Exception:
-                continue
-
-        if not week_pnl:
-            return 0
-
-        profitable_weeks = sum(1 for v in week_pnl.values() if v > 0)
-        return round(profitable_weeks / len(week_pnl) * 100, 2)
-
-    def _calculate_diff_win_rate(self, closed_positions: list[dict]) -> float:
-        """
-        Calculate difficulty-weighted win rate from closed positions.
-        Difficulty = 1 - avgPrice (lower entry price = harder bet = more credit).
-        """
-        if not closed_positions:
-            return 0
-
-        # Group by conditionId
-        market_pnl: dict[str, float] = {}
-        market_prices: dict[str, list[float]] = {}
-
-        for pos in closed_positions:
-            cid = pos.get("conditionId", "")
-            if not cid:
-                continue
-            pnl = float(pos.get("realizedPnl", 0))
-            avg_price = float(pos.get("avgPrice", 0.5))
-            avg_price = max(0.01, min(avg_price, 0.99))
-
-            market_pnl[cid] = market_pnl.get(cid, 0) + pnl
-            if cid not in market_prices:
-                market_prices[cid] = []
-            market_prices[cid].append(avg_price)
-
-        if not market_pnl:
-            return 0
-
-        total_difficulty = 0
-        wins_difficulty = 0
-        for cid, prices in market_prices.items():
-            avg_entry = sum(prices) / len(prices)
-            difficulty = 1 - avg_entry
-            total_difficulty += difficulty
-            if market_pnl.get(cid, 0) > 0:
-                wins_difficulty += difficulty
-
-        return round((wins_difficulty / total_difficulty * 100) if total_difficulty > 0 else 0, 2)
-
-    def _calculate_avg_trades_per_day(self, closed_positions: list[dict]) -> float:
-        """Calculate average trades per active day from closed positions."""
-        if not closed_positions:
-            return 0
-
-        # Collect unique active days
-        active_days: set[str] = set()
-        for pos in closed_positions:
-            resolved_at = pos.get("resolvedAt") or pos.get("timestamp")
-            if not resolved_at:
-                continue
-            try:
-                if isinstance(resolved_at, (int, float)):
-                    resolved_ts = resolved_at / 1000 if resolved_at > 4102444800 else resolved_at
-                    dt = datetime.fromtimestamp(resolved_ts, tz=timezone.utc)
-                else:
-                    dt = datetime.fromisoformat(str(resolved_at).replace("Z", "+00:00"))
-                active_days.add(dt.strftime("%Y-%m-%d"))
-            except Exception:
-                continue
-
-        if not active_days:
-            return 0
-
-        # Count unique markets (trades) rather than raw positions
-        unique_markets = len(set(p.get("conditionId", "") for p in closed_positions if p.get("conditionId")))
-        return round(unique_markets / len(active_days), 2)
-
-    @staticmethod
-    def _calculate_median_profit_pct(closed_positions: list[dict]) -> float | None:
-        """
-        Calculate median profit percentage per closed trade with IQR outlier removal.
-
-        For each closed position: profit_pct = (realizedPnl / initialValue) * 100
-        Then remove outliers via IQR method and return median.
-
-        Returns None if fewer than 3 valid positions.
-        """
-        profit_pcts: list[float] = []
-
-        for pos in closed_positions:
-            realized_pnl = float(pos.get("realizedPnl", 0))
-            # Try totalBought first (newer API format), then initialValue, then size*avgPrice
-            initial_value = 0
-            total_bought = pos.get("totalBought")
-            if total_bought is not None:
-                initial_value = float(total_bought)
-            if initial_value <= 0:
-                initial_value = float(pos.get("initialValue", 0))
-            if initial_value <= 0:
-                size = float(pos.get("size", 0))
-                avg_price = float(pos.get("avgPrice", 0))
-                initial_value = size * avg_price
-
-            if initial_value <= 0:
-                continue
-
-            pct = (realized_pnl / initial_value) * 100
-            profit_pcts.append(pct)
-
-        if len(profit_pcts) < 3:
-            return None
-
-        profit_pcts.sort()
-        n = len(profit_pcts)
-
-        def interpolate(sorted_data: list[float], frac_idx: float) -> float:
-            lower = int(frac_idx)
-            upper = min(lower + 1, len(sorted_data) - 1)
-            weight = frac_idx - lower
-            return sorted_data[lower] * (1 - weight) + sorted_data[upper] * weight
-
-        q1 = interpolate(profit_pcts, n * 0.25)
-        q3 = interpolate(profit_pcts, n * 0.75)
-        iqr = q3 - q1
-
-        lower_bound = q1 - 1.5 * iqr
-        upper_bound = q3 + 1.5 * iqr
-
-        filtered = [p for p in profit_pcts if lower_bound <= p <= upper_bound]
-        if not filtered:
-            return None
-
-        filtered.sort()
-        mid = len(filtered) // 2
-        if len(filtered) % 2 == 0:
-            median_val = (filtered[mid - 1] + filtered[mid]) / 2
-        else:
-            median_val = filtered[mid]
-
-        return round(median_val, 2)
-
-    @staticmethod
-    def _in_period(position: dict, days: int) -> bool:
-        """Check if a position's resolvedAt is within the last N days."""
-        resolved_at = position.get("resolvedAt") or position.get("timestamp")
-        if not resolved_at:
-            return False
-        try:
-            if isinstance(resolved_at, (int, float)):
-                ts = resolved_at / 1000 if resolved_at > 4102444800 else resolved_at
-            else:
-                ts = datetime.fromisoformat(
-                    str(resolved_at).replace("Z", "+00:00")
-                ).timestamp()
-            cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).timestamp()
-            return ts >= cutoff
-        except Exception:
-            return False
-
-    @staticmethod
-    def _calculate_growth_quality(
-        closed_positions: list[dict],
-        roi: float,
-    ) -> int:
-        """
-        Calculate Growth Quality score (1-10).
-        Combines R² of cumulative PnL equity curve (60%) with ROI magnitude (40%).
-
-        R² measures steadiness: 1.0 = perfectly linear growth, 0 = random.
-        """
-        # Filter positions with resolvedAt and sort by time
-        sorted_positions = []
-        for p in closed_positions:
-            resolved_at = p.get("resolvedAt") or p.get("timestamp")
-            if resolved_at:
-                try:
-                    if isinstance(resolved_at, (int, float)):
-                        ts = resolved_at / 1000 if resolved_at > 4102444800 else resolved_at
-                    else:
-                        ts = datetime.fromisoformat(
-                            str(resolved_at).replace("Z", "+00:00")
-                        ).timestamp()
-                    sorted_positions.append((ts, float(p.get("realizedPnl", 0))))
-                except Exception:
-                    pass
-
-        sorted_positions.sort(key=lambda x: x[0])
-
-        if len(sorted_positions) < 3:
-            return 0
-
-        # Build cumulative PnL points
-        cum_pnl = 0.0
-        points = []
-        for i, (_, pnl) in enumerate(sorted_positions):
-            cum_pnl += pnl
-            points.append((float(i), cum_pnl))
-
-        n = len(points)
-        sum_x = sum(p[0] for p in points)
-        sum_y = sum(p[1] for p in points)
-        sum_xy = sum(p[0] * p[1] for p in points)
-        sum_xx = sum(p[0] * p[0] for p in points)
-
-        mean_y = sum_y / n
-        ss_tot = sum((p[1] - mean_y) ** 2 for p in points)
-
-        if ss_tot == 0:
-            return 7 if roi > 0 else 1
-
-        denom = n * sum_xx - sum_x * sum_x
-        if denom == 0:
-            return 1
-
-        slope = (n * sum_xy - sum_x * sum_y) / denom
-        intercept = (sum_y - slope * sum_x) / n
-
-        ss_res = sum((p[1] - (intercept + slope * p[0])) ** 2 for p in points)
-        r2 = max(1 - ss_res / ss_tot, 0)
-
-        # Only reward upward trends
-        if slope <= 0:
-            return 1
-
-        steadiness = r2
-        return_score = min(max(roi / 20, 0), 1.0)
-        raw = steadiness * 0.6 + return_score * 0.4
-        return max(1, min(10, round(raw * 9 + 1)))
-
-    @staticmethod
-    def _calculate_best_trade_pct(closed_positions: list[dict]) -> float | None:
-        """
-        Calculate what % of total positive PnL comes from the single best trade.
-
-        A high value (e.g. 80%) means the trader's profits depend on one lucky bet.
-        A low value (e.g. 10%) means profits are well-distributed across trades.
-
-        Returns None if no positive PnL trades.
-        """
-        # Group by conditionId to get per-market PnL
-        market_pnl: dict[str, float] = {}
-        for pos in closed_positions:
-            cid = pos.get("conditionId", "")
-            if not cid:
-                continue
-            pnl = float(pos.get("realizedPnl", 0))
-            market_pnl[cid] = market_pnl.get(cid, 0) + pnl
-
-        positive_pnls = [v for v in market_pnl.values() if v > 0]
-        if not positive_pnls:
-            return None
-
-        total_positive = sum(positive_pnls)
-        if total_positive <= 0:
-            return None
-
-        max_single = max(positive_pnls)
-        return round((max_single / total_positive) * 100, 2)
-
-    @staticmethod
-    def _calculate_pf_trend(profit_factor_30d: float, profit_factor_all: float) -> float | None:
-        """
-        Calculate PF trend = profit_factor_30d / profit_factor_all.
-
-        > 1.0 = improving edge (recent PF better than historical)
-        < 1.0 = decaying edge (recent PF worse than historical)
-        = 1.0 = stable
-
-        Returns None if either PF is 0 or unavailable.
-        """
-        if not profit_factor_all or profit_factor_all <= 0:
-            return None
-        if profit_factor_30d is None or profit_factor_30d < 0:
-            return None
-        return round(profit_factor_30d / profit_factor_all, 2)
-
-    @staticmethod
-    def _calculate_copy_score(
-        profit_factor_30d: float,
-        profit_factor_all: float,
-        drawdown_30d: float,
-        diff_win_rate_30d: float,
-        weekly_profit_rate: float,
-        trade_count_all: int,
-        median_profit_pct: float | None = None,
-        avg_trades_per_day: float | None = None,
-        overall_pnl: float = 0,
-        best_trade_pct: float | None = None,
-        pf_trend: float | None = None,
-    ) -> int:
-        """
-        Calculate composite copy-trade score (0-100).
-
-        5-pillar formula:
-        - Edge (25%): Blended Profit Factor (70% 30d + 30% all-time), normalized 1.2-3.0
-        - Skill (20%): Difficulty-weighted win rate, normalized 45%-75%
-        - Consistency (20%): Weekly Profit Rate, normalized 40%-85%
-        - Risk (15%): Inverse drawdown, DD 5%-25%
-        - Discipline (10%): Inverse best_trade_pct, penalizes one-hit wonders
-
-        Multiplied by:
-        - Confidence: min(1, trade_count_all / 150) — stricter than before
-        - Decay: pf_trend ratio clamped to [0.5, 1.0] — penalizes fading edge
-        """
-        # Hard filters — all must pass or score = 0
-        if overall_pnl < 0:
-            return 0
-        if trade_count_all < 40:
-            return 0
-        if profit_factor_30d < 1.2:
-            return 0
-        if median_profit_pct is None or median_profit_pct < 5.0:
-            return 0
-        if avg_trades_per_day is not None and (avg_trades_per_day < 0.5 or avg_trades_per_day > 25):
-            return 0
-
-        # Pillar 1: Edge (25%) — Blended PF (70% recent + 30% all-time)
-        blended_pf = profit_factor_30d * 0.7 + (profit_factor_all or profit_factor_30d) * 0.3
-        edge_score = min(max((blended_pf - 1.2) / (3.0 - 1.2), 0), 1.0)
-
-        # Pillar 2: Skill (20%) — Difficulty-weighted win rate 45% → 0, 75%+ → 1.0
-        skill_score = min(max((diff_win_rate_30d - 45) / (75 - 45), 0), 1.0)
-
-        # Pillar 3: Consistency (20%) — Weekly profit rate 40% → 0, 85%+ → 1.0
-        consistency_score = min(max((weekly_profit_rate - 40) / (85 - 40), 0), 1.0)
-
-        # Pillar 4: Risk (15%) — Inverse drawdown: DD 5% → 1.0, DD 25%+ → 0
-        if drawdown_30d <= 0:
-            risk_score = 1.0
-        else:
-            risk_score = min(max((25 - drawdown_30d) / (25 - 5), 0), 1.0)
-
-        # Pillar 5: Discipline (10%) — Penalizes one-hit wonders
-        # best_trade_pct = 15% → full score, 85%+ → zero
-        if best_trade_pct is not None and best_trade_pct > 0:
-            discipline_score = min(max((1 - best_trade_pct / 100 - 0.15) / (0.85 - 0.15), 0), 1.0)
-        else:
-            discipline_score = 0.5  # Unknown = neutral
-
-        # Weighted sum
-        raw_score = (
-            edge_score * 0.25 +
-            skill_score * 0.20 +
-            consistency_score * 0.20 +
-            risk_score * 0.15 +
-            discipline_score * 0.10
-        ) * 100
-
-        # Confidence multiplier — stricter: 150 trades for full confidence
-        confidence = min(1.0, trade_count_all / 150)
-
-        # Decay multiplier — penalizes fading edge
-        if pf_trend is not None and pf_trend > 0:
-            decay = max(0.5, min(pf_trend, 1.0))
-        else:
-            decay = 1.0  # Unknown = no penalty
-
-        return min(round(raw_score * confidence * decay), 100)
-
     async def _fetch_trade_stats(self, address: str) -> tuple[float, float]:
         """
         Fetch sell_ratio and trades_per_market from Polymarket data API trades endpoint.
@@ -1426,15 +694,19 @@ class WalletDiscoveryProcessor:
 
     def refresh_cache(self, address: str) -> None:
         """Add an address to the known wallets cache."""
-        self._known_wallets.add(address.lower())
+        self.wallets.apply_local({"address": address})
 
     @property
     def stats(self) -> dict:
         """Get processor statistics."""
         return {
-            "known_wallets": len(self._known_wallets),
-            "pending_wallets": len(self._pending_wallets),
+            "known_wallets": len(self.wallets),
+            "pending_wallets": len(self._queue) + len(self._pending_wallets),
             "queue_size": self._queue.qsize(),
+            "queue": self._queue.stats,
+            "snapshots": self.snapshots.stats if self.snapshots else None,
+            "api_cache": self._api.cache.stats if self._api and self._api.cache else None,
+            "metrics_pool": self.metrics_pool.stats,
             "wallets_discovered": self._wallets_discovered,
             "wallets_skipped_cooldown": self._wallets_skipped_cooldown,
             "wallets_processed": self._wallets_processed,
@@ -0,0 +1,437 @@
+"""
+Shared, incrementally synced in-memory index of the wallets table.
+
+One WalletIndex serves the trade processor (known traders), wallet
+discovery (known / last analyzed) and the insider scorer (wallet age,
+win rate, profitability), refreshed by a single background loop.
+
+The full table is loaded once with keyset pagination (ORDER BY address),
+then only rows whose updated_at moved past the sync cursor are fetched
+(keyset on updated_at, address). Migration 032 keeps updated_at current.
+Writers in this process apply their rows in place.
+
+Rows live in an array-backed store: one dict maps the interned address
+to a row number, numeric and timestamp columns are array('d') (epoch
+seconds, NaN for NULL) and repeated strings are interned.
+"""
+
+import asyncio
+import logging
+import math
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+_NAN = float("nan")
+
+NUMERIC_COLUMNS = (
+    "balance",
+    "copy_score",
+    "profit_factor_30d",
+    "pnl_all",
+    "overall_pnl",
+    "win_rate_all",
+    "overall_win_rate",
+    "trade_count_all",
+    "total_trades",
+)
+TIMESTAMP_COLUMNS = ("metrics_updated_at", "account_created_at")
+TEXT_COLUMNS = ("source", "username")
+
+
+class WalletInfo(NamedTuple):
+    """Basic cached wallet fields."""
+
+    address: str
+    source: Optional[str]
+    balance: Optional[float]
+    username: Optional[str]
+
+
+class InsiderFields(NamedTuple):
+    """Wallet fields used by insider scoring."""
+
+    account_created_at: Optional[datetime]
+    trade_count: int  # trade_count_all, else total_trades
+    trade_count_all: int
+    win_rate_all: float
+
+
+class Profitability(NamedTuple):
+    """Wallet profitability summary (0 where not computed)."""
+
+    copy_score: float
+    profit_factor_30d: float
+    pnl: float
+    win_rate: float
+    trade_count: int
+
+
+def _to_float(value) -> float:
+    if value is None:
+        return _NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def _parse_timestamp(value) -> datetime:
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def _to_epoch(value) -> float:
+    if not value:
+        return _NAN
+    try:
+        return _parse_timestamp(value).timestamp()
+    except ValueError:
+        return _NAN
+
+
+class WalletIndex:
+    """
+    Full-coverage wallet cache with delta refresh and typed lookups.
+
+    Usage:
+        wallets = WalletIndex(supabase)
+        await wallets.load()                      # full keyset load
+        task = asyncio.create_task(wallets.run()) # the one refresh loop
+        wallets.get(address)                      # WalletInfo or None
+        wallets.last_analyzed(address)            # datetime or None
+        wallets.profitability(address)            # Profitability or None
+        wallets.apply_local(row)                  # after writing a wallets row
+    """
+
+    PAGE_SIZE = 1000  # PostgREST default max rows per request
+    COLUMNS = ", ".join(("address", "updated_at") + TEXT_COLUMNS + NUMERIC_COLUMNS + TIMESTAMP_COLUMNS)
+
+    REFRESH_INTERVAL_SECONDS = 60
+
+    # Re-read rows stamped up to this long before the previous sync started:
+    # a transaction that stamped updated_at earlier may commit after we read
+    CURSOR_OVERLAP_SECONDS = 120
+
+    # Deletes are invisible to delta sync; reconcile with a full load
+    FULL_RELOAD_SECONDS = 6 * 3600
+
+    # Memory budget. Over budget, wallets that carry nothing but their
+    # address (no metrics, balance below KEEP_MIN_BALANCE) are not cached.
+    MAX_MEMORY_MB = 512
+    KEEP_MIN_BALANCE = 100
+    _ROW_BYTES = 200 + 8 * (len(NUMERIC_COLUMNS) + len(TIMESTAMP_COLUMNS))  # dict entry, key, slots
+
+    def __init__(self, supabase: Client, max_memory_mb: float = MAX_MEMORY_MB):
+        """
+        Args:
+            supabase: supabase-py Client
+            max_memory_mb: Approximate memory budget for the index
+        """
+        self.supabase = supabase
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self._reset_store()
+
+        self._cursor: Optional[datetime] = None  # max updated_at seen
+        self._cursor_address = ""
+        self._synced_at: Optional[datetime] = None  # wall time the last sync/load started
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+        # Stats
+        self._full_loads = 0
+        self._delta_syncs = 0
+        self._last_delta_rows = 0
+        self._delta_rows_total = 0
+        self._local_writes = 0
+        self._skipped_over_budget = 0
+        self._last_sync_ms = 0.0
+        self._last_full_load_ms = 0.0
+        self._errors = 0
+
+    def _reset_store(self) -> None:
+        self._rows: dict[str, int] = {}
+        self._addresses: list[str] = []
+        self._text: dict[str, list[Optional[str]]] = {c: [] for c in TEXT_COLUMNS}
+        self._numeric: dict[str, array] = {c: array("d") for c in NUMERIC_COLUMNS + TIMESTAMP_COLUMNS}
+        self._text_bytes = 0
+
+    # ------------------------------------------------------------------
+    # Lookups (addresses must be lowercase)
+    # ------------------------------------------------------------------
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def is_known(self, address: str) -> bool:
+        """True if the wallet has a wallets row."""
+        return address in self._rows
+
+    def _value(self, column: str, row: int) -> Optional[float]:
+        value = self._numeric[column][row]
+        return None if math.isnan(value) else value
+
+    def get(self, address: str) -> Optional[WalletInfo]:
+        """Cached wallet, or None if unknown."""
+        row = self._rows.get(address)
+        if row is None:
+            return None
+        return WalletInfo(
+            address=self._addresses[row],
+            source=self._text["source"][row],
+            balance=self._value("balance", row),
+            username=self._text["username"][row],
+        )
+
+    def balance(self, address: str) -> Optional[float]:
+        """Cached balance, or None if unknown or NULL."""
+        row = self._rows.get(address)
+        return None if row is None else self._value("balance", row)
+
+    def last_analyzed(self, address: str) -> Optional[datetime]:
+        """When wallet metrics were last computed (metrics_updated_at)."""
+        row = self._rows.get(address)
+        if row is None:
+            return None
+        value = self._value("metrics_updated_at", row)
+        return None if value is None else datetime.fromtimestamp(value, timezone.utc)
+
+    def _trade_count(self, row: int) -> int:
+        return int(self._value("trade_count_all", row) or self._value("total_trades", row) or 0)
+
+    def insider_fields(self, address: str) -> Optional[InsiderFields]:
+        """Age / track-record fields, or None if the wallet was never analyzed."""
+        row = self._rows.get(address)
+        if row is None or not self._trade_count(row):
+            return None
+        created = self._value("account_created_at", row)
+        return InsiderFields(
+            account_created_at=None if created is None else datetime.fromtimestamp(created, timezone.utc),
+            trade_count=self._trade_count(row),
+            trade_count_all=int(self._value("trade_count_all", row) or 0),
+            win_rate_all=self._value("win_rate_all", row) or 0,
+        )
+
+    def profitability(self, address: str) -> Optional[Profitability]:
+        """Profitability summary, or None if the wallet was never analyzed."""
+        row = self._rows.get(address)
+        if row is None or not self._trade_count(row):
+            return None
+        return Profitability(
+            copy_score=self._value("copy_score", row) or 0,
+            profit_factor_30d=self._value("profit_factor_30d", row) or 0,
+            pnl=self._value("pnl_all", row) or self._value("overall_pnl", row) or 0,
+            win_rate=self._value("win_rate_all", row) or self._value("overall_win_rate", row) or 0,
+            trade_count=self._trade_count(row),
+        )
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate memory used by the index."""
+        return len(self._rows) * self._ROW_BYTES + self._text_bytes
+
+    def _worth_caching(self, row: dict) -> bool:
+        """Over budget, only wallets with metrics or a meaningful balance are added."""
+        if any(row.get(c) for c in ("trade_count_all", "total_trades", "metrics_updated_at")):
+            return True
+        balance = _to_float(row.get("balance"))
+        return not math.isnan(balance) and balance >= self.KEEP_MIN_BALANCE
+
+    def apply(self, row: dict) -> None:
+        """Insert or update one wallets row (columns missing from `row` are kept)."""
+        address = sys.intern(row["address"].lower())
+        index = self._rows.get(address)
+        if index is None:
+            if self.memory_bytes >= self.max_bytes and not self._worth_caching(row):
+                self._skipped_over_budget += 1
+                return
+            index = len(self._addresses)
+            self._rows[address] = index
+            self._addresses.append(address)
+            for values in self._text.values():
+                values.append(None)
+            for values in self._numeric.values():
+                values.append(_NAN)
+
+        for column in TEXT_COLUMNS:
+            if column in row:
+                old = self._text[column][index]
+                new = sys.intern(row[column]) if row[column] else None
+                self._text[column][index] = new
+                self._text_bytes += len(new or "") - len(old or "")
+        for column in NUMERIC_COLUMNS:
+            if column in row:
+                self._numeric[column][index] = _to_float(row[column])
+        for column in TIMESTAMP_COLUMNS:
+            if column in row:
+                self._numeric[column][index] = _to_epoch(row[column])
+
+        updated_at = row.get("updated_at")
+        if updated_at:
+            timestamp = _parse_timestamp(updated_at)
+            raw_address = row["address"]  # keyset compares the stored value
+            if self._cursor is None or (timestamp, raw_address) > (self._cursor, self._cursor_address):
+                self._cursor, self._cursor_address = timestamp, raw_address
+
+    def apply_local(self, row: dict) -> None:
+        """Apply a row this process just wrote (visible before the next sync)."""
+        self.apply({k: v for k, v in row.items() if k != "updated_at"})  # cursor follows the DB
+        self._local_writes += 1
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def _fetch_page(self, after_address: str) -> list[dict]:
+        query = self.supabase.table("wallets").select(self.COLUMNS).order("address").limit(self.PAGE_SIZE)
+        if after_address:
+            query = query.gt("address", after_address)
+        return query.execute().data or []
+
+    def _fetch_delta_page(self, since: datetime, after: Optional[tuple[str, str]]) -> list[dict]:
+        query = (
+            self.supabase.table("wallets")
+            .select(self.COLUMNS)
+            .gte("updated_at", since.isoformat())
+            .order("updated_at")
+            .order("address")
+            .limit(self.PAGE_SIZE)
+        )
+        if after:
+            updated_at, address = after
+            query = query.or_(
+                f'updated_at.gt."{updated_at}",'
+                f'and(updated_at.eq."{updated_at}",address.gt."{address}")'
+            )
+        return query.execute().data or []
+
+    async def load(self) -> None:
+        """Full load of the wallets table (replaces the index when complete)."""
+        async with self._lock:
+            started = time.monotonic()
+            synced_at = datetime.now(timezone.utc)
+
+            # Build aside and swap, so lookups never see a partial index
+            fresh = WalletIndex(self.supabase, max_memory_mb=self.max_bytes / (1024 * 1024))
+            after = ""
+            while True:
+                page = await asyncio.to_thread(self._fetch_page, after)
+                for row in page:
+                    fresh.apply(row)
+                if len(page) < self.PAGE_SIZE:
+                    break
+                after = page[-1]["address"]
+
+            self._rows, self._addresses = fresh._rows, fresh._addresses
+            self._text, self._numeric, self._text_bytes = fresh._text, fresh._numeric, fresh._text_bytes
+            self._cursor, self._cursor_address = fresh._cursor, fresh._cursor_address
+            self._skipped_over_budget += fresh._skipped_over_budget
+            self._synced_at = synced_at
+            self._loaded_at = time.monotonic()
+            self._full_loads += 1
+            self._last_full_load_ms = (self._loaded_at - started) * 1000
+            logger.info(
+                f"Wallet index loaded: {len(self._rows):,} wallets "
+                f"(~{self.memory_bytes / (1024 * 1024):.0f}MB) in {self._last_full_load_ms:.0f}ms"
+            )
+            if fresh._skipped_over_budget:
+                logger.warning(
+                    f"Wallet index over {self.max_bytes // (1024 * 1024)}MB budget: "
+                    f"{fresh._skipped_over_budget:,} address-only wallets not cached"
+                )
+
+    async def sync(self) -> int:
+        """
+        Fetch and apply rows changed since the cursor.
+
+        Returns:
+            Number of rows applied
+        """
+        if self._cursor is None:
+            await self.load()
+            return len(self._rows)
+
+        async with self._lock:
+            started = time.monotonic()
+            synced_at = datetime.now(timezone.utc)
+            horizon = self._synced_at - timedelta(seconds=self.CURSOR_OVERLAP_SECONDS)
+            after: Optional[tuple[str, str]] = None
+            if self._cursor < horizon:
+                # Everything up to the cursor was committed and read: resume after it
+                since = self._cursor
+                after = (self._cursor.isoformat(), self._cursor_address)
+            else:
+                since = horizon
+            applied = 0
+            while True:
+                page = await asyncio.to_thread(self._fetch_delta_page, since, after)
+                for row in page:
+                    self.apply(row)
+                applied += len(page)
+                if len(page) < self.PAGE_SIZE:
+                    break
+                after = (page[-1]["updated_at"], page[-1]["address"])
+
+            self._synced_at = synced_at
+            self._delta_syncs += 1
+            self._last_delta_rows = applied
+            self._delta_rows_total += applied
+            self._last_sync_ms = (time.monotonic() - started) * 1000
+            return applied
+
+    async def refresh(self) -> None:
+        """Deltas, or a full reload when one is due."""
+        try:
+            if not self._loaded_at or time.monotonic() - self._loaded_at >= self.FULL_RELOAD_SECONDS:
+                await self.load()
+            else:
+                await self.sync()
+        except Exception as e:
+            logger.error(f"Wallet index refresh failed: {e}")
+            self._errors += 1
+
+    async def run(self) -> None:
+        """Background refresh loop (one per process)."""
+        logger.info("Starting wallet index refresh loop")
+        while True:
+            try:
+                await asyncio.sleep(self.REFRESH_INTERVAL_SECONDS)
+                await self.refresh()
+                logger.debug(
+                    f"Wallet index refreshed: {len(self._rows):,} wallets "
+                    f"({self._last_delta_rows} changed)"
+                )
+            except asyncio.CancelledError:
+                logger.info("Wallet index refresh loop stopped")
+                break
+
+    @property
+    def stats(self) -> dict:
+        """Get index statistics."""
+        return {
+            "wallets": len(self._rows),
+            "memory_mb": round(self.memory_bytes / (1024 * 1024), 1),
+            "max_memory_mb": round(self.max_bytes / (1024 * 1024)),
+            "skipped_over_budget": self._skipped_over_budget,
+            "full_loads": self._full_loads,
+            "delta_syncs": self._delta_syncs,
+            "last_delta_rows": self._last_delta_rows,
+            "delta_rows_total": self._delta_rows_total,
+            "local_writes": self._local_writes,
+            "last_sync_ms": round(self._last_sync_ms, 1),
+            "last_full_load_ms": round(self._last_full_load_ms, 1),
+            "cursor": self._cursor.isoformat() if self._cursor else None,
+            "errors": self._errors,
+        }
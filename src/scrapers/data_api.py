@@ -1,15 +1,17 @@
 """Polymarket Data API client with per-endpoint rate limiting."""
 
 import asyncio
+import json
 import logging
 import time
-from typing import Optional
+from typing import Callable, Optional
 from datetime import datetime
 
 import aiohttp
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..config.settings import get_settings
+from .response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -39,8 +41,23 @@ ENDPOINT_BATCH_SIZES = {
     "positions": 3,         # 3 parallel at 6 req/s
     "closed-positions": 3,  # 3 parallel at 6 req/s
     "activity": 8,          # 8 parallel at 40 req/s
+    "trades": 4,            # 4 parallel at 8 req/s
 }
 
+# Response cache TTLs in seconds (with a cache configured). Endpoints not
+# listed are never cached: /trades feeds gap backfill and must be live.
+ENDPOINT_CACHE_TTLS = {
+    "value": 300,
+    "positions": 600,
+    "closed-positions": 3600,
+    "activity": 600,
+    "public-profile": 86400,
+}
+
+# Global /trades pagination (data-api caps limit and offset)
+TRADES_PAGE_SIZE = 500
+TRADES_MAX_OFFSET = 10000
+
 
 class EndpointRateLimiter:
     """Per-endpoint rate limiter using token bucket algorithm."""
@@ -74,11 +91,29 @@ class EndpointRateLimiter:
 class PolymarketDataAPI:
     """Client for Polymarket Data API with per-endpoint rate limiting."""
 
-    def __init__(self):
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """
+        Args:
+            cache: Optional response cache; by default one is opened if
+                api.polymarket.cache_path (POLYMARKET_API_CACHE) is set
+        """
         self.settings = get_settings()
-        self.base_url = self.settings.api.polymarket.base_url
+        api_config = self.settings.api.polymarket
+        self.base_url = api_config.base_url
         self._session: Optional[aiohttp.ClientSession] = None
 
+        self.cache = cache
+        if self.cache is None and api_config.cache_path:
+            try:
+                self.cache = ResponseCache(
+                    api_config.cache_path,
+                    ttls=ENDPOINT_CACHE_TTLS,
+                    max_mb=api_config.cache_max_mb,
+                    read_only=api_config.cache_read_only,
+                )
+            except Exception as e:
+                logger.warning(f"Response cache disabled: {e}")
+
         # Per-endpoint rate limiters
         self._rate_limiters: dict[str, EndpointRateLimiter] = {}
         for endpoint, rate in ENDPOINT_RATE_LIMITS.items():
@@ -99,6 +134,8 @@ class PolymarketDataAPI:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self._session:
             await self._session.close()
+        if self.cache:
+            self.cache.close()
 
     async def _ensure_session(self):
         """Ensure we have an active session."""
@@ -118,15 +155,29 @@ class PolymarketDataAPI:
         wait=wait_exponential(multiplier=1, min=2, max=30)
     )
     async def _get(self, endpoint: str, params: Optional[dict] = None) -> dict | list:
-        """Make a GET request to the API with rate limiting."""
+        """Make a GET request to the API with rate limiting (cached if configured)."""
+        url = f"{self.base_url}/{endpoint}"
+        return await self._get_url(endpoint, url, params, self._get_rate_limiter(endpoint))
+
+    async def _get_url(
+        self,
+        endpoint: str,
+        url: str,
+        params: Optional[dict],
+        limiter: EndpointRateLimiter,
+    ) -> dict | list:
+        """GET a URL through the response cache and the given rate limiter."""
+        cacheable = self.cache is not None and self.cache.cacheable(endpoint)
+        if cacheable:
+            cached = await asyncio.to_thread(self.cache.get, endpoint, params)
+            if cached is not None:
+                return cached
+
         await self._ensure_session()
 
         # Apply per-endpoint rate limiting
-        limiter = self._get_rate_limiter(endpoint)
         await limiter.acquire()
 
-        url = f"{self.base_url}/{endpoint}"
-
         async with self._session.get(url, params=params) as response:
             if response.status == 404:
                 return []
@@ -141,7 +192,13 @@ class PolymarketDataAPI:
                 logger.error(f"API error on {endpoint}: {response.status}")
                 raise Exception(f"API error: {response.status}")
 
-            return await response.json()
+            if not cacheable:
+                return await response.json()
+            body = await response.read()
+
+        result = json.loads(body)
+        await asyncio.to_thread(self.cache.put, endpoint, params, body)
+        return result
 
     async def _fetch_page(self, endpoint: str, params: dict) -> tuple[list, bool]:
         """
@@ -224,17 +281,14 @@ class PolymarketDataAPI:
     async def get_profile(self, address: str) -> dict:
         """Get a trader's public profile from Gamma API."""
         try:
-            await self._ensure_session()
             # Gamma API has its own rate limits, use default limiter
-            await self._default_limiter.acquire()
-
-            url = f"https://gamma-api.polymarket.com/public-profile"
-            async with self._session.get(url, params={"address": address}) as response:
-                if response.status == 404:
-                    return {}
-                if response.status != 200:
-                    return {}
-                return await response.json()
+            result = await self._get_url(
+                "public-profile",
+                "https://gamma-api.polymarket.com/public-profile",
+                {"address": address},
+                self._default_limiter,
+            )
+            return result if isinstance(result, dict) else {}
         except Exception as e:
             logger.error(f"Error getting profile for {address}: {e}")
             return {}
@@ -337,6 +391,54 @@ class PolymarketDataAPI:
             logger.error(f"Error getting closed positions for {address}: {e}")
             return []
 
+    async def get_closed_positions_since(
+        self,
+        address: str,
+        is_known: Optional[Callable[[dict], bool]] = None,
+    ) -> tuple[list[dict], bool]:
+        """
+        Get a trader's closed positions newer than the ones already held.
+
+        Pages are walked newest-first (TIMESTAMP DESC) and the walk stops at
+        the first record ``is_known`` accepts; without it the whole history
+        is fetched. The first page is fetched alone (most deltas fit in it),
+        later ones in rate-limited parallel batches.
+
+        Returns:
+            (records, complete) - complete is False if a page failed, in
+            which case records is a prefix of the delta
+        """
+        lock = self._endpoint_locks["closed-positions"]
+        base_params = {"user": address, "sortBy": "TIMESTAMP", "sortDirection": "DESC"}
+        records: list[dict] = []
+        offset = 0
+        batch_size = 1
+
+        async with lock:
+            while offset < 50000:
+                results = await asyncio.gather(*(
+                    self._fetch_page(
+                        "closed-positions",
+                        {**base_params, "limit": PAGE_SIZE, "offset": offset + i * PAGE_SIZE},
+                    )
+                    for i in range(batch_size)
+                ))
+                for data, ok in results:
+                    if not ok:
+                        return records, False
+                    if not data:
+                        return records, True
+                    for record in data:
+                        if is_known and is_known(record):
+                            return records, True
+                        records.append(record)
+
+                offset += batch_size * PAGE_SIZE
+                batch_size = self._get_batch_size("closed-positions")
+
+        logger.warning(f"Hit safety limit for closed-positions of {address}")
+        return records, True
+
     async def get_activity(self, address: str) -> list[dict]:
         """Get a trader's activity history with full pagination."""
         try:
@@ -356,6 +458,65 @@ class PolymarketDataAPI:
             logger.error(f"Error getting trades for {address}: {e}")
             return []
 
+    async def get_recent_trades(
+        self,
+        since: float,
+        until: Optional[float] = None,
+        min_usd: float = 0,
+    ) -> tuple[list[dict], bool]:
+        """
+        Get all markets' trades executed in [since, until] (epoch seconds).
+
+        /trades is newest-first with no time filter, so pages are fetched in
+        rate-limited parallel batches until a page reaches past ``since``.
+
+        Returns:
+            (trades, complete) - complete is False if the offset cap or a
+            failed page cut the window short
+        """
+        base_params = {"limit": TRADES_PAGE_SIZE}
+        if min_usd > 0:
+            base_params.update({"filterType": "CASH", "filterAmount": min_usd})
+
+        trades = []
+        complete = True
+        offset = 0
+        batch_size = self._get_batch_size("trades")
+
+        while True:
+            batch_tasks = []
+            for i in range(batch_size):
+                page_offset = offset + i * TRADES_PAGE_SIZE
+                if page_offset > TRADES_MAX_OFFSET:
+                    break
+                batch_tasks.append(
+                    self._fetch_page("trades", {**base_params, "offset": page_offset})
+                )
+            if not batch_tasks:
+                logger.warning(f"Hit offset limit for trades since {since}")
+                return trades, False
+
+            results = await asyncio.gather(*batch_tasks)
+
+            reached_end = False
+            for data, ok in results:
+                if not ok:
+                    complete = False
+                    continue
+                for trade in data:
+                    ts = trade.get("timestamp") or 0
+                    if ts < since:
+                        reached_end = True
+                    elif until is None or ts <= until:
+                        trades.append(trade)
+                if len(data) < TRADES_PAGE_SIZE:
+                    reached_end = True
+
+            if reached_end:
+                return trades, complete
+
+            offset += batch_size * TRADES_PAGE_SIZE
+
     # =========================================================================
     # Batch Operations
     # =========================================================================
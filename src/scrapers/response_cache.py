@@ -0,0 +1,209 @@
+"""
+Persistent on-disk cache of Polymarket Data API responses.
+
+The same wallet's value, profile and position pages are fetched again by
+discovery, scripts/verify_wallet_metrics.py and ad-hoc runs. ResponseCache
+keeps raw JSON bodies in an embedded SQLite database keyed by endpoint and
+params, so any process pointed at the same file reuses them:
+
+- per-endpoint TTLs; endpoints without a TTL are never cached
+- size-bounded: beyond max_bytes the least recently used entries are evicted
+- read-only mode for offline replays: entries are served whatever their age
+  and nothing is written or evicted
+
+SQLite calls are blocking; the async client runs them in a worker thread.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def cache_key(endpoint: str, params: Optional[dict]) -> str:
+    """Stable key for a request: endpoint plus params in sorted order."""
+    if not params:
+        return endpoint
+    return f"{endpoint}?{urlencode(sorted((k, str(v)) for k, v in params.items()))}"
+
+
+class ResponseCache:
+    """
+    SQLite-backed LRU cache of API response bodies.
+
+    Usage:
+        cache = ResponseCache("data/api_cache.sqlite", ttls={"value": 300})
+        body = cache.get("value", {"user": addr})      # None on miss / expired
+        cache.put("value", {"user": addr}, raw_bytes)
+    """
+
+    MAX_MB = 256
+    EVICT_TO_FRACTION = 0.9  # evict down to this share of max_bytes
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttls: dict[str, float],
+        max_mb: float = MAX_MB,
+        read_only: bool = False,
+    ):
+        """
+        Args:
+            path: SQLite database file (created if missing, unless read-only)
+            ttls: Seconds each endpoint's responses stay fresh; endpoints
+                missing from it are not cached
+            max_mb: Size budget for stored bodies
+            read_only: Serve cached entries regardless of age, never write
+        """
+        self.path = Path(path)
+        self.ttls = ttls
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.read_only = read_only
+        self._lock = threading.Lock()
+
+        if read_only:
+            self._conn = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._entries, self._bytes = row
+
+        # Stats
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._stored = 0
+        self._evicted = 0
+        self._bytes_saved = 0
+        self._errors = 0
+
+    def cacheable(self, endpoint: str) -> bool:
+        """True if responses of this endpoint are cached."""
+        return endpoint in self.ttls
+
+    def get(self, endpoint: str, params: Optional[dict] = None) -> Optional[Any]:
+        """Return the decoded cached response, or None on a miss or expired entry."""
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT body, stored_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self._misses += 1
+                    return None
+                body, stored_at = row
+                if not self.read_only:
+                    if now - stored_at > self.ttls.get(endpoint, 0):
+                        self._expired += 1
+                        self._misses += 1
+                        return None
+                    self._conn.execute(
+                        "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                logger.debug(f"Response cache read failed for {key}: {e}")
+                self._errors += 1
+                return None
+
+        self._hits += 1
+        self._bytes_saved += len(body)
+        return json.loads(body)
+
+    def put(self, endpoint: str, params: Optional[dict], body: bytes) -> None:
+        """Store a raw response body, evicting least recently used entries if over budget."""
+        if self.read_only or not self.cacheable(endpoint) or len(body) > self.max_bytes:
+            return
+        key = cache_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            try:
+                old = self._conn.execute(
+                    "SELECT size FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, endpoint, body, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, endpoint, body, len(body), now, now),
+                )
+                if old:
+                    self._bytes -= old[0]
+                else:
+                    self._entries += 1
+                self._bytes += len(body)
+                self._stored += 1
+                if self._bytes > self.max_bytes:
+                    self._evict()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.debug(f"Response cache write failed for {key}: {e}")
+                self._errors += 1
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under EVICT_TO_FRACTION of the budget."""
+        target = self.max_bytes * self.EVICT_TO_FRACTION
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        )
+        victims = []
+        freed = 0
+        for key, size in rows:
+            if self._bytes - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self._bytes -= freed
+        self._entries -= len(victims)
+        self._evicted += len(victims)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+    @property
+    def stats(self) -> dict:
+        """Get cache statistics."""
+        lookups = self._hits + self._misses
+        return {
+            "entries": self._entries,
+            "size_mb": round(self._bytes / (1024 * 1024), 1),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 1),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate_pct": round(self._hits / lookups * 100, 1) if lookups else 0,
+            "expired": self._expired,
+            "stored": self._stored,
+            "evicted": self._evicted,
+            "mb_saved": round(self._bytes_saved / (1024 * 1024), 1),
+            "errors": self._errors,
+            "read_only": self.read_only,
+        }
@@ -0,0 +1,22 @@
+-- Migration 032: Keep wallets.updated_at current for incremental cache sync
+-- The trade monitor's wallet index loads the table once, then only fetches rows
+-- with updated_at past its cursor. Writers upsert without setting updated_at,
+-- so a trigger stamps every insert/update.
+
+CREATE OR REPLACE FUNCTION wallets_touch_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at := NOW();
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_wallets_touch_updated_at ON wallets;
+CREATE TRIGGER trg_wallets_touch_updated_at
+  BEFORE INSERT OR UPDATE ON wallets
+  FOR EACH ROW EXECUTE FUNCTION wallets_touch_updated_at();
+
+-- Keyset pagination for delta sync: ORDER BY updated_at, address
+CREATE INDEX IF NOT EXISTS idx_wallets_updated_at_address ON wallets(updated_at, address);
@@ -0,0 +1,319 @@
+-- ============================================================================
+-- MIGRATION 033: Time-partitioned live_trades and insider_alerts
+-- ============================================================================
+-- Retention used to DELETE ... WHERE received_at < cutoff through the REST
+-- client (returning every deleted row). Both tables are now range-partitioned
+-- by executed_at and expired partitions are detached and dropped whole by the
+-- trade monitor's retention manager (src/realtime/retention.py).
+--
+-- live_trades is first split by retention_tier:
+--   regular   - non-whale, non-insider trades, 6-hour partitions, kept 1 day
+--   important - whale / insider suspect trades, daily partitions, kept 7 days
+-- insider_alerts has daily partitions, kept 30 days.
+--
+-- Unique keys on a partitioned table must contain the partition key, so the
+-- upsert targets become (trade_id, retention_tier, executed_at) for
+-- live_trades and (trade_id, executed_at) for insider_alerts.
+--   executed_at is the exchange execution time; trades without one are
+--   dropped by the RTDS client, so a re-delivered trade has the same value.
+--   retention_tier can rise when a trade is re-delivered with a larger
+--   merged value or a higher insider score. The trade writers keep one row
+--   per trade in its highest tier: an important record replaces the regular
+--   row, and a later regular record updates the important one
+--   (TradeWriter, src/realtime/trade_writer.py).
+-- Rows outside any partition land in the per-table DEFAULT partition.
+
+
+-- ============================================================================
+-- SECTION 1: PARTITION MAINTENANCE FUNCTIONS
+-- ============================================================================
+
+-- Create missing range partitions <parent>_pYYYYMMDDHH covering [p_from, p_to),
+-- aligned to p_step within the UTC day. Rows already sitting in the DEFAULT
+-- partition for a new range are moved into it.
+CREATE OR REPLACE FUNCTION ensure_time_partitions(
+    p_parent TEXT,
+    p_column TEXT,
+    p_step INTERVAL,
+    p_from TIMESTAMPTZ,
+    p_to TIMESTAMPTZ
+) RETURNS INT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_day TIMESTAMPTZ := date_trunc('day', p_from AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+    v_start TIMESTAMPTZ;
+    v_name TEXT;
+    v_default TEXT := p_parent || '_default';
+    v_created INT := 0;
+BEGIN
+    v_start := v_day + p_step * floor(
+        extract(epoch FROM p_from - v_day) / extract(epoch FROM p_step)
+    );
+
+    WHILE v_start < p_to LOOP
+        v_name := p_parent || '_p' || to_char(v_start AT TIME ZONE 'UTC', 'YYYYMMDDHH24');
+        IF to_regclass(v_name) IS NULL THEN
+            IF to_regclass(v_default) IS NOT NULL THEN
+                EXECUTE format('CREATE TEMP TABLE _partition_move (LIKE %I) ON COMMIT DROP', p_parent);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) '
+                    'INSERT INTO _partition_move SELECT * FROM moved',
+                    v_default, p_column, v_start, p_column, v_start + p_step
+                );
+            END IF;
+
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                v_name, p_parent, v_start, v_start + p_step
+            );
+
+            IF to_regclass(v_default) IS NOT NULL THEN
+                EXECUTE format('INSERT INTO %I SELECT * FROM _partition_move', v_name);
+                DROP TABLE _partition_move;
+            END IF;
+            v_created := v_created + 1;
+        END IF;
+        v_start := v_start + p_step;
+    END LOOP;
+
+    RETURN v_created;
+END;
+$$;
+
+-- Detach and drop range partitions of p_parent whose upper bound is at or
+-- before p_before, then purge expired rows from its DEFAULT partition.
+-- Returns one row per partition dropped (approx_rows from planner stats) and
+-- one for the DEFAULT partition purge (exact count).
+CREATE OR REPLACE FUNCTION drop_expired_partitions(
+    p_parent TEXT,
+    p_column TEXT,
+    p_before TIMESTAMPTZ
+) RETURNS TABLE (partition_name TEXT, approx_rows BIGINT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    r RECORD;
+    v_default TEXT := p_parent || '_default';
+    v_deleted BIGINT;
+BEGIN
+    FOR r IN
+        SELECT c.relname, c.reltuples,
+               substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([^'']+)''\)')::timestamptz AS upper_bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = p_parent::regclass
+          AND pg_get_expr(c.relpartbound, c.oid) <> 'DEFAULT'
+        ORDER BY 3
+    LOOP
+        EXIT WHEN r.upper_bound > p_before;
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', p_parent, r.relname);
+        EXECUTE format('DROP TABLE %I', r.relname);
+        partition_name := r.relname;
+        approx_rows := GREATEST(r.reltuples, 0)::BIGINT;
+        RETURN NEXT;
+    END LOOP;
+
+    IF to_regclass(v_default) IS NOT NULL THEN
+        EXECUTE format('DELETE FROM %I WHERE %I < %L', v_default, p_column, p_before);
+        GET DIAGNOSTICS v_deleted = ROW_COUNT;
+        IF v_deleted > 0 THEN
+            partition_name := v_default;
+            approx_rows := v_deleted;
+            RETURN NEXT;
+        END IF;
+    END IF;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION ensure_time_partitions(TEXT, TEXT, INTERVAL, TIMESTAMPTZ, TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION drop_expired_partitions(TEXT, TEXT, TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ensure_time_partitions(TEXT, TEXT, INTERVAL, TIMESTAMPTZ, TIMESTAMPTZ) TO service_role;
+GRANT EXECUTE ON FUNCTION drop_expired_partitions(TEXT, TEXT, TIMESTAMPTZ) TO service_role;
+
+
+-- ============================================================================
+-- SECTION 2: LIVE_TRADES
+-- ============================================================================
+
+ALTER TABLE live_trades ADD COLUMN IF NOT EXISTS retention_tier TEXT NOT NULL DEFAULT 'regular';
+
+ALTER TABLE live_trades RENAME TO live_trades_legacy;
+ALTER SEQUENCE live_trades_id_seq OWNED BY NONE;
+
+CREATE TABLE live_trades (LIKE live_trades_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+    PARTITION BY LIST (retention_tier);
+ALTER TABLE live_trades ADD CONSTRAINT live_trades_retention_tier_check
+    CHECK (retention_tier IN ('regular', 'important'));
+ALTER SEQUENCE live_trades_id_seq OWNED BY live_trades.id;
+
+CREATE TABLE live_trades_regular PARTITION OF live_trades
+    FOR VALUES IN ('regular') PARTITION BY RANGE (executed_at);
+CREATE TABLE live_trades_important PARTITION OF live_trades
+    FOR VALUES IN ('important') PARTITION BY RANGE (executed_at);
+CREATE TABLE live_trades_regular_default PARTITION OF live_trades_regular DEFAULT;
+CREATE TABLE live_trades_important_default PARTITION OF live_trades_important DEFAULT;
+
+SELECT ensure_time_partitions('live_trades_regular', 'executed_at', INTERVAL '6 hours',
+                              NOW() - INTERVAL '1 day', NOW() + INTERVAL '2 days');
+SELECT ensure_time_partitions('live_trades_important', 'executed_at', INTERVAL '1 day',
+                              NOW() - INTERVAL '7 days', NOW() + INTERVAL '2 days');
+
+-- Carry over trades still inside their retention window
+UPDATE live_trades_legacy SET retention_tier = 'important'
+WHERE (COALESCE(is_whale, FALSE) OR COALESCE(is_insider_suspect, FALSE))
+  AND executed_at >= NOW() - INTERVAL '7 days';
+
+INSERT INTO live_trades
+SELECT * FROM live_trades_legacy
+WHERE (retention_tier = 'important' AND executed_at >= NOW() - INTERVAL '7 days')
+   OR (retention_tier = 'regular' AND executed_at >= NOW() - INTERVAL '1 day');
+
+-- Views over the old table are dropped with it and recreated in SECTION 4
+DROP TABLE live_trades_legacy CASCADE;
+
+ALTER TABLE live_trades ADD PRIMARY KEY (id, retention_tier, executed_at);
+
+-- Upsert target (TradeWriter.CONFLICT_COLUMNS); one row per trade_id is
+-- kept by the writers moving a trade between tiers (see header)
+CREATE UNIQUE INDEX idx_live_trades_trade_id ON live_trades(trade_id, retention_tier, executed_at);
+
+-- Insider scorer polls by id
+CREATE INDEX idx_live_trades_id ON live_trades(id);
+
+CREATE INDEX idx_live_trades_trader ON live_trades(trader_address, created_at DESC);
+CREATE INDEX idx_live_trades_recent ON live_trades(received_at DESC);
+CREATE INDEX idx_live_trades_whales ON live_trades(usd_value DESC, received_at DESC)
+    WHERE is_whale = TRUE;
+CREATE INDEX idx_live_trades_watchlist ON live_trades(received_at DESC)
+    WHERE is_watchlist = TRUE;
+CREATE INDEX idx_live_trades_market ON live_trades(condition_id, received_at DESC);
+CREATE INDEX idx_live_trades_category ON live_trades(category, received_at DESC);
+CREATE INDEX idx_live_trades_insider ON live_trades(trader_insider_score DESC)
+    WHERE is_insider_suspect = TRUE;
+
+
+-- ============================================================================
+-- SECTION 3: INSIDER_ALERTS
+-- ============================================================================
+
+ALTER TABLE insider_alerts RENAME TO insider_alerts_legacy;
+
+CREATE TABLE insider_alerts (LIKE insider_alerts_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+    PARTITION BY RANGE (executed_at);
+ALTER TABLE insider_alerts ALTER COLUMN executed_at SET NOT NULL;
+CREATE TABLE insider_alerts_default PARTITION OF insider_alerts DEFAULT;
+
+-- Move ownership of the id sequence (if any) before the old table is dropped
+DO $$
+DECLARE
+    v_seq TEXT := pg_get_serial_sequence('insider_alerts_legacy', 'id');
+BEGIN
+    IF v_seq IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY insider_alerts.id', v_seq);
+    END IF;
+END $$;
+
+SELECT ensure_time_partitions('insider_alerts', 'executed_at', INTERVAL '1 day',
+                              NOW() - INTERVAL '30 days', NOW() + INTERVAL '2 days');
+
+INSERT INTO insider_alerts
+SELECT * FROM insider_alerts_legacy
+WHERE executed_at >= NOW() - INTERVAL '30 days';
+
+DROP TABLE insider_alerts_legacy CASCADE;
+
+ALTER TABLE insider_alerts ADD PRIMARY KEY (id, executed_at);
+
+-- Upsert target (InsiderScorer._write_alert)
+CREATE UNIQUE INDEX idx_insider_alerts_trade_id ON insider_alerts(trade_id, executed_at);
+CREATE INDEX idx_insider_alerts_created ON insider_alerts(created_at DESC);
+
+
+-- ============================================================================
+-- SECTION 4: VIEWS AND REALTIME
+-- ============================================================================
+
+CREATE OR REPLACE VIEW v_recent_whales AS
+SELECT
+    id,
+    trade_id,
+    trader_address,
+    trader_username,
+    is_known_trader,
+    trader_classification,
+    trader_copytrade_score,
+    market_slug,
+    side,
+    outcome,
+    usd_value,
+    executed_at,
+    processing_latency_ms
+FROM live_trades
+WHERE is_whale = TRUE
+ORDER BY received_at DESC
+LIMIT 100;
+
+CREATE OR REPLACE VIEW v_watchlist_activity AS
+SELECT
+    t.id,
+    t.trade_id,
+    t.trader_address,
+    t.trader_username,
+    t.market_slug,
+    t.side,
+    t.outcome,
+    t.usd_value,
+    t.executed_at,
+    w.list_type,
+    w.notes as watchlist_notes
+FROM live_trades t
+JOIN watchlist w ON t.trader_address = w.address
+WHERE t.is_watchlist = TRUE
+ORDER BY t.received_at DESC
+LIMIT 100;
+
+CREATE OR REPLACE VIEW v_trade_volume_24h AS
+SELECT
+    COUNT(*) as total_trades,
+    SUM(usd_value) as total_volume,
+    COUNT(DISTINCT trader_address) as unique_traders,
+    COUNT(DISTINCT condition_id) as unique_markets,
+    AVG(usd_value) as avg_trade_size,
+    MAX(usd_value) as largest_trade,
+    COUNT(*) FILTER (WHERE is_whale) as whale_trades,
+    SUM(usd_value) FILTER (WHERE is_whale) as whale_volume,
+    AVG(processing_latency_ms) as avg_latency_ms
+FROM live_trades
+WHERE received_at >= NOW() - INTERVAL '24 hours';
+
+CREATE OR REPLACE VIEW v_insider_trades AS
+SELECT
+    lt.trade_id,
+    lt.trader_address,
+    lt.trader_username,
+    lt.trader_insider_score,
+    lt.trader_insider_level,
+    lt.trader_red_flags,
+    lt.market_slug,
+    lt.event_slug,
+    lt.side,
+    lt.outcome,
+    lt.usd_value,
+    lt.price,
+    lt.executed_at,
+    lt.received_at,
+    lt.is_whale
+FROM live_trades lt
+WHERE lt.is_insider_suspect = TRUE
+ORDER BY lt.received_at DESC;
+
+-- Realtime INSERT events for partitioned tables are published under the root
+-- table name, so dashboard subscriptions on live_trades / insider_alerts keep working
+ALTER PUBLICATION supabase_realtime SET (publish_via_partition_root = true);
+ALTER PUBLICATION supabase_realtime ADD TABLE live_trades;
+ALTER PUBLICATION supabase_realtime ADD TABLE insider_alerts;
@@ -0,0 +1,31 @@
+-- Migration 034: List expired partitions before they are dropped
+-- The retention manager archives each expiring live_trades partition to
+-- Parquet first, so it needs the partitions (and their bounds) that
+-- drop_expired_partitions(p_parent, p_column, p_before) is about to drop.
+
+CREATE OR REPLACE FUNCTION list_expired_partitions(
+    p_parent TEXT,
+    p_before TIMESTAMPTZ
+) RETURNS TABLE (partition_name TEXT, lower_bound TIMESTAMPTZ, upper_bound TIMESTAMPTZ, approx_rows BIGINT)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT relname, lower_bound, upper_bound, approx_rows
+    FROM (
+        SELECT c.relname,
+               substring(pg_get_expr(c.relpartbound, c.oid) FROM 'FROM \(''([^'']+)''\)')::timestamptz AS lower_bound,
+               substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([^'']+)''\)')::timestamptz AS upper_bound,
+               GREATEST(c.reltuples, 0)::BIGINT AS approx_rows
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = p_parent::regclass
+          AND pg_get_expr(c.relpartbound, c.oid) <> 'DEFAULT'
+    ) p
+    WHERE upper_bound <= p_before
+    ORDER BY lower_bound;
+$$;
+
+REVOKE EXECUTE ON FUNCTION list_expired_partitions(TEXT, TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION list_expired_partitions(TEXT, TIMESTAMPTZ) TO service_role;
@@ -0,0 +1,27 @@
+-- Migration 035: Fill count for aggregated trades
+-- The realtime service merges fills of one order (same transaction, trader,
+-- market, asset and side) into a single live_trades row; fill_count records
+-- how many RTDS fills the row stands for (1 = not aggregated).
+
+ALTER TABLE live_trades ADD COLUMN IF NOT EXISTS fill_count INTEGER NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE VIEW v_recent_whales AS
+SELECT
+    id,
+    trade_id,
+    trader_address,
+    trader_username,
+    is_known_trader,
+    trader_classification,
+    trader_copytrade_score,
+    market_slug,
+    side,
+    outcome,
+    usd_value,
+    executed_at,
+    processing_latency_ms,
+    fill_count
+FROM live_trades
+WHERE is_whale = TRUE
+ORDER BY received_at DESC
+LIMIT 100;
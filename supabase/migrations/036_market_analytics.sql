@@ -0,0 +1,32 @@
+-- Migration 036: Rolling per-market analytics snapshots
+-- The realtime service keeps 1m/5m/1h/24h rolling windows per market in
+-- memory and upserts one row per (market, window) every minute. Rows for
+-- windows with no trades left are deleted by the same snapshot.
+
+CREATE TABLE IF NOT EXISTS market_analytics (
+    condition_id TEXT NOT NULL,
+    window_label TEXT NOT NULL CHECK (window_label IN ('1m', '5m', '1h', '24h')),
+    trades INTEGER NOT NULL,
+    volume DECIMAL(18,2) NOT NULL,              -- USD
+    buy_volume DECIMAL(18,2) NOT NULL,
+    sell_volume DECIMAL(18,2) NOT NULL,
+    vwap DECIMAL(10,6) NOT NULL,                -- volume-weighted average price
+    imbalance DECIMAL(6,4) NOT NULL,            -- (buy - sell) / (buy + sell)
+    unique_traders INTEGER NOT NULL,            -- HyperLogLog estimate (~3%)
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (condition_id, window_label)
+);
+
+CREATE INDEX IF NOT EXISTS idx_market_analytics_window_volume
+    ON market_analytics(window_label, volume DESC);
+CREATE INDEX IF NOT EXISTS idx_market_analytics_updated_at
+    ON market_analytics(updated_at);
+
+-- Row Level Security
+ALTER TABLE market_analytics ENABLE ROW LEVEL SECURITY;
+
+-- Allow public read access
+CREATE POLICY "Allow public read on market_analytics" ON market_analytics FOR SELECT USING (true);
+
+-- Allow service role full access
+CREATE POLICY "Allow service role full access on market_analytics" ON market_analytics FOR ALL USING (auth.role() = 'service_role');
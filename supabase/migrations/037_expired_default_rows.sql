@@ -0,0 +1,41 @@
+-- Migration 037: Page through expired DEFAULT-partition rows before the purge
+-- drop_expired_partitions(p_parent, p_column, p_before) also DELETEs rows
+-- older than p_before from p_parent's DEFAULT partition (trades that arrived
+-- for a window no range partition existed for). list_expired_partitions only
+-- lists range partitions, so the retention manager archives those rows to
+-- Parquet through this function first, p_limit rows at a time by id.
+
+CREATE OR REPLACE FUNCTION expired_default_rows(
+    p_parent TEXT,
+    p_column TEXT,
+    p_before TIMESTAMPTZ,
+    p_after_id BIGINT,
+    p_limit INTEGER
+) RETURNS SETOF live_trades
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_default TEXT := p_parent || '_default';
+BEGIN
+    IF to_regclass(v_default) IS NULL THEN
+        RETURN;
+    END IF;
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_partition_tree('live_trades')
+        WHERE relid = v_default::regclass AND isleaf
+    ) THEN
+        RAISE EXCEPTION '% is not a live_trades partition', v_default;
+    END IF;
+
+    RETURN QUERY EXECUTE format(
+        'SELECT * FROM %I WHERE %I < $1 AND id > $2 ORDER BY id LIMIT $3',
+        v_default, p_column
+    ) USING p_before, p_after_id, p_limit;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION expired_default_rows(TEXT, TEXT, TIMESTAMPTZ, BIGINT, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION expired_default_rows(TEXT, TEXT, TIMESTAMPTZ, BIGINT, INTEGER) TO service_role;
@@ -0,0 +1,41 @@
+"""DiscoveryQueue re-queue keeps a wallet's original priority."""
+
+from src.realtime.discovery_queue import DiscoveryQueue
+
+
+def test_requeue_keeps_staleness_and_age():
+    queue = DiscoveryQueue(capacity=10)
+    queue.put("0xstale", 100, is_new=False, stale_days=20, now=0)
+    wallet = queue.get_nowait(now=60)
+
+    queue.put("0xfresh", 100, is_new=False, stale_days=0, now=600)
+    assert queue.requeue(wallet)
+
+    first = queue.get_nowait(now=660)
+    assert first.address == "0xstale"
+    assert (first.stale_days, first.enqueued_at) == (20, 0)
+
+
+def test_requeue_merges_with_a_newer_entry():
+    queue = DiscoveryQueue(capacity=10)
+    queue.put("0xa", 500, is_new=True, now=0)
+    wallet = queue.get_nowait(now=10)
+    queue.put("0xa", 50, is_new=False, now=100)
+
+    assert queue.requeue(wallet)
+    assert len(queue) == 1
+    entry = queue.get_nowait(now=200)
+    assert (entry.usd_value, entry.enqueued_at) == (500, 0)
+
+
+def test_requeue_into_a_full_queue_does_not_revive_stale_slots():
+    queue = DiscoveryQueue(capacity=2)
+    queue.put("0xlow", 50, is_new=False, now=0)
+    wallet = queue.get_nowait(now=1)
+    queue.put("0xbig1", 50_000, is_new=True, now=1)
+    queue.put("0xbig2", 50_000, is_new=True, now=1)
+
+    assert not queue.requeue(wallet)
+    assert queue.put("0xbig3", 100_000, is_new=True, now=2)
+    assert len(queue) == 2
+    assert "0xlow" not in queue
@@ -0,0 +1,110 @@
+"""TradeWriter in-flight limits and per-trade_id ordering, via MemoryTradeWriter."""
+
+import asyncio
+
+from src.realtime.retention import TIER_IMPORTANT, TIER_REGULAR
+from src.realtime.trade_writer import MemoryTradeWriter, WriteBatch
+
+EXECUTED_AT = "2026-01-01T00:00:00+00:00"
+
+
+def record(trade_id: str, **fields) -> dict:
+    return {
+        "trade_id": trade_id,
+        "retention_tier": TIER_REGULAR,
+        "executed_at": EXECUTED_AT,
+        **fields,
+    }
+
+
+class DelayedWriter(MemoryTradeWriter):
+    """MemoryTradeWriter whose latency comes from the batch's first record."""
+
+    async def _write(self, records: list[dict]) -> None:
+        await asyncio.sleep(records[0].get("delay", 0))
+        await super()._write(records)
+
+
+def test_regular_batches_leave_the_priority_slot_free():
+    async def run():
+        writer = MemoryTradeWriter(latency_seconds=0.05, max_in_flight=3)
+        for i in range(6):
+            await asyncio.wait_for(writer.submit(WriteBatch([record(f"r{i}")])), 1)
+            assert writer.in_flight <= 2
+
+        # Both regular slots are taken; a priority batch still gets in at once
+        assert writer.in_flight == 2
+        await asyncio.wait_for(writer.submit(WriteBatch([record("p")], priority=True)), 0.01)
+        assert writer.in_flight == 3
+
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(run())
+    stats = writer.stats
+    assert stats["peak_in_flight"] == 3
+    assert stats["batches_written"] == 7
+    assert writer.in_flight == 0
+
+
+def test_in_flight_never_exceeds_the_limit():
+    async def run():
+        writer = MemoryTradeWriter(latency_seconds=0.01, max_in_flight=4)
+        submits = [
+            writer.submit(WriteBatch([record(f"t{i}")], priority=i % 3 == 0))
+            for i in range(40)
+        ]
+        await asyncio.gather(*submits)
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(run())
+    assert writer.stats["peak_in_flight"] == 4
+    assert writer.stats["records_written"] == 40
+
+
+def test_batches_sharing_a_trade_id_land_in_submission_order():
+    async def run():
+        writer = DelayedWriter(max_in_flight=4)
+        await writer.submit(WriteBatch([record("a", delay=0.05, price=1), record("b", price=1)]))
+        await writer.submit(WriteBatch([record("b", price=2), record("c", price=2)]))
+        await writer.submit(WriteBatch([record("d", price=3)]))
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(run())
+    # The unrelated batch is not held back; the overlapping one waits
+    assert writer.write_log == [("d",), ("a", "b"), ("b", "c")]
+    assert writer.stats["ordering_waits"] == 1
+    assert writer.rows[("b", TIER_REGULAR, EXECUTED_AT)]["price"] == 2
+
+
+def test_failed_batches_release_their_slots():
+    failed = []
+
+    async def run():
+        writer = MemoryTradeWriter(
+            fail_every=2, max_in_flight=2, on_failure=lambda batch, e: failed.append(batch)
+        )
+        for i in range(10):
+            await asyncio.wait_for(writer.submit(WriteBatch([record(f"t{i}")])), 1)
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(run())
+    assert len(failed) == 5
+    assert writer.stats["batches_written"] == 5
+    assert writer.in_flight == 0
+
+
+def test_regular_redelivery_keeps_the_important_row():
+    async def run():
+        writer = MemoryTradeWriter()
+        await writer.submit(WriteBatch([record("t", retention_tier=TIER_IMPORTANT, price=1)]))
+        await writer.submit(WriteBatch([record("t", price=2)]))
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(run())
+    assert list(writer.rows) == [("t", TIER_IMPORTANT, EXECUTED_AT)]
+    assert writer.rows[("t", TIER_IMPORTANT, EXECUTED_AT)]["price"] == 2
@@ -0,0 +1,31 @@
+"""compute_wallet_metrics against the reference dict helpers."""
+
+import pytest
+
+from scripts.bench_wallet_metrics import (
+    columnar_metrics,
+    diff,
+    legacy_metrics,
+    prepare,
+    synthetic_wallet,
+)
+
+
+@pytest.mark.parametrize("closed_count", [1, 50, 1_000, 10_000])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_synthetic_wallet_parity(closed_count, seed):
+    data = synthetic_wallet(closed_count, seed=seed * 100_003 + closed_count)
+    open_positions, closed = prepare(data["positions"], data["closed_positions"])
+    balance = data["balance"]
+
+    mismatches = diff(
+        legacy_metrics(open_positions, closed, balance),
+        columnar_metrics(open_positions, closed, balance),
+    )
+
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("balance", [0, 1_000])
+def test_empty_wallet_parity(balance):
+    assert diff(legacy_metrics([], [], balance), columnar_metrics([], [], balance)) == []